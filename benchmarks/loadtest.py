@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Load test for the web tier (HTTP + Socket.IO).
+
+Starts create_app() in a subprocess with download_video/resolve_video
+replaced by a fake that emits synthetic progress (no network), then runs:
+
+- hundreds of Socket.IO clients receiving every broadcast
+- concurrent POST /api/download, GET /api/files and ranged GET /serve requests
+
+and reports:
+
+- HTTP latency p50/p99 per endpoint and error counts
+- Socket.IO event delivery lag p50/p99 (server emit → client receive) and
+  events lost per client
+- event-loop lag from the server's watchdog (/api/watchdog)
+- server CPU and peak RSS
+
+Broadcast fan-out shows up as event lag growing with --clients; a blocking
+handler shows up as watchdog stalls and latency spikes on every endpoint.
+
+Usage:
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --clients 500 --jobs 100 --http-workers 32
+    python benchmarks/loadtest.py --server asyncio
+
+Requires a Socket.IO client:
+    pip install "python-socketio[client]" websocket-client
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import psutil
+
+# Add project root and benchmarks to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from server_modes import free_port, install_fake_downloads, percentile, wait_ready  # noqa: E402
+
+MEDIA_FILE = 'loadtest-media.mp4'
+RANGE_SIZE = 1024 * 1024
+
+
+def prepare_download_dir(directory: Path, files: int, media_mb: int):
+    """Fill a download dir with small files for /api/files and one media file for /serve."""
+    for i in range(files):
+        (directory / f'loadtest-{i:05d}.mp4').write_bytes(b'\0' * 1024)
+    with open(directory / MEDIA_FILE, 'wb') as f:
+        block = os.urandom(1024 * 1024)
+        for _ in range(media_mb):
+            f.write(block)
+
+
+def serve(mode: str, port: int, steps: int, step_delay: float):
+    """Run the server with fake downloads (child process)."""
+    install_fake_downloads(steps, step_delay)
+    if mode == 'asyncio':
+        from yt_dlp_wizwam import asgi
+        asgi.run('127.0.0.1', port)
+    else:
+        from yt_dlp_wizwam.web import create_app, socketio
+        socketio.run(create_app(), host='127.0.0.1', port=port, log_output=False)
+
+
+class ClientSwarm:
+    """Socket.IO clients recording event lag and delivery counts."""
+
+    def __init__(self, base: str, clients: int, jobs: int):
+        self.base = base
+        self.count = clients
+        self.jobs = jobs
+        self.lock = threading.Lock()
+        self.lags = []
+        self.connect_times = []
+        self.received = defaultdict(int)
+        self.finished = set()
+        self.all_done = threading.Event()
+        self.sockets = []
+
+    def _connect(self, index: int):
+        import socketio
+
+        sio = socketio.Client(reconnection=False)
+
+        @sio.on('progress')
+        def on_progress(data):
+            now = time.time()
+            message = data.get('message', '')
+            with self.lock:
+                self.received[index] += 1
+                if message.startswith('sent='):
+                    self.lags.append(now - float(message[5:]))
+
+        @sio.on('success')
+        def on_success(data):
+            with self.lock:
+                self.received[index] += 1
+                self.finished.add(data['job_id'])
+                if len(self.finished) >= self.jobs:
+                    self.all_done.set()
+
+        started = time.perf_counter()
+        sio.connect(self.base, transports=['websocket'])
+        with self.lock:
+            self.connect_times.append(time.perf_counter() - started)
+            self.sockets.append(sio)
+
+    def connect(self, parallel: int = 32):
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            list(pool.map(self._connect, range(self.count)))
+
+    def disconnect(self):
+        for sio in self.sockets:
+            try:
+                sio.disconnect()
+            except Exception:
+                pass
+
+
+class HttpLoad:
+    """Concurrent HTTP workers mixing downloads, file listings and range reads."""
+
+    def __init__(self, base: str, workers: int, jobs: int, media_size: int):
+        self.base = base
+        self.workers = workers
+        self.jobs_left = jobs
+        self.media_size = media_size
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.stop = threading.Event()
+        self._threads = []
+
+    def _take_job(self) -> bool:
+        with self.lock:
+            if self.jobs_left <= 0:
+                return False
+            self.jobs_left -= 1
+            return True
+
+    def _request(self, session, name: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, self.base + path, timeout=30, **kwargs)
+            ok = response.status_code < 400
+            response.content  # noqa: B018 - include body transfer in the latency
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def _worker(self, seed: int):
+        import requests
+
+        rng = random.Random(seed)
+        session = requests.Session()
+        while not self.stop.is_set():
+            if self._take_job():
+                url = f'https://example.com/loadtest/{rng.getrandbits(64):x}'
+                self._request(session, 'POST /api/download', 'POST', '/api/download', json={'url': url})
+                continue
+            if rng.random() < 0.5:
+                self._request(session, 'GET /api/files', 'GET', '/api/files')
+            else:
+                start = rng.randrange(0, max(self.media_size - RANGE_SIZE, 1))
+                self._request(session, 'GET /serve (range)', 'GET', f'/serve/{MEDIA_FILE}',
+                              headers={'Range': f'bytes={start}-{start + RANGE_SIZE - 1}'})
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(i,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        self.stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+class ServerMonitor:
+    """Sample CPU and RSS of the server process."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.cpu = []
+        self.peak_rss = 0
+        self.stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        self.process.cpu_percent()
+        while not self.stop.wait(self.interval):
+            try:
+                self.cpu.append(self.process.cpu_percent())
+                self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            except psutil.Error:
+                return
+
+    def start(self):
+        self._thread.start()
+
+    def join(self):
+        self.stop.set()
+        self._thread.join()
+
+
+def run(args) -> dict:
+    import requests
+
+    download_dir = Path(tempfile.mkdtemp(prefix='wizwam-loadtest-'))
+    prepare_download_dir(download_dir, args.files, args.media_mb)
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = {
+        **os.environ,
+        'YT_DLP_WIZWAM_WATCH_ENABLED': 'false',
+        'YT_DLP_WIZWAM_DOWNLOAD_DIR': str(download_dir),
+        # Report every stall above 50 ms
+        'YT_DLP_WIZWAM_HUB_BLOCK_THRESHOLD': '0.05',
+        'YT_DLP_WIZWAM_MAX_CONCURRENT_DOWNLOADS': str(args.concurrency),
+    }
+    server = subprocess.Popen(
+        [sys.executable, __file__, '--serve', args.server, '--port', str(port),
+         '--steps', str(args.steps), '--step-delay', str(args.step_delay)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(base)
+
+        swarm = ClientSwarm(base, args.clients, args.jobs)
+        swarm.connect()
+
+        monitor = ServerMonitor(server.pid)
+        http = HttpLoad(base, args.http_workers, args.jobs, args.media_mb * 1024 * 1024)
+        cpu_before = sum(monitor.process.cpu_times()[:2])
+        started = time.perf_counter()
+        monitor.start()
+        http.start()
+
+        completed = swarm.all_done.wait(timeout=args.timeout)
+        wall = time.perf_counter() - started
+        # Let the last events arrive before counting deliveries
+        time.sleep(1.0)
+        http.join()
+        monitor.join()
+        cpu_seconds = sum(monitor.process.cpu_times()[:2]) - cpu_before
+        watchdog = requests.get(f'{base}/api/watchdog', timeout=10).json()
+        swarm.disconnect()
+
+        expected = args.jobs * (args.steps + 1)  # progress steps + success per job
+        lost = [max(expected - swarm.received[i], 0) for i in range(args.clients)]
+        return {
+            'completed': completed,
+            'wall': wall,
+            'connect': swarm.connect_times,
+            'lags': swarm.lags,
+            'lost': lost,
+            'http': http.latencies,
+            'errors': http.errors,
+            'cpu_avg': cpu_seconds / wall * 100 if wall else 0.0,
+            'cpu_peak': max(monitor.cpu, default=0.0),
+            'peak_rss': monitor.peak_rss,
+            'watchdog': watchdog,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+
+def report(args, r: dict):
+    ms = 1000
+    print(f'{args.clients} Socket.IO clients, {args.http_workers} HTTP workers, '
+          f'{args.jobs} jobs x {args.steps} progress events ({args.server})\n')
+    print(f'Wall time until all jobs finished: {r["wall"]:.2f}s'
+          + ('' if r['completed'] else '  (timed out)'))
+    print(f'Client connect: p50 {percentile(r["connect"], 50) * ms:.1f} ms, '
+          f'p99 {percentile(r["connect"], 99) * ms:.1f} ms\n')
+
+    print(f'{"endpoint":<22} {"requests":>9} {"errors":>7} {"p50 ms":>9} {"p99 ms":>9}')
+    for name, values in sorted(r['http'].items()):
+        print(f'{name:<22} {len(values):>9} {r["errors"].get(name, 0):>7} '
+              f'{percentile(values, 50) * ms:>9.1f} {percentile(values, 99) * ms:>9.1f}')
+
+    print(f'\nEvent delivery: {len(r["lags"])} progress events, lag p50 '
+          f'{percentile(r["lags"], 50) * ms:.1f} ms, p99 {percentile(r["lags"], 99) * ms:.1f} ms')
+    clients_losing = sum(1 for n in r['lost'] if n)
+    print(f'Events lost: {sum(r["lost"])} total, {clients_losing} of {len(r["lost"])} clients affected')
+
+    wd = r['watchdog']
+    if wd.get('enabled'):
+        print(f'Event loop: {wd["stalls"]} stalls > 50 ms, max lag {wd["max_lag"] * ms:.0f} ms, '
+              f'total {wd["total_lag"]:.2f}s')
+        for endpoint, stats in sorted(wd['slow_handlers'].items()):
+            print(f'  slow handler {endpoint}: {stats["count"]}x, max {stats["max"] * ms:.0f} ms')
+    print(f'Server CPU: avg {r["cpu_avg"]:.0f}%, peak {r["cpu_peak"]:.0f}%; '
+          f'peak RSS {r["peak_rss"] / (1024 * 1024):.0f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', default='eventlet', choices=['eventlet', 'asyncio'])
+    parser.add_argument('--clients', type=int, default=200, help='Socket.IO clients')
+    parser.add_argument('--http-workers', type=int, default=16, help='Concurrent HTTP clients')
+    parser.add_argument('--jobs', type=int, default=40, help='Fake download jobs submitted')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent fake downloads')
+    parser.add_argument('--steps', type=int, default=40, help='Progress events per job')
+    parser.add_argument('--step-delay', type=float, default=0.05, help='Seconds between progress events')
+    parser.add_argument('--files', type=int, default=500, help='Files listed by /api/files')
+    parser.add_argument('--media-mb', type=int, default=64, help='Size of the file read by /serve ranges')
+    parser.add_argument('--timeout', type=float, default=300, help='Give up after this many seconds')
+    parser.add_argument('--serve', choices=['eventlet', 'asyncio'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.steps, args.step_delay)
+        return
+
+    report(args, run(args))
+
+
+if __name__ == '__main__':
+    main()
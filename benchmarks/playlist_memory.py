@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for playlist handling.
+
+Registers fake extractors with yt-dlp (no network): a playlist of N
+entries, listed lazily, whose videos each resolve to an info dict with
+60 formats, a long description and thumbnails (roughly what a YouTube
+video costs in memory). Each mode runs in its own subprocess:
+
+- stream: the playlist URL goes through the job queue; the listing is
+  streamed and entries are fed in as jobs, a window at a time (resolve and
+  download of the entries are fakes that build the same info dicts)
+- eager: extract_info(download=False) on the playlist, i.e. what a
+  playlist URL used to cost before anything was downloaded
+
+and reports the RSS growth over the baseline, the time until the first
+download started and the total time. The benchmark fails if the streamed
+run grows by more than --max-growth-mb, whatever the number of entries.
+
+Usage:
+    python benchmarks/playlist_memory.py
+    python benchmarks/playlist_memory.py --entries 50000 --eager-entries 5000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import psutil
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def install_fake_extractors():
+    """Make every YoutubeDL instance know the fakeplaylist: and fakevideo: URLs."""
+    import yt_dlp
+    from yt_dlp.extractor.common import InfoExtractor
+
+    class FakePlaylistIE(InfoExtractor):
+        _VALID_URL = r'fakeplaylist:(?P<count>\d+)'
+
+        def _real_extract(self, url):
+            count = int(self._match_valid_url(url).group('count'))
+
+            def entries():
+                for i in range(count):
+                    yield self.url_result(f'fakevideo:{i}', 'FakeVideo', video_id=str(i), video_title=f'Video {i}')
+
+            return self.playlist_result(entries(), f'fake{count}', f'Fake playlist of {count}')
+
+    class FakeVideoIE(InfoExtractor):
+        _VALID_URL = r'fakevideo:(?P<id>\d+)'
+
+        def _real_extract(self, url):
+            return fake_info(self._match_id(url))
+
+    original = yt_dlp.YoutubeDL.add_default_info_extractors
+
+    def add_default_info_extractors(self):
+        self.add_info_extractor(FakePlaylistIE())
+        self.add_info_extractor(FakeVideoIE())
+        original(self)
+
+    yt_dlp.YoutubeDL.add_default_info_extractors = add_default_info_extractors
+
+
+def fake_info(video_id: str) -> dict:
+    """An info dict about the size of a YouTube video's."""
+    formats = [{
+        'format_id': str(n),
+        'url': f'https://media.invalid/{video_id}/{n}.mp4?sig={"s" * 1200}',
+        'ext': 'mp4',
+        'height': 144 * (n % 8 + 1),
+        'vcodec': 'avc1.64001F',
+        'acodec': 'none',
+        'tbr': 100 + n,
+        'filesize': 1_000_000 + n,
+        'http_headers': {'User-Agent': 'x' * 100},
+    } for n in range(60)]
+    formats.append({'format_id': 'audio', 'url': f'https://media.invalid/{video_id}/a.m4a',
+                    'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'tbr': 128})
+    return {
+        'id': video_id,
+        'title': f'Video {video_id}',
+        'description': 'd' * 5000,
+        'formats': formats,
+        'thumbnails': [{'url': f'https://img.invalid/{video_id}/{n}.jpg', 'width': n} for n in range(40)],
+        'duration': 600,
+    }
+
+
+class PeakRSS:
+    """Samples the process RSS in the background and keeps the peak."""
+
+    def __init__(self, interval: float = 0.05):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = self.current()
+        self._stop = threading.Event()
+        threading.Thread(target=self._sample, daemon=True).start()
+
+    def current(self) -> int:
+        return self.process.memory_info().rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def stop(self) -> int:
+        self._stop.set()
+        self.peak = max(self.peak, self.current())
+        return self.peak
+
+
+def run_stream(entries: int, workers: int) -> dict:
+    """Playlist through the job queue with fake entry resolve/download."""
+    from yt_dlp_wizwam import jobs
+    from yt_dlp_wizwam.downloader import resolve_video
+
+    first_download = []
+
+    def fake_resolve(url, **kwargs):
+        if url.startswith('fakeplaylist:'):
+            return resolve_video(url, **kwargs)
+        return {'url': url, 'info': fake_info(url.split(':', 1)[1]), 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, resolved=None, **kwargs):
+        if not first_download:
+            first_download.append(time.monotonic())
+        info = resolved['info']
+        return {'status': 'success', 'filename': f'/tmp/{info["id"]}.mp4', 'filesize': '1.0 MB',
+                'url': url, 'title': info['title']}
+
+    jobs.resolve_video = fake_resolve
+    jobs.download_video = fake_download
+
+    queue = jobs.JobQueue(download_workers=workers)
+    queue.start()
+    baseline = PeakRSS()
+    base = baseline.current()
+    started = time.monotonic()
+    job = queue.submit(f'fakeplaylist:{entries}', {})
+    job.done.wait()
+    elapsed = time.monotonic() - started
+    peak = baseline.stop()
+    result = job.result
+    assert result['status'] == 'success', result
+    assert result['downloaded'] == entries, result
+    return {
+        'entries': entries,
+        'growth_mb': (peak - base) / 1024 / 1024,
+        'first_download_s': first_download[0] - started,
+        'total_s': elapsed,
+    }
+
+
+def run_eager(entries: int) -> dict:
+    """extract_info(download=False) on the whole playlist."""
+    import yt_dlp
+
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'format': 'best*'})
+    baseline = PeakRSS()
+    base = baseline.current()
+    started = time.monotonic()
+    info = ydl.extract_info(f'fakeplaylist:{entries}', download=False)
+    elapsed = time.monotonic() - started
+    peak = baseline.stop()
+    assert len(info['entries']) == entries
+    return {
+        'entries': entries,
+        'growth_mb': (peak - base) / 1024 / 1024,
+        # Nothing can start before the complete info dict exists
+        'first_download_s': elapsed,
+        'total_s': elapsed,
+    }
+
+
+def run_mode(mode: str, entries: int, workers: int) -> dict:
+    """Run one mode in a fresh interpreter (RSS is not given back reliably)."""
+    cmd = [sys.executable, __file__, '--run', mode, '--entries', str(entries), '--workers', str(workers)]
+    # Own HOME: archive, auth profiles and config of the run are throwaway
+    with tempfile.TemporaryDirectory(prefix='playlist-bench-') as home:
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True,
+                                env={**os.environ, 'HOME': home}).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=20000, help='Playlist size for the streamed run')
+    parser.add_argument('--eager-entries', type=int, default=500,
+                        help='Playlist size for the eager run (0: skip)')
+    parser.add_argument('--workers', type=int, default=4, help='Download workers')
+    parser.add_argument('--max-growth-mb', type=float, default=64.0,
+                        help='Fail if the streamed run grows RSS by more than this')
+    parser.add_argument('--run', choices=['stream', 'eager'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        install_fake_extractors()
+        result = run_stream(args.entries, args.workers) if args.run == 'stream' else run_eager(args.entries)
+        print(json.dumps(result))
+        return
+
+    print(f'Streamed playlist of {args.entries} entries...')
+    stream = run_mode('stream', args.entries, args.workers)
+    rows = [('stream', stream)]
+    if args.eager_entries:
+        print(f'Eager extract_info of {args.eager_entries} entries...')
+        rows.append(('eager', run_mode('eager', args.eager_entries, args.workers)))
+
+    print(f'\n{"mode":<8} {"entries":>8} {"RSS growth":>12} {"per entry":>10} {"first dl":>9} {"total":>8}')
+    for mode, row in rows:
+        per_entry = row['growth_mb'] * 1024 / row['entries']
+        print(f'{mode:<8} {row["entries"]:>8} {row["growth_mb"]:>9.1f} MB {per_entry:>7.1f} KB '
+              f'{row["first_download_s"]:>8.2f}s {row["total_s"]:>7.1f}s')
+    if args.eager_entries:
+        eager = rows[1][1]
+        estimate = eager['growth_mb'] / eager['entries'] * args.entries
+        print(f'\nEager extraction of {args.entries} entries would need about {estimate:.0f} MB')
+
+    if stream['growth_mb'] > args.max_growth_mb:
+        print(f'\n❌ Streamed run grew by {stream["growth_mb"]:.1f} MB (limit {args.max_growth_mb:.0f} MB)')
+        sys.exit(1)
+    print(f'\n✅ Streamed run stayed within {args.max_growth_mb:.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
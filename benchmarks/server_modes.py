@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Side-by-side benchmark of the eventlet and asyncio server modes.
+
+Starts each server in a subprocess with download_video/resolve_video replaced
+by a fake that reports progress without touching the network, connects
+Socket.IO clients, submits jobs through /api/download and measures:
+
+- progress event latency (server emit → client receive)
+- HTTP latency of /api/config while jobs are running
+- wall time until every job has finished
+
+Usage:
+    python benchmarks/server_modes.py                      # both modes
+    python benchmarks/server_modes.py --clients 50 --jobs 20
+    python benchmarks/server_modes.py --modes asyncio
+
+Requires the asyncio extra and a Socket.IO client:
+    pip install yt-dlp-wizwam[asyncio] "python-socketio[client]"
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def install_fake_downloads(steps: int, step_delay: float):
+    """Replace yt-dlp calls in the job queue with a fake that only reports progress."""
+    from yt_dlp_wizwam import jobs
+
+    def fake_resolve(url, **kwargs):
+        time.sleep(step_delay)
+        return {'url': url, 'info': {'title': url, 'id': url}, 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, progress_callback=None, job_id=None, cancel_event=None, **kwargs):
+        for step in range(1, steps + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                return {'status': 'cancelled', 'url': url}
+            time.sleep(step_delay)
+            if progress_callback:
+                # Emit time travels in the message so clients can measure latency
+                progress_callback('downloading', 100.0 * step / steps, f'sent={time.time()}')
+        return {'status': 'success', 'filename': f'/tmp/{job_id}.mp4', 'filesize': '0.0 MB',
+                'url': url, 'title': url}
+
+    jobs.resolve_video = fake_resolve
+    jobs.download_video = fake_download
+
+
+def serve(mode: str, port: int, steps: int, step_delay: float):
+    """Run one server mode with fake downloads (child process)."""
+    install_fake_downloads(steps, step_delay)
+    if mode == 'asyncio':
+        from yt_dlp_wizwam import asgi
+        asgi.run('127.0.0.1', port)
+    else:
+        from yt_dlp_wizwam.web import create_app, socketio
+        socketio.run(create_app(), host='127.0.0.1', port=port, log_output=False)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base: str, timeout: float = 30.0):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base}/api/config', timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server at {base} did not start')
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def run_mode(mode: str, clients: int, jobs: int, steps: int, step_delay: float) -> dict:
+    import requests
+    import socketio
+
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = {**os.environ, 'YT_DLP_WIZWAM_WATCH_ENABLED': 'false'}
+    server = subprocess.Popen(
+        [sys.executable, __file__, '--serve', mode, '--port', str(port),
+         '--steps', str(steps), '--step-delay', str(step_delay)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(base)
+
+        latencies = []
+        finished = set()
+        lock = threading.Lock()
+        all_done = threading.Event()
+        sockets = []
+
+        for _ in range(clients):
+            sio = socketio.Client()
+
+            @sio.on('progress')
+            def on_progress(data):
+                message = data.get('message', '')
+                if message.startswith('sent='):
+                    with lock:
+                        latencies.append(time.time() - float(message[5:]))
+
+            @sio.on('success')
+            def on_success(data):
+                with lock:
+                    finished.add(data['job_id'])
+                    if len(finished) >= jobs:
+                        all_done.set()
+
+            sio.connect(base, transports=['websocket'])
+            sockets.append(sio)
+
+        http_latencies = []
+        stop_probe = threading.Event()
+
+        def probe():
+            while not stop_probe.is_set():
+                started = time.perf_counter()
+                requests.get(f'{base}/api/config')
+                http_latencies.append(time.perf_counter() - started)
+                time.sleep(0.05)
+
+        prober = threading.Thread(target=probe, daemon=True)
+        prober.start()
+
+        started = time.perf_counter()
+        urls = [f'https://example.com/video{i}' for i in range(jobs)]
+        requests.post(f'{base}/api/download', json={'urls': urls}).raise_for_status()
+        completed = all_done.wait(timeout=300)
+        wall = time.perf_counter() - started
+
+        stop_probe.set()
+        prober.join()
+        for sio in sockets:
+            sio.disconnect()
+
+        return {
+            'mode': mode,
+            'completed': completed,
+            'wall': wall,
+            'events': len(latencies),
+            'event_p50': percentile(latencies, 50),
+            'event_p99': percentile(latencies, 99),
+            'http_p50': percentile(http_latencies, 50),
+            'http_p99': percentile(http_latencies, 99),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['eventlet', 'asyncio'], choices=['eventlet', 'asyncio'])
+    parser.add_argument('--clients', type=int, default=20, help='Socket.IO clients')
+    parser.add_argument('--jobs', type=int, default=10, help='Fake download jobs')
+    parser.add_argument('--steps', type=int, default=50, help='Progress events per job')
+    parser.add_argument('--step-delay', type=float, default=0.05, help='Seconds between progress events')
+    parser.add_argument('--serve', choices=['eventlet', 'asyncio'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.steps, args.step_delay)
+        return
+
+    print(f'{args.clients} clients, {args.jobs} jobs x {args.steps} progress events\n')
+    print(f'{"mode":<10} {"wall s":>8} {"events":>8} {"evt p50 ms":>11} {"evt p99 ms":>11} '
+          f'{"http p50 ms":>12} {"http p99 ms":>12}')
+    for mode in args.modes:
+        r = run_mode(mode, args.clients, args.jobs, args.steps, args.step_delay)
+        flag = '' if r['completed'] else '  (timed out)'
+        print(f'{r["mode"]:<10} {r["wall"]:>8.2f} {r["events"]:>8} {r["event_p50"] * 1000:>11.1f} '
+              f'{r["event_p99"] * 1000:>11.1f} {r["http_p50"] * 1000:>12.1f} {r["http_p99"] * 1000:>12.1f}{flag}')
+
+
+if __name__ == '__main__':
+    main()
@@ -89,6 +89,19 @@ setup(
             'redis>=5.0.0',
             'celery>=5.3.0',
         ],
+        'brotli': [
+            # Brotli-precompressed static assets (gzip is always available)
+            'brotli>=1.1.0',
+        ],
+        'asyncio': [
+            # uvicorn/asyncio server mode (downloader web --server asyncio)
+            'uvicorn[standard]>=0.23.0',
+            'asgiref>=3.7.0',
+        ],
+        'sftp': [
+            # SFTP transfer target (downloader push, NAS auto-push)
+            'paramiko>=3.0.0',
+        ],
     },
     
     # Command-line entry points
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the Downloader Python API (downloads are faked).
+"""
+
+import asyncio
+import contextlib
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import api, history, jobs
+from yt_dlp_wizwam import Downloader, DownloadCancelled, DownloadError, DownloaderClosed
+from yt_dlp_wizwam.api import DownloadResult
+from yt_dlp_wizwam.config import Config
+
+
+def fake_resolve(url, **kwargs):
+    return {'url': url, 'info': {'title': url, 'id': url}, 'format': None, 'resolved_at': time.time()}
+
+
+def fake_download(url, progress_callback=None, job_id=None, cancel_event=None, **kwargs):
+    for step in range(1, 5):
+        if cancel_event is not None and cancel_event.is_set():
+            return {'status': 'cancelled', 'url': url}
+        time.sleep(0.05 if 'slow' not in url else 0.5)
+        progress_callback('downloading', step * 25.0, f'step {step}')
+    if 'fail' in url:
+        return {'status': 'error', 'error': 'HTTP Error 404', 'url': url}
+    path = Path(tempfile.gettempdir()) / f'{job_id}.mp4'
+    path.write_bytes(b'x' * 10)
+    return {'status': 'success', 'filename': str(path), 'url': url, 'title': url, 'tier': 'archive'}
+
+
+@contextlib.contextmanager
+def fake_downloads():
+    """Replace extraction and downloads (and the job history file) for the duration of a test."""
+    originals = jobs.resolve_video, jobs.download_video, Config.HISTORY_FILE, history._history
+    jobs.resolve_video, jobs.download_video = fake_resolve, fake_download
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.HISTORY_FILE, history._history = str(Path(tmp) / 'history.db'), None
+        try:
+            yield
+        finally:
+            if history._history is not None:
+                history._history.close()
+            jobs.resolve_video, jobs.download_video, Config.HISTORY_FILE, history._history = originals
+
+
+def test_sync_api():
+    """Futures, progress streams, batches and typed errors."""
+    with fake_downloads():
+        dl = Downloader(concurrency=2)
+        future = dl.submit('https://example.com/a')
+        updates = list(future.progress(timeout=10))
+        assert [u.percent for u in updates] == [25.0, 50.0, 75.0, 100.0]
+        result = future.result(10)
+        assert result.filesize == 10 and result.title == 'https://example.com/a'
+        print("✓ submit() future with progress iterator")
+
+        results = dl.download_many(['https://example.com/b', 'https://example.com/fail'],
+                                   concurrency=1, return_exceptions=True)
+        assert results[0].url == 'https://example.com/b'
+        assert isinstance(results[1], DownloadError) and results[1].url == 'https://example.com/fail'
+        try:
+            dl.download('https://example.com/fail')
+            assert False, 'expected DownloadError'
+        except DownloadError as e:
+            assert 'HTTP Error 404' in str(e)
+        print("✓ download_many() and typed errors")
+
+        future = dl.submit('https://example.com/slow')
+        time.sleep(0.2)
+        assert future.cancel()
+        try:
+            future.result(10)
+            assert False, 'expected DownloadCancelled'
+        except DownloadCancelled:
+            pass
+        print("✓ Cancellation")
+
+        dl.close()
+        try:
+            dl.submit('https://example.com/c')
+            assert False, 'expected DownloaderClosed'
+        except DownloaderClosed:
+            pass
+        print("✓ Closed downloader rejects downloads")
+
+
+def test_async_api():
+    """adownload(), adownload_many() and aprogress()."""
+    with fake_downloads():
+        async def main():
+            async with Downloader(concurrency=2) as dl:
+                result = await dl.adownload('https://example.com/x')
+                assert result.url == 'https://example.com/x'
+                results = await dl.adownload_many(
+                    ['https://example.com/y', 'https://example.com/fail'], return_exceptions=True
+                )
+                assert isinstance(results[1], DownloadError)
+                future = dl.submit('https://example.com/z')
+                phases = [u.phase async for u in future.aprogress()]
+                assert phases == ['downloading'] * 4
+
+        asyncio.run(main())
+        print("✓ Async interface")
+
+
+def test_download_many_submit_failure():
+    """A batch slot taken for a download that could not be queued is given back."""
+    semaphores = []
+
+    class RecordingSemaphore(threading.BoundedSemaphore):
+        def __init__(self, value=1):
+            super().__init__(value)
+            semaphores.append(self)
+
+    with fake_downloads():
+        dl = Downloader(concurrency=2)
+        submit = dl.submit
+
+        def failing_submit(url, **options):
+            if 'closed' in url:
+                raise DownloaderClosed('Job queue is shut down')
+            return submit(url, **options)
+
+        dl.submit = failing_submit
+        api.threading.BoundedSemaphore, real = RecordingSemaphore, api.threading.BoundedSemaphore
+        try:
+            dl.download_many(['https://example.com/d', 'https://example.com/closed'], concurrency=1)
+            assert False, 'expected DownloaderClosed'
+        except DownloaderClosed:
+            pass
+        finally:
+            api.threading.BoundedSemaphore = real
+            dl.close()
+        assert semaphores[0].acquire(blocking=False), 'slot of the failed submit was not released'
+        print("✓ download_many() releases the slot of a failed submit")
+
+
+def test_result_in_namespace_archive():
+    """A result whose file was moved out of staging is found in its namespace's folder."""
+    old_download, old_staging = Config.DOWNLOAD_DIR, Config.STAGING_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR = str(Path(tmp) / 'downloads')
+        Config.STAGING_DIR = str(Path(tmp) / 'staging')
+        try:
+            archived = Path(tmp) / 'downloads' / 'users' / 'alice' / 'video.mp4'
+            archived.parent.mkdir(parents=True)
+            archived.write_bytes(b'x' * 5)
+            result = {'status': 'success', 'url': 'https://example.com/v', 'title': 'v',
+                      'filename': str(Path(tmp) / 'staging' / 'users' / 'alice' / 'video.mp4')}
+            assert DownloadResult.from_dict(result, 'job', 'alice').filesize == 5
+            try:
+                DownloadResult.from_dict(result, 'job')
+                assert False, 'expected FileNotFoundError'
+            except FileNotFoundError:
+                pass
+            print("✓ Results resolve moved files in their namespace")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+
+
+if __name__ == '__main__':
+    print("Testing Python API...\n")
+    test_sync_api()
+    test_async_api()
+    test_download_many_submit_failure()
+    test_result_in_namespace_archive()
+    print("\n✅ All API tests passed!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio server mode: an API route and the Socket.IO
+handshake served by uvicorn (temporary files only).
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import asgi, history
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.events import event_log
+from yt_dlp_wizwam.server import bind_socket
+
+
+def request(url, data=None):
+    with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=10) as response:
+        return response.status, response.read().decode()
+
+
+def test_api_and_socketio_handshake():
+    """uvicorn serves Flask routes and Socket.IO (polling handshake and namespace connect)."""
+    if not asgi.is_available():
+        print("✓ uvicorn/asgiref not installed (skipped)")
+        return
+    import uvicorn
+
+    old = (Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR, Config.HISTORY_FILE,
+           Config.LOG_DIR, Config.ASSET_CACHE_DIR, Config.SHUTDOWN_TIMEOUT, history._history, event_log._emitter)
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR = False, tmp, ''
+        Config.HISTORY_FILE, history._history = str(Path(tmp) / 'history.db'), None
+        Config.LOG_DIR, Config.ASSET_CACHE_DIR = str(Path(tmp) / 'logs'), str(Path(tmp) / 'assets')
+        Config.SHUTDOWN_TIMEOUT = 5
+        sock = bind_socket('127.0.0.1', 0)
+        base = f'http://127.0.0.1:{sock.getsockname()[1]}'
+        server = uvicorn.Server(uvicorn.Config(asgi.create_asgi_app(primary=False), log_level='warning',
+                                               lifespan='on'))
+        thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 10
+            while not server.started and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert server.started
+
+            status, body = request(f'{base}/api/config')
+            assert status == 200 and json.loads(body)['version'] == Config.VERSION, body
+
+            # Engine.IO open packet: "0" + session info
+            status, body = request(f'{base}/socket.io/?EIO=4&transport=polling')
+            assert status == 200 and body.startswith('0'), body
+            sid = json.loads(body[1:])['sid']
+            session = f'{base}/socket.io/?EIO=4&transport=polling&sid={sid}'
+            # Socket.IO namespace connect; the server answers and emits 'connected'
+            assert request(session, data=b'40') == (200, 'OK')
+            packets = ''
+            while '"connected"' not in packets and time.monotonic() < deadline:
+                packets += request(session)[1]
+            assert '40{"sid":' in packets and '42["connected",' in packets, packets
+            assert f'"version":"{Config.VERSION}"' in packets
+            print("✓ API route and Socket.IO handshake under uvicorn")
+        finally:
+            server.should_exit = True
+            thread.join(15)
+            sock.close()
+            if history._history is not None:
+                history._history.close()
+            (Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR, Config.HISTORY_FILE,
+             Config.LOG_DIR, Config.ASSET_CACHE_DIR, Config.SHUTDOWN_TIMEOUT, history._history,
+             event_log._emitter) = old
+
+
+if __name__ == '__main__':
+    print("Testing asyncio server mode...\n")
+    test_api_and_socketio_handshake()
+    print("\n✅ All asyncio server tests passed!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the static asset pipeline and cached responses (temporary files only).
+"""
+
+import gzip
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from flask import Flask
+
+from yt_dlp_wizwam import assets
+from yt_dlp_wizwam.assets import IMMUTABLE, AssetPipeline, ResponseCache
+
+SCRIPT = b'function hello() { return "hello"; }\n' * 50
+
+
+def make_app(tmp: Path):
+    """A Flask app serving a temporary static dir through the pipeline."""
+    static = tmp / 'static'
+    (static / 'js').mkdir(parents=True)
+    (static / 'js' / 'app.js').write_bytes(SCRIPT)
+    (static / 'logo.png').write_bytes(b'\x89PNG not really')
+    (static / 'tiny.css').write_bytes(b'a{}')
+
+    app = Flask(__name__, static_folder=str(static))
+    pipeline = AssetPipeline(static, tmp / 'out')
+    pipeline.build()
+    cache = ResponseCache()
+    state = {'version': 1}
+
+    @app.route('/assets/<path:name>')
+    def serve_asset(name):
+        return pipeline.serve(name)
+
+    @app.route('/api/config')
+    def config():
+        return cache.json(('config', state['version']), lambda: {'version': state['version']})
+
+    return app, pipeline, state
+
+
+def test_fingerprinted_urls():
+    """Names carry a hash of the content; a changed file gets a new name and old outputs go."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        app, pipeline, _ = make_app(tmp)
+        digest = hashlib.sha256(SCRIPT).hexdigest()[:12]
+        assert pipeline.manifest['js/app.js'] == f'js/app.{digest}.js'
+        with app.test_request_context():
+            assert pipeline.asset_url('js/app.js') == f'/assets/js/app.{digest}.js'
+            assert pipeline.asset_url('missing.js') == '/static/missing.js'
+        old = tmp / 'out' / f'js/app.{digest}.js'
+        assert old.exists() and Path(f'{old}.gz').exists()
+
+        (tmp / 'static' / 'js' / 'app.js').write_bytes(SCRIPT + b'// v2\n')
+        pipeline.build()
+        assert pipeline.manifest['js/app.js'] != f'js/app.{digest}.js'
+        assert not old.exists() and not Path(f'{old}.gz').exists()
+        print("✓ Fingerprinted asset URLs")
+
+
+def test_encoding_negotiation():
+    """The best precompressed variant the client accepts is served."""
+    with tempfile.TemporaryDirectory() as tmp:
+        app, pipeline, _ = make_app(Path(tmp))
+        client = app.test_client()
+        url = f"/assets/{pipeline.manifest['js/app.js']}"
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == SCRIPT
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.mimetype in ('application/javascript', 'text/javascript')
+
+        response = client.get(url, headers={'Accept-Encoding': 'br, gzip'})
+        expected = 'br' if assets.brotli is not None else 'gzip'
+        assert response.headers['Content-Encoding'] == expected, response.headers
+
+        for accept in ('identity', 'gzip;q=0'):
+            response = client.get(url, headers={'Accept-Encoding': accept})
+            assert 'Content-Encoding' not in response.headers and response.data == SCRIPT, accept
+
+        # Compressing would not make these smaller
+        for name in ('tiny.css', 'logo.png'):
+            response = client.get(f"/assets/{pipeline.manifest[name]}", headers={'Accept-Encoding': 'gzip'})
+            assert 'Content-Encoding' not in response.headers, name
+        assert client.get('/assets/js/app.000000000000.js').status_code == 404
+        print("✓ gzip/br chosen by Accept-Encoding")
+
+
+def test_cache_headers_and_etags():
+    """Assets are immutable; memoized responses revalidate with ETags (304)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        app, pipeline, state = make_app(Path(tmp))
+        client = app.test_client()
+
+        response = client.get(f"/assets/{pipeline.manifest['js/app.js']}")
+        assert response.headers['Cache-Control'] == IMMUTABLE
+        etag = response.headers['ETag']
+        again = client.get(f"/assets/{pipeline.manifest['js/app.js']}", headers={'If-None-Match': etag})
+        assert again.status_code == 304 and again.data == b''
+
+        response = client.get('/api/config')
+        assert response.status_code == 200 and response.get_json() == {'version': 1}
+        assert response.headers['Cache-Control'] == 'no-cache'
+        etag = response.headers['ETag']
+        assert client.get('/api/config', headers={'If-None-Match': etag}).status_code == 304
+
+        state['version'] = 2
+        changed = client.get('/api/config', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and changed.get_json() == {'version': 2}
+        assert changed.headers['ETag'] != etag
+        print("✓ Immutable assets and ETag revalidation")
+
+
+if __name__ == '__main__':
+    print("Testing asset pipeline...\n")
+    test_fingerprinted_urls()
+    test_encoding_negotiation()
+    test_cache_headers_and_etags()
+    print("\n✅ All asset tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for auth profiles (cookies, headers, host rules, write-back).
+"""
+
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import yt_dlp
+
+from yt_dlp_wizwam.auth import AuthStore
+from yt_dlp_wizwam.downloader import _base_ydl_opts, _open_ydl
+
+COOKIES = """# Netscape HTTP Cookie File
+127.0.0.1\tFALSE\t/\tFALSE\t0\tlogin\tsecret-token
+"""
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Returns the request's Cookie and User-Agent headers and sets a session cookie."""
+
+    def do_GET(self):
+        body = f'{self.headers.get("Cookie")}|{self.headers.get("User-Agent")}|{self.headers.get("X-Test")}'
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'visitor=warm; Path=/; Max-Age=3600')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def test_profiles():
+    """Profiles are private, validated and chosen by host rules."""
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        store = AuthStore(tmp / 'auth')
+        profile = store.add('members', cookies=COOKIES, headers={'X-Test': '1'},
+                            user_agent='TestAgent/1.0', hosts=['127.0.0.1', 'example.com'])
+        assert profile == {'name': 'members', 'hosts': ['127.0.0.1', 'example.com'],
+                           'headers': ['X-Test'], 'user_agent': 'TestAgent/1.0', 'cookies': 1}
+        assert stat.S_IMODE((tmp / 'auth').stat().st_mode) == 0o700
+        for path in (tmp / 'auth').iterdir():
+            assert stat.S_IMODE(path.stat().st_mode) == 0o600, path
+        print("✓ Profile files are private (0700/0600)")
+
+        store.add('music', hosts=['music.example.com'])
+        assert store.match('https://www.example.com/watch') == 'members'
+        assert store.match('https://music.example.com/x') == 'music'
+        assert store.match('https://other.org/') is None
+        assert store.session('https://other.org/') is None
+        for bad in (lambda: store.add('../x'), lambda: store.add('x', cookies='not a cookie file'),
+                    lambda: store.add('x', headers={'Cookie': 'a=b'}), lambda: store.session('u', 'nope')):
+            try:
+                bad()
+                assert False, 'expected ValueError'
+            except ValueError:
+                pass
+        print("✓ Host rules and validation")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_session_reuse_and_write_back():
+    """yt-dlp sends the profile's cookies and headers; new cookies are written back."""
+    tmp = Path(tempfile.mkdtemp())
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+    try:
+        store = AuthStore(tmp / 'auth')
+        store.add('members', cookies=COOKIES, headers={'X-Test': '1'},
+                  user_agent='TestAgent/1.0', hosts=['127.0.0.1'])
+        session = store.session(url)
+        with _open_ydl(_base_ydl_opts('best', session=session), session) as ydl:
+            body = ydl.urlopen(yt_dlp.networking.Request(url)).read().decode()
+        assert body == 'login=secret-token|TestAgent/1.0|1', body
+        print("✓ Profile cookies and headers are sent")
+
+        # The next job shares the warmed-up jar
+        assert store.session(url).jar is session.jar
+        with _open_ydl(_base_ydl_opts('best', session=session), session) as ydl:
+            body = ydl.urlopen(yt_dlp.networking.Request(url)).read().decode()
+        assert 'visitor=warm' in body
+        store.save_cookies('members')
+        assert 'visitor\twarm' in (tmp / 'auth' / 'members.cookies.txt').read_text()
+        assert AuthStore(tmp / 'auth').get('members')['cookies'] == 2
+        assert not list((tmp / 'auth').glob('.*'))
+        print("✓ Session reuse and atomic cookie write-back")
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    print("Testing auth profiles...\n")
+    test_profiles()
+    test_session_reuse_and_write_back()
+    print("\n✅ All auth tests passed!")
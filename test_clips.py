@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for clip downloads: time offsets, clip ranges and filename labels.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.clips import clip_label, clip_range, clip_spec, clip_ydl_opts, format_offset, parse_timestamp
+
+
+def expect_error(func, *args, match=''):
+    try:
+        func(*args)
+    except ValueError as e:
+        assert match in str(e), e
+        return
+    assert False, f'expected ValueError for {args}'
+
+
+def test_parse_timestamp():
+    """Seconds, MM:SS and HH:MM:SS are accepted; anything else is rejected."""
+    assert parse_timestamp('1:02:03') == 3723
+    assert parse_timestamp('01:00:00.5') == 3600.5
+    assert parse_timestamp('2:03') == 123
+    assert parse_timestamp('90') == 90 and parse_timestamp(' 7.25 ') == 7.25
+    assert parse_timestamp(90) == 90.0 and parse_timestamp(1.5) == 1.5
+    assert parse_timestamp(None) is None and parse_timestamp('') is None
+
+    for bad in ('abc', '1:2:3:4', '-5', '1h', ':30', '1:', True):
+        expect_error(parse_timestamp, bad, match='Invalid time')
+    expect_error(parse_timestamp, -1, match='must not be negative')
+    print("✓ Timestamps in seconds, MM:SS and HH:MM:SS")
+
+
+def test_clip_spec():
+    """Ranges are validated; open-ended ranges and chapters are kept, no range means no clip."""
+    assert clip_spec('1:00:00', '1:00:30') == {'start': 3600, 'end': 3630, 'chapter': None, 'accurate': False}
+    assert clip_spec(end='30', accurate=1) == {'start': None, 'end': 30, 'chapter': None, 'accurate': True}
+    assert clip_spec(start='10') == {'start': 10, 'end': None, 'chapter': None, 'accurate': False}
+    assert clip_spec(chapter='  Intro ') == {'start': None, 'end': None, 'chapter': 'Intro', 'accurate': False}
+    # Whole video: nothing given, or a start of 0 without an end
+    assert clip_spec() is None and clip_spec(0) is None and clip_spec('', '', '  ') is None
+
+    expect_error(clip_spec, '30', '10', match='after its start')
+    expect_error(clip_spec, '10', '10', match='after its start')
+    expect_error(clip_spec, '10', None, 'Intro', match='either a chapter')
+    expect_error(clip_spec, 'x', '10', match='Invalid time')
+    print("✓ Clip ranges validated")
+
+
+def test_clip_range():
+    """Start/end and chapters resolve against the video; ends past the video are open."""
+    info = {'duration': 600, 'chapters': [
+        {'title': 'Intro', 'start_time': 0, 'end_time': 60},
+        {'title': 'Main part', 'start_time': 60, 'end_time': 540},
+        {'title': 'Outro', 'start_time': 540, 'end_time': 600},
+    ]}
+    assert clip_range(clip_spec('10', '20'), info) == (10, 20)
+    assert clip_range(clip_spec(end='20'), info) == (0.0, 20)
+    assert clip_range(clip_spec(start='30'), info) == (30, None)
+    assert clip_range(clip_spec('30', '10:00'), info) == (30, None)
+    assert clip_range(clip_spec('30', '1:00:00'), {}) == (30, 3600)
+    # Exact title first (case-insensitive), then a title containing it
+    assert clip_range(clip_spec(chapter='outro'), info) == (540.0, None)
+    assert clip_range(clip_spec(chapter='main'), info) == (60.0, 540)
+
+    expect_error(clip_range, clip_spec('10:00'), info, match='starts after the end')
+    expect_error(clip_range, clip_spec(chapter='Credits'), info, match='chapters: Intro, Main part, Outro')
+    expect_error(clip_range, clip_spec(chapter='Intro'), {'duration': 10}, match='chapters: none')
+    print("✓ Clip ranges resolved against the video")
+
+
+def test_labels():
+    """Offsets and clip labels for filenames."""
+    assert format_offset(0) == '0s' and format_offset(7.5) == '7.5s'
+    assert format_offset(123) == '2m03s' and format_offset(3723) == '1h02m03s'
+    assert format_offset(3600.25) == '1h00m00.2s'
+    assert clip_label(3600, 3630) == 'clip1h00m00s-1h00m30s'
+    assert clip_label(90, None) == 'clip1m30s-end'
+    assert clip_label(0, 7.5) == 'clip0s-7.5s'
+    print("✓ Offsets and clip labels")
+
+
+def test_ydl_opts():
+    """The range reaches yt-dlp; an open end becomes infinity."""
+    opts = clip_ydl_opts(10, None, True)
+    assert opts['force_keyframes_at_cuts'] is True
+    ranges = list(opts['download_ranges']({'duration': 600}, None))
+    assert [(r['start_time'], r['end_time']) for r in ranges] == [(10, float('inf'))], ranges
+    ranges = list(clip_ydl_opts(10, 20, False)['download_ranges']({}, None))
+    assert [(r['start_time'], r['end_time']) for r in ranges] == [(10, 20)], ranges
+    print("✓ yt-dlp download ranges")
+
+
+if __name__ == '__main__':
+    print("Testing clip downloads...\n")
+    test_parse_timestamp()
+    test_clip_spec()
+    test_clip_range()
+    test_labels()
+    test_ydl_opts()
+    print("\n✅ All clip tests passed!")
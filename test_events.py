@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the job event log and replay.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.events import JobEventLog, tail_job_logs
+
+
+def test_replay():
+    """Late clients get active job state; reconnecting clients get what they missed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = JobEventLog(Path(tmp), buffer_size=10, max_jobs=10)
+        sent = []
+        log.set_emitter(lambda event, data: sent.append((event, data)))
+
+        for i in range(20):
+            log.emit('progress', {'job_id': 'a', 'percent': i})
+        log.emit('progress', {'job_id': 'b', 'percent': 50})
+        log.emit('success', {'job_id': 'a', 'filename': 'a.mp4'})
+        assert len(sent) == 22
+        assert sent[-1][1]['seq'] == 22
+
+        # Fresh client: latest progress of unfinished jobs only
+        fresh = log.replay()
+        assert [(r['event'], r['data']['job_id']) for r in fresh] == [('progress', 'b')]
+
+        # Reconnect after seq 5: one coalesced progress per job plus the result
+        missed = log.replay(5, log.epoch)
+        assert [(r['event'], r['data']['seq']) for r in missed] == [
+            ('progress', 20), ('progress', 21), ('success', 22)
+        ]
+
+        # Sequence numbers from another server run are not trusted
+        assert len(log.replay(21, 'old-epoch')) == 3
+        print("✓ Replay")
+
+        log.flush()
+        assert len(list(tail_job_logs(Path(tmp)))) == 22
+        assert len(list(tail_job_logs(Path(tmp), job_id='b'))) == 1
+        print("✓ JSONL spill")
+
+
+if __name__ == '__main__':
+    test_replay()
+    print("\nAll event log tests passed!")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test script for blocking-call offload, callback relay and the hub watchdog.
+
+The eventlet tests run a real eventlet hub in this thread; Socket.IO is
+replaced by eventlet's own spawn and sleep.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import eventlet
+
+from yt_dlp_wizwam import executor
+from yt_dlp_wizwam.executor import CallbackRelay, HubWatchdog, init_executor, run_blocking
+
+
+class GreenSocketIO:
+    """The parts of Flask-SocketIO the executor uses, on eventlet."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def start_background_task(self, func, *args, **kwargs):
+        task = eventlet.spawn(func, *args, **kwargs)
+        self.tasks.append(task)
+        return task
+
+    def sleep(self, seconds):
+        eventlet.sleep(seconds)
+
+    def stop(self):
+        """Kill the background tasks (relay and watchdog loops)."""
+        for task in self.tasks:
+            task.kill()
+
+
+def green_mode():
+    """Switch the executor to eventlet mode; returns a function switching it back."""
+    socketio = GreenSocketIO()
+    init_executor(socketio, 'eventlet')
+
+    def restore():
+        socketio.stop()
+        init_executor(None, None)
+    return restore
+
+
+def fail():
+    raise KeyError('boom')
+
+
+def expect_keyerror(func):
+    try:
+        run_blocking(func)
+        assert False, 'exception was not propagated'
+    except KeyError:
+        pass
+
+
+def test_run_blocking_inline():
+    """Without eventlet, calls and callbacks run inline in the caller's thread."""
+    init_executor(None, 'threading')
+    try:
+        assert run_blocking(threading.get_ident) == threading.get_ident()
+        assert run_blocking(lambda a, b=0: a + b, 1, b=2) == 3
+        expect_keyerror(fail)
+
+        relay = CallbackRelay()
+        callback = lambda: None  # noqa: E731
+        assert relay.wrap(callback) is callback and relay.wrap(None) is None
+        print("✓ Inline mode")
+    finally:
+        init_executor(None, None)
+
+
+def test_run_blocking_green():
+    """Under eventlet, calls run in tpool threads while the hub keeps running."""
+    restore = green_mode()
+    try:
+        ticks = []
+
+        def ticker():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                eventlet.sleep(0.02)
+
+        eventlet.spawn(ticker)
+        eventlet.sleep(0)
+        assert run_blocking(lambda: (time.sleep(0.3), threading.get_ident())[1]) != threading.get_ident()
+        # The ticker greenlet ran during the blocking call
+        assert len(ticks) >= 5, ticks
+        expect_keyerror(fail)
+        print("✓ Eventlet mode offloads to threads")
+    finally:
+        restore()
+
+
+def test_relay_to_hub():
+    """Callbacks from OS threads are queued and run on the hub."""
+    restore = green_mode()
+    try:
+        relay = CallbackRelay(interval=0.01)
+        calls = []
+        relayed = relay.wrap(lambda *args, **kwargs: calls.append((threading.get_ident(), args, kwargs)))
+        failing = relay.wrap(fail)
+        thread = threading.Thread(target=lambda: (failing(), relayed('done', 50.0, phase='merge')))
+        thread.start()
+        thread.join()
+        assert not calls
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            eventlet.sleep(0.01)
+        # On the hub's thread; the failing callback before it was logged and skipped
+        assert calls == [(threading.get_ident(), ('done', 50.0), {'phase': 'merge'})], calls
+        print("✓ Callbacks relayed onto the hub")
+    finally:
+        restore()
+
+
+def test_watchdog_lag():
+    """Hub stalls are measured; offloaded waits do not make a handler slow."""
+    restore = green_mode()
+    try:
+        watchdog = HubWatchdog(interval=0.02, threshold=0.15)
+        executor.watchdog, real = watchdog, executor.watchdog
+        try:
+            watchdog.start()
+            eventlet.sleep(0.1)
+            assert watchdog.snapshot()['stalls'] == 0
+
+            def offloading_handler():
+                token = watchdog.request_started('offloading')
+                run_blocking(time.sleep, 0.4)
+                run_blocking(run_blocking, time.sleep, 0.1)
+                watchdog.request_finished(token)
+
+            def blocking_handler():
+                token = watchdog.request_started('blocking')
+                time.sleep(0.3)
+                watchdog.request_finished(token)
+
+            eventlet.spawn(offloading_handler).wait()
+            eventlet.sleep(0.1)
+            snapshot = watchdog.snapshot()
+            assert snapshot['stalls'] == 0 and snapshot['slow_handlers'] == {}, snapshot
+
+            eventlet.spawn(blocking_handler).wait()
+            eventlet.sleep(0.1)
+            snapshot = watchdog.snapshot()
+            assert snapshot['stalls'] == 1 and 0.25 <= snapshot['max_lag'] < 1, snapshot
+            assert list(snapshot['slow_handlers']) == ['blocking'], snapshot
+            assert snapshot['slow_handlers']['blocking']['max'] >= 0.3
+            assert not watchdog._inflight and not watchdog._tasks
+            print("✓ Watchdog measures hub lag, not offloaded waits")
+        finally:
+            executor.watchdog = real
+    finally:
+        restore()
+
+
+if __name__ == '__main__':
+    print("Testing executor...\n")
+    test_run_blocking_inline()
+    test_run_blocking_green()
+    test_relay_to_hub()
+    test_watchdog_lag()
+    print("\n✅ All executor tests passed!")
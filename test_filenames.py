@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for download file names: byte limits and collisions.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import downloader
+from yt_dlp_wizwam.archive import DownloadArchive
+from yt_dlp_wizwam.config import Config
+
+
+def test_id_is_never_truncated():
+    """Long titles and long details are cut; the video ID is kept whole."""
+    info = {'title': 'ü' * 300, 'id': 'x' * 90, 'upload_date': '20240101', 'height': 720,
+            'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2', 'extractor_key': 'Generic' * 10}
+    name = downloader.build_filename(info, '720p', 'https://example.com/v')
+    assert name.endswith('_' + 'x' * 90), name
+    assert len(name.encode('utf-8')) <= Config.FILENAME_MAX_BYTES - downloader._SUFFIX_RESERVE
+
+    # Clips of a video keep their label too
+    clipped = downloader.build_filename(info, '720p', 'https://example.com/v', clip='0m10s-0m20s')
+    assert clipped.endswith('x' * 90 + '_0m10s-0m20s'), clipped
+
+    # An ID longer than half the name is replaced by its hash, still unique per video
+    names = {downloader.build_filename({**info, 'id': c * 200}, '720p', 'u') for c in 'ab'}
+    assert len(names) == 2
+    print("✓ Video ID survives truncation")
+
+
+def test_concurrent_downloads_get_distinct_names():
+    """A name being written by one video's download is not given to another video."""
+    old_download, old_staging, old_archive = Config.DOWNLOAD_DIR, Config.STAGING_DIR, downloader.get_archive
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR, Config.STAGING_DIR = tmp, ''
+        archive = DownloadArchive(Path(tmp) / 'archive.jsonl')
+        downloader.get_archive = lambda: archive
+        try:
+            first = downloader.unique_filename('same', 'mp4', 'site a')
+            second = downloader.unique_filename('same', 'mp4', 'site b')
+            again = downloader.unique_filename('same', 'mp4', 'site a')
+            assert first == again == 'same' and second.startswith('same-'), (first, second)
+            # Claims are hidden files: never listed as downloads
+            assert not any(f['name'].endswith('.name') for f in downloader.storage.list_files())
+
+            downloader.release_filename(second, 'site b')
+            downloader.release_filename('same', 'site b')  # Not its claim: kept
+            assert downloader.unique_filename('same', 'mp4', 'site c') != 'same'
+            downloader.release_filename('same', 'site a')
+            assert downloader.unique_filename('same', 'mp4', 'site c') == 'same'
+            print("✓ Names of downloads in progress are reserved")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+            downloader.get_archive = old_archive
+
+
+if __name__ == '__main__':
+    print("Testing file names...\n")
+    test_id_is_never_truncated()
+    test_concurrent_downloads_get_distinct_names()
+    print("\n✅ All file name tests passed!")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for startup warmup, readiness and graceful drain (checks and downloads are faked).
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import health, history, jobs
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.health import HealthMonitor
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not condition():
+        time.sleep(0.05)
+    return condition()
+
+
+def fail():
+    raise RuntimeError('not installed')
+
+
+def test_warmup_states():
+    """Pending critical checks keep the server unready; failures are errors or degrade it."""
+    monitor = HealthMonitor([('core', lambda: 'fine', True), ('extra', lambda: 'fine', False)])
+    assert monitor.status() == 'starting'
+    assert monitor.unready_reasons({}) == ['core: pending']
+    monitor.warmup()
+    assert monitor.status() == 'ok' and monitor.unready_reasons({}) == []
+    assert monitor.results()['core']['detail'] == 'fine'
+
+    degraded = HealthMonitor([('core', lambda: 'fine', True), ('extra', fail, False)])
+    degraded.warmup()
+    assert degraded.status() == 'degraded' and degraded.unready_reasons({}) == []
+    broken = HealthMonitor([('core', fail, True)])
+    broken.warmup()
+    assert broken.status() == 'error'
+    assert broken.unready_reasons({}) == ['core: RuntimeError: not installed']
+
+    old_backlog = Config.READY_MAX_BACKLOG
+    Config.READY_MAX_BACKLOG = 5
+    try:
+        assert monitor.unready_reasons({'jobs': {'backlog': 5}}) == ['job backlog 5 (limit 5)']
+        assert monitor.unready_reasons({'transfers': {'full': True}}) == ['transfer queue full']
+    finally:
+        Config.READY_MAX_BACKLOG = old_backlog
+    print("✓ Warmup states and unready reasons")
+
+
+def test_readyz():
+    """/readyz is 503 before warmup, 200 after it and 503 again while draining."""
+    from yt_dlp_wizwam.web import create_app
+
+    warmed = threading.Event()
+    old = (health._monitor, Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR,
+           Config.HISTORY_FILE, Config.LOG_DIR, Config.ASSET_CACHE_DIR, history._history)
+    with tempfile.TemporaryDirectory() as tmp:
+        health._monitor = HealthMonitor([('slow', lambda: warmed.wait(10) and 'warm', True)])
+        Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR = False, tmp, ''
+        Config.HISTORY_FILE, history._history = str(Path(tmp) / 'history.db'), None
+        Config.LOG_DIR, Config.ASSET_CACHE_DIR = str(Path(tmp) / 'logs'), str(Path(tmp) / 'assets')
+        try:
+            app = create_app(async_mode='threading', primary=False)
+            client = app.test_client()
+            response = client.get('/readyz')
+            assert response.status_code == 503, response.status_code
+            assert response.get_json()['status'] == 'starting'
+            assert response.get_json()['reasons'] == ['slow: pending']
+            assert client.get('/healthz').status_code == 200
+
+            warmed.set()
+            assert wait_for(lambda: client.get('/readyz').status_code == 200)
+            assert client.get('/readyz').get_json()['checks']['slow']['detail'] == 'warm'
+
+            app.extensions['health'].begin_drain()
+            response = client.get('/readyz')
+            assert response.status_code == 503 and response.get_json()['reasons'] == ['draining']
+            assert response.get_json()['status'] == 'draining'
+            response = client.post('/api/download', json={'url': 'https://example.com/v'})
+            assert response.status_code == 503, response.status_code
+            app.extensions['job_queue'].shutdown(5)
+            print("✓ Readiness before and after warmup, 503 while draining")
+        finally:
+            if history._history is not None:
+                history._history.close()
+            (health._monitor, Config.MULTI_USER, Config.DOWNLOAD_DIR, Config.STAGING_DIR,
+             Config.HISTORY_FILE, Config.LOG_DIR, Config.ASSET_CACHE_DIR, history._history) = old
+
+
+def test_drain_waits_for_running_jobs():
+    """Drain lets a running download finish and interrupts the ones that have not started."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def fake_resolve(url, **kwargs):
+        return {'url': url, 'info': {'id': url, 'title': url}, 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, **kwargs):
+        started.set()
+        release.wait(10)
+        return {'status': 'success', 'filename': f'/tmp/{url.rsplit("/", 1)[1]}.mp4', 'url': url}
+
+    originals = jobs.resolve_video, jobs.download_video
+    jobs.resolve_video, jobs.download_video = fake_resolve, fake_download
+    try:
+        queue = jobs.JobQueue(download_workers=1, prefetch_workers=1, history=False)
+        running = queue.submit('https://example.com/running')
+        assert started.wait(10)
+        waiting = queue.submit('https://example.com/waiting')
+
+        drained = []
+        drainer = threading.Thread(target=lambda: drained.append(queue.drain(10)), daemon=True)
+        drainer.start()
+        drainer.join(0.5)
+        # Still waiting for the running download; the waiting job is ended at once
+        assert not drained and running.status == 'downloading', running.status
+        assert waiting.status == 'interrupted'
+        try:
+            queue.submit('https://example.com/late')
+            assert False, 'drained queue accepted a job'
+        except RuntimeError:
+            pass
+
+        release.set()
+        drainer.join(10)
+        assert drained == [True] and running.status == 'success', (drained, running.status)
+        print("✓ Drain waits for running jobs")
+    finally:
+        jobs.resolve_video, jobs.download_video = originals
+
+
+if __name__ == '__main__':
+    print("Testing health checks and drain...\n")
+    test_warmup_states()
+    test_readyz()
+    test_drain_waits_for_running_jobs()
+    print("\n✅ All health tests passed!")
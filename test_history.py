@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent job history (SQLite, temporary files only).
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.history import JobHistory, parse_since
+from yt_dlp_wizwam.jobs import Job
+
+
+def finished_job(url, status='success', finished=None, parent=None, user=None, options=None, created=None):
+    job = Job(url, options or {'quality': '720p'}, parent=parent, user=user)
+    job.status = status
+    job.created = created if created is not None else time.time()
+    job.finished = finished if finished is not None else time.time()
+    job.result = {'status': status, 'url': url, 'filename': f'/downloads/{url.rsplit("/", 1)[1]}.mp4'}
+    return job
+
+
+def test_cursor_pagination():
+    """Pages follow each other without gaps or repeats, also for equal finish times."""
+    with tempfile.TemporaryDirectory() as tmp:
+        history = JobHistory(Path(tmp) / 'history.db', max_age_days=0, max_rows=0)
+        try:
+            now = time.time()
+            # Pairs of jobs finishing at the same moment
+            for i in range(25):
+                history.record(finished_job(f'https://example.com/v{i}', finished=now - i // 2,
+                                            status='error' if i % 5 == 0 else 'success',
+                                            user='alice' if i % 2 else 'bob'))
+
+            seen, cursor = [], None
+            while True:
+                page = history.query(limit=7, cursor=cursor)
+                seen += [job['url'] for job in page['jobs']]
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+            assert len(seen) == len(set(seen)) == 25
+            finished = [history.get(job_id)['finished'] for job_id in
+                        (job['job_id'] for job in history.query(limit=25)['jobs'])]
+            assert finished == sorted(finished, reverse=True)
+
+            assert len(history.query(status='error', limit=50)['jobs']) == 5
+            assert all(job['user'] == 'alice' for job in history.query(user='alice')['jobs'])
+            assert history.query(search='v13')['jobs'][0]['url'] == 'https://example.com/v13'
+            assert len(history.query(since=now - 2.5, limit=50)['jobs']) == 6
+            assert history.counts() == {'success': 20, 'error': 5}
+            try:
+                history.query(cursor='garbage')
+                assert False, 'expected ValueError'
+            except ValueError:
+                pass
+            assert abs(parse_since('2h', now=now) - (now - 7200)) < 1e-6
+            print("✓ Cursor pagination and filters")
+        finally:
+            history.close()
+
+
+def test_compaction():
+    """Compaction drops rows by age and beyond the row limit, newest kept."""
+    with tempfile.TemporaryDirectory() as tmp:
+        history = JobHistory(Path(tmp) / 'history.db', max_age_days=30, max_rows=10)
+        try:
+            now = time.time()
+            for i in range(5):
+                history.record(finished_job(f'https://example.com/old{i}', finished=now - 40 * 86400 - i))
+            for i in range(15):
+                history.record(finished_job(f'https://example.com/new{i}', finished=now - i))
+
+            assert history.compact() == 10
+            urls = [job['url'] for job in history.query(limit=50)['jobs']]
+            assert urls == [f'https://example.com/new{i}' for i in range(10)], urls
+            assert history.compact() == 0
+            # Explicit arguments override the instance's limits
+            assert history.compact(max_age_days=0, max_rows=3) == 7
+            print("✓ Compaction and retention")
+        finally:
+            history.close()
+
+
+def test_interrupted_recovery():
+    """Interrupted top-level jobs come back oldest first with their options."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'history.db'
+        history = JobHistory(path, max_age_days=0, max_rows=0)
+        now = time.time()
+        history.record(finished_job('https://example.com/b', 'interrupted', created=now - 10,
+                                    options={'quality': '1080p'}, user='bob'))
+        history.record(finished_job('https://example.com/a', 'interrupted', created=now - 20))
+        history.record(finished_job('https://example.com/entry', 'interrupted', parent='playlist-job'))
+        history.record(finished_job('https://example.com/done'))
+        history.close()
+
+        # As after a restart: a new instance on the same file
+        reopened = JobHistory(path)
+        try:
+            jobs = reopened.interrupted()
+            assert [job['url'] for job in jobs] == ['https://example.com/a', 'https://example.com/b']
+            assert jobs[1]['options'] == {'quality': '1080p'} and jobs[1]['user'] == 'bob'
+            print("✓ Interrupted jobs for resubmission")
+        finally:
+            reopened.close()
+
+
+if __name__ == '__main__':
+    print("Testing job history...\n")
+    test_cursor_pagination()
+    test_compaction()
+    test_interrupted_recovery()
+    print("\n✅ All job history tests passed!")
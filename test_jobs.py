@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the prefetch → download job queue (extraction and downloads are faked).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import jobs
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not condition():
+        time.sleep(0.05)
+    return condition()
+
+
+def test_cancel_during_prefetch():
+    """A job cancelled while it is being resolved ends cancelled and is never downloaded."""
+    resolving = threading.Event()
+    release = threading.Event()
+    downloaded = []
+
+    def fake_resolve(url, **kwargs):
+        resolving.set()
+        release.wait(10)
+        return {'url': url, 'info': {'id': url, 'title': url}, 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, **kwargs):
+        downloaded.append(url)
+        return {'status': 'success', 'filename': f'/tmp/{url}.mp4', 'url': url}
+
+    originals = jobs.resolve_video, jobs.download_video
+    jobs.resolve_video, jobs.download_video = fake_resolve, fake_download
+    try:
+        queue = jobs.JobQueue(download_workers=1, prefetch_workers=1, history=False)
+        job = queue.submit('https://example.com/a')
+        assert resolving.wait(10) and job.status == 'resolving', job.status
+        assert queue.cancel(job.job_id)
+        release.set()
+        assert job.done.wait(10)
+        assert job.status == 'cancelled' and not downloaded, (job.status, downloaded)
+        print("✓ Cancelling during prefetch")
+    finally:
+        jobs.resolve_video, jobs.download_video = originals
+
+
+def test_drain_keeps_held_job_finished():
+    """A job held back for a rate-limited site and then drained stays interrupted."""
+    queue = jobs.JobQueue(download_workers=1, prefetch_workers=1, history=False)
+    queue.start()
+    job = jobs.Job('https://example.com/held')
+    with queue._lock:
+        queue._jobs[job.job_id] = job
+    queue._hold(job, 60)
+    assert job.status == 'waiting'
+    assert queue.drain(1)
+    assert job.status == 'interrupted'
+    # The hold wakes up on the cancel; the finished job must not be queued again
+    assert wait_for(lambda: job.waiting_until is None)
+    time.sleep(0.2)
+    assert job.status == 'interrupted' and len(queue._pending) == 0, (job.status, len(queue._pending))
+    print("✓ Drained job is not released from its hold")
+
+
+if __name__ == '__main__':
+    print("Testing job queue...\n")
+    test_cancel_during_prefetch()
+    test_drain_keeps_held_job_finished()
+    print("\n✅ All job queue tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for live-stream recording: ffmpeg command, segment list and stop reasons.
+
+Recordings read a short generated MP4 file in real time (-re) instead of a
+live stream, so no network access is needed.
+"""
+
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import live
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.transcode import get_ffmpeg
+
+
+class RealtimeRecorder(live.LiveRecorder):
+    """Reads its input at native speed, like a live stream arrives."""
+
+    def command(self, ffmpeg):
+        cmd = super().command(ffmpeg)
+        index = cmd.index('-i')
+        return cmd[:index] + ['-re'] + cmd[index:]
+
+
+def make_source(path: Path, seconds: int):
+    subprocess.run(
+        [get_ffmpeg(), '-hide_banner', '-loglevel', 'error', '-y',
+         '-f', 'lavfi', '-i', 'testsrc=size=160x120:rate=10', '-f', 'lavfi', '-i', 'sine',
+         '-t', str(seconds), '-c:v', 'mpeg4', '-c:a', 'aac', str(path)],
+        check=True, capture_output=True
+    )
+
+
+def test_command():
+    """Inputs, maps and limits end up in the ffmpeg command."""
+    info = {'requested_formats': [
+        {'url': 'https://example.com/v.m3u8', 'protocol': 'm3u8_native', 'http_headers': {'Referer': 'x'}},
+        {'url': 'https://example.com/a.m3u8', 'protocol': 'm3u8_native'},
+    ]}
+    recorder = live.LiveRecorder(info, Path('/tmp/100%, live'), from_start=True, segment_seconds=30,
+                                 max_duration=60, max_size_mb=0)
+    cmd = recorder.command('ffmpeg')
+    assert cmd.count('-i') == 2 and cmd.count('-live_start_index') == 2
+    assert cmd[cmd.index('-headers') + 1] == 'Referer: x\r\n'
+    assert cmd[cmd.index('-t') + 1] == '60' and cmd[cmd.index('-segment_time') + 1] == '30'
+    assert ['-map', '0:v:0', '-map', '1:a:0'] == cmd[cmd.index('-map'):cmd.index('-map') + 4]
+    # '%' is escaped for the segment muxer's pattern
+    assert cmd[-1] == '/tmp/100%%, live_seg%05d.ts.part', cmd[-1]
+
+    single = live.LiveRecorder({'url': '/tmp/in.ts'}, Path('/tmp/x'), max_duration=0).command('ffmpeg')
+    assert '-t' not in single and '-reconnect' not in single and '-live_start_index' not in single
+    print("✓ ffmpeg command")
+
+
+def test_collect_segments_with_comma():
+    """Quoted names from ffmpeg's CSV segment list are parsed; half-written lines wait."""
+    old_staging = Config.STAGING_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.STAGING_DIR = ''
+        try:
+            base = Path(tmp) / 'Live, part 1'
+            recorder = live.LiveRecorder({'url': 'x'}, base, remux=False)
+            for number in (1, 2):
+                recorder._segment_path(number).write_bytes(b'x' * number)
+            recorder.segment_list.write_text(
+                '"Live, part 1_seg00001.ts.part",0.000000,10.000000\n'
+                '"Live, part 1_seg00002.ts.part",10.000000,2'
+            )
+            recorder._collect_segments()
+            assert recorder._listed == 1 and recorder._recorded_bytes == 1
+
+            with open(recorder.segment_list, 'a') as f:
+                f.write('0.000000\n')
+            recorder._collect_segments()
+            recorder._executor.shutdown(wait=True)
+            assert recorder._listed == 2 and recorder._recorded_bytes == 3
+            assert [future.result().name for future in recorder._segments] == [
+                'Live, part 1_seg00001.ts', 'Live, part 1_seg00002.ts'
+            ]
+            print("✓ Segment list with a comma in the title")
+        finally:
+            Config.STAGING_DIR = old_staging
+
+
+def test_stop_reasons():
+    """Stream end, duration and size limits and cancelling each stop the recording."""
+    old_staging = Config.STAGING_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.STAGING_DIR = ''
+        try:
+            short, long = Path(tmp) / 'short.mp4', Path(tmp) / 'long.mp4'
+            make_source(short, 2)
+            make_source(long, 30)
+
+            def record(name, source, **kwargs):
+                kwargs.setdefault('max_duration', 0)
+                kwargs.setdefault('max_size_mb', 0)
+                recorder = RealtimeRecorder({'url': str(source)}, Path(tmp) / name, ext='mp4',
+                                            segment_seconds=1, remux=False, **kwargs)
+                return recorder.run()
+
+            ended = record('Live, ended', short)
+            assert ended['stopped'] == 'ended', ended
+            assert ended['segments'] and all(path.exists() and path.suffix == '.ts' for path in ended['segments'])
+            assert not list(Path(tmp).glob('*.part'))
+
+            assert record('duration', long, max_duration=2)['stopped'] == 'max_duration'
+            assert record('size', long, max_size_mb=0.01)['stopped'] == 'max_size'
+
+            cancel = threading.Event()
+            threading.Timer(1.5, cancel.set).start()
+            cancelled = record('cancelled', long, cancel_event=cancel)
+            assert cancelled['stopped'] == 'cancelled' and cancelled['duration'] < 20, cancelled
+            print("✓ Stop reasons")
+        finally:
+            Config.STAGING_DIR = old_staging
+
+
+if __name__ == '__main__':
+    print("Testing live recording...\n")
+    test_command()
+    test_collect_segments_with_comma()
+    test_stop_reasons()
+    print("\n✅ All live recording tests passed!")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed playlist expansion (fake extractors, no network).
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from yt_dlp_wizwam import history, jobs
+from yt_dlp_wizwam.archive import DownloadArchive
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.downloader import resolve_video
+from yt_dlp_wizwam.playlist import PlaylistFeeder, list_entries
+
+# Entries the fake playlist has handed out so far
+LISTED = []
+
+
+class FakePlaylistIE(InfoExtractor):
+    _VALID_URL = r'fakeplaylist:(?P<count>\d+)'
+
+    def _real_extract(self, url):
+        count = int(self._match_valid_url(url).group('count'))
+
+        def entries():
+            for i in range(count):
+                LISTED.append(i)
+                yield self.url_result(f'fakevideo:{i}', 'FakeVideo', video_id=str(i), video_title=f'Video {i}')
+
+        return self.playlist_result(entries(), 'fake', 'Fake playlist')
+
+
+class FakeVideoIE(InfoExtractor):
+    _VALID_URL = r'fakevideo:(?P<id>\d+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        return {'id': video_id, 'title': f'Video {video_id}', 'url': f'https://media.invalid/{video_id}.mp4'}
+
+
+_add_extractors = yt_dlp.YoutubeDL.add_default_info_extractors
+
+
+def add_default_info_extractors(self):
+    self.add_info_extractor(FakePlaylistIE())
+    self.add_info_extractor(FakeVideoIE())
+    _add_extractors(self)
+
+
+yt_dlp.YoutubeDL.add_default_info_extractors = add_default_info_extractors
+
+
+def test_listing_is_lazy():
+    """A playlist is recognised without resolving entries; the listing is read as consumed."""
+    LISTED.clear()
+    resolved = resolve_video('fakeplaylist:100000')
+    assert resolved['playlist'] and resolved['info']['title'] == 'Fake playlist'
+    assert 'entries' not in resolved['info'] and LISTED == []
+    assert resolve_video('fakevideo:7')['info']['title'] == 'Video 7'
+    print("✓ Playlists are recognised before their entries are resolved")
+
+    entries = list_entries('fakeplaylist:100000')
+    first = [next(entries) for _ in range(3)]
+    entries.close()
+    assert [e['url'] for e in first] == ['fakevideo:0', 'fakevideo:1', 'fakevideo:2']
+    assert first[0]['key'] == 'fakevideo 0'
+    assert len(LISTED) == 3
+    print("✓ Entries are listed lazily")
+
+
+def test_feeder_window_and_archive():
+    """At most a window of entry jobs is outstanding; archived entries are skipped."""
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        archive = DownloadArchive(tmp / 'archive.jsonl')
+        archive.record('fakevideo 3', filename='3.mp4')
+        outstanding = []
+        peak = []
+
+        class FakeJob:
+            def __init__(self, url):
+                self.url = url
+                self.status = 'queued'
+                self.done = threading.Event()
+
+        def submit(url):
+            job = FakeJob(url)
+            outstanding.append(job)
+            peak.append(sum(not j.done.is_set() for j in outstanding))
+
+            def finish():
+                time.sleep(0.01)
+                job.status = 'error' if url == 'fakevideo:5' else 'success'
+                job.done.set()
+                feeder.notify()
+            threading.Thread(target=finish, daemon=True).start()
+            return job
+
+        feeder = PlaylistFeeder('fakeplaylist:30', submit, cancel=lambda job: None, window=4, archive=archive)
+        counts = feeder.run()
+        assert counts == {'entries': 30, 'skipped': 1, 'downloaded': 28, 'failed': 1, 'cancelled': 0}, counts
+        assert max(peak) <= 4
+        print("✓ Backpressure window and archive skip")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_job_queue_expansion():
+    """A playlist job queues a job per entry and finishes with a summary."""
+    def fake_resolve(url, **kwargs):
+        if url.startswith('fakeplaylist:'):
+            return resolve_video(url)
+        return {'url': url, 'info': {'id': url, 'title': url}, 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, **kwargs):
+        return {'status': 'success', 'filename': f'/tmp/{url}.mp4', 'url': url, 'title': url}
+
+    originals = jobs.resolve_video, jobs.download_video, Config.PLAYLIST_WINDOW, Config.HISTORY_FILE, history._history
+    tmp = tempfile.mkdtemp()
+    jobs.resolve_video, jobs.download_video = fake_resolve, fake_download
+    Config.PLAYLIST_WINDOW = 2
+    # Finished jobs go into a throwaway history, not the user's
+    Config.HISTORY_FILE, history._history = str(Path(tmp) / 'history.db'), None
+    try:
+        LISTED.clear()
+        queue = jobs.JobQueue(download_workers=2)
+        updates = []
+        job = queue.submit('fakeplaylist:25', {'quality': '480p'},
+                           progress_callback=lambda *update: updates.append(update))
+        assert job.done.wait(30)
+        assert job.result['status'] == 'success' and job.result['playlist'], job.result
+        assert job.result['downloaded'] == 25 and len(LISTED) == 25
+        entries = [j for j in queue.list_jobs() if j.parent == job.job_id]
+        assert len(entries) == 25 and all(j.options == {'quality': '480p'} for j in entries)
+        assert updates[-1][0] == 'playlist' and updates[-1][2].startswith('Playlist: 25 of 25 done'), updates[-3:]
+        print("✓ Job queue expands playlists into entry jobs")
+    finally:
+        if history._history is not None:
+            history._history.close()
+        jobs.resolve_video, jobs.download_video, Config.PLAYLIST_WINDOW, Config.HISTORY_FILE, history._history = originals
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    print("Testing playlists...\n")
+    test_listing_is_lazy()
+    test_feeder_window_and_archive()
+    test_job_queue_expansion()
+    print("\n✅ All playlist tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for combined multi-stream progress (video + audio + merge).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.downloader import DownloadProgress
+from yt_dlp_wizwam.stats import StatsRegistry
+
+
+def make_progress():
+    updates = []
+    progress = DownloadProgress(lambda phase, percent, message: updates.append((phase, percent)))
+    progress.expect_streams({'requested_formats': [
+        {'format_id': '137', 'filesize': 500 * 1024 * 1024},
+        {'format_id': '140', 'filesize': 5 * 1024 * 1024},
+    ]})
+    return progress, updates
+
+
+def test_unstarted_stream_does_not_pin_progress():
+    """Half of the video downloaded, audio not started: ~half overall, not 0."""
+    progress, updates = make_progress()
+    progress({'status': 'downloading', 'info_dict': {'format_id': '137'},
+              'downloaded_bytes': 250 * 1024 * 1024, 'total_bytes': 500 * 1024 * 1024})
+    phase, percent = updates[-1]
+    assert phase == 'downloading'
+    assert 44.0 < percent < 46.0, percent  # 250/505 of the 90% download share
+    print(f"✓ Unstarted audio stream: {percent:.1f}%")
+
+
+def test_small_stream_weighted_by_bytes():
+    """A finished 5 MB audio stream barely moves the bar."""
+    progress, updates = make_progress()
+    progress({'status': 'finished', 'info_dict': {'format_id': '140'},
+              'total_bytes': 5 * 1024 * 1024})
+    phase, percent = updates[-1]
+    assert phase == 'downloading'
+    assert percent < 1.0, percent
+    print(f"✓ Finished audio stream: {percent:.1f}%")
+
+
+def test_fragment_estimate():
+    """Unknown totals are extrapolated from fragment counts."""
+    progress = DownloadProgress()
+    progress({'status': 'downloading', 'info_dict': {'format_id': 'hls'},
+              'downloaded_bytes': 1000, 'fragment_index': 10, 'fragment_count': 40})
+    assert progress.streams['hls']['total'] == 4000
+    assert abs(progress.overall_percent() - 25.0) < 0.01
+    print("✓ Fragment-based estimate")
+
+
+def test_merge_phase():
+    """Downloads complete at 90%, merge fills the rest."""
+    progress, updates = make_progress()
+    for fmt, size in (('137', 500), ('140', 5)):
+        progress({'status': 'finished', 'info_dict': {'format_id': fmt},
+                  'total_bytes': size * 1024 * 1024})
+    assert updates[-1][0] == 'processing'
+    assert abs(updates[-1][1] - 90.0) < 0.01
+    assert abs(progress.overall_percent(0.5) - 95.0) < 0.01
+    print("✓ Merge phase weighting")
+
+
+def test_queue_eta_includes_queued():
+    """Queued jobs count towards the queue ETA; unknown sizes as an average finished job."""
+    registry = StatsRegistry()
+    registry.start_job('done', 'https://example.com/done')
+    registry.update_stream('done', 'v', 300, 300, 100.0, 0)
+    registry.finish_job('done', 'success')
+    registry.start_job('a', 'https://example.com/a')
+    registry.update_stream('a', 'v', 0, 1000, 100.0, 10)
+
+    summary = registry.summary([500, None])
+    assert summary['queued_jobs'] == 2 and summary['queued_bytes'] == 800
+    assert summary['active_eta'] == 10 and summary['queue_eta'] == 18, summary
+    assert registry.compact_summary([500, None])['queue_eta'] == 18
+    # Nothing to estimate from: the job is reported as of unknown size instead
+    assert StatsRegistry().summary([None])['unknown_size_jobs'] == 1
+    print("✓ Queue ETA includes queued jobs")
+
+
+if __name__ == '__main__':
+    test_unstarted_stream_does_not_pin_progress()
+    test_small_stream_weighted_by_bytes()
+    test_fragment_estimate()
+    test_merge_phase()
+    test_queue_eta_includes_queued()
+    print("\nAll progress tests passed!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for error classification, retries and the circuit breaker.
+"""
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.config import Config
+import yt_dlp
+
+from yt_dlp_wizwam.retry import (
+    GEO, PERMANENT, RATE_LIMITED, TRANSIENT, CircuitBreaker, backoff_delay, call_with_retries,
+    classify_error, ydl_retry_opts
+)
+
+
+def test_classify():
+    """Errors are sorted into retryable and final categories."""
+    assert classify_error('ERROR: unable to download video data: HTTP Error 429: Too Many Requests') == RATE_LIMITED
+    assert classify_error("Sign in to confirm you're not a bot") == RATE_LIMITED
+    assert classify_error('Sign in to confirm you’re not a bot. Use --cookies') == RATE_LIMITED
+    assert classify_error('HTTP Error 503: Service Unavailable') == TRANSIENT
+    assert classify_error('HTTP Error 403: Forbidden') == TRANSIENT
+    assert classify_error(ConnectionResetError('reset')) == TRANSIENT
+    assert classify_error('The uploader has not made this video available in your country') == GEO
+    assert classify_error('Unsupported URL: https://example.com/') == PERMANENT
+    assert classify_error('HTTP Error 404: Not Found') == PERMANENT
+    assert classify_error('Private video') == PERMANENT
+    # Age gates need cookies, not patience: no backoff, no circuit breaker
+    assert classify_error('Sign in to confirm your age. This video may be inappropriate for some users.') == PERMANENT
+    assert classify_error('This video is age-restricted and only available on YouTube') == PERMANENT
+    assert classify_error('[vimeo] 123: Login required to access this video') == PERMANENT
+    print("✓ Error classification")
+
+
+def test_backoff_and_retries():
+    """Backoff grows with jitter; only retryable errors are retried."""
+    rng = random.Random(1)
+    first = backoff_delay(1, TRANSIENT, rng)
+    assert Config.RETRY_BASE_DELAY / 2 <= first <= Config.RETRY_BASE_DELAY
+    assert backoff_delay(3, TRANSIENT, rng) >= Config.RETRY_BASE_DELAY * 2
+    assert backoff_delay(1, RATE_LIMITED, rng) >= Config.RETRY_RATE_LIMIT_DELAY / 2
+    assert backoff_delay(50, TRANSIENT, rng) <= Config.RETRY_MAX_DELAY
+    print("✓ Jittered exponential backoff")
+
+    calls = []
+    retries = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OSError('HTTP Error 503: Service Unavailable')
+        return 'ok'
+
+    assert call_with_retries(flaky, attempts=3, on_retry=lambda *a: retries.append(a[:2])) == 'ok'
+    assert retries == [(1, TRANSIENT), (2, TRANSIENT)]
+
+    calls.clear()
+
+    def missing():
+        calls.append(1)
+        raise OSError('HTTP Error 404: Not Found')
+
+    try:
+        call_with_retries(missing, attempts=3, on_retry=lambda *a: None)
+        assert False, 'expected OSError'
+    except OSError:
+        pass
+    assert len(calls) == 1
+    print("✓ Transient errors retried, permanent errors not")
+
+
+def test_circuit_breaker():
+    """Rate limiting opens a circuit; a half-open trial closes or reopens it."""
+    breaker = CircuitBreaker(threshold=2, cooldown=0.2, max_cooldown=1)
+    breaker.learn('https://www.example.com/watch?v=1', 'Example')
+    assert breaker.extractor_for('https://example.com/other') == 'example'
+
+    breaker.record('Example', RATE_LIMITED)
+    assert breaker.retry_after('example') == 0
+    breaker.record('Example', RATE_LIMITED)
+    assert breaker.snapshot()['example']['state'] == 'open'
+    assert 0 < breaker.retry_after('example') <= 0.2
+    assert breaker.retry_after('other') == 0
+    print("✓ Circuit opens after repeated rate limiting")
+
+    time.sleep(0.25)
+    assert breaker.remaining('example') == 0
+    assert breaker.retry_after('example') == 0      # the trial job
+    assert breaker.retry_after('example') > 0       # everyone else waits for it
+    breaker.record('Example', RATE_LIMITED)
+    assert breaker.snapshot()['example']['retry_after'] > 0.2    # reopened for longer
+
+    time.sleep(0.45)
+    assert breaker.retry_after('example') == 0
+    breaker.record('Example', None)
+    assert breaker.snapshot() == {}
+    print("✓ Half-open trial reopens or closes the circuit")
+
+
+def test_ydl_retry_sleep_cancellable():
+    """yt-dlp's retry sleeps end when the download is cancelled."""
+    assert ydl_retry_opts()['retry_sleep_functions']['http'](0) >= Config.RETRY_BASE_DELAY / 2
+
+    cancel = threading.Event()
+    sleep = ydl_retry_opts(cancel)['retry_sleep_functions']['fragment']
+    threading.Timer(0.1, cancel.set).start()
+    started = time.monotonic()
+    try:
+        sleep(30)
+        assert False, 'expected DownloadCancelled'
+    except yt_dlp.utils.DownloadCancelled:
+        pass
+    assert time.monotonic() - started < 5
+    print("✓ Cancel interrupts yt-dlp retry sleeps")
+
+
+if __name__ == '__main__':
+    print("Testing retries...\n")
+    test_classify()
+    test_backoff_and_retries()
+    test_circuit_breaker()
+    test_ydl_retry_sleep_cancellable()
+    print("\n✅ All retry tests passed!")
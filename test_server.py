@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for listening sockets and the web worker supervisor.
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import server
+
+
+def test_bind_available_keeps_socket():
+    """A busy port is skipped and the chosen port stays bound."""
+    busy = server.bind_socket('127.0.0.1', 0)
+    port = busy.getsockname()[1]
+    try:
+        sock = server.bind_available('127.0.0.1', port, attempts=5)
+        try:
+            assert sock.getsockname()[1] != port
+            # Held: nobody else can take it in the meantime
+            try:
+                server.bind_socket('127.0.0.1', sock.getsockname()[1])
+                assert False, 'port was not held'
+            except OSError:
+                pass
+        finally:
+            sock.close()
+        try:
+            server.bind_available('127.0.0.1', port, attempts=1)
+            assert False, 'busy port was bound'
+        except OSError:
+            pass
+        print("✓ Free port is bound once and held")
+    finally:
+        busy.close()
+
+
+def test_reuse_port_workers_share_port():
+    """With SO_REUSEPORT, sockets of several workers listen on one port; others cannot bind it."""
+    if not server.reuse_port_supported():
+        print("✓ SO_REUSEPORT not supported here (skipped)")
+        return
+    holder = server.bind_socket('127.0.0.1', 0, reuse_port=True, listen=False)
+    port = holder.getsockname()[1]
+    listeners = [server.bind_socket('127.0.0.1', port, reuse_port=True) for _ in range(2)]
+    try:
+        try:
+            server.bind_socket('127.0.0.1', port)
+            assert False, 'port was not held'
+        except OSError:
+            pass
+        clients = [socket.create_connection(('127.0.0.1', port)) for _ in range(20)]
+        accepted = 0
+        for listener in listeners:
+            listener.settimeout(0.2)
+            try:
+                while True:
+                    listener.accept()[0].close()
+                    accepted += 1
+            except socket.timeout:
+                pass
+        assert accepted == 20, accepted
+        for client in clients:
+            client.close()
+        print("✓ Workers listen on one port with SO_REUSEPORT")
+    finally:
+        for sock in listeners + [holder]:
+            sock.close()
+
+
+def test_systemd_sockets_need_matching_pid():
+    """LISTEN_FDS of another process is ignored."""
+    os.environ.update(LISTEN_PID=str(os.getpid() + 1), LISTEN_FDS='1')
+    try:
+        assert server.systemd_sockets() == []
+        assert os.environ['LISTEN_FDS'] == '1'
+        os.environ.update(LISTEN_PID=str(os.getpid()), LISTEN_FDS='0')
+        assert server.systemd_sockets() == []
+        assert 'LISTEN_PID' not in os.environ and 'LISTEN_FDS' not in os.environ
+        print("✓ systemd sockets are only taken by the activated process")
+    finally:
+        os.environ.pop('LISTEN_PID', None)
+        os.environ.pop('LISTEN_FDS', None)
+
+
+def test_supervisor_restarts_and_stops_workers():
+    """A worker that dies is restarted; stop() ends all of them."""
+    handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+    original_uptime = server.MIN_WORKER_UPTIME
+    server.MIN_WORKER_UPTIME = 0
+    try:
+        supervisor = server.WorkerSupervisor(2, lambda index: time.sleep(60), stop_timeout=10)
+        supervisor.start()
+        first = sorted(supervisor._workers)
+        assert len(first) == 2
+        codes = []
+        waiter = threading.Thread(target=lambda: codes.append(supervisor.wait()))
+        waiter.start()
+        os.kill(first[0], signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and first[0] in supervisor._workers or len(supervisor._workers) < 2:
+            time.sleep(0.1)
+        assert first[0] not in supervisor._workers and len(supervisor._workers) == 2
+        assert sorted(index for index, _ in supervisor._workers.values()) == [0, 1]
+        supervisor.stop()
+        waiter.join(15)
+        assert codes == [0] and not supervisor._workers
+        print("✓ Supervisor restarts dead workers and stops them all")
+    finally:
+        server.MIN_WORKER_UPTIME = original_uptime
+        signal.signal(signal.SIGTERM, handlers[0])
+        signal.signal(signal.SIGINT, handlers[1])
+
+
+if __name__ == '__main__':
+    print("Testing server sockets...\n")
+    test_bind_available_keeps_socket()
+    test_reuse_port_workers_share_port()
+    test_systemd_sockets_need_matching_pid()
+    test_supervisor_restarts_and_stops_workers()
+    print("\n✅ All server tests passed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for subtitle/chapter/metadata sidecars.
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.archive import DownloadArchive
+from yt_dlp_wizwam.sidecars import (
+    attach_sidecars, compact_info, parse_languages, sidecar_names, sidecar_ydl_opts, write_sidecars
+)
+
+
+def test_options():
+    """Language lists and yt-dlp options."""
+    assert parse_languages('en, de,,') == ['en', 'de']
+    assert parse_languages(None) == []
+    assert sidecar_ydl_opts([], False) == {}
+    opts = sidecar_ydl_opts(['en'], True)
+    assert opts['writesubtitles'] and opts['subtitleslangs'] == ['en']
+    assert opts['postprocessors'][0]['add_chapters']
+    print("✓ Sidecar options")
+
+
+def test_write_and_attach():
+    """Sidecars are written, indexed in the archive and attached to their media."""
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        media = tmp / 'Video [abc].mp4'
+        media.write_bytes(b'media')
+        subtitle = tmp / 'Video [abc].en.vtt'
+        subtitle.write_text('WEBVTT\n')
+        info = {
+            'id': 'abc',
+            'title': 'Video',
+            'formats': [{'url': 'https://example.com/'}] * 50,
+            'chapters': [{'start_time': 0, 'end_time': 10, 'title': 'Intro', 'extra': 1}],
+            'requested_subtitles': {'en': {'filepath': str(subtitle)}, 'de': {'filepath': None}},
+        }
+
+        sidecars = write_sidecars(info, media, info_json=True)
+        names = sidecar_names(sidecars)
+        assert names == {'subtitles': {'en': subtitle.name}, 'info_json': 'Video [abc].info.json'}
+        data = json.loads((tmp / names['info_json']).read_text())
+        assert 'formats' not in data and data['title'] == 'Video'
+        assert data['chapters'] == [{'start_time': 0, 'end_time': 10, 'title': 'Intro'}]
+        assert data == {**compact_info(info), 'subtitles': names['subtitles']}
+        print("✓ Compact info.json and subtitle index")
+
+        archive = DownloadArchive(tmp / 'archive.jsonl')
+        archive.record('generic abc', filename=media.name, sidecars=names)
+        files = [{'filename': name} for name in (media.name, subtitle.name, names['info_json'], 'other.mp4')]
+        listing = attach_sidecars(files, archive)
+        assert [f['filename'] for f in listing] == [media.name, 'other.mp4']
+        assert listing[0]['sidecars'] == names and 'sidecars' not in listing[1]
+        print("✓ Sidecars attached to their media in listings")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    print("Testing sidecars...\n")
+    test_options()
+    test_write_and_attach()
+    print("\n✅ All sidecar tests passed!")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test script for storage tiers (staging dir + archive dir).
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.archive import DownloadArchive
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam import storage
+
+
+def test_partial_detection():
+    """In-progress yt-dlp work files are never listed or moved."""
+    for name in ['a.mp4.part', 'a.f137.mp4', 'a.temp.mp4', 'a.mp4.ytdl',
+                 'a.mp4.part-Frag3', 'a.mp4.moving', '.hidden']:
+        assert storage.is_partial(Path(name)), name
+    for name in ['20240101_title_720p_avc1_mp4a__youtube_abc.mp4', 'song.m4a']:
+        assert not storage.is_partial(Path(name)), name
+    print("✓ Partial file detection")
+
+
+def test_tiers():
+    """Files in both tiers are listed as one view and moved to the archive."""
+    old_download, old_staging = Config.DOWNLOAD_DIR, Config.STAGING_DIR
+    old_verify = Config.FILE_VERIFICATION_ENABLED
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR = str(Path(tmp) / 'nas')
+        Config.STAGING_DIR = str(Path(tmp) / 'ssd')
+        Config.FILE_VERIFICATION_ENABLED = False
+        try:
+            Config.ensure_directories()
+            assert storage.staging_enabled()
+            assert storage.get_work_dir() == Path(Config.STAGING_DIR)
+
+            staged = Path(Config.STAGING_DIR) / 'new.mp4'
+            staged.write_bytes(b'x' * 1024)
+            (Path(Config.STAGING_DIR) / 'other.mp4.part').write_bytes(b'x')
+            (Path(Config.DOWNLOAD_DIR) / 'old.mp4').write_bytes(b'y' * 10)
+
+            listing = {f['name']: f['tier'] for f in storage.list_files()}
+            assert listing == {'new.mp4': 'staging', 'old.mp4': 'archive'}, listing
+            assert storage.resolve_file('new.mp4') == staged
+
+            future = storage.promote(staged)
+            assert future is not None
+            dest = future.result(timeout=10)
+            assert dest == Path(Config.DOWNLOAD_DIR) / 'new.mp4'
+            assert dest.read_bytes() == b'x' * 1024
+            assert not staged.exists()
+            assert storage.resolve_file('new.mp4') == dest
+            print("✓ Staging → archive move")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+            Config.FILE_VERIFICATION_ENABLED = old_verify
+
+
+def test_mover_keeps_archive_and_failures():
+    """An archive file is never replaced; failures are reported by wait(); deletes cancel queued moves."""
+    old_download, old_staging, old_archive = Config.DOWNLOAD_DIR, Config.STAGING_DIR, storage.get_archive
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR = str(Path(tmp) / 'nas')
+        Config.STAGING_DIR = str(Path(tmp) / 'ssd')
+        archive = DownloadArchive(Path(tmp) / 'archive.jsonl')
+        storage.get_archive = lambda: archive
+        try:
+            Config.ensure_directories()
+            mover = storage.TierMover(max_workers=1)
+            archived = Path(Config.DOWNLOAD_DIR) / 'dup.mp4'
+            archived.write_bytes(b'archived')
+            staged = Path(Config.STAGING_DIR) / 'dup.mp4'
+            staged.write_bytes(b'staged')
+            future = mover.submit(staged)
+            try:
+                future.result(timeout=10)
+                assert False, 'archive file replaced'
+            except FileExistsError:
+                pass
+            assert archived.read_bytes() == b'archived' and staged.exists()
+            # The move failed before wait() was called; it is still reported, once
+            assert mover.wait() == ['dup.mp4']
+            assert mover.wait() == []
+            print("✓ Archive files are not replaced; failed moves are reported")
+
+            # Occupy the only mover thread so the next move stays queued
+            release = threading.Event()
+            mover._executor.submit(release.wait)
+            queued = Path(Config.STAGING_DIR) / 'queued.mp4'
+            queued.write_bytes(b'q')
+            future = mover.submit(queued)
+            assert mover.delete(queued) and not queued.exists() and future.cancelled()
+            release.set()
+            assert mover.wait() == [] and mover.pending() == []
+            assert not (Path(Config.DOWNLOAD_DIR) / 'queued.mp4').exists()
+            print("✓ Deleting a staged file cancels its move")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+            storage.get_archive = old_archive
+
+
+def test_redownload_into_archived_name():
+    """A re-download of an archived video gives way to the archived file instead of failing."""
+    old_download, old_staging, old_archive = Config.DOWNLOAD_DIR, Config.STAGING_DIR, storage.get_archive
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR = str(Path(tmp) / 'nas')
+        Config.STAGING_DIR = str(Path(tmp) / 'ssd')
+        archive = DownloadArchive(Path(tmp) / 'archive.jsonl')
+        storage.get_archive = lambda: archive
+        try:
+            Config.ensure_directories()
+            mover = storage.TierMover(max_workers=1)
+            nas, ssd = Path(Config.DOWNLOAD_DIR), Path(Config.STAGING_DIR)
+            archive.record('youtube abc', filename='video.mp4')
+            for name in ('video.mp4', 'video.en.srt', 'copy.mp4'):
+                (nas / name).write_bytes(b'archived')
+
+            # The same video downloaded again (a new encode), with its subtitles
+            (ssd / 'video.mp4').write_bytes(b'downloaded again')
+            (ssd / 'video.en.srt').write_bytes(b'new subtitles')
+            assert mover.submit(ssd / 'video.mp4', 'youtube abc').result(10) == nas / 'video.mp4'
+            assert mover.submit(ssd / 'video.en.srt', 'youtube abc').result(10) == nas / 'video.en.srt'
+            # After a restart the key is not known; the archive still tells whose name it is
+            (ssd / 'video.mp4').write_bytes(b'interrupted move')
+            mover.submit(ssd / 'video.mp4').result(10)
+            # A byte-identical leftover of any file
+            (ssd / 'copy.mp4').write_bytes(b'archived')
+            mover.submit(ssd / 'copy.mp4').result(10)
+
+            assert not list(ssd.iterdir()) and mover.wait() == []
+            assert all((nas / name).read_bytes() == b'archived' for name in ('video.mp4', 'video.en.srt', 'copy.mp4'))
+            print("✓ Re-downloads into an archived name are not stuck in staging")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+            storage.get_archive = old_archive
+
+
+def test_verify_copy():
+    """Checksum verification rejects a corrupted copy."""
+    old_delay = Config.FILE_VERIFICATION_DELAY
+    Config.FILE_VERIFICATION_DELAY = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'copy.mp4'
+            path.write_bytes(b'abc')
+            storage.verify_copy(path, 3, storage.file_sha256(path))
+            try:
+                storage.verify_copy(path, 3, '0' * 64)
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError('checksum mismatch not detected')
+        print("✓ Copy verification")
+    finally:
+        Config.FILE_VERIFICATION_DELAY = old_delay
+
+
+if __name__ == '__main__':
+    test_partial_detection()
+    test_tiers()
+    test_mover_keeps_archive_and_failures()
+    test_redownload_into_archived_name()
+    test_verify_copy()
+    print("\nAll storage tests passed!")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental subscription polling.
+
+Uses a fake yt-dlp listing, so no network access is needed.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import subscriptions
+from yt_dlp_wizwam.archive import DownloadArchive, archive_key
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.subscriptions import SubscriptionStore, SubscriptionWatcher, list_new_entries
+
+
+class FakeChannel:
+    """Stand-in for yt_dlp.YoutubeDL listing a channel newest first."""
+
+    ids = [f'v{i}' for i in range(1000, 0, -1)]
+    pulled = 0
+
+    def __init__(self, opts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def extract_info(self, url, download=False, process=True):
+        def entries():
+            for video_id in FakeChannel.ids:
+                FakeChannel.pulled += 1
+                yield {'id': video_id, 'url': f'https://example.com/{video_id}', 'ie_key': 'Fake'}
+        return {'extractor_key': 'Fake', 'entries': entries()}
+
+
+def test_incremental_poll():
+    """First poll only sets the cursor; later polls stop at it."""
+    real = subscriptions.yt_dlp.YoutubeDL
+    subscriptions.yt_dlp.YoutubeDL = FakeChannel
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SubscriptionStore(Path(tmp) / 'subs.json')
+            archive = DownloadArchive(Path(tmp) / 'archive.jsonl')
+            queued = []
+            watcher = SubscriptionWatcher(store, lambda url, opts, owner: queued.append(url), archive)
+            sub = store.add('https://example.com/channel', interval=60, backfill=2)
+
+            # First poll: backfill 2 newest, remember cursor, don't walk 1000 entries
+            FakeChannel.pulled = 0
+            assert watcher.poll(store.get(sub['id'])) == 2
+            assert queued == ['https://example.com/v999', 'https://example.com/v1000']
+            assert FakeChannel.pulled <= subscriptions.CURSOR_SIZE + 1, FakeChannel.pulled
+
+            # Two new uploads: only they are enqueued, listing stops at the cursor
+            FakeChannel.ids = ['v1002', 'v1001'] + FakeChannel.ids
+            FakeChannel.pulled = 0
+            queued.clear()
+            assert watcher.poll(store.get(sub['id'])) == 2
+            assert queued == ['https://example.com/v1001', 'https://example.com/v1002']
+            assert FakeChannel.pulled == 3, FakeChannel.pulled
+
+            # Already archived entries also stop the listing
+            archive.record(archive_key('Fake', 'v1003'), filename='x.mp4')
+            FakeChannel.ids = ['v1004', 'v1003'] + FakeChannel.ids
+            entries, _ = list_new_entries(
+                {**store.get(sub['id']), 'cursor': ['nothing']}, archive
+            )
+            assert [e['id'] for e in entries] == ['v1004']
+            print("✓ Incremental polling")
+    finally:
+        subscriptions.yt_dlp.YoutubeDL = real
+
+
+def test_backlog_is_not_skipped():
+    """More new entries than WATCH_MAX_NEW are queued over several polls, oldest first."""
+    real, real_ids, real_max = subscriptions.yt_dlp.YoutubeDL, FakeChannel.ids, Config.WATCH_MAX_NEW
+    subscriptions.yt_dlp.YoutubeDL = FakeChannel
+    Config.WATCH_MAX_NEW = 2
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SubscriptionStore(Path(tmp) / 'subs.json')
+            archive = DownloadArchive(Path(tmp) / 'archive.jsonl')
+            queued = []
+            watcher = SubscriptionWatcher(store, lambda url, opts, owner: queued.append(url.rsplit('/', 1)[1]), archive)
+            FakeChannel.ids = [f'v{i}' for i in range(10, 0, -1)]
+            sub = store.add('https://example.com/channel', interval=60)
+            assert watcher.poll(store.get(sub['id'])) == 0
+
+            # Five uploads since the last poll: two per poll, none skipped
+            FakeChannel.ids = [f'n{i}' for i in range(5, 0, -1)] + FakeChannel.ids
+            assert [watcher.poll(store.get(sub['id'])) for _ in range(4)] == [2, 2, 1, 0]
+            assert queued == ['n1', 'n2', 'n3', 'n4', 'n5'], queued
+            print("✓ Backlog queued over several polls")
+    finally:
+        subscriptions.yt_dlp.YoutubeDL = real
+        FakeChannel.ids = real_ids
+        Config.WATCH_MAX_NEW = real_max
+
+if __name__ == '__main__':
+    test_incremental_poll()
+    test_backlog_is_not_skipped()
+    print("\nAll subscription tests passed!")
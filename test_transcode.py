@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for transcode profiles (no ffmpeg needed).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.transcode import PROFILES, CpuBudget, build_command, profile_fingerprint
+
+
+def test_target_size_bitrate():
+    """Target-size profiles derive the video bitrate from the duration."""
+    profile = PROFILES['whatsapp']
+    cmd = build_command('ffmpeg', Path('in.mp4'), Path('out.mp4'), profile, duration=120)
+    video_bitrate = int(cmd[cmd.index('-b:v') + 1].rstrip('k'))
+    total_kbit = (video_bitrate + profile['audio_bitrate']) * 120
+    assert total_kbit / 8 / 1024 <= profile['target_size_mb'], video_bitrate
+    assert str(profile['threads']) == cmd[cmd.index('-threads') + 1]
+
+    # Short clips are capped at the profile's maximum bitrate
+    cmd = build_command('ffmpeg', Path('in.mp4'), Path('out.mp4'), profile, duration=10)
+    assert cmd[cmd.index('-b:v') + 1] == f"{profile['max_video_bitrate']}k"
+    print("✓ Target size bitrate")
+
+
+def test_fingerprint():
+    """Thread count does not affect the cache key; encoding settings do."""
+    base = PROFILES['signal']
+    assert profile_fingerprint(base) == profile_fingerprint({**base, 'threads': 8})
+    assert profile_fingerprint(base) != profile_fingerprint({**base, 'max_height': 480})
+    print("✓ Profile fingerprint")
+
+
+def test_cpu_budget():
+    """Encodes only start while their threads fit the budget."""
+    budget = CpuBudget(4)
+    peak = []
+    lock = threading.Lock()
+    running = [0]
+
+    def encode(threads):
+        taken = budget.acquire(threads)
+        with lock:
+            running[0] += taken
+            peak.append(running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= taken
+        budget.release(taken)
+
+    workers = [threading.Thread(target=encode, args=(t,)) for t in (2, 2, 3, 1, 8)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert max(peak) <= 4, peak
+    assert budget.used == 0
+    print("✓ CPU budget")
+
+
+if __name__ == '__main__':
+    test_target_size_bitrate()
+    test_fingerprint()
+    test_cpu_budget()
+    print("\nAll transcode tests passed!")
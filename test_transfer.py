@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script for NAS transfers against a local stand-in upload server.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam.transfer import (
+    HTTPTarget, MountTarget, SFTPTarget, TransferManifest, TransferQueue, transfer_file
+)
+
+CHUNK = 64 * 1024
+
+
+class StandInNAS(BaseHTTPRequestHandler):
+    """PUT with Content-Range into files, HEAD, and MOVE with Destination."""
+
+    root = None
+    fail_after = None  # Fail PUTs after this many succeeded
+    confirm_checksum = True  # Answer MOVE with the checksum it checked
+    puts = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _path(self, url):
+        return self.root / unquote(urlparse(url).path).lstrip('/')
+
+    def do_HEAD(self):
+        path = self._path(self.path)
+        if not path.is_file():
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(path.stat().st_size))
+        self.end_headers()
+
+    def do_PUT(self):
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        with StandInNAS.lock:
+            if StandInNAS.fail_after is not None and StandInNAS.puts >= StandInNAS.fail_after:
+                self.send_response(503)
+                self.end_headers()
+                return
+            StandInNAS.puts += 1
+        start = int(self.headers['Content-Range'].split()[1].split('-')[0])
+        path = self._path(self.path)
+        with StandInNAS.lock:
+            with open(path, 'r+b' if path.exists() else 'wb') as f:
+                f.seek(start)
+                f.write(data)
+        self.send_response(201)
+        self.end_headers()
+
+    def do_MOVE(self):
+        source = self._path(self.path)
+        data = source.read_bytes()
+        if hashlib.sha256(data).hexdigest() != self.headers['X-Checksum-Sha256']:
+            self.send_response(409)
+            self.end_headers()
+            return
+        os.replace(source, self._path(self.headers['Destination']))
+        self.send_response(201)
+        if StandInNAS.confirm_checksum:
+            self.send_header('X-Checksum-Sha256', self.headers['X-Checksum-Sha256'])
+        self.end_headers()
+
+
+def make_source(directory: Path, size: int) -> Path:
+    source = directory / 'Video Title [720p].mp4'
+    source.write_bytes(os.urandom(size))
+    return source
+
+
+def test_http_resume():
+    """An interrupted HTTP push resumes with the missing chunks only."""
+    tmp = Path(tempfile.mkdtemp())
+    remote = tmp / 'nas'
+    remote.mkdir()
+    StandInNAS.root = remote
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInNAS)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        source = make_source(tmp, CHUNK * 10 + 123)
+        target = HTTPTarget(f'http://127.0.0.1:{server.server_port}')
+        manifest = TransferManifest(tmp / 'manifest.json')
+        kwargs = dict(target=target, manifest=manifest, chunk_size=CHUNK,
+                      parallel_chunks=4, state_dir=tmp / 'state')
+
+        # Connection drops after 4 chunks
+        StandInNAS.puts, StandInNAS.fail_after = 0, 4
+        result = transfer_file(source, **kwargs)
+        assert result['status'] == 'error', result
+        assert not (remote / source.name).exists()
+        print("✓ Interrupted transfer fails and keeps its state")
+
+        StandInNAS.puts, StandInNAS.fail_after = 0, None
+        result = transfer_file(source, **kwargs)
+        assert result['status'] == 'success', result
+        assert result['resumed'] and result['verified'] == 'sha256'
+        assert StandInNAS.puts == 11 - 4, StandInNAS.puts
+        assert (remote / source.name).read_bytes() == source.read_bytes()
+        assert not list((tmp / 'state').glob('*.json'))
+        print("✓ Resumed transfer sends only the missing chunks and verifies")
+
+        StandInNAS.puts = 0
+        result = transfer_file(source, **kwargs)
+        assert result['skipped'] and StandInNAS.puts == 0
+        print("✓ Already transferred file is skipped")
+
+        # A server that does not confirm the checksum: the size is checked, and reported as such
+        StandInNAS.confirm_checksum = False
+        other = tmp / 'Other.mp4'
+        other.write_bytes(os.urandom(CHUNK + 1))
+        result = transfer_file(other, **kwargs)
+        assert result['status'] == 'success' and result['verified'] == 'size', result
+        print("✓ Unconfirmed HTTP upload is verified by size only")
+    finally:
+        StandInNAS.confirm_checksum = True
+        server.shutdown()
+        shutil.rmtree(tmp)
+
+
+def test_mount_target():
+    """Mounted share: parallel pwrite chunks, atomic rename into place."""
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        (tmp / 'share').mkdir()
+        source = make_source(tmp, CHUNK * 5 + 7)
+        result = transfer_file(source, target=MountTarget(str(tmp / 'share')),
+                               manifest=TransferManifest(tmp / 'manifest.json'),
+                               chunk_size=CHUNK, parallel_chunks=3, state_dir=tmp / 'state')
+        assert result['status'] == 'success', result
+        assert (tmp / 'share' / source.name).read_bytes() == source.read_bytes()
+        assert not list((tmp / 'share').glob('*.part'))
+        print("✓ Mount target transfer")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_sftp_checksum_command_is_quoted():
+    """A title with quotes and ';' is hashed as one file name, never run as a command."""
+
+    class LocalShell:
+        # Stands in for the SSH connection: runs the command in a local shell
+        def exec_command(self, command, timeout=None):
+            proc = subprocess.run(command, shell=True, capture_output=True, cwd=tmp)
+            return None, BytesIO(proc.stdout), BytesIO(proc.stderr)
+
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        name = "It's done; touch injected; echo '.mp4"
+        (tmp / name).write_bytes(b'video')
+        target = SFTPTarget.__new__(SFTPTarget)
+        target._client = LocalShell()
+        assert target._remote_sha256(str(tmp / name)) == hashlib.sha256(b'video').hexdigest()
+        assert not (tmp / 'injected').exists()
+        print("✓ SFTP checksum command quotes the path")
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_queue_prunes_finished():
+    """Only the newest MAX_FINISHED finished transfers are kept."""
+    queue = TransferQueue(workers=1, maxsize=10)
+    queue.MAX_FINISHED = 2
+    for i in range(4):
+        queue._jobs[str(i)] = {'job_id': str(i), 'created': i, 'finished': i or None}
+    queue._prune()
+    assert sorted(queue._jobs) == ['0', '2', '3'], sorted(queue._jobs)
+    print("✓ Finished transfers are pruned")
+
+
+if __name__ == '__main__':
+    print("Testing NAS transfers...\n")
+    test_http_resume()
+    test_mount_target()
+    test_sftp_checksum_command_is_quoted()
+    test_queue_prunes_finished()
+    print("\n✅ All transfer tests passed!")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-user mode: tokens, fair-share scheduling, quotas and namespaces.
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from yt_dlp_wizwam import jobs, storage, subscriptions
+from yt_dlp_wizwam.archive import DownloadArchive
+from yt_dlp_wizwam.auth import AuthStore
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.subscriptions import SubscriptionStore, SubscriptionWatcher
+from yt_dlp_wizwam.users import QuotaExceeded, UserStore, request_token
+
+
+def test_tokens_and_settings():
+    """Tokens authenticate their user only; settings fall back to the defaults."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(Path(tmp) / 'users.json')
+        token = store.add('alice', weight=2, rate_limit='4M')
+        assert token and store.authenticate(token) == 'alice'
+        assert store.authenticate('wrong') is None and store.authenticate(None) is None
+        assert token not in (Path(tmp) / 'users.json').read_text()
+        assert store.add('alice', max_jobs=3) is None
+        alice = store.get('alice')
+        assert (alice['weight'], alice['max_jobs'], alice['rate_limit']) == (2.0, 3, '4M'), alice
+
+        rotated = store.rotate_token('alice')
+        assert store.authenticate(rotated) == 'alice' and store.authenticate(token) is None
+        # Another process (the CLI) adds a user; the running store sees it
+        other = UserStore(Path(tmp) / 'users.json').add('bob')
+        assert store.authenticate(other) == 'bob'
+
+        for bad in ('Alice', '../x', ''):
+            try:
+                store.add(bad)
+                assert False, bad
+            except ValueError:
+                pass
+
+        environ = {'HTTP_COOKIE': f'theme=dark; wizwam_token={rotated}'}
+        assert request_token(environ) == rotated
+        assert request_token({'HTTP_AUTHORIZATION': 'Bearer abc', **environ}) == 'abc'
+        assert request_token({'QUERY_STRING': 'token=xyz'}) == 'xyz'
+        print("✓ Tokens, settings and reloads")
+
+
+def test_fair_share_order():
+    """Owners get jobs in proportion to their weight; a newcomer gets no backlog of credit."""
+    weights = {'heavy': 2.0, 'light': 1.0, 'late': 1.0}
+    fair = jobs.FairQueue(lambda owner: {'weight': weights[owner], 'max_jobs': 0})
+    for i in range(30):
+        fair.put(jobs.Job(f'heavy:{i}', user='heavy'))
+        fair.put(jobs.Job(f'light:{i}', user='light'))
+    first = [fair.get() for _ in range(9)]
+    assert sum(job.user == 'heavy' for job in first) == 6, [job.user for job in first]
+    assert [job.url for job in first if job.user == 'light'] == ['light:0', 'light:1', 'light:2']
+
+    fair.put(jobs.Job('late:0', user='late'))
+    fair.put(jobs.Job('late:1', user='late'))
+    following = [fair.get().user for _ in range(8)]
+    assert following.count('late') == 2 and following.count('heavy') >= 4, following
+    print("✓ Weighted fair share across owners")
+
+
+def test_job_limit_and_release():
+    """An owner at its job limit waits; the others go ahead; release() frees the slot."""
+    fair = jobs.FairQueue(lambda owner: {'weight': 1.0, 'max_jobs': 1 if owner == 'a' else 0})
+    a1, a2, b1 = jobs.Job('a1', user='a'), jobs.Job('a2', user='a'), jobs.Job('b1', user='b')
+    for job in (a1, a2, b1):
+        fair.put(job)
+    assert fair.get() is a1 and fair.get() is b1
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(fair.get()), daemon=True)
+    waiter.start()
+    waiter.join(0.3)
+    assert not got and fair.active('a') == 1
+    fair.release(a1)
+    waiter.join(5)
+    assert got == [a2] and fair.active('a') == 1
+
+    # Cancelled jobs come out at once (to be finished), whatever the limit
+    a3 = jobs.Job('a3', user='a')
+    fair.put(a3)
+    a3.cancel_requested.set()
+    assert fair.get() is a3
+    print("✓ Job limits and slot release")
+
+
+def test_namespaces_and_quota():
+    """Each user downloads into their own folder; a full quota refuses new downloads."""
+    old_download, old_staging = Config.DOWNLOAD_DIR, Config.STAGING_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DOWNLOAD_DIR = str(Path(tmp) / 'downloads')
+        Config.STAGING_DIR = ''
+        try:
+            store = UserStore(Path(tmp) / 'users.json')
+            store.add('alice', storage_mb=1, rate_limit='2M', max_jobs=2)
+            options = store.download_options('alice')
+            assert options['namespace'] == 'alice' and options['rate_limit'] == 1024 * 1024
+            assert options['max_filesize'] == 1024 * 1024
+
+            work = storage.get_work_dir('alice')
+            assert work == Path(Config.DOWNLOAD_DIR) / 'users' / 'alice'
+            work.mkdir(parents=True)
+            (work / 'video.mp4').write_bytes(b'x' * 1024 * 1024)
+            (Path(Config.DOWNLOAD_DIR) / 'shared.mp4').write_bytes(b'y')
+            assert storage.namespace_of(work / 'video.mp4') == 'alice'
+            assert storage.namespace_of(Path(Config.DOWNLOAD_DIR) / 'shared.mp4') is None
+            assert [f['name'] for f in storage.list_files('alice')] == ['video.mp4']
+            assert [f['name'] for f in storage.list_files()] == ['shared.mp4']
+            assert storage.resolve_file('video.mp4') is None
+            assert storage.resolve_file('video.mp4', 'alice') == work / 'video.mp4'
+
+            # Usage measured before the file was written is reused until forgotten
+            store.forget_usage('alice')
+            try:
+                store.download_options('alice')
+                assert False, 'quota not enforced'
+            except QuotaExceeded:
+                pass
+            (work / 'video.mp4').unlink()
+            assert store.storage_used('alice') == 1024 * 1024
+            store.forget_usage('alice')
+            assert store.storage_used('alice') == 0
+            print("✓ Per-user folders and storage quota")
+        finally:
+            Config.DOWNLOAD_DIR, Config.STAGING_DIR = old_download, old_staging
+
+
+def test_subscription_owner():
+    """Each user's subscription to a channel is their own; its jobs are enqueued for them."""
+
+    class OneVideo:
+        def __init__(self, opts):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def extract_info(self, url, download=False, process=True):
+            return {'extractor_key': 'Fake', 'entries': [{'id': 'v1', 'url': 'https://example.com/v1'}]}
+
+    real = subscriptions.yt_dlp.YoutubeDL
+    subscriptions.yt_dlp.YoutubeDL = OneVideo
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SubscriptionStore(Path(tmp) / 'subs.json')
+            alice = store.add('https://example.com/channel', backfill=1, owner='alice')
+            bob = store.add('https://example.com/channel', backfill=1, owner='bob')
+            assert alice['id'] != bob['id'] and alice['owner'] == 'alice'
+            queued = []
+            watcher = SubscriptionWatcher(store, lambda url, opts, owner: queued.append((url, owner)),
+                                          DownloadArchive(Path(tmp) / 'archive.jsonl'))
+            watcher.poll(store.get(alice['id']))
+            watcher.poll(store.get(bob['id']))
+            assert queued == [('https://example.com/v1', 'alice'), ('https://example.com/v1', 'bob')], queued
+            print("✓ Subscriptions belong to their owner")
+    finally:
+        subscriptions.yt_dlp.YoutubeDL = real
+
+
+def test_auth_profiles_admin_only():
+    """A user's jobs cannot use the admin's auth profile, neither by name nor by host rule."""
+    resolved, downloaded = {}, {}
+
+    def fake_resolve(url, auth=None, **kwargs):
+        resolved[url] = auth
+        return {'url': url, 'info': {'id': url, 'title': url}, 'format': None, 'resolved_at': time.time()}
+
+    def fake_download(url, auth=None, **kwargs):
+        downloaded[url] = auth
+        return {'status': 'success', 'filename': f'/tmp/{url.rsplit("/", 1)[1]}.mp4', 'url': url}
+
+    originals = jobs.resolve_video, jobs.download_video, Config.DOWNLOAD_DIR
+    jobs.resolve_video, jobs.download_video = fake_resolve, fake_download
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            Config.DOWNLOAD_DIR = tmp
+            auth = AuthStore(Path(tmp) / 'auth')
+            auth.add('members', hosts=['example.com'])
+            assert auth.session('https://example.com/v').name == 'members'
+            assert auth.session('https://example.com/v', False) is None
+
+            store = UserStore(Path(tmp) / 'users.json')
+            store.add('root', admin=True)
+            store.add('bob')
+            assert store.download_options('bob')['auth'] is False
+            assert 'auth' not in store.download_options('root')
+
+            queue = jobs.JobQueue(download_workers=1, prefetch_workers=1, history=False, users=store)
+            named = queue.submit('https://example.com/named', {'auth': 'members'}, user='bob')
+            by_rule = queue.submit('https://example.com/rule', {}, user='bob')
+            admin = queue.submit('https://example.com/admin', {'auth': 'members'}, user='root')
+            for job in (named, by_rule, admin):
+                assert job.done.wait(10) and job.status == 'success', job.status
+            assert resolved['https://example.com/named'] is False and downloaded['https://example.com/named'] is False
+            assert resolved['https://example.com/rule'] is False and downloaded['https://example.com/rule'] is False
+            assert resolved['https://example.com/admin'] == downloaded['https://example.com/admin'] == 'members'
+            queue.shutdown(5)
+            print("✓ Auth profiles are for admins only")
+    finally:
+        jobs.resolve_video, jobs.download_video, Config.DOWNLOAD_DIR = originals
+
+
+if __name__ == '__main__':
+    print("Testing multi-user mode...\n")
+    test_tokens_and_settings()
+    test_fair_share_order()
+    test_job_limit_and_release()
+    test_namespaces_and_quota()
+    test_subscription_owner()
+    test_auth_profiles_admin_only()
+    print("\n✅ All multi-user tests passed!")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for process worker mode: limits, crash and cancel recovery, recycling.
+
+The worker processes run fake_download from this file instead of download_video.
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import resource
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.workers import WorkerPool
+
+TARGET = 'test_workers:fake_download'
+
+
+def fake_download(url, progress_callback=None, cancel_event=None, checkpoint_event=None, **kwargs):
+    """Stand-in for download_video, run in the worker process."""
+    if url == 'crash':
+        os._exit(3)
+    if url == 'hang':
+        while True:  # Ignores cancellation
+            time.sleep(1)
+    if url.startswith('burn:'):
+        started = time.process_time()
+        while time.process_time() - started < float(url[5:]):
+            pass
+    progress_callback('downloading', 50.0, url)
+    return {
+        'status': 'success',
+        'url': url,
+        'pid': os.getpid(),
+        'cpu_limit': resource.getrlimit(resource.RLIMIT_CPU),
+        'memory_limit': resource.getrlimit(resource.RLIMIT_AS)[0],
+    }
+
+
+def with_limits(memory_mb, cpu_seconds, grace=None):
+    """Set worker limits for a test; returns a function restoring them."""
+    old = Config.WORKER_MEMORY_LIMIT_MB, Config.WORKER_CPU_LIMIT, Config.WORKER_CANCEL_GRACE
+    Config.WORKER_MEMORY_LIMIT_MB, Config.WORKER_CPU_LIMIT = memory_mb, cpu_seconds
+    if grace is not None:
+        Config.WORKER_CANCEL_GRACE = grace
+
+    def restore():
+        Config.WORKER_MEMORY_LIMIT_MB, Config.WORKER_CPU_LIMIT, Config.WORKER_CANCEL_GRACE = old
+    return restore
+
+
+def test_limits_per_job():
+    """The CPU budget is per job in a reused worker; a job over it ends only its worker."""
+    restore = with_limits(2048, 2)
+    pool = WorkerPool(1, target=TARGET)
+    try:
+        progress = []
+        first = pool.run('burn:1.2', progress_callback=lambda *args: progress.append(args))
+        second = pool.run('burn:1.2')
+        assert first['status'] == second['status'] == 'success', (first, second)
+        # 2.4s of CPU in one process: would have exceeded a process-wide limit of 2s
+        assert first['pid'] == second['pid']
+        assert second['memory_limit'] == 2048 * 1024 * 1024
+        soft, hard = second['cpu_limit']
+        assert hard == resource.RLIM_INFINITY and 2 < soft <= 6, (soft, hard)
+        assert progress == [('downloading', 50.0, 'burn:1.2')]
+
+        runaway = pool.run('burn:30')
+        assert runaway['status'] == 'error' and 'exited unexpectedly' in runaway['error'], runaway
+        print("✓ Per-job CPU budget and memory limit")
+    finally:
+        pool.shutdown(10)
+        restore()
+
+
+def test_crash_and_cancel_recovery():
+    """A crashed or unresponsive worker is replaced for the next job."""
+    restore = with_limits(0, 0, grace=0.5)
+    pool = WorkerPool(1, target=TARGET)
+    try:
+        before = pool.run('ok')['pid']
+        crashed = pool.run('crash')
+        assert crashed['status'] == 'error' and 'code 3' in crashed['error'], crashed
+        after_crash = pool.run('ok')
+        assert after_crash['status'] == 'success' and after_crash['pid'] != before
+
+        cancel = threading.Event()
+        threading.Timer(1.0, cancel.set).start()
+        started = time.monotonic()
+        assert pool.run('hang', cancel_event=cancel)['status'] == 'cancelled'
+        assert time.monotonic() - started < 10
+        after_hang = pool.run('ok')
+        assert after_hang['status'] == 'success' and after_hang['pid'] != after_crash['pid']
+        print("✓ Crash and cancel recovery")
+    finally:
+        pool.shutdown(10)
+        restore()
+
+
+def test_recycling():
+    """Workers are replaced after max_jobs jobs."""
+    restore = with_limits(0, 0)
+    pool = WorkerPool(1, max_jobs=2, target=TARGET)
+    try:
+        pids = [pool.run('ok')['pid'] for _ in range(3)]
+        assert pids[0] == pids[1] != pids[2], pids
+        print("✓ Worker recycling")
+    finally:
+        pool.shutdown(10)
+        restore()
+
+
+if __name__ == '__main__':
+    print("Testing worker processes...\n")
+    test_limits_per_job()
+    test_crash_and_cancel_recovery()
+    test_recycling()
+    print("\n✅ All worker tests passed!")
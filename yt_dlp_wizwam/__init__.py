@@ -12,5 +12,21 @@ __license__ = 'MIT'
 # Expose main components
 from yt_dlp_wizwam.cli import main
 from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.exceptions import DownloadCancelled, DownloadError, DownloaderClosed, WizwamError
 
-__all__ = ['main', 'Config', '__version__']
+# Python API (imported on first use: it loads yt-dlp)
+_API_NAMES = ('Downloader', 'DownloadFuture', 'DownloadResult', 'PlaylistResult', 'Progress')
+
+
+def __getattr__(name):
+    if name in _API_NAMES:
+        from yt_dlp_wizwam import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    'main', 'Config', '__version__',
+    'Downloader', 'DownloadFuture', 'DownloadResult', 'PlaylistResult', 'Progress',
+    'WizwamError', 'DownloadError', 'DownloadCancelled', 'DownloaderClosed',
+]
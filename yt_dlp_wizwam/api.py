@@ -0,0 +1,373 @@
+"""
+Python API for yt-dlp-wizwam.
+
+A Downloader is a long-lived object for services that embed the package:
+its job queue, prefetch and download workers (or worker processes) are
+started once and reused by every download, instead of being set up for
+each download_video() call.
+
+    from yt_dlp_wizwam import Downloader
+
+    with Downloader(quality='1080p') as dl:
+        result = dl.download('https://youtube.com/watch?v=...')
+        print(result.filename, result.filesize)
+
+        future = dl.submit(url)
+        for update in future.progress():
+            print(update.phase, update.percent)
+
+        results = dl.download_many(urls, concurrency=4, return_exceptions=True)
+
+        clip = dl.download(url, start='1:02:00', end='1:02:30')
+
+        playlist = dl.download(channel_url)     # PlaylistResult: entries queued one by one
+
+    async with Downloader() as dl:
+        result = await dl.adownload(url)
+
+Failures raise typed exceptions (see exceptions.py) instead of returning
+{'status': 'error'} dicts.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.exceptions import DownloadCancelled, DownloadError, DownloaderClosed
+from yt_dlp_wizwam.jobs import Job, JobQueue
+from yt_dlp_wizwam.storage import resolve_file
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a progress stream
+_DONE = object()
+
+
+class Progress(NamedTuple):
+    """One progress update of a download."""
+
+    phase: str
+    percent: float
+    message: str
+
+
+@dataclass(frozen=True)
+class DownloadResult:
+    """A finished download."""
+
+    url: str
+    filename: Path
+    filesize: int
+    title: str
+    job_id: str
+    tier: str = 'archive'
+    sidecars: Dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(
+        cls, result: Dict, job_id: str, namespace: Optional[str] = None
+    ) -> 'DownloadResult':
+        """
+        Build from a successful download_video() result dict.
+
+        Raises:
+            FileNotFoundError: If the file is in neither storage tier
+        """
+        path = Path(result['filename'])
+        try:
+            size = path.stat().st_size
+        except OSError:
+            # Already moved out of the staging tier (into the namespace's folder)
+            moved = resolve_file(path.name, namespace)
+            if moved is None:
+                raise FileNotFoundError(f'{path.name} is in neither storage tier')
+            size = moved.stat().st_size
+        return cls(
+            url=result.get('url', ''),
+            filename=path,
+            filesize=size,
+            title=result.get('title', ''),
+            job_id=job_id,
+            tier=result.get('tier', 'archive'),
+            sidecars=result.get('sidecars', {}),
+        )
+
+
+@dataclass(frozen=True)
+class PlaylistResult:
+    """A finished playlist or channel; its entries were downloaded as jobs of their own."""
+
+    url: str
+    title: str
+    job_id: str
+    entries: int
+    downloaded: int
+    skipped: int
+
+    @classmethod
+    def from_dict(cls, result: Dict, job_id: str) -> 'PlaylistResult':
+        """Build from a successful playlist job result."""
+        return cls(
+            url=result.get('url', ''),
+            title=result.get('title', ''),
+            job_id=job_id,
+            entries=result.get('entries', 0),
+            downloaded=result.get('downloaded', 0),
+            skipped=result.get('skipped', 0),
+        )
+
+
+def _exception_for(result: Dict, job_id: str) -> DownloadError:
+    """Typed exception for a failed download_video() result."""
+    url = result.get('url')
+    if result.get('status') == 'cancelled':
+        return DownloadCancelled('Download cancelled', url=url, job_id=job_id)
+    return DownloadError(result.get('error', 'Unknown error'), url=url, job_id=job_id)
+
+
+class DownloadFuture(Future):
+    """Future of a DownloadResult (PlaylistResult for playlists) with cancellation and a progress stream."""
+
+    def __init__(self, downloader: 'Downloader', url: str):
+        super().__init__()
+        self.url = url
+        self.job_id: Optional[str] = None
+        self._downloader = downloader
+        self._updates = queue.Queue()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the download (queued or running).
+
+        The future then fails with DownloadCancelled once the download has stopped.
+        """
+        if self.done() or self.job_id is None:
+            return False
+        return self._downloader._queue.cancel(self.job_id)
+
+    def progress(self, timeout: Optional[float] = None) -> Iterator[Progress]:
+        """
+        Iterate over progress updates until the download finishes.
+
+        Args:
+            timeout: Seconds to wait for each update (None: no limit)
+
+        Raises:
+            queue.Empty: If no update arrives within timeout
+        """
+        while True:
+            update = self._updates.get(timeout=timeout)
+            if update is _DONE:
+                # Let other iterators (and repeated calls) see the end as well
+                self._updates.put(_DONE)
+                return
+            yield update
+
+    async def aprogress(self) -> AsyncIterator[Progress]:
+        """Async variant of progress()."""
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await loop.run_in_executor(None, self._updates.get)
+            if update is _DONE:
+                self._updates.put(_DONE)
+                return
+            yield update
+
+    def _report(self, phase: str, percent: float, message: str):
+        self._updates.put(Progress(phase, percent, message))
+
+    def _finish(self, job: Job):
+        self._updates.put(_DONE)
+        if job.result.get('status') == 'success' and job.result.get('playlist'):
+            self.set_result(PlaylistResult.from_dict(job.result, job.job_id))
+        elif job.result.get('status') == 'success':
+            try:
+                namespace = job.options.get('namespace')
+                self.set_result(DownloadResult.from_dict(job.result, job.job_id, namespace))
+            except OSError as e:
+                self.set_exception(DownloadError(f'Downloaded file not found: {e}',
+                                                 url=self.url, job_id=job.job_id))
+        else:
+            self.set_exception(_exception_for(job.result, job.job_id))
+
+
+class Downloader:
+    """Reusable downloader with futures, batch and async interfaces."""
+
+    def __init__(
+        self,
+        download_dir: Optional[Union[str, Path]] = None,
+        concurrency: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        worker_mode: Optional[str] = None,
+        **defaults
+    ):
+        """
+        Initialize downloader; workers start with the first download.
+
+        Args:
+            download_dir: Output directory (sets Config.DOWNLOAD_DIR, which is process-wide)
+            concurrency: Concurrent downloads (default: Config.MAX_CONCURRENT_DOWNLOADS)
+            prefetch: Concurrent extractions (default: Config.PREFETCH_CONCURRENCY)
+            worker_mode: 'thread' or 'process' (default: Config.WORKER_MODE)
+            **defaults: Default download_video options for every download
+                        (quality, video_codec, audio_codec, audio_only, subtitles, ...)
+        """
+        if download_dir is not None:
+            Config.DOWNLOAD_DIR = str(download_dir)
+        Config.ensure_directories()
+        self.defaults = defaults
+        self._futures: Dict[str, DownloadFuture] = {}
+        self._lock = threading.Lock()
+        self._queue = JobQueue(
+            download_workers=concurrency,
+            prefetch_workers=prefetch,
+            on_done=self._on_done,
+            worker_mode=worker_mode,
+        )
+
+    def submit(self, url: str, **options) -> DownloadFuture:
+        """
+        Queue a download.
+
+        Args:
+            url: Video URL
+            **options: download_video options overriding the defaults
+                       (e.g. start/end or chapter for a clip)
+
+        Returns:
+            DownloadFuture resolving to a DownloadResult
+
+        Raises:
+            DownloaderClosed: If close() was called
+        """
+        future = DownloadFuture(self, url)
+        future.set_running_or_notify_cancel()
+        try:
+            job = self._queue.submit(url, {**self.defaults, **options},
+                                     progress_callback=future._report)
+        except RuntimeError as e:
+            raise DownloaderClosed(str(e)) from e
+        future.job_id = job.job_id
+        with self._lock:
+            self._futures[job.job_id] = future
+        # The job may have finished before it was registered
+        if job.done.is_set():
+            self._on_done(job)
+        return future
+
+    def download(self, url: str, timeout: Optional[float] = None, **options) -> DownloadResult:
+        """
+        Download one video (or every video of a playlist/channel) and wait for it.
+
+        Raises:
+            DownloadError: If the download failed
+            DownloadCancelled: If it was cancelled
+        """
+        return self.submit(url, **options).result(timeout)
+
+    def download_many(
+        self,
+        urls: Iterable[str],
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+        **options
+    ) -> List[Union[DownloadResult, DownloadError]]:
+        """
+        Download several videos and wait for all of them.
+
+        Args:
+            urls: Video URLs
+            concurrency: Downloads of this batch in the queue at once (default:
+                         no limit beyond the downloader's own concurrency)
+            return_exceptions: Return exceptions in place of failed results
+                               instead of raising the first one
+            **options: download_video options overriding the defaults
+
+        Returns:
+            Results in the order of urls
+        """
+        urls = list(urls)
+        slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        futures = []
+        for url in urls:
+            if slots is not None:
+                slots.acquire()
+            try:
+                future = self.submit(url, **options)
+            except BaseException:
+                if slots is not None:
+                    slots.release()
+                raise
+            if slots is not None:
+                future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except DownloadError as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    async def adownload(self, url: str, **options) -> DownloadResult:
+        """Async variant of download()."""
+        return await asyncio.wrap_future(self.submit(url, **options))
+
+    async def adownload_many(
+        self,
+        urls: Iterable[str],
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+        **options
+    ) -> List[Union[DownloadResult, DownloadError]]:
+        """Async variant of download_many()."""
+        slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def one(url):
+            if slots is None:
+                return await self.adownload(url, **options)
+            async with slots:
+                return await self.adownload(url, **options)
+
+        return await asyncio.gather(*(one(url) for url in urls), return_exceptions=return_exceptions)
+
+    def cancel(self, future: DownloadFuture) -> bool:
+        """Cancel a download; same as future.cancel()."""
+        return future.cancel()
+
+    def close(self, timeout: float = 30.0) -> bool:
+        """
+        Stop accepting downloads and cancel unfinished ones.
+
+        Returns:
+            True if everything stopped within the timeout
+        """
+        return self._queue.shutdown(timeout)
+
+    def _on_done(self, job: Job):
+        with self._lock:
+            future = self._futures.pop(job.job_id, None)
+        if future is not None and not future.done():
+            future._finish(job)
+
+    def __enter__(self) -> 'Downloader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self) -> 'Downloader':
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,121 @@
+"""
+Download archive for yt-dlp-wizwam.
+
+Records every successful download as "{extractor} {id}" (the key format of
+yt-dlp's --download-archive) together with the file it produced. Stored as
+append-only JSON lines and loaded once into memory.
+
+In multi-user mode keys are prefixed with the user's namespace
+("alice:youtube dQw4w9WgXcQ"): every user has their own copy of a video.
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def archive_key(extractor: str, video_id: str, namespace: Optional[str] = None) -> str:
+    """Archive key for a video (same format as yt-dlp's download archive, prefixed by a namespace)."""
+    key = f'{extractor.lower()} {video_id}'
+    return f'{namespace}:{key}' if namespace else key
+
+
+class DownloadArchive:
+    """In-memory index of downloaded videos backed by a JSON-lines file."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize archive.
+
+        Args:
+            path: Archive file (default: Config.ARCHIVE_FILE)
+        """
+        self.path = Path(path or Config.ARCHIVE_FILE)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._by_filename: Dict[str, str] = {}
+        self._offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Index entries appended since the last read (e.g. by worker processes)."""
+        if not self.path.exists():
+            return
+        with self._lock, open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    # Partial line still being written
+                    break
+                self._offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt archive line in {self.path}")
+                    continue
+                self._index(entry)
+
+    def _index(self, entry: Dict):
+        self._entries[entry['key']] = entry
+        if entry.get('filename'):
+            self._by_filename[(entry.get('namespace'), entry['filename'])] = entry['key']
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Archive entry for a key."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def lookup_filename(self, filename: str, namespace: Optional[str] = None) -> Optional[str]:
+        """Key of the video that produced filename (in a namespace), if any."""
+        with self._lock:
+            return self._by_filename.get((namespace, filename))
+
+    def record(self, key: str, **fields) -> Dict:
+        """
+        Record a downloaded video.
+
+        Args:
+            key: Archive key (see archive_key())
+            **fields: Extra fields to store (filename, namespace, url, title, ...)
+
+        Returns:
+            The stored entry
+        """
+        entry = {'key': key, 'time': time.time(), **fields}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            self._index(entry)
+        return entry
+
+
+_archive: Optional[DownloadArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> DownloadArchive:
+    """Get the shared archive instance."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive()
+        return _archive
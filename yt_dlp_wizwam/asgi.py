@@ -0,0 +1,198 @@
+"""
+Asyncio server mode for yt-dlp-wizwam.
+
+Serves the web interface as an ASGI application under uvicorn instead of
+eventlet's monkeypatched hub:
+
+- Socket.IO runs on python-socketio's AsyncServer on the asyncio loop
+- Flask routes run through asgiref's WsgiToAsgi in its thread pool
+- Downloads run in the job queue's worker threads; their events are handed
+  to the loop with run_coroutine_threadsafe
+
+On shutdown (SIGTERM or Ctrl+C) the job queue drains: it stops accepting
+jobs and lets running downloads finish (Config.SHUTDOWN_TIMEOUT) before the
+loop exits; jobs cut short are resumed on the next start.
+
+Requires the optional dependencies: pip install yt-dlp-wizwam[asyncio]
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+from typing import Dict, Optional
+
+import socketio as python_socketio
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.events import event_log
+from yt_dlp_wizwam.executor import watchdog
+from yt_dlp_wizwam.users import get_user_store, request_token, user_room
+
+try:
+    import uvicorn
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # Optional: pip install yt-dlp-wizwam[asyncio]
+    uvicorn = None
+    WsgiToAsgi = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    """Return True if the asyncio server dependencies are installed."""
+    return uvicorn is not None and WsgiToAsgi is not None
+
+
+class LoopEmitter:
+    """Thread-safe bridge from job workers to AsyncServer.emit on the loop."""
+
+    def __init__(self, sio: python_socketio.AsyncServer):
+        self.sio = sio
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach to the running loop (called at startup)."""
+        self.loop = loop
+        self._loop_thread = threading.get_ident()
+
+    def __call__(self, event: str, data: Dict, to: Optional[str] = None):
+        if self.loop is None or self.loop.is_closed():
+            return
+        if threading.get_ident() == self._loop_thread:
+            self.loop.create_task(self.sio.emit(event, data, to=to))
+        else:
+            asyncio.run_coroutine_threadsafe(self.sio.emit(event, data, to=to), self.loop)
+
+
+def _client_manager() -> Optional[python_socketio.AsyncManager]:
+    """Message queue client manager, so events reach the clients of every web worker."""
+    url = Config.SOCKETIO_MESSAGE_QUEUE
+    if not url:
+        return None
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return python_socketio.AsyncRedisManager(url)
+    return python_socketio.AsyncAioPikaManager(url)
+
+
+def create_asgi_app(primary: bool = True):
+    """
+    Build the ASGI application.
+
+    Args:
+        primary: Run the once-per-server duties (see server.py)
+
+    Returns:
+        socketio.ASGIApp wrapping the Flask app
+
+    Raises:
+        RuntimeError: If uvicorn/asgiref are not installed
+    """
+    if not is_available():
+        raise RuntimeError(
+            'The asyncio server needs uvicorn and asgiref: pip install yt-dlp-wizwam[asyncio]'
+        )
+
+    from yt_dlp_wizwam.web import create_app
+
+    # Flask routes and job workers run in plain threads; no monkeypatching
+    flask_app = create_app(async_mode='threading', primary=primary)
+    job_queue = flask_app.extensions['job_queue']
+
+    origins = Config.CORS_ORIGINS
+    sio = python_socketio.AsyncServer(
+        async_mode='asgi',
+        client_manager=_client_manager(),
+        cors_allowed_origins='*' if origins == ['*'] else origins,
+        ping_timeout=60,
+        ping_interval=25,
+    )
+    emitter = LoopEmitter(sio)
+    event_log.set_emitter(emitter)
+    users = get_user_store() if Config.MULTI_USER else None
+
+    async def replay(sid, since, epoch):
+        try:
+            since = int(since) if since is not None else None
+        except (TypeError, ValueError):
+            since = None
+        room = (await sio.get_session(sid)).get('room')
+        for record in event_log.replay(since, epoch, room):
+            await sio.emit(record['event'], record['data'], to=sid)
+
+    @sio.event
+    async def connect(sid, environ, auth=None):
+        auth = auth if isinstance(auth, dict) else {}
+        if users is not None:
+            # Multi-user mode: the user's own room; their events go there only
+            token = auth.get('token') or request_token(environ)
+            user = await asyncio.get_running_loop().run_in_executor(None, users.authenticate, token)
+            if user is None:
+                raise python_socketio.exceptions.ConnectionRefusedError('Authentication required')
+            await sio.enter_room(sid, user_room(user))
+            await sio.save_session(sid, {'room': user_room(user)})
+        await sio.emit('connected', {'version': Config.VERSION, 'epoch': event_log.epoch}, to=sid)
+        await replay(sid, auth.get('since'), auth.get('epoch'))
+
+    @sio.event
+    async def resume(sid, data=None):
+        data = data if isinstance(data, dict) else {}
+        await replay(sid, data.get('since'), data.get('epoch'))
+
+    @sio.event
+    async def ping(sid):
+        await sio.emit('pong', {'timestamp': 'now'}, to=sid)
+
+    tasks = []
+
+    async def on_startup():
+        emitter.bind(asyncio.get_running_loop())
+        tasks.append(asyncio.create_task(watchdog.run_async()))
+        logger.info("Asyncio server started")
+
+    async def on_shutdown():
+        for task in tasks:
+            task.cancel()
+        logger.info("Draining jobs before shutdown...")
+        flask_app.extensions['health'].begin_drain()
+        loop = asyncio.get_running_loop()
+        drained = await loop.run_in_executor(None, job_queue.drain, Config.SHUTDOWN_TIMEOUT)
+        if not drained:
+            logger.warning("Some jobs were still running at shutdown")
+
+    return python_socketio.ASGIApp(
+        sio,
+        other_asgi_app=WsgiToAsgi(flask_app),
+        on_startup=on_startup,
+        on_shutdown=on_shutdown,
+    )
+
+
+def run(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    debug: bool = False,
+    sock: Optional[socket.socket] = None,
+    primary: bool = True
+):
+    """
+    Run the asyncio server with uvicorn.
+
+    Args:
+        host: Host to bind to (unless sock is given)
+        port: Port to listen on (unless sock is given)
+        debug: Verbose server logging
+        sock: Listening socket to serve on (see server.py)
+        primary: Run the once-per-server duties (see server.py)
+    """
+    app = create_asgi_app(primary=primary)
+    config = uvicorn.Config(
+        app,
+        host=host or Config.HOST,
+        port=port or Config.PORT,
+        log_level='debug' if debug else 'warning',
+        lifespan='on',
+        timeout_graceful_shutdown=Config.SHUTDOWN_TIMEOUT,
+    )
+    uvicorn.Server(config).run(sockets=[sock] if sock is not None else None)
@@ -0,0 +1,183 @@
+"""
+Static asset pipeline and response caching for yt-dlp-wizwam.
+
+At startup every file under static/ is content-hashed and copied to
+ASSET_CACHE_DIR as name.<hash>.ext together with gzip (and brotli, if the
+optional brotli package is installed) precompressed variants. Templates
+reference assets through asset_url(), and /assets/ serves them with a
+one-year immutable Cache-Control, so repeat page loads need no revalidation.
+
+ResponseCache memoizes small JSON/HTML payloads with ETags for conditional
+requests.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from flask import Response, request, send_file, url_for
+
+from yt_dlp_wizwam.config import Config
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install yt-dlp-wizwam[brotli]
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Files worth precompressing
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json', '.txt', '.ico', '.map')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class AssetPipeline:
+    """Fingerprint and precompress static files."""
+
+    def __init__(self, static_dir: Path, out_dir: Optional[Path] = None):
+        """
+        Initialize pipeline.
+
+        Args:
+            static_dir: Source static directory
+            out_dir: Output directory (default: Config.ASSET_CACHE_DIR)
+        """
+        self.static_dir = Path(static_dir)
+        self.out_dir = Path(out_dir or Config.ASSET_CACHE_DIR)
+        # 'js/app.js' -> 'js/app.3f2a9c1b7d4e.js'
+        self.manifest: Dict[str, str] = {}
+        # 'js/app.3f2a9c1b7d4e.js' -> (path, mimetype, {'br': path, 'gzip': path})
+        self._files: Dict[str, Tuple[Path, str, Dict[str, Path]]] = {}
+
+    def build(self) -> Dict[str, str]:
+        """
+        Hash, copy and compress all static files.
+
+        Returns:
+            Manifest mapping logical names to fingerprinted names
+        """
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        keep = set()
+
+        for src in sorted(self.static_dir.rglob('*')):
+            if not src.is_file():
+                continue
+            logical = src.relative_to(self.static_dir).as_posix()
+            data = src.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            fingerprinted = str(Path(logical).with_name(f'{src.stem}.{digest}{src.suffix}').as_posix())
+
+            dest = self.out_dir / fingerprinted
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if not dest.exists():
+                shutil.copyfile(src, dest)
+            keep.add(dest)
+
+            variants = {}
+            if src.suffix.lower() in COMPRESSIBLE:
+                variants = self._compress(dest, data)
+                keep.update(variants.values())
+
+            mimetype = mimetypes.guess_type(src.name)[0] or 'application/octet-stream'
+            self.manifest[logical] = fingerprinted
+            self._files[fingerprinted] = (dest, mimetype, variants)
+
+        # Drop outputs of previous builds
+        for path in self.out_dir.rglob('*'):
+            if path.is_file() and path not in keep:
+                path.unlink()
+
+        logger.info(f"Built {len(self.manifest)} fingerprinted assets in {self.out_dir}")
+        return self.manifest
+
+    @staticmethod
+    def _compress(dest: Path, data: bytes) -> Dict[str, Path]:
+        variants = {}
+        gz = dest.with_name(dest.name + '.gz')
+        if not gz.exists():
+            gz.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if gz.stat().st_size < len(data):
+            variants['gzip'] = gz
+        if brotli is not None:
+            br = dest.with_name(dest.name + '.br')
+            if not br.exists():
+                br.write_bytes(brotli.compress(data, quality=11))
+            if br.stat().st_size < len(data):
+                variants['br'] = br
+        return variants
+
+    def asset_url(self, logical: str) -> str:
+        """URL for a static file; falls back to /static/ if it is not in the manifest."""
+        fingerprinted = self.manifest.get(logical)
+        if fingerprinted is None:
+            return url_for('static', filename=logical)
+        return url_for('serve_asset', name=fingerprinted)
+
+    def serve(self, name: str):
+        """Serve a fingerprinted asset, picking the best precompressed variant."""
+        entry = self._files.get(name)
+        if entry is None:
+            return Response('Not found', status=404)
+        path, mimetype, variants = entry
+
+        encoding = None
+        accepted = request.accept_encodings
+        for candidate in ('br', 'gzip'):
+            if candidate in variants and accepted[candidate]:
+                encoding = candidate
+                path = variants[candidate]
+                break
+
+        response = send_file(path, mimetype=mimetype, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+
+class ResponseCache:
+    """Memoize rendered payloads keyed on their inputs and serve them with ETags."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[bytes, str]] = {}
+
+    def get(self, key: Hashable, render: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """Cached (body, etag) for key, rendering on first use."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            body = render()
+            entry = (body, hashlib.sha256(body).hexdigest()[:16])
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def respond(self, key: Hashable, render: Callable[[], bytes], mimetype: str) -> Response:
+        """
+        Build a response for a cached payload; 304 if the client already has it.
+
+        The client must revalidate (no-cache), but the body is only re-sent
+        when the payload changed.
+        """
+        body, etag = self.get(key, render)
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def json(self, key: Hashable, build: Callable[[], Dict]) -> Response:
+        """Cached JSON response."""
+        return self.respond(key, lambda: json.dumps(build()).encode(), 'application/json')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
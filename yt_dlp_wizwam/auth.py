@@ -0,0 +1,309 @@
+"""
+Auth profiles for yt-dlp-wizwam.
+
+A profile is a named set of cookies (Netscape cookies.txt), extra HTTP
+headers and an optional user agent, for members-only, age-gated and other
+logged-in content. Profiles live in AUTH_DIR (0700, files 0600):
+
+    profiles.json        name → headers, user agent, host rules
+    <name>.cookies.txt   the profile's cookie jar
+
+A job uses the profile it names, or else the profile with the most
+specific host rule matching its URL ("youtube.com" also matches
+"www.youtube.com" and "music.youtube.com"). Cookie jars are loaded once and shared in memory by
+all jobs of a profile, so a session warmed up by one job (consent and
+visitor cookies, refreshed login tokens) is reused by the next one
+without another round of challenges. Cookies changed by a job are
+written back atomically when it finishes.
+
+In process worker mode each worker process keeps its own copy; the last
+write-back wins.
+
+Profiles are server-wide and managed by admins. In multi-user mode only
+admins' jobs use them, by name or by host rule; other users' jobs carry
+auth=False (see users.UserStore.download_options).
+"""
+
+import copy
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+from yt_dlp.cookies import YoutubeDLCookieJar
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+_NAME_RE = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+def _write_private(path: Path, text: str):
+    """Atomically write a file only the owner can read."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        # mkstemp creates the file 0600
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _jar_state(jar: YoutubeDLCookieJar) -> frozenset:
+    return frozenset((c.domain, c.path, c.name, c.value, c.expires) for c in jar)
+
+
+def host_matches(host: str, rule: str) -> bool:
+    """Whether a host matches a host rule ("example.com" or "*.example.com")."""
+    rule = rule.lower().lstrip('*.')
+    return host == rule or host.endswith('.' + rule)
+
+
+class AuthSession:
+    """A profile's live session: shared cookie jar and request headers."""
+
+    def __init__(self, name: str, jar: YoutubeDLCookieJar, headers: Dict[str, str]):
+        self.name = name
+        self.jar = jar
+        self.headers = headers
+
+    def attach(self, ydl):
+        """
+        Make a YoutubeDL instance use this session's cookie jar.
+
+        Must be called before the instance makes its first request.
+        """
+        # YoutubeDL.cookiejar is a cached property; setting it skips loading a cookie file
+        ydl.__dict__['cookiejar'] = self.jar
+
+
+class AuthStore:
+    """Auth profiles persisted in AUTH_DIR (default: ~/.yt-dlp-wizwam/auth)."""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or Config.AUTH_DIR)
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict] = {}
+        # Cookie jars are loaded on first use and kept; _saved is their last written state
+        self._jars: Dict[str, YoutubeDLCookieJar] = {}
+        self._saved: Dict[str, frozenset] = {}
+        index = self.directory / 'profiles.json'
+        if index.exists():
+            try:
+                with open(index, 'r', encoding='utf-8') as f:
+                    self._profiles = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Error loading auth profiles: {e}")
+
+    def _ensure_directory(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+
+    def _save(self):
+        self._ensure_directory()
+        _write_private(self.directory / 'profiles.json', json.dumps(self._profiles, indent=2))
+
+    def _cookie_path(self, name: str) -> Path:
+        return self.directory / f'{name}.cookies.txt'
+
+    def add(
+        self,
+        name: str,
+        cookies: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        user_agent: Optional[str] = None,
+        hosts: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Add or update a profile. Fields that are not given are kept.
+
+        Args:
+            name: Profile name (letters, digits, "_", "-", ".")
+            cookies: Contents of a Netscape cookies.txt file
+            headers: Extra HTTP headers sent with every request
+            user_agent: User agent (default: Config.USER_AGENT)
+            hosts: Host rules that select this profile automatically
+
+        Returns:
+            The profile (see get())
+
+        Raises:
+            ValueError: If the name, headers or cookies are invalid
+        """
+        if not _NAME_RE.match(name or ''):
+            raise ValueError(f"Invalid profile name '{name}' (use letters, digits, '_', '-' and '.')")
+        headers = dict(headers or {})
+        if any(key.lower() == 'cookie' for key in headers):
+            raise ValueError('Pass cookies as a cookies.txt file, not as a Cookie header')
+
+        jar = None
+        if cookies is not None:
+            # Parse before storing, so a bad file never replaces a good one
+            self._ensure_directory()
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.import.')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(cookies)
+                jar = YoutubeDLCookieJar(tmp)
+                jar.load()
+            except Exception as e:
+                raise ValueError(f'Invalid cookies file: {e}') from e
+            finally:
+                os.unlink(tmp)
+
+        with self._lock:
+            profile = self._profiles.get(name, {'name': name, 'headers': {}, 'user_agent': None, 'hosts': []})
+            if headers:
+                profile['headers'] = headers
+            if user_agent is not None:
+                profile['user_agent'] = user_agent or None
+            if hosts is not None:
+                profile['hosts'] = [h.strip().lower() for h in hosts if h.strip()]
+            self._profiles[name] = profile
+            self._save()
+            if jar is not None:
+                jar.filename = str(self._cookie_path(name))
+                self._jars[name] = jar
+                self._write_jar(name, jar)
+            return self._describe(name)
+
+    def remove(self, name: str) -> bool:
+        """Remove a profile and its cookies; returns False if it did not exist."""
+        with self._lock:
+            if self._profiles.pop(name, None) is None:
+                return False
+            self._jars.pop(name, None)
+            self._saved.pop(name, None)
+            self._save()
+            try:
+                self._cookie_path(name).unlink()
+            except FileNotFoundError:
+                pass
+            return True
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Profile settings without secrets (header names and cookie count only)."""
+        with self._lock:
+            return self._describe(name) if name in self._profiles else None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [self._describe(name) for name in sorted(self._profiles)]
+
+    def match(self, url: str) -> Optional[str]:
+        """Name of the profile whose host rule matches a URL (most specific rule wins)."""
+        host = (urlparse(url).hostname or '').lower()
+        best, best_len = None, -1
+        with self._lock:
+            for name, profile in self._profiles.items():
+                for rule in profile.get('hosts', []):
+                    if host_matches(host, rule) and len(rule) > best_len:
+                        best, best_len = name, len(rule)
+        return best
+
+    def session(self, url: str, name: Union[str, bool, None] = None) -> Optional[AuthSession]:
+        """
+        Session for a job.
+
+        Args:
+            url: Job URL (used for host rules if no name is given)
+            name: Profile name chosen for the job; False uses no profile, not even by host rule
+
+        Returns:
+            AuthSession, or None if no profile applies
+
+        Raises:
+            ValueError: If the named profile does not exist
+        """
+        if name is False:
+            return None
+        name = name or self.match(url)
+        if name is None:
+            return None
+        with self._lock:
+            profile = self._profiles.get(name)
+            if profile is None:
+                raise ValueError(f"Unknown auth profile '{name}'")
+            headers = {'User-Agent': profile.get('user_agent') or Config.USER_AGENT, **profile['headers']}
+            return AuthSession(name, self._jar(name), headers)
+
+    def save_cookies(self, name: str):
+        """Write a profile's cookies back if jobs changed them (atomic)."""
+        with self._lock:
+            jar = self._jars.get(name)
+            if jar is None or name not in self._profiles:
+                return
+            if _jar_state(jar) == self._saved.get(name):
+                return
+            try:
+                self._write_jar(name, jar)
+            except OSError as e:
+                logger.error(f"Error saving cookies of auth profile {name}: {e}")
+
+    def _jar(self, name: str) -> YoutubeDLCookieJar:
+        jar = self._jars.get(name)
+        if jar is None:
+            path = self._cookie_path(name)
+            jar = YoutubeDLCookieJar(str(path))
+            if path.exists():
+                try:
+                    jar.load()
+                except Exception as e:
+                    logger.warning(f"Error loading cookies of auth profile {name}: {e}")
+            self._jars[name] = jar
+            self._saved[name] = _jar_state(jar)
+        return jar
+
+    def _write_jar(self, name: str, jar: YoutubeDLCookieJar):
+        self._ensure_directory()
+        path = self._cookie_path(name)
+        # YoutubeDLCookieJar.save() marks session cookies as expired in place; save a copy
+        snapshot = YoutubeDLCookieJar()
+        for cookie in jar:
+            snapshot.set_cookie(copy.copy(cookie))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f'.{path.name}.')
+        os.close(fd)
+        try:
+            snapshot.save(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._saved[name] = _jar_state(jar)
+        logger.debug(f"Saved cookies of auth profile {name}")
+
+    def _describe(self, name: str) -> Dict:
+        profile = self._profiles[name]
+        path = self._cookie_path(name)
+        cookies = len(self._jars[name]) if name in self._jars else None
+        if cookies is None and path.exists():
+            cookies = sum(1 for line in path.read_text(encoding='utf-8').splitlines()
+                          if line.strip() and (not line.startswith('#') or line.startswith('#HttpOnly_')))
+        return {
+            'name': name,
+            'hosts': list(profile.get('hosts', [])),
+            'headers': sorted(profile.get('headers', {})),
+            'user_agent': profile.get('user_agent'),
+            'cookies': cookies or 0,
+        }
+
+
+_store: Optional[AuthStore] = None
+_store_lock = threading.Lock()
+
+
+def get_auth_store() -> AuthStore:
+    """Get the shared auth profile store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AuthStore()
+        return _store
@@ -6,6 +6,7 @@ Uses Click framework for argument parsing and command structure.
 """
 
 import click
+import os
 import sys
 import webbrowser
 import time
@@ -41,7 +42,7 @@ def main(ctx, version):
 
 
 @main.command()
-@click.argument('url')
+@click.argument('urls', nargs=-1, required=True)
 @click.option('--quality', default='720p', 
               type=click.Choice(['4k', '1080p', '720p', '480p', '360p']),
               help='Video quality (default: 720p)')
@@ -55,18 +56,82 @@ def main(ctx, version):
               help='Download audio only')
 @click.option('--output-dir', type=click.Path(),
               help=f'Output directory (default: {Config.DOWNLOAD_DIR})')
+@click.option('--concurrency', '-j', default=None, type=int,
+              help=f'Parallel downloads for batches (default: {Config.MAX_CONCURRENT_DOWNLOADS})')
+@click.option('--profile', default=None,
+              help='Transcode profile to apply after download (see: downloader transcode --list)')
+@click.option('--subs', default=None,
+              help='Subtitle languages to save next to the video, e.g. "en,de" or "all"')
+@click.option('--chapters/--no-chapters', default=None,
+              help='Embed chapters into the video')
+@click.option('--info-json/--no-info-json', default=None,
+              help='Save a compact NAME.info.json with the video metadata')
+@click.option('--auth', default=None,
+              help='Auth profile with cookies/headers (default: by host rule, see: downloader auth list)')
+@click.option('--start', default=None,
+              help='Clip start (seconds or HH:MM:SS); only the needed part is downloaded')
+@click.option('--end', default=None,
+              help='Clip end (seconds or HH:MM:SS)')
+@click.option('--chapter', default=None,
+              help='Download only the chapter with this title')
+@click.option('--accurate-cuts', is_flag=True,
+              help='Re-encode at the clip edges instead of cutting at keyframes')
+@click.option('--live-from-start', is_flag=True,
+              help='Live streams: record from the oldest available segment instead of the live edge')
+@click.option('--max-duration', default=None,
+              help='Live streams: stop recording after this long (seconds or HH:MM:SS, 0 = no limit)')
+@click.option('--max-size', 'max_size_mb', default=None, type=float,
+              help=f'Live streams: stop recording after this many MB (default: {Config.LIVE_MAX_SIZE_MB:.0f})')
+@click.option('--segment-duration', 'segment_seconds', default=None, type=click.IntRange(min=1),
+              help=f'Live streams: segment length in seconds (default: {Config.LIVE_SEGMENT_SECONDS})')
 @click.option('--verbose', '-v', is_flag=True,
               help='Verbose output')
-def download(url, quality, video_codec, audio_codec, audio_only, output_dir, verbose):
+def download(urls, quality, video_codec, audio_codec, audio_only, output_dir, concurrency, profile,
+             subs, chapters, info_json, auth, start, end, chapter, accurate_cuts, live_from_start,
+             max_duration, max_size_mb, segment_seconds, verbose):
     """
-    Download a video via CLI.
+    Download one or more videos via CLI.
+    
+    Several URLs are downloaded as a batch: metadata for upcoming videos is
+    fetched while earlier ones are still downloading. Playlists and channels
+    are listed page by page and downloaded video by video.
     
     Examples:
         downloader download https://youtube.com/watch?v=...
         downloader download {URL} --quality 1080p --video-codec av1
         downloader download {URL} --audio-only --audio-codec opus
+        downloader download {URL1} {URL2} {URL3} -j 2
+        downloader download https://youtube.com/@channel/videos
+        downloader download {URL} --profile whatsapp
+        downloader download {URL} --subs en,de --chapters --info-json
+        downloader download {URL} --auth members
+        downloader download {URL} --start 1:02:00 --end 1:02:30
+        downloader download {URL} --chapter "Q&A" --accurate-cuts
+        downloader download {LIVE_URL} --max-duration 2:00:00 --segment-duration 300
     """
-    from yt_dlp_wizwam.downloader import download_video
+    from yt_dlp_wizwam.sidecars import parse_languages
+    
+    if profile:
+        from yt_dlp_wizwam.transcode import get_profile
+        try:
+            get_profile(profile)
+        except ValueError as e:
+            click.echo(f'❌ {e}', err=True)
+            sys.exit(1)
+    
+    if auth:
+        from yt_dlp_wizwam.auth import get_auth_store
+        if get_auth_store().get(auth) is None:
+            click.echo(f"❌ Unknown auth profile '{auth}'", err=True)
+            sys.exit(1)
+    
+    from yt_dlp_wizwam.clips import clip_spec, parse_timestamp
+    try:
+        clip = clip_spec(start, end, chapter, accurate_cuts)
+        max_duration = parse_timestamp(max_duration)
+    except ValueError as e:
+        click.echo(f'❌ {e}', err=True)
+        sys.exit(1)
     
     # Set up configuration
     if output_dir:
@@ -77,31 +142,124 @@ def download(url, quality, video_codec, audio_codec, audio_only, output_dir, ver
     if verbose:
         Config.LOG_LEVEL = 'DEBUG'
     
-    click.echo(f'📥 Downloading from: {url}')
+    if len(urls) == 1:
+        click.echo(f'📥 Downloading from: {urls[0]}')
+    else:
+        click.echo(f'📥 Downloading {len(urls)} videos')
     click.echo(f'📁 Output directory: {Config.DOWNLOAD_DIR}')
     
     if audio_only:
         click.echo(f'🎵 Audio-only mode, codec: {audio_codec}')
     else:
         click.echo(f'🎬 Quality: {quality}, Video: {video_codec}, Audio: {audio_codec}')
+    if clip:
+        what = f'chapter "{clip["chapter"]}"' if clip['chapter'] else f'{start or "start"} → {end or "end"}'
+        click.echo(f'✂️  Clip: {what}{" (accurate cuts)" if clip["accurate"] else ""}')
+    
+    options = {
+        'quality': quality,
+        'video_codec': video_codec,
+        'audio_codec': audio_codec,
+        'audio_only': audio_only,
+        'verbose': verbose,
+    }
+    # Sidecars: only override the configured defaults when given
+    if subs is not None:
+        options['subtitles'] = parse_languages(subs)
+    if chapters is not None:
+        options['chapters'] = chapters
+    if info_json is not None:
+        options['info_json'] = info_json
+    if auth:
+        options['auth'] = auth
+    if clip:
+        options.update(start=clip['start'], end=clip['end'], chapter=clip['chapter'],
+                       accurate_cuts=clip['accurate'])
+    # Live recording (ignored for regular videos)
+    if live_from_start:
+        options['live_from_start'] = True
+    if max_duration is not None:
+        options['max_duration'] = max_duration
+    if max_size_mb is not None:
+        options['max_size_mb'] = max_size_mb
+    if segment_seconds:
+        options['segment_seconds'] = segment_seconds
     
     try:
-        # Perform download
-        result = download_video(
-            url=url,
-            quality=quality,
-            video_codec=video_codec,
-            audio_codec=audio_codec,
-            audio_only=audio_only,
-            verbose=verbose
-        )
+        from yt_dlp_wizwam.jobs import JobQueue
         
-        if result['status'] == 'success':
-            click.echo(f'\n✅ Download complete!')
-            click.echo(f'📄 File: {result["filename"]}')
-            click.echo(f'💾 Size: {result.get("filesize", "Unknown")}')
-        else:
-            click.echo(f'\n❌ Download failed: {result.get("error", "Unknown error")}')
+        results = []
+        playlists = []
+        
+        def on_done(job):
+            # A playlist finishes after its entries, which are reported as they finish
+            if job.result.get('playlist'):
+                playlists.append(job.result)
+                return
+            results.append(job.result)
+            if len(urls) > 1 or job.parent:
+                status = '✅' if job.result['status'] == 'success' else '❌'
+                click.echo(f'{status} {job.url}')
+        
+        # Playlist and channel URLs are expanded into a job per video
+        job_queue = JobQueue(download_workers=concurrency, on_done=on_done)
+        for job in [job_queue.submit(url, options) for url in urls]:
+            job.done.wait()
+        
+        failures = 0
+        for result in results:
+            if result['status'] == 'success':
+                click.echo(f'\n✅ Download complete!')
+                click.echo(f'📄 File: {result["filename"]}')
+                click.echo(f'💾 Size: {result.get("filesize", "Unknown")}')
+                if result.get('live'):
+                    from yt_dlp_wizwam.live import format_elapsed
+                    click.echo(f'🔴 Recorded {format_elapsed(result["duration"])} in '
+                               f'{len(result["segments"])} segment(s) (stopped: {result["stopped"]})')
+                    for name in result['segments'][1:]:
+                        click.echo(f'   {name}')
+                sidecars = result.get('sidecars', {})
+                for lang, name in sidecars.get('subtitles', {}).items():
+                    click.echo(f'💬 Subtitles ({lang}): {name}')
+                if sidecars.get('info_json'):
+                    click.echo(f'🏷️  Metadata: {sidecars["info_json"]}')
+            else:
+                click.echo(f'\n❌ Download failed: {result.get("error", "Unknown error")}')
+                failures += 1
+        for result in playlists:
+            click.echo(f'\n📃 Playlist {result.get("title")}: {result.get("downloaded", 0)} downloaded, '
+                       f'{result.get("skipped", 0)} already archived, {result.get("failed", 0)} failed')
+            if result['status'] == 'error' and not result.get('failed'):
+                # Listing the playlist failed
+                click.echo(f'❌ {result.get("error", "Unknown error")}')
+                failures += 1
+        
+        if profile:
+            from yt_dlp_wizwam.transcode import transcode_file
+            for result in results:
+                if result['status'] != 'success':
+                    continue
+                click.echo(f'\n🎞️  Transcoding with profile {profile}...')
+                transcoded = transcode_file(Path(result['filename']), profile)
+                if transcoded['status'] == 'success':
+                    cached = ' (cached)' if transcoded['cached'] else ''
+                    click.echo(f'✅ {transcoded["filename"]} ({transcoded["filesize"]}){cached}')
+                else:
+                    click.echo(f'❌ Transcode failed: {transcoded["error"]}')
+                    failures += 1
+        
+        # Staging tier: wait for the background moves before exiting
+        if any(result.get('tier') == 'staging' for result in results):
+            from yt_dlp_wizwam import storage
+            click.echo(f'📦 Moving to {Config.DOWNLOAD_DIR}...')
+            failed = storage.get_mover().wait()
+            if failed:
+                for name in failed:
+                    click.echo(f'⚠️  Move failed, {name} kept in staging: {Config.STAGING_DIR}', err=True)
+                sys.exit(1)
+            click.echo('✅ Moved and verified')
+        
+        if failures:
             sys.exit(1)
             
     except KeyboardInterrupt:
@@ -124,17 +282,27 @@ def download(url, quality, video_codec, audio_codec, audio_only, output_dir, ver
               help='Enable debug mode')
 @click.option('--open-browser', is_flag=True,
               help='Automatically open browser')
-def web(host, port, debug, open_browser):
+@click.option('--server', default=Config.SERVER_MODE,
+              type=click.Choice(['eventlet', 'asyncio']),
+              help=f'Server implementation (default: {Config.SERVER_MODE})')
+@click.option('--workers', '-w', default=Config.WEB_WORKERS, type=click.IntRange(min=1),
+              help=f'Server processes sharing the port (default: {Config.WEB_WORKERS})')
+def web(host, port, debug, open_browser, server, workers):
     """
     Start the web interface.
     
+    The port is bound once and held; under systemd socket activation the
+    passed socket is used instead.
+    
     Examples:
         downloader web                        # Default (localhost:8080, auto-detect if in use)
         downloader web --port 5000            # Force specific port
         downloader web --host 0.0.0.0         # Listen on all interfaces
         downloader web --open-browser         # Auto-open browser
+        downloader web --server asyncio       # uvicorn/asyncio instead of eventlet
+        downloader web --workers 4            # 4 processes on one port (needs a message queue)
     """
-    from yt_dlp_wizwam.web import create_app, socketio, is_port_in_use, find_available_port
+    from yt_dlp_wizwam import server as web_server
     
     # Update configuration
     Config.HOST = host
@@ -142,77 +310,118 @@ def web(host, port, debug, open_browser):
     Config.ensure_directories()
     Config.validate()
     
-    # Auto-detect available port if not specified
-    if port is None:
-        port = Config.PORT
-        if is_port_in_use(port, host):
-            click.echo(f'⚠️  Port {port} is already in use, finding alternative...')
-            alternative_port = find_available_port(start_port=port, max_attempts=20, host=host)
-            if alternative_port:
-                port = alternative_port
-                click.echo(f'✅ Using port {port} instead')
-            else:
-                click.echo(f'❌ Error: Could not find an available port (tried {port}-{port+19})', err=True)
-                click.echo('💡 Try stopping other services or specify a port manually with --port', err=True)
-                sys.exit(1)
-    else:
-        # User specified a port, check if it's available
-        if is_port_in_use(port, host):
-            click.echo(f'❌ Error: Port {port} is already in use', err=True)
-            click.echo('💡 Try a different port with --port or let the app auto-detect', err=True)
+    if server == 'asyncio':
+        from yt_dlp_wizwam import asgi
+        if not asgi.is_available():
+            click.echo('❌ The asyncio server needs extra packages: pip install yt-dlp-wizwam[asyncio]', err=True)
             sys.exit(1)
     
+    if workers > 1 and debug:
+        click.echo('⚠️  Debug mode runs a single worker')
+        workers = 1
+    if workers > 1 and not Config.SOCKETIO_MESSAGE_QUEUE:
+        click.echo('❌ Error: Several workers need a message queue to share events', err=True)
+        click.echo('💡 Set YT_DLP_WIZWAM_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) or use --workers 1', err=True)
+        sys.exit(1)
+    Config.WEB_WORKERS = workers
+    
+    # Each worker listens on a socket of its own with SO_REUSEPORT; this process only holds the port
+    reuse_port = workers > 1 and web_server.reuse_port_supported()
+    sock = web_server.reloader_socket()
+    systemd = sock is None and web_server.systemd_sockets()
+    if systemd:
+        sock, reuse_port = systemd[0], False
+        if len(systemd) > 1:
+            click.echo(f'⚠️  Using the first of {len(systemd)} sockets passed by systemd')
+    elif sock is None and port is None:
+        # Auto-detect: bind the first free port and keep it
+        try:
+            sock = web_server.bind_available(host, Config.PORT, attempts=20, reuse_port=reuse_port,
+                                             listen=not reuse_port)
+        except OSError:
+            click.echo(f'❌ Error: Could not find an available port (tried {Config.PORT}-{Config.PORT+19})', err=True)
+            click.echo('💡 Try stopping other services or specify a port manually with --port', err=True)
+            sys.exit(1)
+        if sock.getsockname()[1] != Config.PORT:
+            click.echo(f'⚠️  Port {Config.PORT} is already in use')
+            click.echo(f'✅ Using port {sock.getsockname()[1]} instead')
+    elif sock is None:
+        try:
+            sock = web_server.bind_socket(host, port, reuse_port=reuse_port, listen=not reuse_port)
+        except OSError as e:
+            click.echo(f'❌ Error: Cannot listen on port {port}: {e.strerror or e}', err=True)
+            click.echo('💡 Try a different port with --port or let the app auto-detect', err=True)
+            sys.exit(1)
+    host, port = sock.getsockname()[:2]
     Config.PORT = port
     
     click.echo('🚀 Starting yt-dlp-wizwam web interface...')
-    click.echo(f'🌐 Server: http://{host}:{port}')
+    click.echo(f'🌐 Server: http://{host}:{port}' + (' (systemd socket)' if systemd else ''))
     click.echo(f'📁 Downloads: {Config.DOWNLOAD_DIR}')
-    click.echo(f'📊 Mode: {"Development" if debug else "Production"}')
+    click.echo(f'📊 Mode: {"Development" if debug else "Production"} ({server}'
+               + (f', {workers} workers' if workers > 1 else '') + ')')
+    if Config.MULTI_USER:
+        from yt_dlp_wizwam.users import get_user_store
+        
+        count = len(get_user_store().list())
+        click.echo(f'👥 Multi-user mode: {count} user(s)')
+        if not count:
+            click.echo('⚠️  No users yet, nobody can use the API; add one with: downloader users add <name> --admin')
     click.echo('\n💡 Press Ctrl+C to stop\n')
     
-    # Open browser in background thread after server starts
-    if open_browser:
-        url = f'http://{"localhost" if host == "0.0.0.0" else host}:{port}'
+    def open_browser_delayed():
+        """Open browser once the server reports ready."""
+        from yt_dlp_wizwam.health import wait_until_ready
         
-        def open_browser_delayed():
-            """Open browser after giving server time to start."""
-            # Wait for server to be ready
-            time.sleep(1.5)
-            
-            click.echo(f'🔗 Opening {url} in browser...')
-            try:
-                # Suppress stderr to hide Wayland warnings
-                import os
-                import subprocess
-                devnull = open(os.devnull, 'w')
-                old_stderr = os.dup(2)
-                os.dup2(devnull.fileno(), 2)
-                
-                webbrowser.open(url)
-                
-                # Restore stderr
-                os.dup2(old_stderr, 2)
-                devnull.close()
-            except Exception:
-                # Fallback to normal webbrowser.open if the above fails
-                webbrowser.open(url)
+        url = f'http://{"localhost" if host in ("0.0.0.0", "::") else host}:{port}'
+        probe = f'http://{"127.0.0.1" if host in ("0.0.0.0", "::") else host}:{port}'
+        ready, report = wait_until_ready(probe, timeout=60)
+        if not ready:
+            reasons = ', '.join((report or {}).get('reasons') or ['no answer'])
+            click.echo(f'⚠️  Server not ready ({reasons})')
         
-        # Start browser opener in background thread
-        browser_thread = threading.Thread(target=open_browser_delayed, daemon=True)
-        browser_thread.start()
+        click.echo(f'🔗 Opening {url} in browser...')
+        try:
+            # Suppress stderr to hide Wayland warnings
+            import os
+            import subprocess
+            devnull = open(os.devnull, 'w')
+            old_stderr = os.dup(2)
+            os.dup2(devnull.fileno(), 2)
+            
+            webbrowser.open(url)
+            
+            # Restore stderr
+            os.dup2(old_stderr, 2)
+            devnull.close()
+        except Exception:
+            # Fallback to normal webbrowser.open if the above fails
+            webbrowser.open(url)
+    
+    def start_browser_opener():
+        # Once per server, not again in each reloaded process
+        if open_browser and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+            threading.Thread(target=open_browser_delayed, daemon=True).start()
     
-    # Create and run Flask app
-    app = create_app()
+    if workers > 1:
+        def run_worker(index):
+            listener = sock
+            if reuse_port:
+                sock.close()
+                listener = web_server.bind_socket(host, port, reuse_port=True)
+            web_server.serve(listener, server, primary=index == 0)
+        
+        supervisor = web_server.WorkerSupervisor(workers, run_worker)
+        supervisor.start()
+        start_browser_opener()
+        sys.exit(supervisor.wait())
     
+    start_browser_opener()
     try:
-        socketio.run(
-            app,
-            host=host,
-            port=port,
-            debug=debug,
-            use_reloader=debug,
-            log_output=debug
-        )
+        if debug:
+            web_server.run_with_reloader(lambda: web_server.serve(sock, server, debug=True), sock)
+        else:
+            web_server.serve(sock, server)
     except KeyboardInterrupt:
         click.echo('\n\n⚠️  Server stopped by user')
     except Exception as e:
@@ -220,6 +429,496 @@ def web(host, port, debug, open_browser):
         sys.exit(1)
 
 
+@main.group(invoke_without_command=True)
+@click.option('--concurrency', '-j', default=None, type=int,
+              help=f'Parallel downloads (default: {Config.MAX_CONCURRENT_DOWNLOADS})')
+@click.pass_context
+def watch(ctx, concurrency):
+    """
+    Follow channels and playlists, downloading new videos as they appear.
+    
+    Run without a subcommand to start the watch daemon.
+    
+    Examples:
+        downloader watch add https://youtube.com/@channel/videos
+        downloader watch list
+        downloader watch                 # Poll subscriptions and download new videos
+    """
+    if ctx.invoked_subcommand is not None:
+        return
+    
+    from yt_dlp_wizwam.jobs import JobQueue
+    from yt_dlp_wizwam.subscriptions import SubscriptionStore, SubscriptionWatcher
+    from yt_dlp_wizwam.users import get_user_store
+    
+    Config.ensure_directories()
+    store = SubscriptionStore()
+    if not store.list():
+        click.echo('No subscriptions. Add one with: downloader watch add {URL}')
+        sys.exit(1)
+    
+    def on_done(job):
+        if job.result['status'] == 'success':
+            click.echo(f'✅ {job.result.get("title", job.url)}: {job.result["filename"]}')
+        else:
+            click.echo(f'❌ {job.url}: {job.result.get("error", "Unknown error")}')
+    
+    # Subscriptions of users download into their folders, within their limits
+    users = get_user_store() if Config.MULTI_USER else None
+    job_queue = JobQueue(download_workers=concurrency, on_done=on_done, users=users)
+    
+    def enqueue(url, options, owner=None):
+        click.echo(f'📥 New: {url}' + (f' ({owner})' if owner else ''))
+        return job_queue.submit(url, options, user=owner)
+    
+    click.echo(f'👀 Watching {len(store.list())} subscription(s)')
+    click.echo('\n💡 Press Ctrl+C to stop\n')
+    try:
+        SubscriptionWatcher(store, enqueue).run()
+    except KeyboardInterrupt:
+        click.echo('\n\n⚠️  Watch stopped by user')
+
+
+@watch.command('add')
+@click.argument('url')
+@click.option('--name', help='Display name')
+@click.option('--interval', type=int, default=None,
+              help=f'Poll interval in seconds (default: {Config.WATCH_INTERVAL})')
+@click.option('--backfill', type=int, default=0,
+              help='Number of existing videos to download on the first poll (default: 0)')
+@click.option('--quality', default='720p',
+              type=click.Choice(['4k', '1080p', '720p', '480p', '360p']),
+              help='Video quality (default: 720p)')
+@click.option('--audio-only', is_flag=True,
+              help='Download audio only')
+@click.option('--auth', default=None,
+              help='Auth profile for members-only channels (default: by host rule)')
+@click.option('--user', 'owner', default=None,
+              help='User the subscription belongs to (multi-user mode)')
+def watch_add(url, name, interval, backfill, quality, audio_only, auth, owner):
+    """Subscribe to a channel or playlist."""
+    from yt_dlp_wizwam.subscriptions import SubscriptionStore
+    from yt_dlp_wizwam.users import get_user_store
+    
+    if owner and get_user_store().get(owner) is None:
+        click.echo(f'❌ No user {owner}', err=True)
+        sys.exit(1)
+    options = {'quality': quality, 'audio_only': audio_only}
+    if auth:
+        options['auth'] = auth
+    sub = SubscriptionStore().add(
+        url, name=name, interval=interval, backfill=backfill, options=options, owner=owner
+    )
+    click.echo(f'✅ Subscribed [{sub["id"]}]: {sub["name"]}')
+
+
+@watch.command('list')
+def watch_list():
+    """List subscriptions."""
+    from yt_dlp_wizwam.subscriptions import SubscriptionStore
+    
+    subs = SubscriptionStore().list()
+    if not subs:
+        click.echo('No subscriptions.')
+        return
+    for sub in subs:
+        last = time.strftime('%Y-%m-%d %H:%M', time.localtime(sub['last_polled'])) \
+            if sub.get('last_polled') else 'never'
+        owner = f' for {sub["owner"]}' if sub.get('owner') else ''
+        click.echo(f'[{sub["id"]}] {sub["name"]}{owner} (every {sub["interval"]}s, last poll: {last}, '
+                   f'{sub.get("total_enqueued", 0)} downloaded)')
+        if sub.get('last_error'):
+            click.echo(f'    ⚠️  {sub["last_error"]}')
+
+
+@watch.command('remove')
+@click.argument('sub_id')
+def watch_remove(sub_id):
+    """Remove a subscription by ID."""
+    from yt_dlp_wizwam.subscriptions import SubscriptionStore
+    
+    if SubscriptionStore().remove(sub_id):
+        click.echo(f'✅ Removed {sub_id}')
+    else:
+        click.echo(f'❌ No subscription with ID {sub_id}', err=True)
+        sys.exit(1)
+
+
+@main.command()
+@click.argument('files', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--profile', '-p', help='Transcode profile')
+@click.option('--list', 'list_profiles', is_flag=True, help='List available profiles')
+def transcode(files, profile, list_profiles):
+    """
+    Transcode downloaded files with a named profile.
+    
+    Outputs are written to the download directory and cached: the same file
+    is never re-encoded with the same profile.
+    
+    Examples:
+        downloader transcode --list
+        downloader transcode video.mp4 --profile signal
+    """
+    from yt_dlp_wizwam.transcode import get_profiles, transcode_file
+    
+    if list_profiles or not files:
+        for name, settings in sorted(get_profiles().items()):
+            click.echo(f'{name:<18} {settings.get("description", "")}')
+        return
+    if not profile:
+        click.echo('❌ --profile is required', err=True)
+        sys.exit(1)
+    
+    Config.ensure_directories()
+    failures = 0
+    for path in files:
+        click.echo(f'🎞️  {Path(path).name} → {profile}')
+        
+        def show(phase, percent, message):
+            if phase == 'transcoding':
+                click.echo(f'\r   {percent:5.1f}%', nl=False)
+        
+        result = transcode_file(Path(path), profile, progress_callback=show)
+        if result['status'] == 'success':
+            cached = ' (cached)' if result['cached'] else ''
+            click.echo(f'\r✅ {result["filename"]} ({result["filesize"]}){cached}')
+        else:
+            click.echo(f'\r❌ {result["error"]}', err=True)
+            failures += 1
+    if failures:
+        sys.exit(1)
+
+
+@main.command()
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--protocol', type=click.Choice(['auto', 'mount', 'sftp', 'http']), default=None,
+              help='Transfer target (default: YT_DLP_WIZWAM_NAS_PROTOCOL)')
+def push(files, protocol):
+    """
+    Push files to the NAS.
+
+    Files are uploaded in parallel chunks, verified against their SHA-256
+    (by size on targets that cannot checksum) and recorded in a checksum manifest. Interrupted pushes resume where
+    they stopped; files already on the NAS are skipped.
+
+    Examples:
+        downloader push video.mp4
+        downloader push *.mp4 --protocol sftp
+    """
+    from yt_dlp_wizwam.transfer import TransferError, get_target, transfer_file
+
+    try:
+        target = get_target(protocol)
+    except TransferError as e:
+        click.echo(f'❌ {e}', err=True)
+        sys.exit(1)
+
+    click.echo(f'📤 Pushing {len(files)} file(s) to {target.describe()}')
+    failures = 0
+    try:
+        for path in files:
+            click.echo(f'   {Path(path).name}')
+
+            def show(phase, percent, message):
+                if phase == 'transferring':
+                    click.echo(f'\r   {percent:5.1f}%', nl=False)
+
+            result = transfer_file(Path(path), target=target, progress_callback=show)
+            if result['status'] != 'success':
+                click.echo(f'\r❌ {result["error"]}', err=True)
+                failures += 1
+            elif result['skipped']:
+                click.echo(f'\r⏭️  Already on NAS: {result["remote"]}')
+            else:
+                resumed = ' (resumed)' if result['resumed'] else ''
+                checked = ' (size checked only)' if result['verified'] == 'size' else ''
+                click.echo(f'\r✅ {result["remote"]}{resumed}{checked}')
+    finally:
+        target.close()
+    if failures:
+        sys.exit(1)
+
+
+@main.group()
+def auth():
+    """Manage auth profiles (cookies, headers, user agent)."""
+    pass
+
+
+@auth.command('add')
+@click.argument('name')
+@click.option('--cookies', 'cookies_file', type=click.Path(exists=True, dir_okay=False),
+              help='Netscape cookies.txt to import (e.g. exported from a browser)')
+@click.option('--header', 'headers', multiple=True,
+              help='Extra HTTP header, "Name: value" (repeatable)')
+@click.option('--user-agent', default=None,
+              help='User agent for this profile')
+@click.option('--host', 'hosts', multiple=True,
+              help='Use this profile automatically for a host and its subdomains (repeatable)')
+def auth_add(name, cookies_file, headers, user_agent, hosts):
+    """
+    Add or update an auth profile.
+
+    The cookies are copied into the private profile store; the original
+    file can be deleted afterwards.
+
+    Examples:
+        downloader auth add members --cookies cookies.txt --host youtube.com
+        downloader auth add api --header "Authorization: Bearer ..." --host example.com
+    """
+    from yt_dlp_wizwam.auth import get_auth_store
+
+    parsed = {}
+    for header in headers:
+        key, sep, value = header.partition(':')
+        if not sep or not key.strip():
+            click.echo(f'❌ Invalid header (use "Name: value"): {header}', err=True)
+            sys.exit(1)
+        parsed[key.strip()] = value.strip()
+
+    try:
+        profile = get_auth_store().add(
+            name,
+            cookies=Path(cookies_file).read_text(encoding='utf-8') if cookies_file else None,
+            headers=parsed or None,
+            user_agent=user_agent,
+            hosts=list(hosts) if hosts else None,
+        )
+    except ValueError as e:
+        click.echo(f'❌ {e}', err=True)
+        sys.exit(1)
+    click.echo(f'🔐 Saved auth profile {profile["name"]} ({profile["cookies"]} cookies)')
+
+
+@auth.command('list')
+def auth_list():
+    """List auth profiles (secrets are not shown)."""
+    from yt_dlp_wizwam.auth import get_auth_store
+
+    profiles = get_auth_store().list()
+    if not profiles:
+        click.echo('No auth profiles.')
+        return
+    for profile in profiles:
+        hosts = ', '.join(profile['hosts']) or 'no host rules'
+        click.echo(f'🔐 {profile["name"]}: {profile["cookies"]} cookies, {hosts}')
+        if profile['headers']:
+            click.echo(f'    headers: {", ".join(profile["headers"])}')
+        if profile['user_agent']:
+            click.echo(f'    user agent: {profile["user_agent"]}')
+
+
+@auth.command('remove')
+@click.argument('name')
+def auth_remove(name):
+    """Remove an auth profile and its stored cookies."""
+    from yt_dlp_wizwam.auth import get_auth_store
+
+    if get_auth_store().remove(name):
+        click.echo(f'✅ Removed {name}')
+    else:
+        click.echo(f'❌ No auth profile named {name}', err=True)
+        sys.exit(1)
+
+
+@main.group()
+def users():
+    """Manage users of multi-user mode (tokens, fair share, quotas)."""
+    pass
+
+
+@users.command('add')
+@click.argument('name')
+@click.option('--weight', type=click.FloatRange(min=0, min_open=True), default=None,
+              help='Share of the download slots relative to other users (default 1)')
+@click.option('--max-jobs', type=click.IntRange(min=0), default=None,
+              help=f'Jobs at the same time (default: {Config.USER_MAX_JOBS}; 0 = no limit)')
+@click.option('--rate-limit', default=None,
+              help='Bandwidth in bytes/s across the user\'s jobs, e.g. 5M (0 = no limit)')
+@click.option('--storage-mb', type=click.FloatRange(min=0), default=None,
+              help='Disk space of the user\'s folder in MB (0 = no limit)')
+@click.option('--admin/--no-admin', default=None,
+              help='May change server settings and auth profiles')
+def users_add(name, weight, max_jobs, rate_limit, storage_mb, admin):
+    """
+    Add a user, or change an existing user's settings.
+
+    A new user's token is shown once; only its hash is stored.
+
+    Examples:
+        downloader users add alice --admin
+        downloader users add bob --weight 2 --max-jobs 3 --rate-limit 5M --storage-mb 20000
+    """
+    from yt_dlp_wizwam.users import get_user_store
+
+    try:
+        token = get_user_store().add(name, weight=weight, max_jobs=max_jobs, rate_limit=rate_limit,
+                                     storage_mb=storage_mb, admin=admin)
+    except ValueError as e:
+        click.echo(f'❌ {e}', err=True)
+        sys.exit(1)
+    if token is None:
+        click.echo(f'👤 Updated user {name}')
+        return
+    click.echo(f'👤 Added user {name}; their token (shown only now):')
+    click.echo(token)
+    if not Config.MULTI_USER:
+        click.echo('⚠️  Multi-user mode is off; set YT_DLP_WIZWAM_MULTI_USER=true to require tokens')
+
+
+@users.command('list')
+def users_list():
+    """List users and their limits (tokens are not shown)."""
+    from yt_dlp_wizwam import storage
+    from yt_dlp_wizwam.users import get_user_store
+
+    accounts = get_user_store().list()
+    if not accounts:
+        click.echo('No users.')
+        return
+    for user in accounts:
+        used_mb = storage.disk_usage(user['name']) / (1024 * 1024)
+        quota = f'{used_mb:.1f} of {user["storage_mb"]:g} MB' if user['storage_mb'] else f'{used_mb:.1f} MB'
+        click.echo(f'👤 {user["name"]}{" (admin)" if user["admin"] else ""}: weight {user["weight"]:g}, '
+                   f'{user["max_jobs"] or "unlimited"} job(s), {user["rate_limit"] or "no rate limit"}, {quota}')
+
+
+@users.command('token')
+@click.argument('name')
+def users_token(name):
+    """Give a user a new token; the old one stops working."""
+    from yt_dlp_wizwam.users import get_user_store
+
+    token = get_user_store().rotate_token(name)
+    if token is None:
+        click.echo(f'❌ No user named {name}', err=True)
+        sys.exit(1)
+    click.echo(f'🔑 New token of {name} (shown only now):')
+    click.echo(token)
+
+
+@users.command('remove')
+@click.argument('name')
+def users_remove(name):
+    """Remove a user; their files are kept."""
+    from yt_dlp_wizwam.users import get_user_store
+
+    if get_user_store().remove(name):
+        click.echo(f'✅ Removed {name}')
+    else:
+        click.echo(f'❌ No user named {name}', err=True)
+        sys.exit(1)
+
+
+@main.group()
+def jobs():
+    """Inspect job event logs written by the web server."""
+    pass
+
+
+@jobs.command('tail')
+@click.argument('job_id', required=False)
+@click.option('--follow', '-f', is_flag=True,
+              help='Keep printing new events as they are written')
+@click.option('--json', 'as_json', is_flag=True,
+              help='Print raw JSON lines')
+def jobs_tail(job_id, follow, as_json):
+    """
+    Print job events (all jobs, or JOB_ID / an ID prefix).
+
+    Examples:
+        downloader jobs tail -f
+        downloader jobs tail 3f2a9c1b
+    """
+    import json
+    from yt_dlp_wizwam.events import tail_job_logs
+
+    icons = {'progress': '📊', 'success': '✅', 'error': '❌'}
+    try:
+        for record in tail_job_logs(job_id=job_id, follow=follow):
+            if as_json:
+                click.echo(json.dumps(record))
+                continue
+            data = record.get('data', {})
+            stamp = time.strftime('%H:%M:%S', time.localtime(record['time']))
+            event = record['event']
+            if event == 'progress':
+                detail = f'{data.get("phase")} {data.get("percent", 0):.1f}% {data.get("message", "")}'
+            elif event == 'success':
+                detail = data.get('filename', '')
+            elif event == 'error':
+                detail = data.get('error', '')
+            else:
+                detail = json.dumps(data)
+            click.echo(f'{stamp} {record["job_id"][:8]} {icons.get(event, "•")} {event}: {detail}'.rstrip())
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@click.option('--status', type=click.Choice(['success', 'error', 'cancelled', 'interrupted']), default=None,
+              help='Only jobs with this outcome')
+@click.option('--extractor', default=None,
+              help='Only jobs of this site (extractor name, e.g. Youtube)')
+@click.option('--url', default=None,
+              help='Only jobs of this exact URL')
+@click.option('--search', '-s', default=None,
+              help='Substring of title, URL or file name')
+@click.option('--since', default=None,
+              help='Finished within this long (30m, 12h, 7d) or since a date (2024-05-01)')
+@click.option('--limit', '-n', default=20, type=click.IntRange(min=1),
+              help='Number of jobs to show (default: 20)')
+@click.option('--json', 'as_json', is_flag=True,
+              help='Print one JSON object per job')
+@click.option('--compact', is_flag=True,
+              help='Delete jobs older than the retention limits and shrink the database')
+def history(status, extractor, url, search, since, limit, as_json, compact):
+    """
+    Show finished jobs (downloads, failures, cancellations), newest first.
+
+    Examples:
+        downloader history --status error --since 7d
+        downloader history --search "live" -n 50
+    """
+    import json
+    from yt_dlp_wizwam.history import MAX_LIMIT, get_history, parse_since
+
+    store = get_history()
+    if compact:
+        deleted = store.compact()
+        click.echo(f'🧹 Removed {deleted} old job(s) from the history')
+        return
+    try:
+        since = parse_since(since)
+    except ValueError as e:
+        click.echo(f'❌ {e}', err=True)
+        sys.exit(1)
+
+    icons = {'success': '✅', 'error': '❌', 'cancelled': '⏹️ ', 'interrupted': '⏸️ '}
+    shown, cursor = 0, None
+    while shown < limit:
+        page = store.query(status=status, extractor=extractor, url=url, search=search, since=since,
+                           limit=min(limit - shown, MAX_LIMIT), cursor=cursor)
+        for entry in page['jobs']:
+            shown += 1
+            if as_json:
+                click.echo(json.dumps(entry))
+                continue
+            stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['finished']))
+            kind = '📃 ' if entry['playlist'] else ''
+            click.echo(f'{stamp} {entry["job_id"][:8]} {icons.get(entry["status"], "•")} '
+                       f'{kind}{entry["title"] or entry["url"]}')
+            if entry['status'] == 'success' and entry['filename']:
+                click.echo(f'    {entry["filename"]} ({entry["filesize"] or "?"})')
+            elif entry['error']:
+                click.echo(f'    {entry["error"]}')
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    if not shown and not as_json:
+        click.echo('No jobs in the history.')
+
+
 # Convenience aliases for entry points
 def start_web():
     """Entry point for 'yt-dlp-web' command."""
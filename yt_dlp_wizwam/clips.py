@@ -0,0 +1,163 @@
+"""
+Clip downloads for yt-dlp-wizwam.
+
+A clip is a time range of a video: start/end offsets or a chapter name.
+Clips are passed to yt-dlp as download_ranges, so ffmpeg seeks into the
+stream and fetches only the DASH/HLS fragments (or HTTP byte ranges) the
+range needs instead of the whole video. Cuts are made at keyframes by
+default (stream copy, fast, may start up to a GOP early); accurate cuts
+re-encode at the edges (force_keyframes_at_cuts).
+"""
+
+import re
+import shutil
+from typing import Dict, Optional, Tuple, Union
+
+import yt_dlp
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+
+_TIMESTAMP_RE = re.compile(r'^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)$')
+
+
+def parse_timestamp(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Parse a time offset.
+
+    Args:
+        value: Seconds (90, "90.5") or "MM:SS" / "HH:MM:SS(.ms)"; None or "" for none
+
+    Returns:
+        Seconds, or None
+
+    Raises:
+        ValueError: If the value is not a valid offset
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        match = _TIMESTAMP_RE.match(str(value).strip())
+        if not match:
+            raise ValueError(f"Invalid time '{value}' (use seconds, MM:SS or HH:MM:SS)")
+        hours, minutes, secs = match.groups()
+        seconds = int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(secs)
+    if seconds < 0:
+        raise ValueError(f"Invalid time '{value}' (must not be negative)")
+    return seconds
+
+
+def clip_spec(
+    start: Union[str, float, None] = None,
+    end: Union[str, float, None] = None,
+    chapter: Optional[str] = None,
+    accurate: bool = False
+) -> Optional[Dict]:
+    """
+    Validate clip parameters.
+
+    Args:
+        start: Start offset (default: beginning)
+        end: End offset (default: end of the video)
+        chapter: Chapter title instead of start/end
+        accurate: Re-encode at the cuts instead of cutting at keyframes
+
+    Returns:
+        {'start', 'end', 'chapter', 'accurate'}, or None for the whole video
+
+    Raises:
+        ValueError: If the range is invalid
+    """
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    chapter = (chapter or '').strip() or None
+    if chapter and (start is not None or end is not None):
+        raise ValueError('Use either a chapter or start/end, not both')
+    if start is not None and end is not None and end <= start:
+        raise ValueError('Clip end must be after its start')
+    if chapter is None and not start and end is None:
+        return None
+    return {'start': start, 'end': end, 'chapter': chapter, 'accurate': bool(accurate)}
+
+
+def clip_range(clip: Dict, info: Dict) -> Tuple[float, Optional[float]]:
+    """
+    Concrete time range of a clip in a video.
+
+    Args:
+        clip: Result of clip_spec()
+        info: Video info dictionary from yt-dlp
+
+    Returns:
+        (start, end) in seconds; end is None for "until the end"
+
+    Raises:
+        ValueError: If the chapter does not exist or the range is outside the video
+    """
+    duration = info.get('duration')
+    if clip['chapter']:
+        chapters = info.get('chapters') or []
+        wanted = clip['chapter'].casefold()
+        # Exact title first, then the first title containing it
+        found = next((c for c in chapters if (c.get('title') or '').casefold() == wanted), None) or \
+            next((c for c in chapters if wanted in (c.get('title') or '').casefold()), None)
+        if found is None:
+            titles = ', '.join(c.get('title') or '?' for c in chapters) or 'none'
+            raise ValueError(f"No chapter matching '{clip['chapter']}' (chapters: {titles})")
+        start, end = float(found['start_time']), found.get('end_time')
+    else:
+        start, end = clip['start'] or 0.0, clip['end']
+
+    if duration:
+        if start >= duration:
+            raise ValueError(f'Clip starts after the end of the video ({duration:.0f}s)')
+        if end is not None and end >= duration:
+            end = None
+    return start, end
+
+
+def format_offset(seconds: float) -> str:
+    """Compact offset for filenames: 1h02m03s, 2m03s, 7.5s."""
+    whole = int(seconds)
+    fraction = f'{seconds - whole:.1f}'[1:] if seconds != whole else ''
+    hours, rest = divmod(whole, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f'{hours}h{minutes:02d}m{secs:02d}{fraction}s'
+    if minutes:
+        return f'{minutes}m{secs:02d}{fraction}s'
+    return f'{secs}{fraction}s'
+
+
+def clip_label(start: float, end: Optional[float]) -> str:
+    """Filename label of a clip range, e.g. "clip1h00m00s-1h00m30s"."""
+    return f"clip{format_offset(start)}-{format_offset(end) if end is not None else 'end'}"
+
+
+def clip_ydl_opts(start: float, end: Optional[float], accurate: bool) -> Dict:
+    """
+    yt-dlp options that download only a time range.
+
+    Args:
+        start: Start in seconds
+        end: End in seconds (None: end of the video)
+        accurate: Re-encode at the cuts for frame-accurate edges
+
+    Returns:
+        Options to merge into ydl_opts
+    """
+    opts = {
+        'download_ranges': yt_dlp.utils.download_range_func(None, [(start, end if end is not None else float('inf'))]),
+        'force_keyframes_at_cuts': accurate,
+    }
+    # Range downloads always go through ffmpeg; fall back to the bundled binary
+    if not shutil.which('ffmpeg'):
+        from yt_dlp_wizwam.transcode import get_ffmpeg
+        try:
+            location = get_ffmpeg()
+        except RuntimeError:
+            return opts
+        opts['ffmpeg_location'] = location
+        # yt-dlp checks for ffmpeg before a range download without looking at its
+        # options; its own CLI passes --ffmpeg-location through this (per-thread) variable
+        FFmpegPostProcessor._ffmpeg_location.set(location)
+    return opts
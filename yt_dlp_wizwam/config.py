@@ -33,6 +33,13 @@ class Config:
         _user_config.get('download_dir', str(Path.home() / 'Downloads' / 'yt-dlp-wizwam'))
     )
     
+    # Storage tiers
+    # Fast local staging dir for in-progress .part files and ffmpeg merges.
+    # Finished files are moved to DOWNLOAD_DIR (e.g. a NAS mount) in the background.
+    # Empty = single tier, download straight into DOWNLOAD_DIR.
+    STAGING_DIR = os.getenv('YT_DLP_WIZWAM_STAGING_DIR', _user_config.get('staging_dir', ''))
+    MOVER_CONCURRENCY = int(os.getenv('YT_DLP_WIZWAM_MOVER_CONCURRENCY', '2'))
+    
     # Macro script settings
     MACRO_SCRIPT = os.getenv(
         'YT_DLP_WIZWAM_MACRO_SCRIPT',
@@ -50,12 +57,32 @@ class Config:
     NAS_PASSWORD = os.getenv('YT_DLP_WIZWAM_NAS_PASSWORD', '')
     NAS_SHARE_PATH = os.getenv('YT_DLP_WIZWAM_NAS_SHARE_PATH', '')
     NAS_API_URL = os.getenv('YT_DLP_WIZWAM_NAS_API_URL', '')  # Synology FileStation API
+    NAS_MOUNT = os.getenv('YT_DLP_WIZWAM_NAS_MOUNT', '')  # Local mount point of the share
+    NAS_PORT = int(os.getenv('YT_DLP_WIZWAM_NAS_PORT', '22'))  # SFTP port
+    # Transfer target: 'auto' (mount, then HTTP API, then SFTP), 'mount', 'sftp' or 'http'
+    NAS_PROTOCOL = os.getenv('YT_DLP_WIZWAM_NAS_PROTOCOL', 'auto')
+    NAS_AUTO_PUSH = os.getenv('YT_DLP_WIZWAM_NAS_AUTO_PUSH', 'False').lower() == 'true'
+    
+    # Transfers to the NAS (separate from downloads)
+    TRANSFER_CONCURRENCY = int(os.getenv('YT_DLP_WIZWAM_TRANSFER_CONCURRENCY', '2'))  # files at once
+    TRANSFER_PARALLEL_CHUNKS = int(os.getenv('YT_DLP_WIZWAM_TRANSFER_PARALLEL_CHUNKS', '4'))  # per file
+    TRANSFER_CHUNK_SIZE = int(os.getenv('YT_DLP_WIZWAM_TRANSFER_CHUNK_SIZE', str(8 * 1024 * 1024)))  # bytes
+    TRANSFER_QUEUE_SIZE = int(os.getenv('YT_DLP_WIZWAM_TRANSFER_QUEUE_SIZE', '100'))
+    TRANSFER_STATE_DIR = os.getenv('YT_DLP_WIZWAM_TRANSFER_STATE_DIR', str(UserConfig.CONFIG_DIR / 'transfers'))
     
     # yt-dlp default settings
     DEFAULT_QUALITY = '720p'
     DEFAULT_VIDEO_CODEC = 'avc1'  # H.264 for compatibility
     DEFAULT_AUDIO_CODEC = 'm4a'   # AAC for compatibility
     
+    # Longest file name in UTF-8 bytes (255 on ext4/Btrfs; 143 on encrypted Synology shares)
+    FILENAME_MAX_BYTES = int(os.getenv('YT_DLP_WIZWAM_FILENAME_MAX_BYTES', '255'))
+    
+    # Sidecars written from the same extraction (defaults; can be set per download)
+    SUBTITLE_LANGS = os.getenv('YT_DLP_WIZWAM_SUBTITLE_LANGS', '')  # e.g. "en,de" or "all"
+    EMBED_CHAPTERS = os.getenv('YT_DLP_WIZWAM_EMBED_CHAPTERS', 'False').lower() == 'true'
+    WRITE_INFO_JSON = os.getenv('YT_DLP_WIZWAM_WRITE_INFO_JSON', 'False').lower() == 'true'
+    
     # Quality mapping
     QUALITY_MAP = {
         '4k': 2160,
@@ -78,6 +105,86 @@ class Config:
         'mp3': 'MP3 (universal)',
     }
     
+    # Download queue settings
+    MAX_CONCURRENT_DOWNLOADS = int(os.getenv('YT_DLP_WIZWAM_MAX_CONCURRENT_DOWNLOADS', '3'))
+    # Metadata prefetch: resolve info dicts for upcoming jobs while downloads run
+    PREFETCH_CONCURRENCY = int(os.getenv('YT_DLP_WIZWAM_PREFETCH_CONCURRENCY', '2'))
+    PREFETCH_AHEAD = int(os.getenv('YT_DLP_WIZWAM_PREFETCH_AHEAD', '4'))  # resolved jobs waiting
+    PREFETCH_MAX_AGE = int(os.getenv('YT_DLP_WIZWAM_PREFETCH_MAX_AGE', '1800'))  # seconds
+    
+    # Playlists/channels: entry jobs queued or running at a time per playlist (bounds memory;
+    # never fewer than the download workers plus PREFETCH_AHEAD)
+    PLAYLIST_WINDOW = int(os.getenv('YT_DLP_WIZWAM_PLAYLIST_WINDOW', '20'))
+    
+    # Retries of transient and rate-limited failures (jittered exponential backoff)
+    RETRY_ATTEMPTS = int(os.getenv('YT_DLP_WIZWAM_RETRY_ATTEMPTS', '3'))  # per job, after the first try
+    RETRY_BASE_DELAY = float(os.getenv('YT_DLP_WIZWAM_RETRY_BASE_DELAY', '2'))  # seconds
+    RETRY_RATE_LIMIT_DELAY = float(os.getenv('YT_DLP_WIZWAM_RETRY_RATE_LIMIT_DELAY', '30'))  # seconds
+    RETRY_MAX_DELAY = float(os.getenv('YT_DLP_WIZWAM_RETRY_MAX_DELAY', '300'))  # seconds
+    HTTP_RETRIES = int(os.getenv('YT_DLP_WIZWAM_HTTP_RETRIES', '10'))  # yt-dlp, per request
+    FRAGMENT_RETRIES = int(os.getenv('YT_DLP_WIZWAM_FRAGMENT_RETRIES', '10'))  # yt-dlp, per fragment
+    
+    # Per-extractor circuit breaker: pause intake for a site that keeps rate-limiting us
+    CIRCUIT_THRESHOLD = int(os.getenv('YT_DLP_WIZWAM_CIRCUIT_THRESHOLD', '3'))  # failures in a row
+    CIRCUIT_COOLDOWN = float(os.getenv('YT_DLP_WIZWAM_CIRCUIT_COOLDOWN', '300'))  # seconds, doubles
+    CIRCUIT_MAX_COOLDOWN = float(os.getenv('YT_DLP_WIZWAM_CIRCUIT_MAX_COOLDOWN', '3600'))  # seconds
+    
+    # Live-stream recording: rotating segments, remuxed in the background
+    LIVE_SEGMENT_SECONDS = int(os.getenv('YT_DLP_WIZWAM_LIVE_SEGMENT_SECONDS', '600'))
+    LIVE_MAX_DURATION = float(os.getenv('YT_DLP_WIZWAM_LIVE_MAX_DURATION', '43200'))  # seconds; 0 = no limit
+    LIVE_MAX_SIZE_MB = float(os.getenv('YT_DLP_WIZWAM_LIVE_MAX_SIZE_MB', '20480'))  # 0 = no limit
+    LIVE_REMUX = os.getenv('YT_DLP_WIZWAM_LIVE_REMUX', 'True').lower() == 'true'  # else keep .ts segments
+    
+    # Browser user agent sent with every request (auth profiles can override it)
+    USER_AGENT = os.getenv(
+        'YT_DLP_WIZWAM_USER_AGENT',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    )
+    # Auth profiles (cookies, headers, user agent); the directory is kept private (0700)
+    AUTH_DIR = os.getenv('YT_DLP_WIZWAM_AUTH_DIR', str(UserConfig.CONFIG_DIR / 'auth'))
+    
+    # Multi-user mode (default in docker): API tokens, fair-share scheduling, quotas and per-user
+    # folders under DOWNLOAD_DIR/users; manage users with `downloader users`
+    MULTI_USER = os.getenv('YT_DLP_WIZWAM_MULTI_USER', str(DEPLOYMENT_MODE == 'docker')).lower() == 'true'
+    USERS_FILE = os.getenv('YT_DLP_WIZWAM_USERS_FILE', str(UserConfig.CONFIG_DIR / 'users.json'))
+    # Defaults for users without their own limits
+    USER_MAX_JOBS = int(os.getenv('YT_DLP_WIZWAM_USER_MAX_JOBS', '2'))  # concurrent jobs; 0 = no limit
+    USER_RATE_LIMIT = os.getenv('YT_DLP_WIZWAM_USER_RATE_LIMIT', '')  # bandwidth, e.g. 5M (bytes/s); '' = no limit
+    USER_STORAGE_MB = int(os.getenv('YT_DLP_WIZWAM_USER_STORAGE_MB', '0'))  # 0 = no limit
+    
+    # Download workers: 'thread' (in the server process) or 'process' (recyclable child processes)
+    WORKER_MODE = os.getenv('YT_DLP_WIZWAM_WORKER_MODE', 'thread')
+    WORKER_MAX_JOBS = int(os.getenv('YT_DLP_WIZWAM_WORKER_MAX_JOBS', '25'))  # jobs before recycling
+    WORKER_MAX_RSS_MB = int(os.getenv('YT_DLP_WIZWAM_WORKER_MAX_RSS_MB', '1024'))  # recycle above; 0 = off
+    WORKER_MEMORY_LIMIT_MB = int(os.getenv('YT_DLP_WIZWAM_WORKER_MEMORY_LIMIT_MB', '4096'))  # RLIMIT_AS; 0 = off
+    WORKER_CPU_LIMIT = int(os.getenv('YT_DLP_WIZWAM_WORKER_CPU_LIMIT', '3600'))  # CPU seconds per job (RLIMIT_CPU); 0 = off
+    WORKER_CANCEL_GRACE = float(os.getenv('YT_DLP_WIZWAM_WORKER_CANCEL_GRACE', '10'))  # seconds before kill
+    
+    # Transcode stage: ffmpeg threads of concurrent encodes are capped at TRANSCODE_CPU_BUDGET
+    TRANSCODE_CPU_BUDGET = int(os.getenv('YT_DLP_WIZWAM_TRANSCODE_CPU_BUDGET', str(os.cpu_count() or 2)))
+    TRANSCODE_WORKERS = int(os.getenv('YT_DLP_WIZWAM_TRANSCODE_WORKERS', '2'))
+    TRANSCODE_CACHE_FILE = os.getenv('YT_DLP_WIZWAM_TRANSCODE_CACHE_FILE', str(UserConfig.CONFIG_DIR / 'transcodes.json'))
+    
+    # Download archive ("{extractor} {id}" of every finished download)
+    ARCHIVE_FILE = os.getenv('YT_DLP_WIZWAM_ARCHIVE_FILE', str(UserConfig.CONFIG_DIR / 'archive.jsonl'))
+    
+    # Job history (SQLite; finished jobs including failures)
+    HISTORY_FILE = os.getenv('YT_DLP_WIZWAM_HISTORY_FILE', str(UserConfig.CONFIG_DIR / 'history.db'))
+    HISTORY_MAX_AGE_DAYS = float(os.getenv('YT_DLP_WIZWAM_HISTORY_MAX_AGE_DAYS', '90'))  # 0 = keep forever
+    HISTORY_MAX_ROWS = int(os.getenv('YT_DLP_WIZWAM_HISTORY_MAX_ROWS', '100000'))  # 0 = no limit
+    
+    # Subscription (channel/playlist) watch mode
+    SUBSCRIPTIONS_FILE = os.getenv(
+        'YT_DLP_WIZWAM_SUBSCRIPTIONS_FILE',
+        str(UserConfig.CONFIG_DIR / 'subscriptions.json')
+    )
+    WATCH_ENABLED = os.getenv('YT_DLP_WIZWAM_WATCH_ENABLED', 'True').lower() == 'true'  # in web server
+    WATCH_INTERVAL = int(os.getenv('YT_DLP_WIZWAM_WATCH_INTERVAL', '3600'))  # seconds
+    WATCH_JITTER = 0.1  # ±10% of the interval
+    WATCH_MIN_SPACING = float(os.getenv('YT_DLP_WIZWAM_WATCH_MIN_SPACING', '5'))  # seconds between polls
+    WATCH_INITIAL_SPREAD = 600  # seconds; first polls after startup are spread over this window
+    WATCH_MAX_NEW = int(os.getenv('YT_DLP_WIZWAM_WATCH_MAX_NEW', '50'))  # new entries per poll
+    
     # Task queue settings
     if DEPLOYMENT_MODE == 'embedded':
         # Embedded mode: use in-memory queue
@@ -90,10 +197,38 @@ class Config:
         CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/1')
         USE_REDIS = True
     
-    # Socket.IO settings
-    SOCKETIO_MESSAGE_QUEUE = None if DEPLOYMENT_MODE == 'embedded' else CELERY_BROKER_URL
+    # Socket.IO settings; several web workers broadcast through the message queue (e.g. redis://)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('YT_DLP_WIZWAM_MESSAGE_QUEUE') or (
+        None if DEPLOYMENT_MODE == 'embedded' else CELERY_BROKER_URL
+    )
     SOCKETIO_ASYNC_MODE = 'eventlet'
     
+    # Web server: 'eventlet' (Flask-SocketIO) or 'asyncio' (uvicorn, needs the [asyncio] extra)
+    SERVER_MODE = os.getenv('YT_DLP_WIZWAM_SERVER', 'eventlet')
+    SHUTDOWN_TIMEOUT = float(os.getenv('YT_DLP_WIZWAM_SHUTDOWN_TIMEOUT', '30'))  # seconds running jobs get on SIGTERM
+    RESUME_INTERRUPTED = os.getenv('YT_DLP_WIZWAM_RESUME_INTERRUPTED', 'True').lower() == 'true'  # on startup
+    
+    # Web server processes sharing the port (SO_REUSEPORT); more than one needs SOCKETIO_MESSAGE_QUEUE
+    WEB_WORKERS = int(os.getenv('YT_DLP_WIZWAM_WEB_WORKERS', '1'))
+    
+    # Readiness (/readyz): not ready while this many jobs wait for a download slot (0 = no limit)
+    READY_MAX_BACKLOG = int(os.getenv('YT_DLP_WIZWAM_READY_MAX_BACKLOG', '200'))
+    
+    # Blocking I/O offload (eventlet tpool) and event-loop watchdog
+    BLOCKING_POOL_SIZE = int(os.getenv('YT_DLP_WIZWAM_BLOCKING_POOL_SIZE', '32'))
+    HUB_BLOCK_THRESHOLD = float(os.getenv('YT_DLP_WIZWAM_HUB_BLOCK_THRESHOLD', '0.25'))  # seconds
+    
+    # Interval for the periodic 'stats' Socket.IO summary
+    STATS_INTERVAL = float(os.getenv('YT_DLP_WIZWAM_STATS_INTERVAL', '2'))  # seconds
+    
+    # Job event log: in-memory replay buffers and JSONL spill under LOG_DIR/jobs
+    EVENT_BUFFER_SIZE = int(os.getenv('YT_DLP_WIZWAM_EVENT_BUFFER_SIZE', '200'))  # events per job
+    EVENT_BUFFER_JOBS = int(os.getenv('YT_DLP_WIZWAM_EVENT_BUFFER_JOBS', '100'))
+    EVENT_LOG_RETENTION_DAYS = int(os.getenv('YT_DLP_WIZWAM_EVENT_LOG_RETENTION_DAYS', '14'))
+    
+    # Fingerprinted/precompressed static assets
+    ASSET_CACHE_DIR = os.getenv('YT_DLP_WIZWAM_ASSET_CACHE_DIR', str(UserConfig.CONFIG_DIR / 'assets'))
+    
     # CORS settings
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
     
@@ -114,6 +249,8 @@ class Config:
         """Create necessary directories if they don't exist."""
         Path(cls.DOWNLOAD_DIR).mkdir(parents=True, exist_ok=True)
         Path(cls.LOG_DIR).mkdir(parents=True, exist_ok=True)
+        if cls.STAGING_DIR:
+            Path(cls.STAGING_DIR).mkdir(parents=True, exist_ok=True)
     
     @classmethod
     def get_quality_height(cls, quality: str) -> int:
@@ -11,25 +11,125 @@ from pathlib import Path
 from datetime import datetime
 import hashlib
 import re
+import threading
+import time
+import unicodedata
+import uuid
 import yt_dlp
-from typing import Dict, Optional, Callable
+from typing import Dict, List, Optional, Callable, Union
 
 from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.stats import registry
+from yt_dlp_wizwam.archive import archive_key, get_archive
+from yt_dlp_wizwam.auth import AuthSession, get_auth_store
+from yt_dlp_wizwam.clips import clip_label, clip_range, clip_spec, clip_ydl_opts, parse_timestamp
+from yt_dlp_wizwam.live import LiveRecorder, format_elapsed
+from yt_dlp_wizwam.playlist import extract_unprocessed, is_playlist, playlist_summary
+from yt_dlp_wizwam.retry import call_with_retries, classify_error, ydl_retry_opts
+from yt_dlp_wizwam.sidecars import (
+    default_options, sidecar_names, sidecar_paths, sidecar_ydl_opts, write_sidecars
+)
 
 
 class DownloadProgress:
-    """Track download progress."""
+    """Track download progress across streams and the merge phase."""
     
-    def __init__(self, callback: Optional[Callable] = None):
+    # Share of the progress bar given to merging video and audio
+    MERGE_WEIGHT = 0.1
+    
+    def __init__(self, callback: Optional[Callable] = None, job_id: Optional[str] = None):
         """
         Initialize progress tracker.
         
         Args:
             callback: Optional callback function for progress updates
                      Called with (phase, percent, message) tuple
+            job_id: Optional job ID; numeric stats are reported to the stats registry
         """
         self.callback = callback
-        self.stream_progress = {}  # Track multi-stream downloads
+        self.job_id = job_id
+        # Per-stream state (video + audio download separately), keyed by format ID:
+        # {'downloaded': bytes, 'total': bytes or None, 'percent': 0-100, 'finished': bool}
+        self.streams = {}
+        self.needs_merge = False
+        self._merge_stop = threading.Event()
+        self._merge_thread = None
+    
+    def expect_streams(self, info: Dict):
+        """
+        Register the streams yt-dlp selected, so streams that have not started
+        yet are weighted in from the beginning.
+        
+        Args:
+            info: Processed info dictionary from yt-dlp (with requested_formats)
+        """
+        formats = info.get('requested_formats') or [info]
+        self.needs_merge = len(formats) > 1
+        for fmt in formats:
+            key = str(fmt.get('format_id') or len(self.streams))
+            total = fmt.get('filesize') or fmt.get('filesize_approx')
+            self.streams.setdefault(key, {
+                'downloaded': 0, 'total': total, 'percent': 0.0, 'finished': False,
+            })
+            if self.job_id:
+                registry.update_stream(self.job_id, key, 0, total, None, None)
+    
+    @staticmethod
+    def _stream_key(d: Dict) -> str:
+        info = d.get('info_dict') or {}
+        return str(info.get('format_id') or os.path.basename(d.get('filename', 'unknown')))
+    
+    @staticmethod
+    def _estimate_total(d: Dict) -> Optional[float]:
+        """Total bytes for a stream: exact, estimated, or extrapolated from fragments."""
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if total:
+            return total
+        downloaded = d.get('downloaded_bytes') or 0
+        frag_index = d.get('fragment_index')
+        frag_count = d.get('fragment_count')
+        if downloaded and frag_index and frag_count:
+            return downloaded / frag_index * frag_count
+        return None
+    
+    def download_fraction(self) -> float:
+        """
+        Byte-weighted fraction (0-1) of all expected streams downloaded.
+        
+        Streams of unknown size are weighted by the average known stream size.
+        """
+        if not self.streams:
+            return 0.0
+        
+        known = [s['total'] for s in self.streams.values() if s['total']]
+        default_weight = sum(known) / len(known) if known else 1.0
+        
+        weighted = 0.0
+        weights = 0.0
+        for stream in self.streams.values():
+            if stream['finished']:
+                fraction = 1.0
+            elif stream['total']:
+                fraction = min(stream['downloaded'] / stream['total'], 1.0)
+            else:
+                fraction = stream['percent'] / 100.0
+            weight = stream['total'] or default_weight
+            weighted += fraction * weight
+            weights += weight
+        
+        return weighted / weights if weights else 0.0
+    
+    def overall_percent(self, merge_fraction: float = 0.0) -> float:
+        """Overall progress (0-100) including the merge phase when there is one."""
+        fraction = self.download_fraction()
+        if self.needs_merge:
+            fraction = fraction * (1 - self.MERGE_WEIGHT) + merge_fraction * self.MERGE_WEIGHT
+        return fraction * 100.0
+    
+    def _report(self, phase: str, percent: float, message: str):
+        if self.callback:
+            self.callback(phase, percent, message)
     
     def __call__(self, d: Dict):
         """
@@ -39,118 +139,278 @@ class DownloadProgress:
             d: Progress dictionary from yt-dlp
         """
         status = d.get('status')
+        key = self._stream_key(d)
+        stream = self.streams.setdefault(key, {
+            'downloaded': 0, 'total': None, 'percent': 0.0, 'finished': False,
+        })
         
         if status == 'downloading':
-            # Track individual stream progress (video + audio download separately)
-            filename = os.path.basename(d.get('filename', 'unknown'))
+            downloaded = d.get('downloaded_bytes') or 0
+            total = self._estimate_total(d)
             
-            # Try multiple methods to get percentage
+            # Percentage for streams without any byte totals
             percent_float = 0.0
-            
-            # Method 1: Use downloaded_bytes / total_bytes
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-            
-            if total > 0:
+            if total:
                 percent_float = (downloaded / total) * 100.0
             else:
-                # Method 2: Parse _percent_str
                 percent_str = d.get('_percent_str', '0%').strip().rstrip('%')
                 try:
                     percent_float = float(percent_str)
                 except (ValueError, TypeError):
-                    # Method 3: Check for fragment info
-                    frag_index = d.get('fragment_index')
-                    frag_count = d.get('fragment_count')
-                    if frag_index and frag_count:
-                        percent_float = (frag_index / frag_count) * 100.0
+                    percent_float = 0.0
             
-            self.stream_progress[filename] = percent_float
+            stream['downloaded'] = downloaded
+            if total:
+                stream['total'] = total
+            stream['percent'] = percent_float
             
-            # Calculate overall progress - use MINIMUM to avoid bouncing
-            # (download isn't complete until ALL streams finish)
-            if self.stream_progress:
-                overall = min(self.stream_progress.values())
-            else:
-                overall = 0.0
+            if self.job_id:
+                registry.update_stream(
+                    self.job_id, key, downloaded, stream['total'],
+                    d.get('speed'), d.get('eta')
+                )
             
             # Format message
             speed = d.get('_speed_str', 'Unknown')
             eta = d.get('_eta_str', 'Unknown')
             message = f'Speed: {speed}, ETA: {eta}'
             
-            if self.callback:
-                self.callback('downloading', overall, message)
+            self._report('downloading', self.overall_percent(), message)
         
         elif status == 'finished':
-            if self.callback:
-                self.callback('processing', 100.0, 'Merging video and audio...')
+            downloaded = d.get('total_bytes') or d.get('downloaded_bytes') or stream['downloaded']
+            stream.update({'downloaded': downloaded, 'total': downloaded or stream['total'],
+                           'percent': 100.0, 'finished': True})
+            
+            if self.job_id:
+                registry.update_stream(self.job_id, key, downloaded, downloaded, 0.0, 0)
+            
+            if all(s['finished'] for s in self.streams.values()):
+                message = 'Merging video and audio...' if self.needs_merge else 'Finalizing...'
+                self._report('processing', self.overall_percent(), message)
+            else:
+                self._report('downloading', self.overall_percent(), 'Stream finished, continuing...')
         
         elif status == 'error':
-            if self.callback:
-                self.callback('error', 0.0, d.get('error', 'Unknown error'))
+            self._report('error', 0.0, d.get('error', 'Unknown error'))
+    
+    def postprocessor_hook(self, d: Dict):
+        """
+        Post-processor hook called by yt-dlp.
+        
+        Measures merge progress by watching the size of ffmpeg's output
+        against the combined size of the input streams.
+        """
+        if d.get('postprocessor') != 'Merger':
+            return
+        
+        status = d.get('status')
+        info = d.get('info_dict') or {}
+        
+        if status == 'started' and info.get('filepath'):
+            inputs = info.get('__files_to_merge') or []
+            expected = sum(os.path.getsize(f) for f in inputs if os.path.exists(f))
+            output = Path(yt_dlp.utils.prepend_extension(info['filepath'], 'temp'))
+            
+            self._merge_stop.clear()
+            self._merge_thread = threading.Thread(
+                target=self._watch_merge, args=(output, expected), daemon=True
+            )
+            self._merge_thread.start()
+            self._report('merging', self.overall_percent(0.0), 'Merging video and audio...')
+        
+        elif status == 'finished':
+            self._merge_stop.set()
+            if self._merge_thread:
+                self._merge_thread.join(timeout=2)
+                self._merge_thread = None
+            self._report('processing', 100.0, 'Merge complete')
+    
+    def _watch_merge(self, output: Path, expected: int, interval: float = 0.5):
+        """Report merge progress until the post-processor finishes."""
+        while not self._merge_stop.wait(interval):
+            try:
+                size = output.stat().st_size
+            except OSError:
+                continue
+            fraction = min(size / expected, 1.0) if expected else 0.0
+            self._report(
+                'merging', self.overall_percent(fraction),
+                f'Merging video and audio... {fraction * 100:.0f}%'
+            )
+
+
+# Characters removed from file names (reserved on Windows/SMB shares, and
+# control characters); spaces become underscores. One str.translate pass.
+_FILENAME_TABLE = str.maketrans({
+    ' ': '_',
+    **{c: None for c in '<>:"/\\|?*\x7f'},
+    **{chr(c): None for c in range(32)},
+})
+
+# Bytes kept free for yt-dlp's work suffixes (.f137.webm.part-Frag123, .temp.mp4)
+# and for a collision suffix
+_SUFFIX_RESERVE = 40
+_TITLE_MAX_CHARS = 100
+
+
+def truncate_bytes(text: str, max_bytes: int) -> str:
+    """
+    Truncate text to at most max_bytes of UTF-8 without splitting a character.
+    
+    Args:
+        text: Text to truncate
+        max_bytes: Maximum encoded length
+    
+    Returns:
+        Truncated text
+    """
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode('utf-8', 'ignore')
+
+
+def sanitize_component(text: str) -> str:
+    """
+    Make one part of a file name safe for NAS filesystems.
+    
+    NFC-normalises (macOS clients and Linux servers otherwise see two
+    different names), drops reserved characters and collapses underscores.
+    """
+    text = unicodedata.normalize('NFC', text).translate(_FILENAME_TABLE)
+    return '_'.join(filter(None, text.split('_')))
 
 
-def sanitize_title(title: str) -> str:
+def sanitize_title(title: str, max_bytes: Optional[int] = None) -> str:
     """
     Sanitize video title for use in filename.
     
     Args:
         title: Original video title
+        max_bytes: Optional limit in UTF-8 bytes (in addition to 100 characters)
     
     Returns:
         Sanitized title safe for filesystem
     """
-    # Remove special characters
-    title = re.sub(r'[<>:"/\\|?*]', '', title)
-    # Replace spaces with underscores
-    title = title.replace(' ', '_')
-    # Remove consecutive underscores
-    title = re.sub(r'_{2,}', '_', title)
-    # Trim underscores
-    title = title.strip('_')
-    # Limit length
-    return title[:100]
-
-
-def build_filename(info: Dict, quality: str, url: str) -> str:
+    title = sanitize_component(title)[:_TITLE_MAX_CHARS]
+    if max_bytes is not None:
+        title = truncate_bytes(title, max_bytes).rstrip('_')
+    return title
+
+
+def build_filename(info: Dict, quality: str, url: str, clip: Optional[str] = None) -> str:
     """
     Build deterministic filename to prevent overwrites.
     
-    Format: {date}_{sanitized_title}_{height}p_{vcodec}_{acodec}__{platform}_{videoID}.{ext}
+    Format: {date}_{sanitized_title}_{height}p_{vcodec}_{acodec}__{platform}_{videoID}[_{clip}].{ext}
+    
+    The title is shortened so the whole name, with extension and yt-dlp's
+    work-file suffixes, stays within Config.FILENAME_MAX_BYTES. The video ID
+    and clip label, which make the name unique, are never cut: an ID too long
+    for the name is replaced by its hash.
     
     Args:
         info: Video info dictionary from yt-dlp
         quality: Requested quality
         url: Original URL
+        clip: Clip label (see clips.clip_label()), so clips of a video get their own names
     
     Returns:
         Base filename (without extension)
     """
     # Date
-    upload_date = info.get('upload_date')
-    if upload_date:
-        date_str = upload_date
-    else:
-        date_str = datetime.now().strftime('%Y%m%d')
-    
-    # Title
-    title = sanitize_title(info.get('title', 'video'))
+    date_str = info.get('upload_date') or datetime.now().strftime('%Y%m%d')
     
     # Quality/height
     height = info.get('height') or Config.get_quality_height(quality)
     
-    # Codecs
-    vcodec = info.get('vcodec', 'unknown')[:20]
-    acodec = info.get('acodec', 'unknown')[:20]
+    # Codecs (None for direct links and some extractors)
+    vcodec = sanitize_component((info.get('vcodec') or 'unknown')[:20])
+    acodec = sanitize_component((info.get('acodec') or 'unknown')[:20])
     
     # Platform
-    extractor = info.get('extractor_key', 'site').lower()
+    extractor = sanitize_component((info.get('extractor_key') or 'site').lower())
     
     # Video ID
-    vid_id = info.get('id') or hashlib.sha256(url.encode()).hexdigest()[:10]
+    vid_id = sanitize_component(str(info.get('id') or '')) or hashlib.sha256(url.encode()).hexdigest()[:10]
+    
+    prefix = f"{date_str}_"
+    clip_part = f"_{clip}" if clip else ''
+    ident = f"_{vid_id}{clip_part}"
+    half = Config.FILENAME_MAX_BYTES // 2
+    if len(ident.encode('utf-8')) > half:
+        ident = f"_{hashlib.sha256(ident.encode('utf-8')).hexdigest()[:16]}"
+    # Quality, codecs and platform get what the ID leaves of half the name
+    details = truncate_bytes(f"_{height}p_{vcodec}_{acodec}__{extractor}", half - len(ident.encode('utf-8')))
+    suffix = details + ident
+    
+    # Title gets whatever the fixed parts leave
+    budget = Config.FILENAME_MAX_BYTES - _SUFFIX_RESERVE - len((prefix + suffix).encode('utf-8'))
+    title = sanitize_title(info.get('title') or 'video', max_bytes=max(budget, 1)) or 'video'
+    
+    return f"{prefix}{title}{suffix}"
+
+
+def _reservation(base_filename: str, namespace: Optional[str] = None) -> Path:
+    # Hidden, so it is never listed or moved (see storage.is_partial)
+    return storage.get_work_dir(namespace) / f'.{base_filename}.name'
+
+
+def _reserve(base_filename: str, key: str, namespace: Optional[str] = None) -> bool:
+    """Claim a name for a download in progress; False if another video holds it."""
+    path = _reservation(base_filename, namespace)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        try:
+            return path.read_text(encoding='utf-8') == key
+        except OSError:
+            return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(key)
+    return True
+
+
+def release_filename(base_filename: str, key: str, namespace: Optional[str] = None):
+    """Give up the claim unique_filename() took on a name (the download has ended)."""
+    path = _reservation(base_filename, namespace)
+    try:
+        if path.read_text(encoding='utf-8') == key:
+            path.unlink()
+    except OSError:
+        pass
+
+
+def unique_filename(base_filename: str, ext: str, key: str, namespace: Optional[str] = None) -> str:
+    """
+    Resolve name collisions between different videos and claim the name.
+    
+    Truncated titles can make two videos share a name. If the archive says
+    the name belongs to another video, or a download of another video is
+    writing it right now, a short hash of this video's key is appended;
+    re-downloads of the same video keep their name. Downloads in progress
+    claim their name with a hidden marker file in the work directory (with
+    O_EXCL, so this also holds across worker processes); release it with
+    release_filename().
+    
+    Args:
+        base_filename: Name from build_filename()
+        ext: Expected extension
+        key: Archive key of this video
+        namespace: User namespace the file is written to
     
-    return f"{date_str}_{title}_{height}p_{vcodec}_{acodec}__{extractor}_{vid_id}"
+    Returns:
+        Base filename (without extension)
+    """
+    owner = get_archive().lookup_filename(f'{base_filename}.{ext}', namespace)
+    if owner in (None, key) and _reserve(base_filename, key, namespace):
+        return base_filename
+    unique = f"{base_filename}-{hashlib.sha256(key.encode()).hexdigest()[:8]}"
+    # The hash is this video's own, so only another download of it can hold the name
+    _reserve(unique, key, namespace)
+    return unique
 
 
 def get_format_string(quality: str, video_codec: str, audio_codec: str, audio_only: bool = False) -> str:
@@ -208,6 +468,146 @@ def get_format_string(quality: str, video_codec: str, audio_codec: str, audio_on
     return '/'.join(formats)
 
 
+# Signed media URLs carry their expiry time (e.g. googlevideo ...&expire=1700000000&...)
+_EXPIRE_RE = re.compile(r'[/?&]expire[=/](\d+)')
+
+
+def _base_ydl_opts(
+    format_str: str,
+    verbose: bool = False,
+    session: Optional[AuthSession] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict:
+    """yt-dlp options shared by extraction and download (cancel_event ends retry sleeps)."""
+    return {
+        'format': format_str,
+        'quiet': not verbose,
+        'no_warnings': not verbose,
+        'extract_flat': False,
+        'nocheckcertificate': True,
+        'ignoreerrors': False,
+        'age_limit': None,
+        # Profile headers include its user agent
+        'http_headers': session.headers if session else {'User-Agent': Config.USER_AGENT},
+        # Request/fragment retries inside yt-dlp; whole-job retries in download_video
+        **ydl_retry_opts(cancel_event),
+    }
+
+
+def _open_ydl(opts: Dict, session: Optional[AuthSession] = None) -> yt_dlp.YoutubeDL:
+    """YoutubeDL instance, using the auth session's cookies if there is one."""
+    ydl = yt_dlp.YoutubeDL(opts)
+    if session is not None:
+        session.attach(ydl)
+    return ydl
+
+
+def resolve_video(
+    url: str,
+    quality: str = '720p',
+    video_codec: str = 'avc1',
+    audio_codec: str = 'm4a',
+    audio_only: bool = False,
+    verbose: bool = False,
+    auth: Optional[str] = None
+) -> Dict:
+    """
+    Extract video information and select formats without downloading.
+    
+    Used by the prefetch stage to resolve upcoming jobs while downloads run.
+    
+    Args:
+        url: Video URL
+        quality: Quality string (720p, 1080p, etc.)
+        video_codec: Preferred video codec
+        audio_codec: Preferred audio codec
+        audio_only: Download audio only
+        verbose: Enable verbose logging
+        auth: Auth profile name (default: the profile whose host rule matches)
+    
+    Returns:
+        Dictionary with 'url', 'info', 'format' and 'resolved_at'; for playlists
+        'playlist' is True and 'info' has no entries (see playlist.py)
+    
+    Raises:
+        RuntimeError: If no information could be extracted
+        ValueError: If the auth profile does not exist
+    """
+    format_str = get_format_string(quality, video_codec, audio_codec, audio_only)
+    session = get_auth_store().session(url, auth)
+    
+    with _open_ydl(_base_ydl_opts(format_str, verbose, session), session) as ydl:
+        # Playlists are recognised before their entries are resolved; the job
+        # queue expands them entry by entry
+        ie_result, extra_info = extract_unprocessed(ydl, url)
+        if is_playlist(ie_result):
+            return {
+                'url': url,
+                'info': playlist_summary(ie_result),
+                'format': format_str,
+                'resolved_at': time.time(),
+                'playlist': True,
+            }
+        info = ydl.process_ie_result(ie_result, download=False, extra_info=extra_info)
+    
+    if not info:
+        raise RuntimeError('Failed to extract video information')
+    
+    return {
+        'url': url,
+        'info': info,
+        'format': format_str,
+        'resolved_at': time.time(),
+    }
+
+
+def is_stale(resolved: Dict, margin: int = 60) -> bool:
+    """
+    Check whether a resolved info dict is too old to download from.
+    
+    Args:
+        resolved: Result of resolve_video()
+        margin: Seconds of validity the media URLs must still have
+    
+    Returns:
+        True if it exceeded PREFETCH_MAX_AGE or a signed URL expires within margin
+    """
+    now = time.time()
+    if now - resolved.get('resolved_at', 0) > Config.PREFETCH_MAX_AGE:
+        return True
+    
+    info = resolved.get('info') or {}
+    for fmt in info.get('requested_formats') or [info]:
+        match = _EXPIRE_RE.search(fmt.get('url') or '')
+        if match and int(match.group(1)) <= now + margin:
+            return True
+    return False
+
+
+def _is_expired_url_error(error: Exception) -> bool:
+    """HTTP 403/410 while downloading usually means the signed URL expired."""
+    message = str(error)
+    return 'HTTP Error 403' in message or 'HTTP Error 410' in message
+
+
+def _remove_partials(work_files: Dict[str, int]):
+    """
+    Delete in-progress files left by an interrupted download.
+    
+    Args:
+        work_files: Work file paths reported by progress hooks, mapped to
+                    their fragment count (no directory scan needed)
+    """
+    for path, fragments in work_files.items():
+        candidates = [path, f'{path}.ytdl'] + [f'{path}-Frag{i}' for i in range(1, fragments + 1)]
+        for candidate in candidates:
+            if storage.is_partial(Path(candidate)):
+                try:
+                    os.unlink(candidate)
+                except OSError:
+                    pass
+
+
 def download_video(
     url: str,
     quality: str = '720p',
@@ -215,7 +615,26 @@ def download_video(
     audio_codec: str = 'm4a',
     audio_only: bool = False,
     verbose: bool = False,
-    progress_callback: Optional[Callable] = None
+    progress_callback: Optional[Callable] = None,
+    job_id: Optional[str] = None,
+    resolved: Optional[Dict] = None,
+    cancel_event: Optional[threading.Event] = None,
+    checkpoint_event: Optional[threading.Event] = None,
+    subtitles: Optional[List[str]] = None,
+    chapters: Optional[bool] = None,
+    info_json: Optional[bool] = None,
+    auth: Optional[str] = None,
+    start: Optional[Union[str, float]] = None,
+    end: Optional[Union[str, float]] = None,
+    chapter: Optional[str] = None,
+    accurate_cuts: bool = False,
+    live_from_start: bool = False,
+    max_duration: Optional[Union[str, float]] = None,
+    max_size_mb: Optional[float] = None,
+    segment_seconds: Optional[int] = None,
+    namespace: Optional[str] = None,
+    rate_limit: Optional[int] = None,
+    max_filesize: Optional[int] = None
 ) -> Dict:
     """
     Download a video using yt-dlp.
@@ -228,98 +647,287 @@ def download_video(
         audio_only: Download audio only
         verbose: Enable verbose logging
         progress_callback: Optional callback for progress updates
+        job_id: Optional job ID for the stats registry (generated if omitted)
+        resolved: Optional prefetched result of resolve_video(); re-resolved if stale
+        cancel_event: Optional event; when set, the download stops at the next
+                      progress update and partial files are removed
+        checkpoint_event: Optional event; if set when cancel_event is, partial
+                          files are kept so a later download of the URL resumes them
+        subtitles: Subtitle languages to write next to the media
+                   (default: Config.SUBTITLE_LANGS)
+        chapters: Embed chapters (default: Config.EMBED_CHAPTERS)
+        info_json: Write a compact name.info.json (default: Config.WRITE_INFO_JSON)
+        auth: Auth profile name (default: the profile whose host rule matches)
+        start: Clip start (seconds or HH:MM:SS); only the needed fragments are fetched
+        end: Clip end (seconds or HH:MM:SS)
+        chapter: Download only the chapter with this title
+        accurate_cuts: Re-encode at the clip edges instead of cutting at keyframes
+        live_from_start: Live streams: record from the oldest available segment, not the live edge
+        max_duration: Live streams: stop after this long (seconds or HH:MM:SS;
+                      default: Config.LIVE_MAX_DURATION)
+        max_size_mb: Live streams: stop after this many MB (default: Config.LIVE_MAX_SIZE_MB)
+        segment_seconds: Live streams: segment length (default: Config.LIVE_SEGMENT_SECONDS)
+        namespace: User namespace: the file goes to users/<namespace> and is archived there
+        rate_limit: Bandwidth limit in bytes/s
+        max_filesize: Skip formats larger than this many bytes (live streams: stop there)
     
     Returns:
         Dictionary with download result:
         {
-            'status': 'success' or 'error',
+            'status': 'success', 'error' or 'cancelled',
             'filename': 'path/to/file.mp4',
             'filesize': 'Size in human-readable format',
-            'error': 'Error message if failed'
+            'retries': 'Whole-download retries after transient/rate-limited errors',
+            'error': 'Error message if failed',
+            'error_category': 'transient, rate_limited, geo or permanent (if failed)',
+            'segments': 'Live recordings: segment file names (filename is the first)'
         }
     """
+    job_id = job_id or uuid.uuid4().hex
+    registry.start_job(job_id, url)
+    status = 'error'
+    # (base filename, archive key) claimed by unique_filename()
+    claimed = None
+    
+    defaults = default_options()
+    subtitles = defaults['subtitles'] if subtitles is None else subtitles
+    chapters = defaults['chapters'] if chapters is None else chapters
+    info_json = defaults['info_json'] if info_json is None else info_json
+    
+    def resolve():
+        if progress_callback:
+            progress_callback('initializing', 0.0, 'Fetching video information...')
+        return resolve_video(url, quality, video_codec, audio_codec, audio_only, verbose, auth)
+    
+    def check_cancelled(d=None):
+        if cancel_event is not None and cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled('Download cancelled')
+    
+    retries = 0
+    
+    def wait_for_retry(attempt, category, delay, error):
+        """Report and wait out a backoff (cancellable)."""
+        nonlocal retries
+        retries += 1
+        if progress_callback:
+            progress_callback('retrying', 0.0,
+                              f'{category.replace("_", " ").capitalize()} error, '
+                              f'retry {attempt}/{Config.RETRY_ATTEMPTS} in {delay:.0f}s')
+        if cancel_event is not None:
+            cancel_event.wait(delay)
+        else:
+            time.sleep(delay)
+        check_cancelled()
+    
+    # Work files and final paths as yt-dlp reports them
+    work_files: Dict[str, int] = {}
+    final_files = []
+    
+    def track_work_files(d):
+        for name in (d.get('tmpfilename'), d.get('filename')):
+            if name:
+                work_files[name] = max(work_files.get(name, 0), d.get('fragment_count') or 0)
+    
+    session = None
     try:
+        # Cookies and headers of the job's auth profile (shared, warm session)
+        session = get_auth_store().session(url, auth)
+        
         # Ensure download directory exists
         Config.ensure_directories()
-        download_dir = Path(Config.DOWNLOAD_DIR)
+        # Staging tier if configured (merges happen on local disk, not the NAS)
+        download_dir = storage.get_work_dir(namespace)
+        download_dir.mkdir(parents=True, exist_ok=True)
         
         # Set up progress tracking
-        progress = DownloadProgress(progress_callback)
+        progress = DownloadProgress(progress_callback, job_id=job_id)
         
         # Build format string
         format_str = get_format_string(quality, video_codec, audio_codec, audio_only)
         
+        # Use prefetched info unless it was resolved for other formats or has gone stale
+        prefetched = (
+            resolved is not None
+            and resolved.get('format') == format_str
+            and not is_stale(resolved)
+        )
+        if not prefetched:
+            resolved = call_with_retries(resolve, on_retry=wait_for_retry)
+        if resolved.get('playlist'):
+            raise ValueError(f"{url} is a playlist; queue it to download its videos one by one")
+        info = resolved['info']
+        check_cancelled()
+        
+        registry.set_extractor(job_id, info.get('extractor_key', 'site'))
+        progress.expect_streams(info)
+        
+        # Clip: concrete range (chapters are looked up in the resolved info)
+        clip = clip_spec(start, end, chapter, accurate_cuts)
+        clip_start, clip_end = clip_range(clip, info) if clip else (None, None)
+        label = clip_label(clip_start, clip_end) if clip else None
+        if info.get('is_live'):
+            if clip:
+                raise ValueError('Live streams cannot be clipped; use max_duration')
+            # Every recording of a (24/7) stream gets its own name
+            label = f"live{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        
+        # Build proper filename
+        ext = 'mp3' if audio_only and audio_codec == 'mp3' else \
+              'opus' if audio_only and audio_codec == 'opus' else \
+              'm4a' if audio_only else \
+              'mp4'
+        key = archive_key(info.get('extractor_key') or 'generic',
+                          info.get('id') or hashlib.sha256(url.encode()).hexdigest()[:10], namespace)
+        if label:
+            # A clip does not count as the whole video (subscriptions skip archived keys)
+            key = f'{key} {label}'
+        base_filename = unique_filename(build_filename(info, quality, url, clip=label), ext, key, namespace)
+        claimed = (base_filename, key)
+        
+        final_path = download_dir / f"{base_filename}.{ext}"
+        
+        # Live stream: rotating segments instead of one ever-growing .part file
+        if info.get('is_live'):
+            if max_filesize:
+                # Storage quota: stop the recording where it would be exceeded
+                limit_mb = max_filesize / (1024 * 1024)
+                max_size_mb = min(max_size_mb or Config.LIVE_MAX_SIZE_MB or limit_mb, limit_mb)
+            recorder = LiveRecorder(
+                info, download_dir / base_filename,
+                ext='m4a' if audio_only else 'mp4',
+                from_start=live_from_start,
+                segment_seconds=segment_seconds,
+                max_duration=parse_timestamp(max_duration),
+                max_size_mb=max_size_mb,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+                job_id=job_id
+            )
+            recorded = recorder.run()
+            segments = recorded['segments']
+            recorded_mb = recorded['bytes'] / (1024 * 1024)
+            if progress_callback:
+                progress_callback('completed', 100.0,
+                                  f'Recorded {format_elapsed(recorded["duration"])} in '
+                                  f'{len(segments)} segment(s), {recorded_mb:.1f} MB')
+            if info.get('id'):
+                get_archive().record(key, filename=segments[0].name, url=url, title=info.get('title'),
+                                     segments=[path.name for path in segments],
+                                     **({'namespace': namespace} if namespace else {}))
+            status = 'success'
+            return {
+                'status': 'success',
+                'filename': str(segments[0]),
+                'filesize': f'{recorded_mb:.1f} MB',
+                'url': url,
+                'title': info.get('title', 'Unknown'),
+                # Segments are handed to the archive tier as they finish
+                'tier': 'staging' if storage.staging_enabled() else 'archive',
+                'retries': retries,
+                'live': True,
+                'segments': [path.name for path in segments],
+                'duration': recorded['duration'],
+                'stopped': recorded['stopped'],
+            }
+        
         # yt-dlp options
         ydl_opts = {
-            'format': format_str,
-            'outtmpl': str(download_dir / '%(title)s.%(ext)s'),  # Temporary, will rename
-            'progress_hooks': [progress],
-            'quiet': not verbose,
-            'no_warnings': not verbose,
-            'extract_flat': False,
-            'nocheckcertificate': True,
-            'ignoreerrors': False,
-            'age_limit': None,
-            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            **_base_ydl_opts(format_str, verbose, session, cancel_event),
+            # '%' is literal in titles, not an output template field
+            'outtmpl': str(download_dir / f"{base_filename.replace('%', '%%')}.%(ext)s"),
+            'progress_hooks': [check_cancelled, track_work_files, progress],
+            'postprocessor_hooks': [progress.postprocessor_hook],
+            # Called with the final path after all post-processors
+            'post_hooks': [final_files.append],
             # FFmpeg options (use bundled via imageio-ffmpeg)
             'prefer_ffmpeg': True,
             'merge_output_format': 'mp4' if not audio_only else None,
+            # Subtitles and chapters from this extraction, no second run
+            **sidecar_ydl_opts(subtitles, chapters),
+            # Clip: fetch only the fragments of the range
+            **(clip_ydl_opts(clip_start, clip_end, clip['accurate']) if clip else {}),
+            # Per-user bandwidth and storage quotas
+            **({'ratelimit': rate_limit} if rate_limit else {}),
+            **({'max_filesize': max_filesize} if max_filesize else {}),
         }
         
-        # Download video
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Get video info first
-            if progress_callback:
-                progress_callback('initializing', 0.0, 'Fetching video information...')
-            
-            info = ydl.extract_info(url, download=False)
-            
-            if not info:
-                raise RuntimeError('Failed to extract video information')
-            
-            # Build proper filename
-            base_filename = build_filename(info, quality, url)
-            ext = 'mp3' if audio_only and audio_codec == 'mp3' else \
-                  'opus' if audio_only and audio_codec == 'opus' else \
-                  'm4a' if audio_only else \
-                  'mp4'
-            
-            final_filename = f"{base_filename}.{ext}"
-            final_path = download_dir / final_filename
-            
-            # Update output template
-            ydl_opts['outtmpl'] = str(download_dir / f'{base_filename}.%(ext)s')
-            
-            # Perform download
-            if progress_callback:
-                progress_callback('downloading', 0.0, 'Starting download...')
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl_download:
-                ydl_download.download([url])
-            
-            # Verify file exists
-            if not final_path.exists():
-                # Look for file with different extension
-                found_files = list(download_dir.glob(f"{base_filename}.*"))
-                if found_files:
-                    final_path = found_files[0]
-                else:
-                    raise RuntimeError(f'Downloaded file not found: {final_path}')
-            
-            # Get file size
-            filesize = final_path.stat().st_size
-            filesize_mb = filesize / (1024 * 1024)
+        # Perform download from the resolved info (no second extraction)
+        if progress_callback:
+            progress_callback('downloading', 0.0, 'Starting download...')
+        
+        with _open_ydl(ydl_opts, session) as ydl_download:
+            def attempt():
+                return ydl_download.process_ie_result(ydl_download.sanitize_info(info), download=True)
             
-            if progress_callback:
-                progress_callback('completed', 100.0, f'Download complete: {filesize_mb:.1f} MB')
+            def before_retry(attempt_number, category, delay, error):
+                nonlocal info
+                if _is_expired_url_error(error):
+                    # Signed media URLs expired: re-extract instead of waiting
+                    info = resolve()['info']
+                    return
+                wait_for_retry(attempt_number, category, delay, error)
             
-            return {
-                'status': 'success',
-                'filename': str(final_path),
-                'filesize': f'{filesize_mb:.1f} MB',
-                'url': url,
-                'title': info.get('title', 'Unknown'),
-            }
+            # Retries reuse the resolved info; already downloaded streams are kept
+            downloaded = call_with_retries(attempt, on_retry=before_retry)
+        
+        # Exact output path from yt-dlp (the extension may differ, e.g. webm audio)
+        if final_files:
+            final_path = Path(final_files[-1])
+        if not final_path.exists():
+            raise RuntimeError(f'Downloaded file not found: {final_path}')
+        
+        # Get file size
+        filesize = final_path.stat().st_size
+        filesize_mb = filesize / (1024 * 1024)
+        
+        if progress_callback:
+            progress_callback('completed', 100.0, f'Download complete: {filesize_mb:.1f} MB')
+        
+        result = {
+            'status': 'success',
+            'filename': str(final_path),
+            'filesize': f'{filesize_mb:.1f} MB',
+            'url': url,
+            'title': info.get('title', 'Unknown'),
+            'tier': 'archive',
+            'retries': retries,
+        }
+        
+        sidecars = write_sidecars(downloaded or info, final_path, info_json=info_json)
+        if sidecars:
+            result['sidecars'] = sidecar_names(sidecars)
+        
+        # Move from staging to the archive tier in the background
+        if storage.promote(final_path, key) is not None:
+            result['tier'] = 'staging'
+        for path in sidecar_paths(sidecars):
+            storage.promote(path, key)
+        
+        if info.get('id'):
+            get_archive().record(
+                key,
+                filename=final_path.name,
+                url=url,
+                title=info.get('title'),
+                **({'namespace': namespace} if namespace else {}),
+                **({'sidecars': result['sidecars']} if sidecars else {}),
+                **({'clip': [clip_start, clip_end]} if clip else {}),
+            )
+        
+        status = 'success'
+        return result
+    
+    except yt_dlp.utils.DownloadCancelled:
+        status = 'cancelled'
+        if checkpoint_event is None or not checkpoint_event.is_set():
+            _remove_partials(work_files)
+        if progress_callback:
+            progress_callback('cancelled', 0.0, 'Download cancelled')
+        
+        return {
+            'status': 'cancelled',
+            'url': url,
+        }
     
     except Exception as e:
         error_msg = str(e)
@@ -329,8 +937,18 @@ def download_video(
         return {
             'status': 'error',
             'error': error_msg,
+            'error_category': classify_error(e),
+            'retries': retries,
             'url': url,
         }
+    
+    finally:
+        registry.finish_job(job_id, status)
+        if claimed is not None:
+            release_filename(*claimed, namespace)
+        if session is not None:
+            # Keep refreshed session cookies for the next run
+            get_auth_store().save_cookies(session.name)
 
 
 if __name__ == '__main__':
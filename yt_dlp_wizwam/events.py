@@ -0,0 +1,284 @@
+"""
+Job event log for yt-dlp-wizwam.
+
+Every job event (progress, success, error, ...) is appended to a per-job log
+with a global sequence number before it is emitted over Socket.IO. Recent
+events are kept in bounded in-memory ring buffers and spilled to JSON lines
+on disk (LOG_DIR/jobs/<job_id>.jsonl) by a writer thread.
+
+Clients that reconnect pass the last sequence number they saw and get the
+missed events replayed; the CLI's 'downloader jobs tail' reads the same files.
+
+In multi-user mode a user's job events go to their Socket.IO room only
+(users.user_room) and are replayed to that room's clients only.
+"""
+
+import collections
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Events that end a job
+TERMINAL_EVENTS = ('success', 'error', 'cancelled')
+
+
+class JobEventLog:
+    """Append-only job event log with in-memory ring buffers and JSONL spill."""
+
+    def __init__(
+        self,
+        log_dir: Optional[Path] = None,
+        buffer_size: Optional[int] = None,
+        max_jobs: Optional[int] = None
+    ):
+        """
+        Initialize event log.
+
+        Args:
+            log_dir: Directory for JSONL files (default: LOG_DIR/jobs)
+            buffer_size: Events kept in memory per job (default: Config.EVENT_BUFFER_SIZE)
+            max_jobs: Jobs kept in memory (default: Config.EVENT_BUFFER_JOBS)
+        """
+        self.log_dir = Path(log_dir or Path(Config.LOG_DIR) / 'jobs')
+        self.buffer_size = buffer_size or Config.EVENT_BUFFER_SIZE
+        self.max_jobs = max_jobs or Config.EVENT_BUFFER_JOBS
+        # Sequence numbers restart with the process; clients compare epochs
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._buffers: 'collections.OrderedDict[str, collections.deque]' = collections.OrderedDict()
+        self._finished = set()
+        self._emitter: Optional[Callable[[str, Dict], None]] = None
+        self._spill = queue.Queue()
+        self._writer = None
+
+    def set_emitter(self, emitter: Callable[..., None]):
+        """Set the function that broadcasts events (e.g. socketio.emit; called with to=room for room events)."""
+        self._emitter = emitter
+
+    def broadcast(self, event: str, data: Dict):
+        """Broadcast an event that is not part of a job's log (e.g. 'stats')."""
+        if self._emitter:
+            self._emitter(event, data)
+
+    def emit(self, event: str, data: Dict, room: Optional[str] = None) -> Dict:
+        """
+        Log a job event and broadcast it.
+
+        Args:
+            event: Event name ('progress', 'success', 'error', ...)
+            data: Event payload; must contain 'job_id'
+            room: Socket.IO room to send it to (default: everyone)
+
+        Returns:
+            The payload as broadcast (with 'seq' and 'epoch')
+        """
+        job_id = data['job_id']
+        with self._lock:
+            self._seq += 1
+            record = {
+                'seq': self._seq,
+                'time': time.time(),
+                'job_id': job_id,
+                'event': event,
+                'data': data,
+            }
+            if room:
+                record['room'] = room
+            buffer = self._buffers.get(job_id)
+            if buffer is None:
+                buffer = self._buffers[job_id] = collections.deque(maxlen=self.buffer_size)
+                self._evict()
+            buffer.append(record)
+            if event in TERMINAL_EVENTS:
+                self._finished.add(job_id)
+
+        self._spill.put(record)
+        self._ensure_writer()
+
+        payload = {**data, 'seq': record['seq'], 'epoch': self.epoch}
+        if self._emitter:
+            if room:
+                self._emitter(event, payload, to=room)
+            else:
+                self._emitter(event, payload)
+        return payload
+
+    def _evict(self):
+        # Drop the oldest finished jobs first, then the oldest overall
+        while len(self._buffers) > self.max_jobs:
+            victim = next((j for j in self._buffers if j in self._finished), None)
+            if victim is None:
+                victim = next(iter(self._buffers))
+            del self._buffers[victim]
+            self._finished.discard(victim)
+
+    def replay(self, since: Optional[int] = None, epoch: Optional[str] = None,
+               room: Optional[str] = None) -> List[Dict]:
+        """
+        Events a (re)connecting client missed, oldest first.
+
+        Only the latest progress event per job is returned; terminal and
+        other events are returned in full.
+
+        Args:
+            since: Last sequence number the client saw; None for a fresh
+                   client, which only gets the state of unfinished jobs
+            epoch: Epoch the sequence number belongs to; a different epoch
+                   (server restarted) replays everything still buffered
+            room: Room of the client; events sent to other rooms are left out
+
+        Returns:
+            List of (event, payload) records
+        """
+        if since is not None and epoch != self.epoch:
+            since = 0
+
+        with self._lock:
+            records = []
+            for job_id, buffer in self._buffers.items():
+                if since is None and job_id in self._finished:
+                    continue
+                latest_progress = None
+                for record in buffer:
+                    if since is not None and record['seq'] <= since:
+                        continue
+                    if record.get('room', room) != room:
+                        continue
+                    if record['event'] == 'progress':
+                        latest_progress = record
+                    else:
+                        records.append(record)
+                if latest_progress:
+                    records.append(latest_progress)
+
+        records.sort(key=lambda r: r['seq'])
+        return [
+            {'event': r['event'], 'data': {**r['data'], 'seq': r['seq'], 'epoch': self.epoch}}
+            for r in records
+        ]
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True, name='event-log')
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._spill.get()]
+            # Group whatever else is pending into the same write
+            while True:
+                try:
+                    batch.append(self._spill.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._spill.task_done()
+
+    def _write(self, batch: List[Dict]):
+        by_job: Dict[str, List[str]] = {}
+        for record in batch:
+            by_job.setdefault(record['job_id'], []).append(json.dumps(record))
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            for job_id, lines in by_job.items():
+                with open(self.log_dir / f'{job_id}.jsonl', 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            logger.warning(f"Failed to write job event log: {e}")
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until spilled events are on disk."""
+        deadline = time.monotonic() + timeout
+        while self._spill.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def prune(self, max_age_days: Optional[int] = None) -> int:
+        """
+        Delete job logs older than max_age_days (default: Config.EVENT_LOG_RETENTION_DAYS).
+
+        Returns:
+            Number of files removed
+        """
+        max_age = (max_age_days or Config.EVENT_LOG_RETENTION_DAYS) * 86400
+        cutoff = time.time() - max_age
+        removed = 0
+        if not self.log_dir.exists():
+            return 0
+        for path in self.log_dir.glob('*.jsonl'):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def read_job_log(path: Path, offset: int = 0) -> tuple:
+    """
+    Read events appended to a job log since offset.
+
+    Returns:
+        (list of records, new offset)
+    """
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line or not line.endswith('\n'):
+                # Partial line still being written; re-read it next time
+                break
+            offset = f.tell()
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records, offset
+
+
+def tail_job_logs(
+    log_dir: Optional[Path] = None,
+    job_id: Optional[str] = None,
+    follow: bool = False,
+    interval: float = 0.5
+) -> Iterator[Dict]:
+    """
+    Yield job events from the JSONL logs.
+
+    Args:
+        log_dir: Directory of job logs (default: LOG_DIR/jobs)
+        job_id: Only this job (prefix match); default: all jobs
+        follow: Keep waiting for new events
+        interval: Poll interval when following
+
+    Yields:
+        Event records in file order
+    """
+    log_dir = Path(log_dir or Path(Config.LOG_DIR) / 'jobs')
+    offsets: Dict[Path, int] = {}
+
+    while True:
+        paths = sorted(log_dir.glob(f'{job_id or ""}*.jsonl'), key=lambda p: p.stat().st_mtime) \
+            if log_dir.exists() else []
+        for path in paths:
+            records, offsets[path] = read_job_log(path, offsets.get(path, 0))
+            yield from records
+        if not follow:
+            return
+        time.sleep(interval)
+
+
+# Shared event log for the web server
+event_log = JobEventLog()
@@ -0,0 +1,29 @@
+"""
+Exceptions raised by the yt-dlp-wizwam Python API.
+
+download_video() reports failures as result dicts; the Downloader API
+(api.py) raises these instead.
+"""
+
+from typing import Optional
+
+
+class WizwamError(Exception):
+    """Base class for yt-dlp-wizwam errors."""
+
+
+class DownloadError(WizwamError):
+    """A download failed."""
+
+    def __init__(self, message: str, url: Optional[str] = None, job_id: Optional[str] = None):
+        super().__init__(message)
+        self.url = url
+        self.job_id = job_id
+
+
+class DownloadCancelled(DownloadError):
+    """A download was cancelled before it finished."""
+
+
+class DownloaderClosed(WizwamError):
+    """The Downloader was closed and accepts no more downloads."""
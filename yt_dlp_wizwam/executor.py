@@ -0,0 +1,283 @@
+"""
+Blocking I/O offload for yt-dlp-wizwam.
+
+Under SOCKETIO_ASYNC_MODE = 'eventlet' every request handler and background
+task shares one hub. A slow stat() on a NAS mount, a macro subprocess or a
+yt-dlp/ffmpeg download running on the hub freezes Socket.IO for every client.
+
+This module runs such calls in real OS threads (eventlet.tpool) while the
+calling greenlet yields, relays callbacks from those threads back onto the
+hub, and provides a watchdog that measures how long the hub is blocked.
+"""
+
+import collections
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Set by init_executor(); None/'threading' means calls run inline
+_async_mode: Optional[str] = None
+_socketio = None
+
+
+def init_executor(socketio, async_mode: str):
+    """
+    Configure offloading for the server's async mode.
+
+    Args:
+        socketio: Flask-SocketIO instance (used for sleep/background tasks)
+        async_mode: Socket.IO async mode ('eventlet', 'threading', ...)
+    """
+    global _async_mode, _socketio
+    _async_mode = async_mode
+    _socketio = socketio
+
+    if async_mode == 'eventlet':
+        from eventlet import tpool
+        tpool.set_num_threads(Config.BLOCKING_POOL_SIZE)
+
+
+def is_green() -> bool:
+    """Return True if callers are greenlets that must not block."""
+    return _async_mode == 'eventlet'
+
+
+def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Run a blocking call without stalling the event loop.
+
+    Under eventlet the call runs in a tpool OS thread and the calling greenlet
+    yields until it returns; exceptions propagate. Otherwise it runs inline.
+    Either way its time is not counted against the calling handler (see HubWatchdog).
+    """
+    with watchdog.offloaded():
+        if not is_green():
+            return func(*args, **kwargs)
+
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+
+
+def current_task() -> int:
+    """Identity of the calling greenlet under eventlet, else of the calling thread."""
+    if is_green():
+        import eventlet
+        return id(eventlet.getcurrent())
+    return threading.get_ident()
+
+
+def spawn(func: Callable, *args, **kwargs):
+    """
+    Start a long-lived worker: a Socket.IO background task (greenlet under
+    eventlet) once the server is set up, otherwise a daemon thread.
+    """
+    if _socketio is not None:
+        return _socketio.start_background_task(func, *args, **kwargs)
+    thread = threading.Thread(target=func, args=args, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def make_queue(maxsize: int = 0):
+    """A queue that blocks workers started with spawn() without blocking the hub."""
+    if is_green():
+        import eventlet.queue
+        return eventlet.queue.Queue(maxsize)
+    import queue
+    return queue.Queue(maxsize)
+
+
+def sleep(seconds: float):
+    """Sleep without blocking the hub."""
+    if _socketio is not None:
+        _socketio.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+class CallbackRelay:
+    """
+    Deliver callbacks made from tpool threads on the hub.
+
+    Socket.IO emits are not safe from foreign OS threads under eventlet, so
+    wrapped callbacks only enqueue; a background greenlet drains the queue.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self._calls = collections.deque()
+        self._interval = interval
+        self._started = False
+        self._lock = threading.Lock()
+
+    def wrap(self, func: Optional[Callable]) -> Optional[Callable]:
+        """Return a thread-safe version of func (func itself when not green)."""
+        if func is None or not is_green():
+            return func
+
+        self._ensure_started()
+
+        def relayed(*args, **kwargs):
+            self._calls.append((func, args, kwargs))
+
+        return relayed
+
+    def drain(self):
+        """Invoke all queued callbacks."""
+        while self._calls:
+            func, args, kwargs = self._calls.popleft()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Relayed callback {getattr(func, '__name__', func)} failed")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        _socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.drain()
+            _socketio.sleep(self._interval)
+
+
+relay = CallbackRelay()
+
+
+class HubWatchdog:
+    """
+    Measure hub blocking time and report the handlers responsible.
+
+    A greenlet sleeps for a fixed interval; any extra delay before it wakes up
+    is time the hub spent running something that did not yield.
+
+    A handler counts as slow by its own time: time spent waiting for
+    run_blocking() calls, which yield the hub, is subtracted.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25):
+        """
+        Initialize watchdog.
+
+        Args:
+            interval: Sampling interval in seconds
+            threshold: Report stalls longer than this (seconds)
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # token -> [endpoint, task, started, offloaded seconds, offload depth, offload start]
+        self._inflight: Dict[int, list] = {}
+        self._tasks: Dict[int, int] = {}
+        self._next_id = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.stalls = 0
+        self.slow_handlers: Dict[str, Dict] = {}
+        self.running = False
+
+    def start(self):
+        """Start sampling the eventlet hub (no-op in other modes; see run_async())."""
+        if is_green():
+            self.running = True
+            _socketio.start_background_task(self._run)
+
+    async def run_async(self):
+        """Sample the running asyncio loop instead of the eventlet hub."""
+        import asyncio
+        self.running = True
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._sample(time.monotonic() - started - self.interval)
+
+    def request_started(self, endpoint: str) -> int:
+        """Record a handler as in flight; returns a token for request_finished()."""
+        task = current_task()
+        with self._lock:
+            self._next_id += 1
+            token = self._next_id
+            self._inflight[token] = [endpoint, task, time.monotonic(), 0.0, 0, 0.0]
+            self._tasks[task] = token
+        return token
+
+    def request_finished(self, token: int):
+        """Record handler completion and its duration (without offloaded time)."""
+        with self._lock:
+            entry = self._inflight.pop(token, None)
+            if entry is not None and self._tasks.get(entry[1]) == token:
+                del self._tasks[entry[1]]
+        if entry is None:
+            return
+        endpoint, _, started, offloaded = entry[:4]
+        duration = time.monotonic() - started - offloaded
+        if duration >= self.threshold:
+            self._record_slow(endpoint, duration)
+
+    @contextlib.contextmanager
+    def offloaded(self):
+        """Exclude the time spent in this context from the calling handler's duration."""
+        with self._lock:
+            entry = self._inflight.get(self._tasks.get(current_task()))
+            if entry is not None:
+                if entry[4] == 0:
+                    entry[5] = time.monotonic()
+                entry[4] += 1
+        try:
+            yield
+        finally:
+            if entry is not None:
+                with self._lock:
+                    entry[4] -= 1
+                    # Nested calls are counted once, by the outermost
+                    if entry[4] == 0:
+                        entry[3] += time.monotonic() - entry[5]
+
+    def snapshot(self) -> Dict:
+        """Current watchdog statistics."""
+        with self._lock:
+            return {
+                'enabled': self.running,
+                'max_lag': round(self.max_lag, 3),
+                'total_lag': round(self.total_lag, 3),
+                'stalls': self.stalls,
+                'slow_handlers': {k: dict(v) for k, v in self.slow_handlers.items()},
+            }
+
+    def _record_slow(self, endpoint: str, duration: float):
+        with self._lock:
+            stats = self.slow_handlers.setdefault(endpoint, {'count': 0, 'max': 0.0})
+            stats['count'] += 1
+            stats['max'] = round(max(stats['max'], duration), 3)
+        logger.warning(f"Slow handler {endpoint}: {duration:.2f}s")
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            _socketio.sleep(self.interval)
+            self._sample(time.monotonic() - started - self.interval)
+
+    def _sample(self, lag: float):
+        if lag < self.threshold:
+            return
+        with self._lock:
+            self.stalls += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            # Handlers waiting for run_blocking() are not running on the hub
+            suspects = sorted({entry[0] for entry in self._inflight.values() if not entry[4]})
+        logger.warning(
+            f"Event loop blocked for {lag:.2f}s"
+            + (f" (in flight: {', '.join(suspects)})" if suspects else '')
+        )
+
+
+watchdog = HubWatchdog(threshold=Config.HUB_BLOCK_THRESHOLD)
@@ -0,0 +1,283 @@
+"""
+Startup warmup and health/readiness reporting for yt-dlp-wizwam.
+
+Without a warmup, the first download after boot pays for importing yt-dlp,
+loading its extractors, locating ffmpeg (possibly unpacking the
+imageio-ffmpeg binary) and opening the archive and history. The web server
+runs these checks in the background right after startup instead:
+
+- /healthz (liveness): the process answers; reports every subsystem check,
+  event-loop lag and queue saturation. Always 200.
+- /readyz (readiness): 200 once warmup has passed its critical checks, the
+  server is not draining and the job backlog is below READY_MAX_BACKLOG;
+  503 with the reasons otherwise.
+
+On SIGTERM the server drains (see JobQueue.drain): /readyz turns 503, new
+downloads are refused, running ones get SHUTDOWN_TIMEOUT to finish.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional, Tuple
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds between readiness probes in wait_until_ready()
+PROBE_INTERVAL = 0.2
+
+
+def check_ytdlp() -> str:
+    """Import yt-dlp and load its extractors."""
+    import yt_dlp
+    from yt_dlp.version import __version__
+
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        extractors = len(ydl._ies)
+    return f'yt-dlp {__version__}, {extractors} extractors'
+
+
+def check_ffmpeg() -> str:
+    """Locate ffmpeg and check that it runs."""
+    from yt_dlp_wizwam.transcode import get_ffmpeg
+
+    ffmpeg = get_ffmpeg()
+    proc = subprocess.run([ffmpeg, '-hide_banner', '-version'], capture_output=True, text=True,
+                          errors='replace', timeout=30)
+    if proc.returncode != 0:
+        raise RuntimeError(f'{ffmpeg} -version failed: {proc.stderr.strip()[-200:]}')
+    first = (proc.stdout.splitlines() or [''])[0]
+    return f"{' '.join(first.split()[:3])} ({ffmpeg})"
+
+
+def check_download_dir() -> str:
+    """The download directory (and staging directory, if any) accepts files."""
+    dirs = [Config.DOWNLOAD_DIR] + ([Config.STAGING_DIR] if Config.STAGING_DIR else [])
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.healthcheck-'):
+            pass
+    return ', '.join(str(d) for d in dirs)
+
+
+def check_archive() -> str:
+    """Load the download archive index."""
+    from yt_dlp_wizwam.archive import get_archive
+
+    return f'{len(get_archive())} entries'
+
+
+def check_history() -> str:
+    """Open the job history database."""
+    from yt_dlp_wizwam.history import get_history
+
+    return f'{sum(get_history().counts().values())} jobs'
+
+
+def check_auth() -> str:
+    """Load the auth profile store."""
+    from yt_dlp_wizwam.auth import get_auth_store
+
+    return f'{len(get_auth_store().list())} profiles'
+
+
+# (name, check, critical): a failed critical check keeps the server unready;
+# the others only degrade it (e.g. no ffmpeg: no merging, clips or transcodes)
+CHECKS: List[Tuple[str, Callable[[], str], bool]] = [
+    ('download_dir', check_download_dir, True),
+    ('yt_dlp', check_ytdlp, True),
+    ('archive', check_archive, True),
+    ('ffmpeg', check_ffmpeg, False),
+    ('history', check_history, False),
+    ('auth', check_auth, False),
+]
+
+
+def queue_saturation(job_queue=None, transfer_queue=None) -> Dict:
+    """
+    Load of the download and transfer queues.
+
+    Args:
+        job_queue: JobQueue of the server
+        transfer_queue: TransferQueue of the server
+
+    Returns:
+        {'jobs': {...}, 'transfers': {...}}; backlog is the number of jobs
+        waiting for a download slot, saturation the share of busy download slots
+    """
+    report = {}
+    if job_queue is not None:
+        counts = job_queue.counts()
+        downloading = counts.get('downloading', 0)
+        report['jobs'] = {
+            'counts': counts,
+            'download_workers': job_queue.download_workers,
+            'backlog': sum(counts.get(s, 0) for s in ('queued', 'waiting', 'resolving', 'resolved')),
+            'saturation': round(min(downloading / job_queue.download_workers, 1.0), 2),
+        }
+    if transfer_queue is not None:
+        waiting = sum(1 for job in transfer_queue.list_jobs() if job.get('status') == 'queued')
+        report['transfers'] = {'queued': waiting, 'max_queued': transfer_queue.maxsize,
+                               'full': waiting >= transfer_queue.maxsize}
+    return report
+
+
+class HealthMonitor:
+    """Warmup state, drain flag and the health/readiness reports."""
+
+    def __init__(self, checks: Optional[List[Tuple[str, Callable[[], str], bool]]] = None):
+        """
+        Initialize monitor.
+
+        Args:
+            checks: (name, check, critical) tuples (default: CHECKS)
+        """
+        self.checks = CHECKS if checks is None else checks
+        self.started = time.time()
+        self.warmup_finished: Optional[float] = None
+        self.draining = False
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict] = {
+            name: {'status': 'pending', 'critical': critical} for name, _, critical in self.checks
+        }
+
+    def warmup(self, run: Optional[Callable] = None) -> Dict[str, Dict]:
+        """
+        Run all checks once.
+
+        Args:
+            run: Runs each (blocking) check, e.g. executor.run_blocking (default: call it)
+
+        Returns:
+            Check results by name
+        """
+        started = time.monotonic()
+        for name, check, critical in self.checks:
+            check_started = time.monotonic()
+            try:
+                detail = run(check) if run else check()
+                result = {'status': 'ok', 'critical': critical, 'detail': detail}
+            except Exception as e:
+                result = {'status': 'error', 'critical': critical, 'detail': f'{type(e).__name__}: {e}'}
+                log = logger.error if critical else logger.warning
+                log(f"Warmup check {name} failed: {result['detail']}")
+            result['seconds'] = round(time.monotonic() - check_started, 3)
+            with self._lock:
+                self._results[name] = result
+        self.warmup_finished = time.time()
+        logger.info(f"Warmup finished in {time.monotonic() - started:.2f}s")
+        return self.results()
+
+    def results(self) -> Dict[str, Dict]:
+        """Current check results by name."""
+        with self._lock:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def begin_drain(self):
+        """Mark the server as shutting down (not ready, no new jobs)."""
+        self.draining = True
+
+    def status(self) -> str:
+        """'starting', 'draining', 'error' (critical check failed), 'degraded' or 'ok'."""
+        results = self.results().values()
+        if self.draining:
+            return 'draining'
+        if any(r['status'] == 'error' and r['critical'] for r in results):
+            return 'error'
+        if self.warmup_finished is None:
+            return 'starting'
+        if any(r['status'] == 'error' for r in results):
+            return 'degraded'
+        return 'ok'
+
+    def report(self, job_queue=None, transfer_queue=None) -> Dict:
+        """
+        Health report: overall status, checks, queues and event-loop lag.
+
+        Returns:
+            {'status', 'ready', 'reasons', 'uptime', 'checks', 'queues', 'event_loop'}
+        """
+        from yt_dlp_wizwam.executor import watchdog
+
+        queues = queue_saturation(job_queue, transfer_queue)
+        reasons = self.unready_reasons(queues)
+        loop = watchdog.snapshot()
+        return {
+            'status': self.status(),
+            'ready': not reasons,
+            'reasons': reasons,
+            'version': Config.VERSION,
+            'uptime': round(time.time() - self.started, 1),
+            'checks': self.results(),
+            'queues': queues,
+            'event_loop': {k: loop[k] for k in ('enabled', 'max_lag', 'stalls')},
+        }
+
+    def unready_reasons(self, queues: Dict) -> List[str]:
+        """Why the server is not ready (empty if it is)."""
+        reasons = []
+        if self.draining:
+            reasons.append('draining')
+        for name, result in self.results().items():
+            if result['critical'] and result['status'] != 'ok':
+                reasons.append(f"{name}: {result.get('detail', result['status'])}")
+        backlog = queues.get('jobs', {}).get('backlog', 0)
+        if Config.READY_MAX_BACKLOG and backlog >= Config.READY_MAX_BACKLOG:
+            reasons.append(f'job backlog {backlog} (limit {Config.READY_MAX_BACKLOG})')
+        if queues.get('transfers', {}).get('full'):
+            reasons.append('transfer queue full')
+        return reasons
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> Tuple[bool, Optional[Dict]]:
+    """
+    Poll a server's /readyz.
+
+    Returns as soon as the server is ready, or has finished warming up
+    without becoming ready (e.g. a critical check failed), or at the timeout.
+
+    Args:
+        base_url: e.g. http://127.0.0.1:8080
+        timeout: Seconds to wait
+
+    Returns:
+        (ready, last report or None if the server never answered)
+    """
+    deadline = time.monotonic() + timeout
+    report = None
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'{base_url}/readyz', timeout=5) as response:
+                return True, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                report = json.loads(e.read())
+            except ValueError:
+                report = None
+            if report and report.get('status') not in ('starting', None):
+                return False, report
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        time.sleep(PROBE_INTERVAL)
+    return False, report
+
+
+_monitor: Optional[HealthMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_health() -> HealthMonitor:
+    """Get the shared health monitor."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor()
+        return _monitor
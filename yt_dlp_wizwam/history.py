@@ -0,0 +1,391 @@
+"""
+Persistent job history for yt-dlp-wizwam.
+
+Finished jobs (successes, failures and cancellations) are recorded in a
+SQLite database, so results outlive the Socket.IO event that announced
+them and the job queue's in-memory window of MAX_FINISHED jobs.
+
+- WAL journal: readers (/api/jobs, `downloader history`) never block the
+  writer, and the web server and CLI can share the file.
+- Indexes on URL, extractor, status, user and finish time; queries page with a
+  keyset cursor on (finished, job_id), so deep pages cost the same as the
+  first one.
+- Compaction deletes rows older than HISTORY_MAX_AGE_DAYS and beyond
+  HISTORY_MAX_ROWS, then gives the freed pages back (incremental vacuum).
+  It runs every COMPACT_EVERY records, and on demand.
+
+Jobs cut short by a shutdown are recorded as 'interrupted' with their
+options, so the next start can submit them again (see interrupted()).
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Records between automatic compactions
+COMPACT_EVERY = 500
+# Page size limit of query()
+MAX_LIMIT = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    extractor TEXT COLLATE NOCASE,
+    status TEXT NOT NULL,
+    error TEXT,
+    error_category TEXT,
+    filename TEXT,
+    filesize TEXT,
+    parent TEXT,
+    transcode_profile TEXT,
+    user TEXT,
+    playlist INTEGER NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    created REAL,
+    finished REAL NOT NULL,
+    options TEXT,
+    result TEXT
+);
+"""
+
+# Created after the migration, which adds the columns they cover
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_url ON jobs (url);
+CREATE INDEX IF NOT EXISTS jobs_extractor ON jobs (extractor, finished, job_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished, job_id);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished, job_id);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user, finished, job_id);
+"""
+
+_COLUMNS = ('job_id', 'url', 'title', 'extractor', 'status', 'error', 'error_category', 'filename',
+            'filesize', 'parent', 'transcode_profile', 'user', 'playlist', 'retries', 'created', 'finished', 'options', 'result')
+
+_SINCE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*([smhdw])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_since(value: Union[str, float, None], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a point in time.
+
+    Args:
+        value: Age ("30m", "12h", "7d", "2w"), ISO date/time ("2024-05-01",
+               "2024-05-01T12:00"), or a Unix timestamp; None or "" for none
+        now: Reference time for ages (default: now)
+
+    Returns:
+        Unix timestamp, or None
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip()
+    match = _SINCE_RE.match(text.lower())
+    if match:
+        return (now if now is not None else time.time()) - float(match.group(1)) * _UNITS[match.group(2)]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}' (use e.g. 12h, 7d or 2024-05-01)") from None
+
+
+def _encode_cursor(finished: float, job_id: str) -> str:
+    return f'{finished!r}:{job_id}'
+
+
+def _decode_cursor(cursor: str):
+    finished, sep, job_id = cursor.partition(':')
+    try:
+        if not sep:
+            raise ValueError
+        return float(finished), job_id
+    except ValueError:
+        raise ValueError(f'Invalid cursor: {cursor}') from None
+
+
+class JobHistory:
+    """SQLite store of finished jobs."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_age_days: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ):
+        """
+        Initialize history.
+
+        Args:
+            path: Database file (default: Config.HISTORY_FILE)
+            max_age_days: Compaction drops older rows (default: Config.HISTORY_MAX_AGE_DAYS; 0 = keep)
+            max_rows: Compaction keeps at most this many rows (default: Config.HISTORY_MAX_ROWS; 0 = no limit)
+        """
+        self.path = Path(path or Config.HISTORY_FILE)
+        self.max_age_days = Config.HISTORY_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        self.max_rows = Config.HISTORY_MAX_ROWS if max_rows is None else max_rows
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._since_compact = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """The connection, opened and migrated on first use (call with the lock held)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # auto_vacuum only takes effect before the first table is created
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.executescript(_SCHEMA)
+                existing = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+                if 'transcode_profile' not in existing:
+                    # Databases created before interrupted jobs were resubmitted
+                    conn.execute('ALTER TABLE jobs ADD COLUMN transcode_profile TEXT')
+                if 'user' not in existing:
+                    # Databases created before multi-user mode
+                    conn.execute('ALTER TABLE jobs ADD COLUMN user TEXT')
+                conn.executescript(_INDEXES)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record(self, job) -> Dict:
+        """
+        Record a finished job (replaces an earlier record of the same job).
+
+        Args:
+            job: Finished Job (see jobs.py)
+
+        Returns:
+            The stored row
+        """
+        data = job.to_dict()
+        result = dict(data.get('result') or {})
+        row = {
+            'job_id': data['job_id'],
+            'url': data['url'],
+            'title': result.get('title') or data.get('title'),
+            'extractor': data.get('extractor'),
+            'status': data['status'],
+            'error': result.get('error'),
+            'error_category': data.get('error_category'),
+            'filename': result.get('filename'),
+            'filesize': result.get('filesize'),
+            'parent': data.get('parent'),
+            'transcode_profile': data.get('transcode_profile'),
+            'user': data.get('user'),
+            'playlist': int(bool(result.get('playlist'))),
+            'retries': data.get('retries') or 0,
+            'created': data.get('created'),
+            'finished': data.get('finished') or time.time(),
+            'options': json.dumps(data.get('options') or {}, default=str),
+            'result': json.dumps(result, default=str),
+        }
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    [row[c] for c in _COLUMNS]
+                )
+            self._since_compact += 1
+            due = self._since_compact >= COMPACT_EVERY
+        if due:
+            self.compact()
+        return self._decode(row)
+
+    @staticmethod
+    def _decode(row) -> Dict:
+        entry = dict(row)
+        entry['playlist'] = bool(entry['playlist'])
+        entry['options'] = json.loads(entry['options'] or '{}')
+        entry['result'] = json.loads(entry['result'] or '{}')
+        return entry
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """A recorded job by ID, or None."""
+        with self._lock:
+            row = self._connect().execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        extractor: Optional[str] = None,
+        url: Optional[str] = None,
+        search: Optional[str] = None,
+        parent: Optional[str] = None,
+        user: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Recorded jobs, most recently finished first.
+
+        Args:
+            status: Only this status ('success', 'error', 'cancelled', 'interrupted')
+            extractor: Only this extractor (e.g. 'Youtube'; case-insensitive)
+            url: Only this exact URL
+            search: Substring of title, URL or filename
+            parent: Only entries of this playlist job
+            user: Only jobs of this user (multi-user mode)
+            since: Finished at or after this Unix time
+            until: Finished before this Unix time
+            limit: Page size (at most MAX_LIMIT)
+            cursor: next_cursor of the previous page
+
+        Returns:
+            {'jobs': [...], 'next_cursor': str or None}
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        where, args = [], []
+        if status:
+            where.append('status = ?')
+            args.append(status)
+        if extractor:
+            where.append('extractor = ?')
+            args.append(extractor)
+        if url:
+            where.append('url = ?')
+            args.append(url)
+        if search:
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            where.append("(title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\' OR filename LIKE ? ESCAPE '\\')")
+            args += [pattern] * 3
+        if parent:
+            where.append('parent = ?')
+            args.append(parent)
+        if user:
+            where.append('user = ?')
+            args.append(user)
+        if since is not None:
+            where.append('finished >= ?')
+            args.append(since)
+        if until is not None:
+            where.append('finished < ?')
+            args.append(until)
+        if cursor:
+            where.append('(finished, job_id) < (?, ?)')
+            args += list(_decode_cursor(cursor))
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        sql = 'SELECT * FROM jobs'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY finished DESC, job_id DESC LIMIT ?'
+        # One extra row tells whether there is a next page
+        args.append(limit + 1)
+        with self._lock:
+            rows = self._connect().execute(sql, args).fetchall()
+        jobs = [self._decode(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_cursor(jobs[-1]['finished'], jobs[-1]['job_id'])
+        return {'jobs': jobs, 'next_cursor': next_cursor}
+
+    def interrupted(self) -> List[Dict]:
+        """
+        Jobs interrupted by a shutdown, oldest first.
+
+        Playlist entries are left out: a drain interrupts their playlist
+        too, which lists them again (archived ones are skipped).
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE status = 'interrupted' AND parent IS NULL ORDER BY created"
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of recorded jobs per status."""
+        with self._lock:
+            rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def compact(self, max_age_days: Optional[float] = None, max_rows: Optional[int] = None) -> int:
+        """
+        Delete old rows and return their space to the file system.
+
+        Args:
+            max_age_days: Drop rows finished longer ago (default: the instance's; 0 = keep)
+            max_rows: Keep at most this many of the newest rows (default: the instance's; 0 = no limit)
+
+        Returns:
+            Number of deleted rows
+        """
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        max_rows = self.max_rows if max_rows is None else max_rows
+        deleted = 0
+        with self._lock:
+            self._since_compact = 0
+            conn = self._connect()
+            with conn:
+                if max_age_days:
+                    deleted += conn.execute('DELETE FROM jobs WHERE finished < ?',
+                                            (time.time() - max_age_days * 86400,)).rowcount
+                if max_rows:
+                    row = conn.execute('SELECT finished, job_id FROM jobs ORDER BY finished DESC, job_id DESC '
+                                       'LIMIT 1 OFFSET ?', (max_rows,)).fetchone()
+                    if row is not None:
+                        deleted += conn.execute('DELETE FROM jobs WHERE (finished, job_id) <= (?, ?)',
+                                                tuple(row)).rowcount
+            if deleted:
+                conn.execute('PRAGMA incremental_vacuum')
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        if deleted:
+            logger.info(f"Compacted job history: {deleted} old job(s) removed")
+        return deleted
+
+
+_history: Optional[JobHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> JobHistory:
+    """Get the shared job history."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = JobHistory()
+        return _history
+
+
+def record_job(job) -> Optional[Dict]:
+    """Record a finished job in the shared history; errors are logged, not raised."""
+    try:
+        return get_history().record(job)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not record job {job.job_id} in the history: {e}")
+        return None
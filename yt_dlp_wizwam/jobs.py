@@ -0,0 +1,673 @@
+"""
+Download job queue for yt-dlp-wizwam.
+
+Jobs pass through two stages with separate concurrency:
+
+1. Prefetch: resolve info dicts and format choices (resolve_video)
+2. Download: transfer and merge (download_video) using the resolved info
+
+While download workers are busy, prefetch workers resolve upcoming jobs, so
+the 1-4 s extraction latency is hidden behind transfer time. Resolved info
+that has gone stale is re-resolved by download_video itself.
+
+With Config.WORKER_MODE = 'process' the download stage runs in a pool of
+worker processes (see workers.py) instead of threads of this process.
+
+Jobs for a site whose circuit breaker is open (see retry.py) are held back
+('waiting') until the site's cooldown has passed.
+
+A job whose URL turns out to be a playlist or channel is not downloaded
+itself: it lists the entries lazily and queues a job per entry, a window
+at a time (see playlist.py), and finishes when they have.
+
+In multi-user mode jobs leave the pending stage in weighted fair-share
+order across their owners, within each owner's job limit (see FairQueue
+and users.py).
+
+Finished jobs are recorded in the persistent job history (see history.py).
+On shutdown, drain() lets running downloads finish; jobs it has to cut
+short are recorded as 'interrupted' and can be resubmitted on the next
+start.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from yt_dlp_wizwam.archive import get_archive
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.downloader import download_video, is_stale, resolve_video
+from yt_dlp_wizwam.executor import make_queue, relay, run_blocking, sleep, spawn
+from yt_dlp_wizwam.history import record_job
+from yt_dlp_wizwam.playlist import PlaylistFeeder
+from yt_dlp_wizwam.retry import get_breaker
+from yt_dlp_wizwam.users import QuotaExceeded
+
+logger = logging.getLogger(__name__)
+
+# Options understood by resolve_video(); download_video() takes all job options
+RESOLVE_OPTIONS = ('quality', 'video_codec', 'audio_codec', 'audio_only', 'auth')
+
+# Playlists inside playlists (channel → tabs → playlists) are expanded this deep
+MAX_PLAYLIST_DEPTH = 3
+
+# Jobs that drain() lets finish; the others are interrupted right away
+RUNNING_STATUSES = ('downloading', 'expanding')
+# Seconds a download gets to stop (keeping its partial files) when a drain times out
+CHECKPOINT_GRACE = 15.0
+# Seconds between FairQueue checks for a job that may be started (besides wakeups)
+POLL_INTERVAL = 1.0
+
+
+class Job:
+    """A queued download and its current state."""
+
+    def __init__(
+        self,
+        url: str,
+        options: Optional[Dict] = None,
+        job_id: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+        transcode_profile: Optional[str] = None,
+        parent: Optional[str] = None,
+        user: Optional[str] = None
+    ):
+        """
+        Initialize job.
+
+        Args:
+            url: Video URL
+            options: Keyword arguments for download_video (quality, codecs, ...)
+            job_id: Optional job ID (generated if omitted)
+            progress_callback: Optional callback(phase, percent, message)
+            transcode_profile: Optional profile to transcode the result with (see transcode.py)
+            parent: Job ID of the playlist this entry belongs to
+            user: Owner of the job (multi-user mode)
+        """
+        self.job_id = job_id or str(uuid.uuid4())
+        self.url = url
+        self.options = options or {}
+        self.progress_callback = progress_callback
+        self.transcode_profile = transcode_profile
+        self.parent = parent
+        self.user = user
+        # queued → (waiting) → resolving → resolved → downloading → success/error/cancelled
+        # Playlists: queued → resolving → expanding → success/error/cancelled
+        # Shutdown (drain) ends unfinished jobs as 'interrupted'
+        self.status = 'queued'
+        self.retries = 0
+        self.interrupted = False
+        self.waiting_until: Optional[float] = None
+        self.resolved: Optional[Dict] = None
+        self.result: Optional[Dict] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+        self.cancel_requested = threading.Event()
+        # Set with cancel_requested to stop a download but keep its partial files
+        self.checkpoint = threading.Event()
+
+    def report(self, phase: str, percent: float, message: str):
+        """Progress callback for the download: counts retries, then forwards."""
+        if phase == 'retrying':
+            self.retries += 1
+        if self.progress_callback:
+            self.progress_callback(phase, percent, message)
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable job status."""
+        info = (self.resolved or {}).get('info') or {}
+        return {
+            'job_id': self.job_id,
+            'url': self.url,
+            'status': self.status,
+            'title': info.get('title'),
+            'extractor': info.get('extractor_key'),
+            'options': self.options,
+            'transcode_profile': self.transcode_profile,
+            'parent': self.parent,
+            'user': self.user,
+            'retries': self.retries,
+            'error_category': (self.result or {}).get('error_category'),
+            'waiting_until': self.waiting_until,
+            'created': self.created,
+            'finished': self.finished,
+            'result': self.result,
+        }
+
+
+class FairQueue:
+    """
+    Pending jobs, handed out in weighted fair-share order across their owners.
+
+    Stride scheduling: every owner has a virtual time that advances by
+    1 / weight with each job it starts, and the next job comes from the
+    owner with jobs waiting and the lowest virtual time. An owner that had
+    nothing queued rejoins at the current virtual time, so being idle earns
+    no credit. Owners at their job limit are skipped until one of their
+    jobs is released (finished, held back or expanded into entries).
+    Within an owner, jobs start in submission order. Jobs without an owner
+    share one queue (weight 1, no limit), which is plain FIFO when they are
+    the only ones.
+    """
+
+    def __init__(self, share: Optional[Callable[[Optional[str]], Dict]] = None):
+        """
+        Initialize queue.
+
+        Args:
+            share: Returns {'weight', 'max_jobs'} of an owner (see UserStore.share);
+                   default: weight 1, no limit for everyone
+        """
+        self.share = share or (lambda owner: {'weight': 1.0, 'max_jobs': 0})
+        self._lock = threading.Lock()
+        self._queues: Dict[Optional[str], Deque[Job]] = {}
+        self._vtime: Dict[Optional[str], float] = {}
+        self._active: Dict[Optional[str], Set[str]] = {}
+        self._clock = 0.0
+        self._wakeup = make_queue()
+
+    def put(self, job: Job):
+        """Queue a job behind its owner's other waiting jobs."""
+        with self._lock:
+            jobs = self._queues.setdefault(job.user, deque())
+            if not jobs:
+                self._vtime[job.user] = max(self._vtime.get(job.user, 0.0), self._clock)
+            jobs.append(job)
+        self._wakeup.put(None)
+
+    def get(self) -> Job:
+        """Wait for the next job that may start; it holds a slot of its owner until release()."""
+        while True:
+            job = self._next()
+            if job is not None:
+                return job
+            try:
+                self._wakeup.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+    def release(self, job: Job):
+        """Give back the slot a job took in get() (no-op if it holds none)."""
+        with self._lock:
+            active = self._active.get(job.user)
+            if active is None or job.job_id not in active:
+                return
+            active.discard(job.job_id)
+        self._wakeup.put(None)
+
+    def active(self, owner: Optional[str]) -> int:
+        """Jobs of an owner holding a slot."""
+        with self._lock:
+            return len(self._active.get(owner, ()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(jobs) for jobs in self._queues.values())
+
+    def _next(self) -> Optional[Job]:
+        # Looked up outside the lock: the store may read its file
+        shares = {owner: self.share(owner) for owner in list(self._queues)}
+        with self._lock:
+            best = None
+            for owner, jobs in list(self._queues.items()):
+                # Finished jobs (drained) are dropped; cancelled ones need no slot to be finished
+                for job in [j for j in jobs if j.done.is_set() or j.cancel_requested.is_set()]:
+                    jobs.remove(job)
+                    if not job.done.is_set():
+                        return job
+                if not jobs:
+                    del self._queues[owner]
+                    continue
+                share = shares.get(owner)
+                if share is None:
+                    # Queued since the lookup; its put() woke us up for the next round
+                    continue
+                if share['max_jobs'] and len(self._active.get(owner, ())) >= share['max_jobs']:
+                    continue
+                key = (self._vtime[owner], jobs[0].created)
+                if best is None or key < best[0]:
+                    best = (key, owner, share)
+            if best is None:
+                return None
+            _, owner, share = best
+            job = self._queues[owner].popleft()
+            self._clock = self._vtime[owner]
+            self._vtime[owner] += 1.0 / max(share['weight'], 1e-6)
+            self._active.setdefault(owner, set()).add(job.job_id)
+            return job
+
+
+class JobQueue:
+    """Two-stage (prefetch → download) job queue."""
+
+    # Finished jobs kept for status queries
+    MAX_FINISHED = 500
+
+    def __init__(
+        self,
+        download_workers: Optional[int] = None,
+        prefetch_workers: Optional[int] = None,
+        on_done: Optional[Callable[[Job], None]] = None,
+        worker_mode: Optional[str] = None,
+        history: bool = True,
+        users=None
+    ):
+        """
+        Initialize queue.
+
+        Args:
+            download_workers: Concurrent downloads (default: Config.MAX_CONCURRENT_DOWNLOADS)
+            prefetch_workers: Concurrent extractions (default: Config.PREFETCH_CONCURRENCY)
+            on_done: Optional callback invoked with each finished Job
+            worker_mode: 'thread' or 'process' (default: Config.WORKER_MODE)
+            history: Record finished jobs in the job history
+            users: UserStore of multi-user mode: fair shares, quotas and namespaces of job owners
+        """
+        self.download_workers = download_workers or Config.MAX_CONCURRENT_DOWNLOADS
+        self.prefetch_workers = prefetch_workers or Config.PREFETCH_CONCURRENCY
+        self.on_done = on_done
+        self.history = history
+        self.users = users
+        self.worker_pool = None
+        if (worker_mode or Config.WORKER_MODE) == 'process':
+            from yt_dlp_wizwam.workers import WorkerPool
+            self.worker_pool = WorkerPool(self.download_workers)
+        self._jobs: Dict[str, Job] = {}
+        # Feeders of playlist jobs being expanded, by job ID
+        self._feeders: Dict[str, PlaylistFeeder] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._pending = None
+        self._ready = None
+
+    def start(self):
+        """Start prefetch and download workers."""
+        if self._started:
+            return
+        self._started = True
+        self._pending = FairQueue(self.users.share if self.users else None)
+        # Bounded so extraction does not run too far ahead of downloads
+        self._ready = make_queue(max(Config.PREFETCH_AHEAD, 1))
+        for _ in range(self.prefetch_workers):
+            spawn(self._prefetch_worker)
+        for _ in range(self.download_workers):
+            spawn(self._download_worker)
+
+    def submit(
+        self,
+        url: str,
+        options: Optional[Dict] = None,
+        progress_callback: Optional[Callable] = None,
+        job_id: Optional[str] = None,
+        transcode_profile: Optional[str] = None,
+        parent: Optional[str] = None,
+        user: Optional[str] = None
+    ) -> Job:
+        """
+        Queue a download.
+
+        Args:
+            url: Video, playlist or channel URL
+            options: Keyword arguments for download_video
+            progress_callback: Optional callback(phase, percent, message)
+            job_id: Optional job ID (generated if omitted)
+            transcode_profile: Optional profile to transcode the result with
+            parent: Job ID of the playlist this entry belongs to
+            user: Owner of the job (multi-user mode)
+
+        Returns:
+            The queued Job
+
+        Raises:
+            RuntimeError: If the queue has been shut down
+        """
+        if self._closed:
+            raise RuntimeError('Job queue is shut down')
+        self.start()
+        job = Job(url, options, job_id=job_id, progress_callback=progress_callback,
+                  transcode_profile=transcode_profile, parent=parent, user=user)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._pending.put(job)
+        logger.info(f"Queued job {job.job_id}: {url}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """All known jobs, oldest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created)
+
+    def backlog(self) -> List[Optional[int]]:
+        """
+        Expected sizes of the jobs still waiting to download, for the queue ETA.
+
+        Returns:
+            Bytes per job from the prefetched formats, None where not known yet
+        """
+        sizes = []
+        for job in self.list_jobs():
+            if job.status not in ('queued', 'waiting', 'resolving', 'resolved'):
+                continue
+            resolved = job.resolved or {}
+            if resolved.get('playlist'):
+                continue  # Counted through its entries
+            info = resolved.get('info') or {}
+            formats = info.get('requested_formats') or ([info] if info else [])
+            total = sum(fmt.get('filesize') or fmt.get('filesize_approx') or 0 for fmt in formats)
+            sizes.append(total or None)
+        return sizes
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. Queued jobs are dropped before they start; running
+        downloads stop at their next progress update.
+
+        Returns:
+            False if the job is unknown or already finished
+        """
+        job = self.get(job_id)
+        if job is None or job.done.is_set():
+            return False
+        job.cancel_requested.set()
+        logger.info(f"Cancelling job {job_id}")
+        return True
+
+    def shutdown(self, timeout: float = 30.0) -> bool:
+        """
+        Stop accepting jobs, cancel everything unfinished and wait for it.
+
+        Args:
+            timeout: Seconds to wait for running downloads to stop
+
+        Returns:
+            True if all jobs finished within the timeout
+        """
+        self._closed = True
+        unfinished = [j for j in self.list_jobs() if not j.done.is_set()]
+        for job in unfinished:
+            job.cancel_requested.set()
+        deadline = time.monotonic() + timeout
+        for job in unfinished:
+            if not job.done.wait(max(deadline - time.monotonic(), 0)):
+                logger.warning(f"Job {job.job_id} did not stop within {timeout}s")
+                return False
+        if self.worker_pool:
+            self.worker_pool.shutdown(max(deadline - time.monotonic(), 1))
+        return True
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """
+        Stop accepting jobs and let running downloads finish.
+
+        Jobs that have not started downloading are ended as 'interrupted'
+        right away. Running ones get until the timeout; then they are stopped
+        and ended as 'interrupted', leaving their partial files (or recorded
+        segments) for the resubmitted job to resume.
+        Call from a worker context (greenlet or thread), not from a request.
+
+        Args:
+            timeout: Seconds running downloads get to finish
+
+        Returns:
+            True if all running jobs finished within the timeout
+        """
+        self._closed = True
+        running = []
+        for job in self.list_jobs():
+            if job.done.is_set():
+                continue
+            job.interrupted = True
+            if job.status in RUNNING_STATUSES:
+                running.append(job)
+            else:
+                job.cancel_requested.set()
+                self._finish(job, {'status': 'interrupted', 'url': job.url})
+        if running:
+            logger.info(f"Draining: waiting up to {timeout:.0f}s for {len(running)} running job(s)")
+        self._wait_done(running, timeout)
+
+        unfinished = [job for job in running if not job.done.is_set()]
+        for job in unfinished:
+            job.checkpoint.set()
+            job.cancel_requested.set()
+        self._wait_done(unfinished, CHECKPOINT_GRACE)
+        for job in unfinished:
+            if not job.done.is_set():
+                logger.warning(f"Job {job.job_id} still running after {timeout:.0f}s, interrupting it")
+                self._finish(job, {'status': 'interrupted', 'url': job.url})
+        return not unfinished
+
+    @staticmethod
+    def _wait_done(jobs: List[Job], timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not all(job.done.is_set() for job in jobs):
+            sleep(min(0.5, max(deadline - time.monotonic(), 0.0)))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        counts: Dict[str, int] = {}
+        for job in self.list_jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _auth(self, job: Job):
+        """Auth profile option of a job; False if its owner may not use auth profiles (non-admin)."""
+        if self.users is not None and job.user and not run_blocking(self.users.is_admin, job.user):
+            return False
+        return job.options.get('auth')
+
+    def _prefetch_worker(self):
+        breaker = get_breaker()
+        while True:
+            job = self._pending.get()
+            if job.done.is_set():
+                # Interrupted by drain() while it waited
+                continue
+            if job.cancel_requested.is_set():
+                self._finish(job, {'status': 'cancelled', 'url': job.url})
+                continue
+            # Don't even extract from a site that is rate-limiting us
+            wait = breaker.remaining(breaker.extractor_for(job.url))
+            if wait > 0:
+                self._hold(job, wait)
+                continue
+            if job.resolved and not is_stale(job.resolved):
+                # Held back after prefetch; the resolved info is still good
+                job.status = 'resolved'
+                self._ready.put(job)
+                continue
+            job.status = 'resolving'
+            try:
+                resolve_args = {k: job.options[k] for k in RESOLVE_OPTIONS if k in job.options}
+                resolve_args['auth'] = self._auth(job)
+                job.resolved = run_blocking(resolve_video, job.url, **resolve_args)
+                if job.done.is_set():
+                    continue
+                job.status = 'resolved'
+                breaker.learn(job.url, job.resolved['info'].get('extractor_key') or 'generic')
+                if job.resolved.get('playlist'):
+                    self._expand(job)
+                    continue
+            except Exception as e:
+                # Leave resolution to download_video, which reports the error
+                logger.warning(f"Prefetch failed for job {job.job_id}: {e}")
+                job.status = 'queued'
+            self._ready.put(job)
+
+    def _download_worker(self):
+        breaker = get_breaker()
+        while True:
+            job = self._ready.get()
+            if job.done.is_set():
+                continue
+            if job.cancel_requested.is_set():
+                self._finish(job, {'status': 'cancelled', 'url': job.url})
+                continue
+            # The circuit may have opened while the job waited; half-open lets one job through
+            wait = breaker.retry_after(self._extractor(job))
+            if wait > 0:
+                self._hold(job, wait)
+                continue
+            options = job.options
+            if self.users is not None and job.user:
+                try:
+                    # Namespace and limits of the owner; the storage quota is checked again now
+                    options = {**options, **run_blocking(self.users.download_options, job.user,
+                                                         self._pending.active(job.user))}
+                except QuotaExceeded as e:
+                    self._finish(job, {'status': 'error', 'error': str(e), 'url': job.url,
+                                       'error_category': 'permanent'})
+                    continue
+            job.status = 'downloading'
+            # Worker process, or this process's download function
+            download = self.worker_pool.run if self.worker_pool else download_video
+            try:
+                # Runs in an OS thread; progress is relayed back to the event loop
+                result = run_blocking(
+                    download,
+                    job.url,
+                    progress_callback=relay.wrap(job.report),
+                    job_id=job.job_id,
+                    resolved=job.resolved,
+                    cancel_event=job.cancel_requested,
+                    checkpoint_event=job.checkpoint,
+                    **options
+                )
+            except Exception as e:
+                logger.exception(f"Download worker error for job {job.job_id}: {e}")
+                result = {'status': 'error', 'error': str(e), 'url': job.url}
+            self._finish(job, result)
+
+    @staticmethod
+    def _extractor(job: Job) -> Optional[str]:
+        info = (job.resolved or {}).get('info') or {}
+        return info.get('extractor_key') or get_breaker().extractor_for(job.url)
+
+    def _hold(self, job: Job, delay: float):
+        """Put a job back into the queue once its site's circuit allows it."""
+        self._pending.release(job)
+        job.status = 'waiting'
+        job.waiting_until = time.time() + delay
+        logger.info(f"Holding job {job.job_id} for {delay:.0f}s (site is rate limiting)")
+        spawn(self._release, job)
+
+    def _release(self, job: Job):
+        while time.time() < job.waiting_until and not job.cancel_requested.is_set():
+            sleep(min(1.0, max(job.waiting_until - time.time(), 0.0)))
+        job.waiting_until = None
+        if job.done.is_set():
+            # Finished (drained) while it waited; a cancelled job is finished by the workers
+            return
+        job.status = 'queued'
+        self._pending.put(job)
+
+    def _expand(self, job: Job):
+        """Download a playlist job's entries as jobs of their own."""
+        ancestors = []
+        parent = self.get(job.parent) if job.parent else None
+        while parent is not None:
+            ancestors.append(parent.url)
+            parent = self.get(parent.parent) if parent.parent else None
+        if job.url in ancestors or len(ancestors) >= MAX_PLAYLIST_DEPTH:
+            self._finish(job, {'status': 'error', 'url': job.url, 'playlist': True,
+                               'error': 'Playlist nested too deeply (or contains itself)',
+                               'error_category': 'permanent'})
+            return
+        job.status = 'expanding'
+        # Listing holds no download slot; the entries take their owner's slots
+        self._pending.release(job)
+        spawn(self._feed_playlist, job)
+
+    def _feed_playlist(self, job: Job):
+        info = job.resolved['info']
+        # Keep the download workers busy and a resolved job ready for each
+        window = max(Config.PLAYLIST_WINDOW, self.download_workers + Config.PREFETCH_AHEAD)
+        feeder = PlaylistFeeder(
+            job.url,
+            submit=lambda url: self.submit(url, dict(job.options), transcode_profile=job.transcode_profile,
+                                           parent=job.job_id, user=job.user),
+            cancel=lambda entry: self.cancel(entry.job_id),
+            auth=self._auth(job),
+            window=window,
+            total=info.get('playlist_count'),
+            cancel_event=job.cancel_requested,
+            progress_callback=job.report,
+            namespace=job.user if self.users is not None else None,
+        )
+        result = {'status': 'success', 'url': job.url, 'title': info.get('title') or job.url, 'playlist': True}
+        self._feeders[job.job_id] = feeder
+        try:
+            result.update(feeder.run())
+        except Exception as e:
+            logger.exception(f"Listing playlist of job {job.job_id} failed: {e}")
+            result.update(feeder.counts, status='error', error=str(e))
+        finally:
+            self._feeders.pop(job.job_id, None)
+        if job.cancel_requested.is_set():
+            result['status'] = 'cancelled'
+        elif job.interrupted and not feeder.complete:
+            # The queue was drained before the listing was
+            result['status'] = 'interrupted'
+        elif result['status'] == 'success' and result['failed']:
+            result.update(status='error', error=f"{result['failed']} of {result['entries']} entries failed",
+                          error_category='permanent')
+        self._finish(job, result)
+
+    def _finish(self, job: Job, result: Dict):
+        if job.interrupted and result.get('status') != 'success':
+            # Cut short by drain(); cancelled or failed entries of a drained playlist too
+            result = {**result, 'status': 'interrupted',
+                      'error': 'Interrupted by server shutdown; resubmitted on the next start'}
+        if self.worker_pool and result.get('status') == 'success':
+            # The worker process appended to the archive file
+            get_archive().refresh()
+        # A playlist's entries report to the circuit breaker themselves
+        if result.get('status') == 'success' and not result.get('playlist'):
+            get_breaker().record(self._extractor(job), None)
+        elif result.get('status') == 'error' and not result.get('playlist'):
+            get_breaker().record(self._extractor(job), result.get('error_category'))
+        job.retries = max(job.retries, result.get('retries', 0))
+        job.result = result
+        job.status = result.get('status', 'error')
+        job.finished = time.time()
+        # Resolved info dicts are large; keep only what status queries need
+        if job.resolved:
+            info = job.resolved['info']
+            job.resolved = {'info': {k: info.get(k) for k in ('title', 'extractor_key', 'id')}}
+        # Recorded before anyone waiting for the job sees it done
+        if self.history:
+            run_blocking(record_job, job)
+        job.done.set()
+        if self._pending is not None:
+            self._pending.release(job)
+        if self.users is not None and job.user:
+            self.users.forget_usage(job.user)
+        feeder = self._feeders.get(job.parent) if job.parent else None
+        if feeder is not None:
+            feeder.notify()
+        self._prune()
+        if self.on_done:
+            try:
+                self.on_done(job)
+            except Exception:
+                logger.exception(f"on_done callback failed for job {job.job_id}")
+
+    def _prune(self):
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.finished]
+            if len(finished) <= self.MAX_FINISHED:
+                return
+            finished.sort(key=lambda j: j.finished)
+            for job in finished[:len(finished) - self.MAX_FINISHED]:
+                del self._jobs[job.job_id]
@@ -0,0 +1,329 @@
+"""
+Live-stream recording for yt-dlp-wizwam.
+
+A live stream has no total size, and yt-dlp would write it into one .part
+file that grows until the stream ends (then merge it in one go). Instead,
+the resolved stream is recorded with ffmpeg's segment muxer:
+
+- Output rotates into fixed-duration MPEG-TS segments
+  (NAME_seg00001.ts.part, ...). A crash loses at most one segment.
+- Finished segments are remuxed to MP4 in the background while recording
+  continues, then handed to the archive tier. No large merge happens at the end.
+- Recording stops at LIVE_MAX_DURATION or LIVE_MAX_SIZE_MB, when the
+  stream ends, or when the job is cancelled. Cancelling keeps the
+  segments recorded so far.
+- Progress is elapsed time and bitrate, not a percentage of an unknown
+  total. With a duration limit, the percentage is elapsed time / limit.
+
+Recording starts at the live edge. "From start" starts at the oldest
+segment the HLS playlist still offers (its DVR window).
+"""
+
+import csv
+import logging
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.stats import registry
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of limits, segments and cancellation
+POLL_INTERVAL = 0.5
+# Seconds ffmpeg gets to close the current segment after 'q'
+STOP_GRACE = 10.0
+
+
+def format_elapsed(seconds: float) -> str:
+    """H:MM:SS"""
+    seconds = int(seconds)
+    return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+
+def stream_inputs(info: Dict, from_start: bool = False) -> List[str]:
+    """
+    ffmpeg input arguments for the resolved stream(s).
+
+    Args:
+        info: Resolved info dict (one muxed format, or requested_formats)
+        from_start: Start at the oldest segment of an HLS playlist instead of the live edge
+
+    Returns:
+        Arguments including -i for each stream
+    """
+    args = []
+    for fmt in info.get('requested_formats') or [info]:
+        url = fmt['url']
+        if url.startswith(('http://', 'https://')):
+            headers = ''.join(f'{k}: {v}\r\n' for k, v in (fmt.get('http_headers') or {}).items())
+            if headers:
+                args += ['-headers', headers]
+            args += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '30']
+        if from_start and (fmt.get('protocol') or '').startswith('m3u8'):
+            args += ['-live_start_index', '0']
+        args += ['-i', url]
+    return args
+
+
+def stream_maps(info: Dict) -> List[str]:
+    """ffmpeg -map arguments: video from the first input, audio from the last."""
+    formats = info.get('requested_formats')
+    if not formats or len(formats) == 1:
+        return ['-map', '0:v?', '-map', '0:a?']
+    return ['-map', '0:v:0', '-map', f'{len(formats) - 1}:a:0']
+
+
+class LiveRecorder:
+    """Record a live stream into rotating, background-remuxed segments."""
+
+    def __init__(
+        self,
+        info: Dict,
+        output_base: Path,
+        ext: str = 'mp4',
+        from_start: bool = False,
+        segment_seconds: Optional[int] = None,
+        max_duration: Optional[float] = None,
+        max_size_mb: Optional[float] = None,
+        remux: Optional[bool] = None,
+        progress_callback: Optional[Callable] = None,
+        cancel_event: Optional[threading.Event] = None,
+        job_id: Optional[str] = None
+    ):
+        """
+        Initialize recorder.
+
+        Args:
+            info: Resolved info dict of the live stream
+            output_base: Path of the recording without extension; segments are
+                         named output_base_seg00001.ext
+            ext: Extension of remuxed segments ('mp4' or 'm4a')
+            from_start: Start at the oldest available segment instead of the live edge
+            segment_seconds: Segment duration (default: Config.LIVE_SEGMENT_SECONDS)
+            max_duration: Stop after this many seconds (default: Config.LIVE_MAX_DURATION; 0 = no limit)
+            max_size_mb: Stop after this many MB (default: Config.LIVE_MAX_SIZE_MB; 0 = no limit)
+            remux: Remux segments to ext (default: Config.LIVE_REMUX); otherwise keep .ts
+            progress_callback: Called with (phase, percent, message)
+            cancel_event: Set to stop recording (segments so far are kept)
+            job_id: Job ID for the stats registry
+        """
+        self.info = info
+        self.output_base = Path(output_base)
+        self.ext = ext
+        self.from_start = from_start
+        self.segment_seconds = segment_seconds or Config.LIVE_SEGMENT_SECONDS
+        self.max_duration = Config.LIVE_MAX_DURATION if max_duration is None else max_duration
+        max_size_mb = Config.LIVE_MAX_SIZE_MB if max_size_mb is None else max_size_mb
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.remux = Config.LIVE_REMUX if remux is None else remux
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.job_id = job_id
+
+        self.segment_list = self.output_base.with_name(f'.{self.output_base.name}.segments.csv')
+        self._listed = 0
+        self._recorded_bytes = 0
+        self._out_time = 0.0
+        self._segments: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='live-remux')
+
+    def _segment_path(self, number: int) -> Path:
+        return self.output_base.with_name(f'{self.output_base.name}_seg{number:05d}.ts.part')
+
+    def command(self, ffmpeg: str) -> List[str]:
+        """ffmpeg command line of the recording."""
+        # The segment muxer expands %d in file names
+        pattern = self.output_base.with_name(f"{self.output_base.name.replace('%', '%%')}_seg%05d.ts.part")
+        cmd = [ffmpeg, '-hide_banner', '-loglevel', 'warning']
+        cmd += stream_inputs(self.info, self.from_start)
+        cmd += stream_maps(self.info)
+        cmd += ['-c', 'copy']
+        if self.max_duration:
+            cmd += ['-t', str(self.max_duration)]
+        cmd += [
+            '-f', 'segment',
+            '-segment_time', str(self.segment_seconds),
+            '-segment_format', 'mpegts',
+            '-segment_start_number', '1',
+            '-reset_timestamps', '1',
+            '-segment_list', str(self.segment_list),
+            '-segment_list_type', 'csv',
+            '-progress', 'pipe:1',
+            '-stats_period', '1',
+            str(pattern),
+        ]
+        return cmd
+
+    def run(self) -> Dict:
+        """
+        Record until the stream ends, a limit is reached or the job is cancelled.
+
+        Returns:
+            {'segments': [Path], 'duration': seconds, 'bytes': recorded bytes,
+             'stopped': 'ended', 'max_duration', 'max_size', 'cancelled' or 'interrupted'}
+
+        Raises:
+            RuntimeError: If nothing could be recorded
+        """
+        from yt_dlp_wizwam.transcode import get_ffmpeg
+
+        self.segment_list.unlink(missing_ok=True)
+        proc = subprocess.Popen(self.command(get_ffmpeg()), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, errors='replace')
+        stderr_tail: List[str] = []
+
+        def read_stderr():
+            for line in proc.stderr:
+                stderr_tail.append(line)
+                del stderr_tail[:-20]
+
+        def read_progress():
+            for line in proc.stdout:
+                if line.startswith('out_time_us='):
+                    try:
+                        self._out_time = max(int(line.split('=', 1)[1]) / 1_000_000, 0.0)
+                    except ValueError:
+                        pass
+
+        readers = [threading.Thread(target=read_stderr, daemon=True),
+                   threading.Thread(target=read_progress, daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        stopped = None
+        last_report = 0.0
+        try:
+            while proc.poll() is None:
+                if self.cancel_event is not None:
+                    self.cancel_event.wait(POLL_INTERVAL)
+                else:
+                    time.sleep(POLL_INTERVAL)
+                self._collect_segments()
+                current = self._recorded_bytes + self._current_size()
+
+                if stopped is None:
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        stopped = 'cancelled'
+                    elif self.max_bytes and current >= self.max_bytes:
+                        stopped = 'max_size'
+                    if stopped:
+                        logger.info(f"Stopping live recording of {self.output_base.name} ({stopped})")
+                        self._stop(proc)
+
+                now = time.monotonic()
+                if now - last_report >= 1.0:
+                    last_report = now
+                    self._report(current)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            for reader in readers:
+                reader.join(5)
+            self._collect_segments()
+            self._executor.shutdown(wait=True)
+            self.segment_list.unlink(missing_ok=True)
+
+        segments = [future.result() for future in self._segments]
+        segments = [path for path in segments if path is not None]
+        if not segments:
+            raise RuntimeError(f'Live recording failed: {"".join(stderr_tail).strip()[-500:] or "no data"}')
+
+        if stopped is None:
+            if self.max_duration and self._out_time >= self.max_duration - 1:
+                stopped = 'max_duration'
+            else:
+                stopped = 'ended' if proc.returncode == 0 else 'interrupted'
+        if stopped == 'interrupted':
+            logger.warning(f"Live recording of {self.output_base.name} interrupted: "
+                           f"{''.join(stderr_tail).strip()[-300:]}")
+        return {
+            'segments': segments,
+            'duration': self._out_time,
+            'bytes': self._recorded_bytes,
+            'stopped': stopped,
+        }
+
+    def _stop(self, proc: subprocess.Popen):
+        """Ask ffmpeg to close the current segment and exit."""
+        try:
+            proc.stdin.write('q')
+            proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+        try:
+            proc.wait(STOP_GRACE)
+        except subprocess.TimeoutExpired:
+            proc.terminate()
+
+    def _current_size(self) -> int:
+        try:
+            return self._segment_path(self._listed + 1).stat().st_size
+        except OSError:
+            return 0
+
+    def _collect_segments(self):
+        """Hand segments ffmpeg has closed (listed in the segment list) to the remuxer."""
+        try:
+            with open(self.segment_list, 'r', encoding='utf-8', errors='replace', newline='') as f:
+                text = f.read()
+        except OSError:
+            return
+        # A line ffmpeg is still writing is read on the next call
+        text = text[:text.rfind('\n') + 1]
+        # ffmpeg quotes names containing commas (titles may), so this is real CSV
+        rows = [row for row in csv.reader(text.splitlines()) if row and row[0].strip()]
+        for row in rows[self._listed:]:
+            path = self.output_base.with_name(Path(row[0]).name)
+            self._listed += 1
+            try:
+                self._recorded_bytes += path.stat().st_size
+            except OSError as e:
+                logger.warning(f"Live segment {path.name} is listed but unreadable: {e}")
+                continue
+            self._segments.append(self._executor.submit(self._finish_segment, path))
+
+    def _finish_segment(self, path: Path) -> Optional[Path]:
+        """Remux (or rename) a closed segment and promote it to the archive tier."""
+        final = path.with_name(path.name[:-len('.ts.part')] + (f'.{self.ext}' if self.remux else '.ts'))
+        if self.remux:
+            from yt_dlp_wizwam.transcode import get_ffmpeg
+            partial = final.with_name(f'{final.stem}.temp.{self.ext}')
+            proc = subprocess.run(
+                [get_ffmpeg(), '-hide_banner', '-loglevel', 'error', '-y', '-i', str(path),
+                 '-map', '0', '-c', 'copy', '-movflags', '+faststart', '-f', 'mp4', str(partial)],
+                capture_output=True, text=True, errors='replace'
+            )
+            if proc.returncode == 0:
+                os.replace(partial, final)
+                path.unlink(missing_ok=True)
+            else:
+                logger.warning(f"Remuxing {path.name} failed, keeping MPEG-TS: {proc.stderr.strip()[-300:]}")
+                partial.unlink(missing_ok=True)
+                final = final.with_suffix('.ts')
+                os.replace(path, final)
+        else:
+            os.replace(path, final)
+        storage.promote(final)
+        return final
+
+    def _report(self, current_bytes: int):
+        elapsed = self._out_time
+        bitrate = current_bytes * 8 / elapsed if elapsed > 0 else 0.0
+        if self.job_id:
+            registry.update_stream(self.job_id, 'live', current_bytes, None, bitrate / 8, None)
+        if not self.progress_callback:
+            return
+        percent = min(elapsed / self.max_duration * 100, 99.9) if self.max_duration else 0.0
+        self.progress_callback(
+            'recording', percent,
+            f'Recording {format_elapsed(elapsed)} at {bitrate / 1_000_000:.1f} Mbit/s, '
+            f'{current_bytes / (1024 * 1024):.1f} MB, {self._listed + 1} segment(s)'
+        )
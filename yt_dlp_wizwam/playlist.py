@@ -0,0 +1,292 @@
+"""
+Playlist and channel expansion for yt-dlp-wizwam.
+
+extract_info() on a playlist builds the complete info dict, with every
+entry extracted along with all of its formats, before anything is
+downloaded. For a channel with 10k videos that means gigabytes of memory
+and minutes before the first download starts.
+
+Instead, playlists are listed flat and lazily: the extractor fetches the
+listing one page at a time, and entries carry only ID, URL and title. The
+feeder turns entries into separate jobs of the job queue, keeping at most
+PLAYLIST_WINDOW of them queued or running. The next page is fetched only
+when the window has room, so memory stays bounded whatever the playlist's
+size. Each entry is resolved by the prefetch stage like any other job.
+Archived entries are skipped without being resolved.
+"""
+
+import logging
+import queue
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import yt_dlp
+from yt_dlp.utils import PagedList, sanitize_url
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.archive import DownloadArchive, archive_key, get_archive
+from yt_dlp_wizwam.auth import get_auth_store
+from yt_dlp_wizwam.executor import make_queue, run_blocking
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_TYPES = ('playlist', 'multi_video')
+# Redirects followed before an extraction result is processed (channel → videos tab)
+MAX_HOPS = 5
+# Seconds between checks of the window while it is full (finished entries wake it earlier)
+POLL_INTERVAL = 0.5
+
+
+def is_playlist(ie_result: Dict) -> bool:
+    """Whether an (unprocessed) extraction result is a playlist."""
+    return ie_result.get('_type') in PLAYLIST_TYPES
+
+
+def extract_unprocessed(ydl: yt_dlp.YoutubeDL, url: str) -> Tuple[Dict, Dict]:
+    """
+    Extract a URL without processing the result.
+
+    Plain 'url' results (redirects to another extractor) are followed, so a
+    playlist behind a redirect is recognised before its entries are resolved.
+
+    Args:
+        ydl: YoutubeDL instance
+        url: URL to extract
+
+    Returns:
+        (ie_result, extra_info for ydl.process_ie_result())
+
+    Raises:
+        RuntimeError: If nothing could be extracted
+    """
+    ie_result = ydl.extract_info(url, download=False, process=False)
+    extra_info = {}
+    for _ in range(MAX_HOPS):
+        if not ie_result or ie_result.get('_type') != 'url':
+            break
+        if ie_result.get('original_url'):
+            extra_info.setdefault('original_url', ie_result['original_url'])
+        ie_result = ydl.extract_info(sanitize_url(ie_result['url']), download=False,
+                                     ie_key=ie_result.get('ie_key'), extra_info=extra_info, process=False)
+    if not ie_result:
+        raise RuntimeError('Failed to extract video information')
+    return ie_result, extra_info
+
+
+def playlist_summary(ie_result: Dict) -> Dict:
+    """The small part of a playlist result kept by its job (no entries)."""
+    return {
+        '_type': ie_result.get('_type'),
+        'id': ie_result.get('id'),
+        'title': ie_result.get('title') or ie_result.get('id'),
+        'extractor_key': ie_result.get('extractor_key') or ie_result.get('ie_key'),
+        'webpage_url': ie_result.get('webpage_url'),
+        'playlist_count': ie_result.get('playlist_count'),
+    }
+
+
+def _flat_entries(entries, playlist_url: str) -> Iterator[Tuple[Dict, str]]:
+    """Iterate (entry, URL) of raw entries without keeping the ones already consumed."""
+    if isinstance(entries, PagedList):
+        # PagedList keeps every page it fetched; iterate its pages uncached
+        entries._use_cache = False
+        entries = entries._getslice(0, None)
+    for entry in entries:
+        if not entry:
+            continue
+        if entry.get('_type') in PLAYLIST_TYPES:
+            # Listed inline (e.g. the tabs of a channel)
+            yield from _flat_entries(entry.get('entries') or [], playlist_url)
+            continue
+        if entry.get('_type') in ('url', 'url_transparent'):
+            url = entry.get('url')
+        else:
+            url = entry.get('webpage_url')
+        if not url or url == playlist_url:
+            # Embedded in the playlist page only; cannot be downloaded as a job of its own
+            logger.warning(f"Skipping playlist entry without its own URL: {entry.get('id') or entry.get('title')}")
+            continue
+        yield entry, url
+
+
+def list_entries(url: str, auth: Optional[str] = None, namespace: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Lazily list a playlist's entries.
+
+    Pages of the listing are fetched as the generator advances. Close the
+    generator to stop early.
+
+    Args:
+        url: Playlist or channel URL
+        auth: Auth profile name (default: the profile whose host rule matches)
+        namespace: User namespace of the archive keys
+
+    Yields:
+        {'id', 'url', 'title', 'key'} per entry; key is the entry's archive key
+    """
+    session = get_auth_store().session(url, auth)
+    ydl_opts = {
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'http_headers': session.headers if session else {'User-Agent': Config.USER_AGENT},
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if session is not None:
+                session.attach(ydl)
+            ie_result, _ = extract_unprocessed(ydl, url)
+            if not is_playlist(ie_result):
+                raise RuntimeError(f'Not a playlist: {url}')
+            extractor = ie_result.get('extractor_key') or ie_result.get('ie_key') or 'generic'
+            for entry, entry_url in _flat_entries(ie_result.get('entries') or [], url):
+                entry_id = entry.get('id')
+                yield {
+                    'id': entry_id,
+                    'url': entry_url,
+                    'title': entry.get('title'),
+                    'key': archive_key(entry.get('ie_key') or extractor, entry_id, namespace) if entry_id else None,
+                }
+    finally:
+        if session is not None:
+            get_auth_store().save_cookies(session.name)
+
+
+class PlaylistFeeder:
+    """Feed a playlist's entries into the job queue, a window at a time."""
+
+    def __init__(
+        self,
+        url: str,
+        submit: Callable[[str], object],
+        cancel: Callable[[object], object],
+        auth: Optional[str] = None,
+        window: Optional[int] = None,
+        total: Optional[int] = None,
+        archive: Optional[DownloadArchive] = None,
+        cancel_event=None,
+        progress_callback: Optional[Callable] = None,
+        namespace: Optional[str] = None
+    ):
+        """
+        Initialize feeder.
+
+        Args:
+            url: Playlist or channel URL
+            submit: Queues an entry URL and returns its Job
+            cancel: Cancels a Job
+            auth: Auth profile name for the listing
+            window: Entry jobs queued or running at a time (default: Config.PLAYLIST_WINDOW)
+            total: Number of entries if the listing reports it (for progress)
+            archive: Download archive (default: shared archive)
+            cancel_event: Set to stop feeding and cancel the entry jobs
+            progress_callback: Called with (phase, percent, message)
+            namespace: User namespace; entries archived there are skipped
+        """
+        self.url = url
+        self.submit = submit
+        self.cancel = cancel
+        self.auth = auth
+        self.window = max(window or Config.PLAYLIST_WINDOW, 1)
+        self.total = total
+        self.archive = archive or get_archive()
+        self.cancel_event = cancel_event
+        self.progress_callback = progress_callback
+        self.namespace = namespace
+        # Only unfinished jobs are kept; finished ones are counted
+        self._active = []
+        self._cancelling = False
+        self._wakeup = make_queue()
+        self.counts = {'entries': 0, 'skipped': 0, 'downloaded': 0, 'failed': 0, 'cancelled': 0}
+        # Set once the whole listing has been fed
+        self.complete = False
+        self._last_report = 0.0
+
+    def notify(self):
+        """Called when one of the entry jobs has finished."""
+        self._wakeup.put(None)
+
+    def _cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _collect(self):
+        """Count finished jobs and drop them from the window."""
+        active = []
+        for job in self._active:
+            if job.done.is_set():
+                status = {'success': 'downloaded', 'cancelled': 'cancelled'}.get(job.status, 'failed')
+                self.counts[status] += 1
+            else:
+                active.append(job)
+        self._active = active
+
+    def _report(self, force: bool = False):
+        now = time.monotonic()
+        if not self.progress_callback or (not force and now - self._last_report < 1.0):
+            return
+        self._last_report = now
+        counts = self.counts
+        finished = counts['entries'] - len(self._active)
+        total = max(self.total or 0, counts['entries'])
+        percent = min(finished / total * 100, 99.9) if total else 0.0
+        message = f"Playlist: {finished} of {self.total or str(counts['entries']) + '+'} done"
+        if self._active:
+            message += f', {len(self._active)} in progress'
+        if counts['skipped']:
+            message += f", {counts['skipped']} already archived"
+        if counts['failed']:
+            message += f", {counts['failed']} failed"
+        self.progress_callback('playlist', percent, message)
+
+    def _wait(self, until_below: int):
+        """Wait until fewer than until_below entry jobs are unfinished."""
+        while True:
+            self._collect()
+            self._report()
+            if len(self._active) < until_below:
+                return
+            if self._cancelled() and not self._cancelling:
+                self._cancelling = True
+                for job in self._active:
+                    self.cancel(job)
+            try:
+                self._wakeup.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+    def run(self) -> Dict:
+        """
+        List the playlist and queue its entries until all are done.
+
+        Returns:
+            Counts: {'entries', 'skipped', 'downloaded', 'failed', 'cancelled'}
+        """
+        entries = list_entries(self.url, self.auth, self.namespace)
+        try:
+            while not self._cancelled():
+                # Backpressure: the next entry (and page) is fetched only when the window has room
+                self._wait(self.window)
+                if self._cancelled():
+                    break
+                entry = run_blocking(next, entries, None)
+                if entry is None:
+                    # End of the listing: the total is known now
+                    self.total = self.counts['entries']
+                    self.complete = True
+                    break
+                self.counts['entries'] += 1
+                if entry['key'] and entry['key'] in self.archive:
+                    self.counts['skipped'] += 1
+                    continue
+                try:
+                    self._active.append(self.submit(entry['url']))
+                except RuntimeError:
+                    # Queue shut down
+                    break
+        finally:
+            run_blocking(entries.close)
+            # Entries already queued finish (or are cancelled) before the playlist does
+            self._wait(1)
+            self._report(force=True)
+        return dict(self.counts)
@@ -0,0 +1,297 @@
+"""
+Retry engine for yt-dlp-wizwam.
+
+Failures are classified before anything is retried:
+
+- transient: network errors, timeouts, 5xx, expired media URLs (403/410),
+  fragment errors - retried with jittered exponential backoff
+- rate_limited: 429 and "slow down"/bot checks - retried with a longer
+  backoff, and counted by the site's circuit breaker
+- geo: geo-blocked content - not retried
+- permanent: unsupported URLs, removed/private videos, 404 - not retried
+
+A per-extractor CircuitBreaker opens after CIRCUIT_THRESHOLD rate-limited
+failures in a row; while it is open the job queue holds back new jobs for
+that site. After the cooldown one job is let through (half-open); a
+success closes the circuit, another failure reopens it for twice as long.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import yt_dlp
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT = 'transient'
+RATE_LIMITED = 'rate_limited'
+GEO = 'geo'
+PERMANENT = 'permanent'
+
+RETRYABLE = (TRANSIENT, RATE_LIMITED)
+
+# Checked in this order; the first match wins
+_PATTERNS = (
+    (RATE_LIMITED, re.compile(
+        r'HTTP Error 429|Too Many Requests|rate[- ]limit|confirm you.re not a bot|'
+        r'slow down|try again later', re.I)),
+    (GEO, re.compile(
+        r'geo[- ]?restrict|available (?:in|from) your (?:country|location)|'
+        r'blocked it in your country|geo[- ]?block', re.I)),
+    (PERMANENT, re.compile(
+        r'Unsupported URL|HTTP Error 404|Video unavailable|Private video|has been removed|'
+        r'account .* terminated|copyright|members[- ]only|requires payment|'
+        r'Requested format is not available|is not a valid URL|No video formats found|'
+        r'Sign in to confirm your age|age[- ]restricted|login required', re.I)),
+    (TRANSIENT, re.compile(
+        r'HTTP Error (?:403|408|410|5\d\d)|timed? ?out|Connection (?:reset|refused|aborted)|'
+        r'Temporary failure|Name or service not known|IncompleteRead|fragment|'
+        r'Remote end closed|EOF occurred|SSL|Unable to download (?:webpage|JSON|video data)|'
+        r'giving up after', re.I)),
+)
+
+
+def classify_error(error) -> str:
+    """
+    Classify a failure.
+
+    Args:
+        error: Exception or error message
+
+    Returns:
+        TRANSIENT, RATE_LIMITED, GEO or PERMANENT
+    """
+    if isinstance(error, yt_dlp.utils.DownloadCancelled):
+        return PERMANENT
+    if isinstance(error, yt_dlp.utils.GeoRestrictedError):
+        return GEO
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    message = str(error)
+    for category, pattern in _PATTERNS:
+        if pattern.search(message):
+            return category
+    return PERMANENT
+
+
+def backoff_delay(attempt: int, category: str, rng: Optional[random.Random] = None) -> float:
+    """
+    Jittered exponential backoff ("full jitter").
+
+    Args:
+        attempt: Retry number, starting at 1
+        category: Error category (rate-limited errors start from a longer base)
+        rng: Optional random generator
+
+    Returns:
+        Seconds to wait before the retry
+    """
+    base = Config.RETRY_RATE_LIMIT_DELAY if category == RATE_LIMITED else Config.RETRY_BASE_DELAY
+    ceiling = min(Config.RETRY_MAX_DELAY, base * 2 ** (attempt - 1))
+    # Never less than half the ceiling, so retries do not hammer the site
+    return (rng or random).uniform(ceiling / 2, ceiling)
+
+
+def call_with_retries(
+    func: Callable,
+    attempts: Optional[int] = None,
+    on_retry: Optional[Callable[[int, str, float, Exception], None]] = None
+):
+    """
+    Call func, retrying transient and rate-limited failures.
+
+    Args:
+        func: Function without arguments
+        attempts: Retries after the first call (default: Config.RETRY_ATTEMPTS)
+        on_retry: Called as on_retry(attempt, category, delay, error) before
+                  each retry; it does the waiting (so it can be cancelled and
+                  can refresh state). Raising from it stops retrying.
+
+    Returns:
+        func's return value
+
+    Raises:
+        The last error if it is not retryable or attempts are used up
+    """
+    attempts = Config.RETRY_ATTEMPTS if attempts is None else attempts
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            category = classify_error(e)
+            if category not in RETRYABLE or attempt >= attempts:
+                raise
+            attempt += 1
+            delay = backoff_delay(attempt, category)
+            logger.info(f"Retry {attempt}/{attempts} in {delay:.1f}s after {category} error: {e}")
+            if on_retry:
+                on_retry(attempt, category, delay, e)
+            else:
+                time.sleep(delay)
+
+
+def ydl_retry_opts(cancel_event: Optional[threading.Event] = None) -> Dict:
+    """
+    yt-dlp's own request and fragment retry settings, with exponential sleeps.
+
+    Args:
+        cancel_event: Optional event; when set, a backoff in progress ends at once
+            and the download stops with yt_dlp.utils.DownloadCancelled
+
+    Returns:
+        Options for yt_dlp.YoutubeDL
+    """
+    def sleep(n):
+        delay = min(Config.RETRY_BASE_DELAY * 2 ** n, Config.RETRY_MAX_DELAY) * random.uniform(0.5, 1.0)
+        if cancel_event is None:
+            return delay
+        # Waited out here rather than by yt-dlp, so a cancel (or drain) interrupts it
+        if cancel_event.wait(delay):
+            raise yt_dlp.utils.DownloadCancelled('Download cancelled')
+        return 0
+
+    return {
+        'retries': Config.HTTP_RETRIES,
+        'fragment_retries': Config.FRAGMENT_RETRIES,
+        'extractor_retries': Config.RETRY_ATTEMPTS,
+        'retry_sleep_functions': {'http': sleep, 'fragment': sleep, 'extractor': sleep},
+    }
+
+
+def site_of(url: str) -> str:
+    """Host of a URL without "www." (used before the extractor is known)."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class CircuitBreaker:
+    """Per-extractor circuit breaker for rate limiting."""
+
+    def __init__(
+        self,
+        threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        max_cooldown: Optional[float] = None
+    ):
+        """
+        Initialize breaker.
+
+        Args:
+            threshold: Rate-limited failures in a row that open a circuit
+            cooldown: First open period in seconds (doubles on each reopen)
+            max_cooldown: Longest open period in seconds
+        """
+        self.threshold = threshold or Config.CIRCUIT_THRESHOLD
+        self.cooldown = cooldown or Config.CIRCUIT_COOLDOWN
+        self.max_cooldown = max_cooldown or Config.CIRCUIT_MAX_COOLDOWN
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, Dict] = {}
+        # Site (host) → extractor, learned from resolved jobs
+        self._sites: Dict[str, str] = {}
+
+    def learn(self, url: str, extractor: str):
+        """Remember which extractor handles a URL's site."""
+        with self._lock:
+            self._sites[site_of(url)] = extractor.lower()
+
+    def extractor_for(self, url: str) -> Optional[str]:
+        """Extractor for a URL's site, if a job from that site was resolved before."""
+        with self._lock:
+            return self._sites.get(site_of(url))
+
+    def remaining(self, extractor: Optional[str]) -> float:
+        """Seconds left in the extractor's open period (0 if closed or half-open)."""
+        if not extractor:
+            return 0.0
+        with self._lock:
+            circuit = self._circuits.get(extractor.lower())
+            if circuit is None or circuit['opened'] is None:
+                return 0.0
+            return max(circuit['until'] - time.monotonic(), 0.0)
+
+    def retry_after(self, extractor: Optional[str]) -> float:
+        """
+        Seconds until the extractor's circuit lets a job through (0: allowed now).
+
+        After the cooldown one trial job is let through; others wait for its result.
+        """
+        if not extractor:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(extractor.lower())
+            if circuit is None or circuit['opened'] is None:
+                return 0.0
+            if now < circuit['until']:
+                return circuit['until'] - now
+            if circuit['trial']:
+                # A trial job is running; check again shortly
+                return min(self.cooldown, 30.0)
+            circuit['trial'] = True
+            return 0.0
+
+    def record(self, extractor: Optional[str], category: Optional[str]):
+        """
+        Record a job result for an extractor.
+
+        Args:
+            extractor: Extractor key
+            category: Error category, or None for a success
+        """
+        if not extractor:
+            return
+        extractor = extractor.lower()
+        with self._lock:
+            circuit = self._circuits.setdefault(
+                extractor, {'failures': 0, 'opened': None, 'until': 0.0, 'cooldown': 0.0, 'trial': False}
+            )
+            if category is None:
+                if circuit['opened'] is not None:
+                    logger.info(f"Circuit for {extractor} closed")
+                circuit.update(failures=0, opened=None, until=0.0, cooldown=0.0, trial=False)
+                return
+            if category != RATE_LIMITED:
+                circuit['trial'] = False
+                return
+            circuit['failures'] += 1
+            if circuit['trial'] or circuit['failures'] >= self.threshold:
+                cooldown = min(circuit['cooldown'] * 2 or self.cooldown, self.max_cooldown)
+                circuit.update(opened=time.time(), until=time.monotonic() + cooldown,
+                               cooldown=cooldown, trial=False)
+                logger.warning(f"Circuit for {extractor} opened for {cooldown:.0f}s (rate limited)")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Open (or recently failing) circuits, for status endpoints."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                extractor: {
+                    'state': 'closed' if c['opened'] is None else
+                             'open' if now < c['until'] else 'half-open',
+                    'failures': c['failures'],
+                    'retry_after': round(max(c['until'] - now, 0.0), 1),
+                }
+                for extractor, c in self._circuits.items()
+                if c['failures'] or c['opened'] is not None
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker() -> CircuitBreaker:
+    """Get the shared circuit breaker."""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
@@ -0,0 +1,301 @@
+"""
+Listening sockets and web worker processes for yt-dlp-wizwam.
+
+The web server binds its port once, before the application starts, and
+holds the socket until it stops. There is no check-then-bind race with
+other processes, and picking a free port binds each candidate only until
+one succeeds.
+
+- systemd socket activation: sockets passed in LISTEN_FDS are used as they
+  are (see systemd_sockets)
+- Several web workers (WEB_WORKERS): the server forks one process per
+  worker. With SO_REUSEPORT every worker listens on a socket of its own
+  bound to the same port, and the kernel spreads connections across them;
+  the parent only holds the port. Without it (or with a systemd socket) the
+  workers accept from the one inherited socket.
+
+Workers are independent servers with their own job queues. Socket.IO
+events reach the clients of every worker through the message queue
+(SOCKETIO_MESSAGE_QUEUE), finished jobs through the shared history
+database. Duties that must run once per server (subscription polling,
+resuming interrupted jobs, staging recovery) run in worker 0 only.
+"""
+
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# First file descriptor passed by systemd (SD_LISTEN_FDS_START)
+LISTEN_FDS_START = 3
+# Pending connections per listening socket
+BACKLOG = 2048
+# A worker that dies sooner than this after starting is not restarted (e.g. it cannot bind)
+MIN_WORKER_UPTIME = 5.0
+# Seconds between worker restarts and between checks of the workers
+RESTART_DELAY = 1.0
+POLL_INTERVAL = 0.2
+
+
+def reuse_port_supported() -> bool:
+    """Whether the platform has SO_REUSEPORT."""
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False, listen: bool = True) -> socket.socket:
+    """
+    Bind a TCP socket.
+
+    Args:
+        host: Address to bind to (IPv6 if it contains ':')
+        port: Port (0: any free port)
+        reuse_port: Set SO_REUSEPORT so other workers can listen on the port too
+        listen: Start listening; an unlistened socket only holds the port
+
+    Returns:
+        The bound socket
+
+    Raises:
+        OSError: If the port is in use (or the address is invalid)
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        if listen:
+            sock.listen(BACKLOG)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def bind_available(
+    host: str,
+    port: int,
+    attempts: int = 1,
+    reuse_port: bool = False,
+    listen: bool = True
+) -> socket.socket:
+    """
+    Bind the first free port of port, port + 1, ... and keep it.
+
+    Args:
+        host: Address to bind to
+        port: First port to try
+        attempts: Number of ports to try
+        reuse_port: See bind_socket
+        listen: See bind_socket
+
+    Returns:
+        The bound socket (its port: sock.getsockname()[1])
+
+    Raises:
+        OSError: If none of the ports could be bound
+    """
+    error = None
+    for candidate in range(port, port + max(attempts, 1)):
+        try:
+            return bind_socket(host, candidate, reuse_port=reuse_port, listen=listen)
+        except OSError as e:
+            error = e
+    raise error
+
+
+def systemd_sockets() -> List[socket.socket]:
+    """
+    Sockets passed by systemd socket activation (LISTEN_PID/LISTEN_FDS).
+
+    The variables are removed from the environment, so child processes do
+    not take the sockets for theirs.
+
+    Returns:
+        Listening sockets (empty if the process was not socket-activated)
+    """
+    if os.environ.get('LISTEN_PID') != str(os.getpid()):
+        return []
+    try:
+        count = int(os.environ.get('LISTEN_FDS', '0'))
+    except ValueError:
+        logger.warning(f"Ignoring invalid LISTEN_FDS={os.environ.get('LISTEN_FDS')!r}")
+        count = 0
+    for name in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(name, None)
+    return [socket.socket(fileno=fd) for fd in range(LISTEN_FDS_START, LISTEN_FDS_START + count)]
+
+
+def reloader_socket() -> Optional[socket.socket]:
+    """The listening socket handed down by the debug reloader (see run_with_reloader)."""
+    fd = os.environ.get('WERKZEUG_SERVER_FD')
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true' or not fd:
+        return None
+    return socket.socket(fileno=int(fd))
+
+
+def run_with_reloader(main: Callable[[], None], sock: socket.socket):
+    """
+    Run main() in a child process that is restarted when the code changes.
+
+    The child is this program run again; it gets the listening socket from
+    reloader_socket() instead of binding the port, which this process holds.
+
+    Args:
+        main: Serves on the socket
+        sock: Listening socket
+    """
+    from werkzeug._reloader import run_with_reloader as werkzeug_reloader
+
+    sock.set_inheritable(True)
+    os.environ['WERKZEUG_SERVER_FD'] = str(sock.fileno())
+    werkzeug_reloader(main)
+
+
+def serve(sock: socket.socket, server: str = 'eventlet', debug: bool = False, primary: bool = True):
+    """
+    Create the application and serve it on a listening socket until it stops.
+
+    Args:
+        sock: Listening socket
+        server: 'eventlet' or 'asyncio'
+        debug: Log requests and server internals
+        primary: Run the once-per-server duties (see module docstring)
+    """
+    from yt_dlp_wizwam.events import event_log
+
+    try:
+        if server == 'asyncio':
+            from yt_dlp_wizwam import asgi
+            asgi.run(sock=sock, debug=debug, primary=primary)
+            return
+
+        import eventlet.wsgi
+        from eventlet.greenio import GreenSocket
+        from yt_dlp_wizwam.web import create_app, install_drain_handler
+
+        app = create_app(primary=primary)
+        app.debug = debug
+        if threading.current_thread() is threading.main_thread():
+            # Not under the debug reloader, which serves from a thread
+            install_drain_handler(app)
+        eventlet.wsgi.server(GreenSocket(sock), app, log_output=debug)
+    finally:
+        event_log.flush()
+
+
+class WorkerSupervisor:
+    """Run web workers in forked processes; restart the ones that die, stop them on SIGTERM."""
+
+    def __init__(self, count: int, target: Callable[[int], None], stop_timeout: Optional[float] = None):
+        """
+        Initialize supervisor.
+
+        Args:
+            count: Number of workers
+            target: Runs worker number i (0 is the primary) until it stops
+            stop_timeout: Seconds workers get to drain before they are killed
+                          (default: SHUTDOWN_TIMEOUT plus a margin)
+        """
+        self.count = count
+        self.target = target
+        self.stop_timeout = stop_timeout if stop_timeout is not None else Config.SHUTDOWN_TIMEOUT + 30
+        self.stopping = False
+        self._stop_deadline: Optional[float] = None
+        # pid -> (worker index, start time)
+        self._workers: Dict[int, tuple] = {}
+
+    def start(self):
+        """Fork the workers and take over SIGTERM and SIGINT."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.count):
+            self._spawn(index)
+
+    def _spawn(self, index: int):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # A stop signal arriving during the fork reaches the worker once its own handlers are set
+        signals = {signal.SIGTERM, signal.SIGINT}
+        signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+        pid = os.fork()
+        if pid:
+            self._workers[pid] = (index, time.monotonic())
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+            return
+        # Worker: its own server handles the signals from here
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+        code = 0
+        try:
+            self.target(index)
+        except KeyboardInterrupt:
+            pass
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+        except BaseException:
+            logger.exception(f"Web worker {index} failed")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Skip the parent's exit handlers (the worker runs no code of its own there)
+            os._exit(code)
+
+    def stop(self, signum=None, frame=None):
+        """Ask every worker to drain and stop (SIGTERM)."""
+        if self.stopping:
+            return
+        self.stopping = True
+        self._stop_deadline = time.monotonic() + self.stop_timeout
+        logger.info(f"Stopping {len(self._workers)} web worker(s)")
+        self._signal_all(signal.SIGTERM)
+
+    def _signal_all(self, signum: int):
+        for pid in list(self._workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def wait(self) -> int:
+        """
+        Supervise the workers until all have stopped.
+
+        Returns:
+            Exit code: 0, or 1 if a worker failed right after starting
+        """
+        code = 0
+        while self._workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self._stop_deadline is not None and time.monotonic() > self._stop_deadline:
+                    logger.warning(f"Web workers still running after {self.stop_timeout:.0f}s, killing them")
+                    self._signal_all(signal.SIGKILL)
+                    self._stop_deadline = None
+                time.sleep(POLL_INTERVAL)
+                continue
+            index, started = self._workers.pop(pid, (None, 0.0))
+            if index is None or self.stopping:
+                continue
+            exit_code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                logger.error(f"Web worker {index} exited with {exit_code} right after starting, stopping")
+                code = 1
+                self.stop()
+                continue
+            logger.warning(f"Web worker {index} (pid {pid}) exited with {exit_code}, restarting it")
+            time.sleep(RESTART_DELAY)
+            if not self.stopping:
+                self._spawn(index)
+        return code
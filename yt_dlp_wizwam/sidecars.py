@@ -0,0 +1,218 @@
+"""
+Sidecar outputs for yt-dlp-wizwam.
+
+Subtitles, chapters and metadata are produced from the same extraction as
+the media, instead of a second yt-dlp run:
+
+- Subtitles in the requested languages are written next to the media
+  ("name.en.vtt")
+- Chapters are embedded into the media container (ffmpeg)
+- A compact "name.info.json" keeps the useful fields of the info dict
+  (title, uploader, dates, description, chapters, ...), not the several
+  hundred KB of formats and thumbnails yt-dlp's own info JSON holds
+
+Sidecar names are stored with the media's archive entry, so /api/files
+reports them without scanning the download directory.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+INFO_JSON_SUFFIX = '.info.json'
+
+# Text formats players understand, best first
+SUBTITLE_FORMAT = 'vtt/srt/best'
+
+# Fields kept in the compact info.json
+INFO_FIELDS = (
+    'id', 'title', 'fulltitle', 'extractor_key', 'webpage_url', 'original_url',
+    'uploader', 'uploader_id', 'channel', 'channel_id', 'channel_url',
+    'upload_date', 'timestamp', 'release_date', 'duration', 'description',
+    'tags', 'categories', 'view_count', 'like_count', 'age_limit',
+    'width', 'height', 'fps', 'vcodec', 'acodec', 'ext', 'language',
+    'playlist_id', 'playlist_title', 'playlist_index',
+)
+
+
+def parse_languages(value) -> List[str]:
+    """
+    Normalise a subtitle language selection.
+
+    Args:
+        value: List of codes or comma-separated string ("en,de", "all")
+
+    Returns:
+        List of language codes (empty: no subtitles)
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [lang.strip() for lang in value if lang and lang.strip()]
+
+
+def sidecar_ydl_opts(subtitles: Iterable[str], chapters: bool) -> Dict:
+    """
+    yt-dlp options producing sidecars during the download.
+
+    Args:
+        subtitles: Subtitle language codes (yt-dlp syntax, e.g. "en.*", "all")
+        chapters: Embed chapters into the media file
+
+    Returns:
+        Options to merge into the download's ydl_opts
+    """
+    opts = {}
+    subtitles = list(subtitles)
+    if subtitles:
+        opts.update({
+            'writesubtitles': True,
+            'subtitleslangs': subtitles,
+            'subtitlesformat': SUBTITLE_FORMAT,
+        })
+    if chapters:
+        opts['postprocessors'] = [{
+            'key': 'FFmpegMetadata',
+            'add_chapters': True,
+            'add_metadata': False,
+        }]
+    return opts
+
+
+def compact_info(info: Dict) -> Dict:
+    """
+    Compact metadata schema written as name.info.json.
+
+    Args:
+        info: yt-dlp info dict
+
+    Returns:
+        Dict with INFO_FIELDS (when present) and chapters
+    """
+    compact = {field: info[field] for field in INFO_FIELDS if info.get(field) is not None}
+    chapters = info.get('chapters') or []
+    if chapters:
+        compact['chapters'] = [
+            {
+                'start_time': chapter.get('start_time'),
+                'end_time': chapter.get('end_time'),
+                'title': chapter.get('title'),
+            }
+            for chapter in chapters
+        ]
+    return compact
+
+
+def info_json_path(media_path: Path) -> Path:
+    """Path of the compact info.json for a media file."""
+    return media_path.with_name(media_path.stem + INFO_JSON_SUFFIX)
+
+
+def write_sidecars(info: Dict, media_path: Path, info_json: bool = False) -> Dict:
+    """
+    Collect subtitle files yt-dlp wrote and write the compact info.json.
+
+    Args:
+        info: Info dict returned by the download (with requested_subtitles)
+        media_path: Final media file
+        info_json: Write name.info.json
+
+    Returns:
+        Sidecar index: {'subtitles': {lang: path}, 'info_json': path};
+        empty if there are no sidecars
+    """
+    sidecars = {}
+
+    subtitles = {}
+    for lang, sub in (info.get('requested_subtitles') or {}).items():
+        filepath = sub.get('filepath')
+        if filepath and os.path.exists(filepath):
+            subtitles[lang] = Path(filepath)
+    if subtitles:
+        sidecars['subtitles'] = subtitles
+
+    if info_json:
+        path = info_json_path(media_path)
+        data = compact_info(info)
+        if subtitles:
+            data['subtitles'] = {lang: p.name for lang, p in subtitles.items()}
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            sidecars['info_json'] = path
+        except OSError as e:
+            logger.warning(f"Could not write {path.name}: {e}")
+
+    return sidecars
+
+
+def sidecar_paths(sidecars: Dict) -> List[Path]:
+    """All paths in a sidecar index returned by write_sidecars()."""
+    paths = list((sidecars.get('subtitles') or {}).values())
+    if sidecars.get('info_json'):
+        paths.append(sidecars['info_json'])
+    return paths
+
+
+def sidecar_names(sidecars: Dict) -> Dict:
+    """Sidecar index with file names only (for the archive and the API)."""
+    names = {}
+    if sidecars.get('subtitles'):
+        names['subtitles'] = {lang: Path(p).name for lang, p in sidecars['subtitles'].items()}
+    if sidecars.get('info_json'):
+        names['info_json'] = Path(sidecars['info_json']).name
+    return names
+
+
+def attach_sidecars(files: List[Dict], archive, namespace: Optional[str] = None) -> List[Dict]:
+    """
+    Attach indexed sidecars to their media in a file listing.
+
+    Sidecar files are reported under their media ('sidecars' field) instead
+    of as separate entries.
+
+    Args:
+        files: Listing from storage.list_files()
+        archive: DownloadArchive holding the sidecar index
+        namespace: User namespace the files are in
+
+    Returns:
+        Listing with sidecars attached
+    """
+    attached = {}
+    for f in files:
+        key = archive.lookup_filename(f['filename'], namespace)
+        entry = archive.get(key) if key else None
+        if entry and entry.get('sidecars'):
+            attached[f['filename']] = entry['sidecars']
+
+    owned = set()
+    for sidecars in attached.values():
+        owned.update((sidecars.get('subtitles') or {}).values())
+        if sidecars.get('info_json'):
+            owned.add(sidecars['info_json'])
+
+    listing = []
+    for f in files:
+        if f['filename'] in owned:
+            continue
+        if f['filename'] in attached:
+            f = {**f, 'sidecars': attached[f['filename']]}
+        listing.append(f)
+    return listing
+
+
+def default_options() -> Dict:
+    """Sidecar options from the configuration (download_video defaults)."""
+    return {
+        'subtitles': parse_languages(Config.SUBTITLE_LANGS),
+        'chapters': Config.EMBED_CHAPTERS,
+        'info_json': Config.WRITE_INFO_JSON,
+    }
@@ -1,8 +1,46 @@
 // yt-dlp-wizwam - Main JavaScript
 // Socket.IO client for real-time progress updates
 
+// Last job event seen; sent on (re)connect so the server replays what we missed
+let lastEventSeq = null;
+let lastEventEpoch = null;
+
+// Multi-user servers answer 401 without a token: ask for it once and keep it in a cookie
+let askedForToken = false;
+function askForToken() {
+    if (askedForToken) return;
+    askedForToken = true;
+    const token = window.prompt('This server needs your access token (ask the admin for one):');
+    if (token && token.trim()) {
+        document.cookie = `wizwam_token=${encodeURIComponent(token.trim())}; path=/; max-age=31536000; SameSite=Strict`;
+        window.location.reload();
+    }
+}
+const originalFetch = window.fetch.bind(window);
+window.fetch = async (...args) => {
+    const response = await originalFetch(...args);
+    if (response.status === 401) askForToken();
+    return response;
+};
+
 // Initialize Socket.IO connection
-const socket = io();
+const socketOptions = {
+    auth: (cb) => cb({since: lastEventSeq, epoch: lastEventEpoch})
+};
+// Several server workers: websocket only (long-polling needs sticky sessions)
+if (document.body.dataset.socketioTransports) {
+    socketOptions.transports = document.body.dataset.socketioTransports.split(',');
+}
+const socket = io(socketOptions);
+
+function trackEvent(data) {
+    if (data && data.seq !== undefined) {
+        if (data.epoch !== lastEventEpoch || data.seq > lastEventSeq) {
+            lastEventSeq = data.seq;
+            lastEventEpoch = data.epoch;
+        }
+    }
+}
 
 // DOM elements
 const downloadForm = document.getElementById('download-form');
@@ -15,10 +53,14 @@ const filesCount = document.getElementById('files-count');
 const refreshFilesBtn = document.getElementById('refresh-files');
 const searchFilesInput = document.getElementById('search-files');
 const sortFilesSelect = document.getElementById('sort-files');
+const historyList = document.getElementById('history-list');
+const historyStatus = document.getElementById('history-status');
+const historyMore = document.getElementById('history-more');
 
 // Current job ID and files data
 let currentJobId = null;
 let allFiles = [];  // Store all files for filtering/sorting
+let historyCursor = null;  // next_cursor of the last /api/jobs page
 
 // Socket.IO event handlers
 socket.on('connect', () => {
@@ -33,22 +75,38 @@ socket.on('disconnect', () => {
 
 socket.on('connect_error', (error) => {
     console.error('❌ Socket.IO Connection Error:', error);
+    if (error && error.message === 'Authentication required') askForToken();
 });
 
 socket.on('progress', (data) => {
+    trackEvent(data);
     console.log('📊 Progress received:', data);
     showProgress(data);
 });
 
 socket.on('success', (data) => {
+    trackEvent(data);
     console.log('✅ Success received:', data);
     showSuccess(data);
     loadFiles(); // Refresh file list
+    loadHistory();
 });
 
 socket.on('error', (data) => {
+    trackEvent(data);
     console.log('❌ Error received:', data);
     showError(data);
+    loadHistory();
+});
+
+socket.on('cancelled', (data) => {
+    trackEvent(data);
+    showError({...data, error: 'Download cancelled'});
+    loadHistory();
+});
+
+socket.on('stats', (data) => {
+    showStats(data);
 });
 
 // Download form submission
@@ -90,7 +148,7 @@ if (downloadForm) {
             
             const result = await response.json();
             
-            if (result.status === 'success' || result.status === 'started') {
+            if (result.status === 'success' || result.status === 'started' || result.status === 'queued') {
                 currentJobId = result.job_id;
                 console.log('✅ Download started:', result);
             } else {
@@ -140,6 +198,38 @@ function showProgress(data) {
     btnText.textContent = displayText;
 }
 
+// Show live throughput summary
+function showStats(data) {
+    const statsBar = document.getElementById('stats-bar');
+    if (!statsBar) return;
+    
+    if (!data.active_jobs) {
+        statsBar.textContent = '';
+        return;
+    }
+    
+    const speed = formatBytes(data.bandwidth || 0) + '/s';
+    const queued = data.queued_jobs ? ` (${data.queued_jobs} queued)` : '';
+    const eta = data.queue_eta != null ? `, ETA ${formatDuration(data.queue_eta)}` : '';
+    statsBar.textContent = `${data.active_jobs} active download${data.active_jobs !== 1 ? 's' : ''}${queued} at ${speed}${eta}`;
+}
+
+function formatBytes(bytes) {
+    const units = ['B', 'KiB', 'MiB', 'GiB'];
+    let i = 0;
+    while (bytes >= 1024 && i < units.length - 1) {
+        bytes /= 1024;
+        i++;
+    }
+    return `${bytes.toFixed(1)} ${units[i]}`;
+}
+
+function formatDuration(seconds) {
+    const m = Math.floor(seconds / 60);
+    const s = Math.floor(seconds % 60);
+    return `${m}:${String(s).padStart(2, '0')}`;
+}
+
 // Show success message
 function showSuccess(data) {
     downloadBtn.classList.remove('downloading', 'error');
@@ -224,6 +314,46 @@ async function loadFiles() {
     }
 }
 
+// Load finished jobs (downloads, failures, cancellations) from the job history
+async function loadHistory(more = false) {
+    if (!historyList) return;
+    
+    const params = new URLSearchParams({limit: '20'});
+    if (historyStatus && historyStatus.value) params.set('status', historyStatus.value);
+    if (more && historyCursor) params.set('cursor', historyCursor);
+    
+    try {
+        const response = await fetch(`/api/jobs?${params}`);
+        const data = await response.json();
+        const icons = {success: '✅', error: '❌', cancelled: '⏹️', interrupted: '⏸️'};
+        const items = (data.jobs || []).map(job => {
+            const detail = job.status === 'success'
+                ? `${job.filename ? job.filename.split(/[\\/]/).pop() : ''} ${job.filesize || ''}`
+                : (job.error || job.status);
+            const finished = new Date(job.finished * 1000).toLocaleString();
+            return `
+                <div class="file-item">
+                    <div class="file-info">
+                        <span class="file-name">${icons[job.status] || '•'} ${escapeHtml(job.title || job.url)}</span>
+                        <span class="file-size">${escapeHtml(finished)} · ${escapeHtml(detail.trim())}</span>
+                    </div>
+                </div>
+            `;
+        }).join('');
+        
+        if (more) {
+            historyList.insertAdjacentHTML('beforeend', items);
+        } else {
+            historyList.innerHTML = items || '<p>No finished jobs yet.</p>';
+        }
+        historyCursor = data.next_cursor || null;
+        if (historyMore) historyMore.classList.toggle('hidden', !historyCursor);
+    } catch (error) {
+        console.error('Error loading job history:', error);
+        historyList.innerHTML = '<p class="error">Error loading job history.</p>';
+    }
+}
+
 // Filter and sort files based on search and sort criteria
 function filterAndSortFiles() {
     if (!filesList) return;
@@ -535,6 +665,16 @@ if (filesList) {
     loadFiles();
 }
 
+if (historyStatus) {
+    historyStatus.addEventListener('change', () => loadHistory());
+}
+
+if (historyMore) {
+    historyMore.addEventListener('click', () => loadHistory(true));
+}
+
+loadHistory();
+
 // Load saved settings
 const savedQuality = localStorage.getItem('default_quality');
 const savedVideoCodec = localStorage.getItem('default_video_codec');
@@ -0,0 +1,230 @@
+"""
+Live throughput statistics for yt-dlp-wizwam.
+
+Download progress hooks report numeric per-stream bytes, speed and ETA into a
+shared in-memory registry. The web server aggregates it into total bandwidth,
+per-extractor throughput and queue ETA (active plus queued jobs) for
+/api/stats and the periodic Socket.IO 'stats' event.
+"""
+
+import collections
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Streams that have not reported for this long no longer count towards bandwidth
+STALE_AFTER = 5.0  # seconds
+
+# Finished jobs kept for per-extractor throughput averages
+HISTORY_SIZE = 200
+
+
+class StatsRegistry:
+    """Thread-safe registry of per-job, per-stream transfer statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._history = collections.deque(maxlen=HISTORY_SIZE)
+        self._totals = {'completed': 0, 'failed': 0, 'bytes': 0}
+        self._forward: Optional[Callable[[str, tuple], None]] = None
+
+    def set_forwarder(self, forward: Optional[Callable[[str, tuple], None]]):
+        """
+        Also pass every update to forward(method, args).
+
+        Used in worker processes to mirror updates into the server's registry.
+        """
+        self._forward = forward
+
+    def start_job(self, job_id: str, url: str, extractor: Optional[str] = None):
+        """Register a job as active."""
+        with self._lock:
+            self._jobs[job_id] = {
+                'url': url,
+                'extractor': extractor or 'unknown',
+                'started': time.time(),
+                'streams': {},
+            }
+        if self._forward:
+            self._forward('start_job', (job_id, url, extractor))
+
+    def set_extractor(self, job_id: str, extractor: str):
+        """Set the extractor key once the URL has been resolved."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job['extractor'] = extractor.lower()
+        if self._forward:
+            self._forward('set_extractor', (job_id, extractor))
+
+    def update_stream(
+        self,
+        job_id: str,
+        stream: str,
+        downloaded: int,
+        total: Optional[int],
+        speed: Optional[float],
+        eta: Optional[float]
+    ):
+        """
+        Record the latest numbers for one stream of a job.
+
+        Args:
+            job_id: Job identifier
+            stream: Stream key (e.g. video and audio file names)
+            downloaded: Bytes downloaded so far
+            total: Total bytes (exact or estimated), None if unknown
+            speed: Bytes per second, None if unknown
+            eta: Seconds remaining, None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['streams'][stream] = {
+                'downloaded': downloaded or 0,
+                'total': total or None,
+                'speed': speed or 0.0,
+                'eta': eta,
+                'updated': time.monotonic(),
+            }
+        if self._forward:
+            self._forward('update_stream', (job_id, stream, downloaded, total, speed, eta))
+
+    def finish_job(self, job_id: str, status: str):
+        """Move a job out of the active set."""
+        if self._forward:
+            self._forward('finish_job', (job_id, status))
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            downloaded = sum(s['downloaded'] for s in job['streams'].values())
+            elapsed = max(time.time() - job['started'], 0.001)
+            self._totals['completed' if status == 'success' else 'failed'] += 1
+            self._totals['bytes'] += downloaded
+            if status == 'success' and downloaded:
+                self._history.append((job['extractor'], downloaded, elapsed))
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        """Numeric snapshot of one active job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._job_summary(job, time.monotonic()) if job else None
+
+    def summary(self, queued: Optional[List[Optional[int]]] = None) -> Dict:
+        """
+        Aggregate statistics across all active jobs.
+
+        Args:
+            queued: Expected sizes of jobs waiting to download (None where unknown;
+                estimated from the average finished download then)
+
+        Returns:
+            Dictionary with total bandwidth, per-extractor throughput, the ETA of
+            the active jobs and of the whole queue
+        """
+        queued = queued or []
+        now = time.monotonic()
+        with self._lock:
+            jobs = {job_id: self._job_summary(job, now) for job_id, job in self._jobs.items()}
+            history = list(self._history)
+            totals = dict(self._totals)
+
+        extractors: Dict[str, Dict] = {}
+        for job in jobs.values():
+            entry = extractors.setdefault(job['extractor'], {
+                'active_jobs': 0, 'speed': 0.0, 'downloaded': 0, 'avg_throughput': None,
+            })
+            entry['active_jobs'] += 1
+            entry['speed'] += job['speed']
+            entry['downloaded'] += job['downloaded']
+
+        # Historical average throughput per extractor (bytes/s over whole jobs)
+        finished: Dict[str, list] = {}
+        for extractor, downloaded, elapsed in history:
+            acc = finished.setdefault(extractor, [0, 0.0])
+            acc[0] += downloaded
+            acc[1] += elapsed
+        for extractor, (downloaded, elapsed) in finished.items():
+            entry = extractors.setdefault(extractor, {
+                'active_jobs': 0, 'speed': 0.0, 'downloaded': 0, 'avg_throughput': None,
+            })
+            entry['avg_throughput'] = downloaded / elapsed
+
+        bandwidth = sum(job['speed'] for job in jobs.values())
+        remaining = sum(job['remaining'] for job in jobs.values() if job['remaining'] is not None)
+        unknown = sum(1 for job in jobs.values() if job['remaining'] is None)
+
+        # Queued jobs without a known size count as an average finished download
+        average = sum(downloaded for _, downloaded, _ in history) / len(history) if history else None
+        queued_bytes = 0
+        for size in queued:
+            if size is None:
+                size = average
+            if size is None:
+                unknown += 1
+            else:
+                queued_bytes += size
+
+        return {
+            'active_jobs': len(jobs),
+            'queued_jobs': len(queued),
+            'bandwidth': bandwidth,
+            'remaining_bytes': remaining,
+            'queued_bytes': round(queued_bytes),
+            'unknown_size_jobs': unknown,
+            'active_eta': remaining / bandwidth if bandwidth > 0 else None,
+            'queue_eta': (remaining + queued_bytes) / bandwidth if bandwidth > 0 else None,
+            'extractors': extractors,
+            'jobs': jobs,
+            'totals': totals,
+        }
+
+    def compact_summary(self, queued: Optional[List[Optional[int]]] = None) -> Dict:
+        """Small summary suitable for periodic broadcast (queued as for summary())."""
+        summary = self.summary(queued)
+        return {
+            'active_jobs': summary['active_jobs'],
+            'queued_jobs': summary['queued_jobs'],
+            'bandwidth': round(summary['bandwidth']),
+            'remaining_bytes': summary['remaining_bytes'],
+            'queued_bytes': summary['queued_bytes'],
+            'queue_eta': round(summary['queue_eta']) if summary['queue_eta'] is not None else None,
+            'extractors': {
+                name: round(entry['speed']) for name, entry in summary['extractors'].items()
+                if entry['active_jobs']
+            },
+        }
+
+    @staticmethod
+    def _job_summary(job: Dict, now: float) -> Dict:
+        downloaded = 0
+        total = 0
+        total_known = True
+        speed = 0.0
+        for stream in job['streams'].values():
+            downloaded += stream['downloaded']
+            if stream['total']:
+                total += stream['total']
+            else:
+                total_known = False
+            if now - stream['updated'] < STALE_AFTER:
+                speed += stream['speed']
+
+        remaining = max(total - downloaded, 0) if total_known and job['streams'] else None
+        return {
+            'url': job['url'],
+            'extractor': job['extractor'],
+            'elapsed': time.time() - job['started'],
+            'downloaded': downloaded,
+            'total': total if total_known else None,
+            'speed': speed,
+            'remaining': remaining,
+            'eta': remaining / speed if remaining is not None and speed > 0 else None,
+        }
+
+
+# Shared registry for the whole process
+registry = StatsRegistry()
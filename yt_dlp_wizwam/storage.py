@@ -0,0 +1,464 @@
+"""
+Storage tiers for yt-dlp-wizwam.
+
+Downloads (including .part files and ffmpeg merges) are written to a fast
+local staging directory. Finished files are moved to DOWNLOAD_DIR (usually a
+NAS mount) by a background mover with bounded concurrency, which verifies the
+copy before removing the staged file. The mover never replaces a file that
+is already in the archive tier.
+
+With no STAGING_DIR configured everything collapses to a single tier.
+
+In multi-user mode every user has a namespace: a folder users/<name> in
+both tiers. Functions taking a namespace work on that folder; without one
+they work on the top level, which single-user mode uses.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from yt_dlp_wizwam.archive import get_archive
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Copy/hash buffer size
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Suffix used while a file is being copied into the archive tier
+MOVING_SUFFIX = '.moving'
+
+# Folder (in both tiers) holding the per-user namespaces
+USERS_SUBDIR = 'users'
+
+# yt-dlp work files: .part/.ytdl, fragments, merge temp files and
+# per-format streams (name.f137.mp4) that still have to be merged
+_PARTIAL_RE = re.compile(r'(\.part|\.ytdl|\.part-Frag\d+|\.temp\.\w+|\.f\d+\.\w+)$')
+
+
+def is_partial(path: Path) -> bool:
+    """Return True if path is a hidden or in-progress work file."""
+    name = path.name
+    return name.startswith('.') or name.endswith(MOVING_SUFFIX) or bool(_PARTIAL_RE.search(name))
+
+
+def staging_enabled() -> bool:
+    """Return True if a separate staging tier is configured."""
+    if not Config.STAGING_DIR:
+        return False
+    return Path(Config.STAGING_DIR).resolve() != Path(Config.DOWNLOAD_DIR).resolve()
+
+
+def namespace_dir(root: Path, namespace: Optional[str] = None) -> Path:
+    """A namespace's folder in a tier (the tier itself without a namespace)."""
+    root = Path(root)
+    return root / USERS_SUBDIR / namespace if namespace else root
+
+
+def namespace_of(path: Path) -> Optional[str]:
+    """Namespace of a file in either tier (None for the top level)."""
+    parent = Path(path).resolve().parent
+    if parent.parent.name != USERS_SUBDIR:
+        return None
+    roots = [Path(Config.DOWNLOAD_DIR)] + ([Path(Config.STAGING_DIR)] if staging_enabled() else [])
+    if any(parent.parent == root.resolve() / USERS_SUBDIR for root in roots):
+        return parent.name
+    return None
+
+
+def get_work_dir(namespace: Optional[str] = None) -> Path:
+    """Directory new downloads (of a namespace) should be written to."""
+    if staging_enabled():
+        return namespace_dir(Config.STAGING_DIR, namespace)
+    return namespace_dir(Config.DOWNLOAD_DIR, namespace)
+
+
+def archive_dir(namespace: Optional[str] = None) -> Path:
+    """Directory finished files (of a namespace) end up in."""
+    return namespace_dir(Config.DOWNLOAD_DIR, namespace)
+
+
+def file_sha256(path: Path) -> str:
+    """Compute the SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_copy(path: Path, expected_size: int, expected_sha256: str):
+    """
+    Verify a copied file against the source size and checksum.
+
+    Honours FILE_VERIFICATION_*: waits FILE_VERIFICATION_DELAY seconds for the
+    NAS to settle, then polls until the size matches or
+    FILE_VERIFICATION_TIMEOUT expires.
+
+    Raises:
+        RuntimeError: If the copy does not match the source
+    """
+    if not Config.FILE_VERIFICATION_ENABLED:
+        return
+
+    time.sleep(Config.FILE_VERIFICATION_DELAY)
+
+    deadline = time.monotonic() + Config.FILE_VERIFICATION_TIMEOUT
+    size = path.stat().st_size
+    while size != expected_size:
+        if time.monotonic() >= deadline:
+            raise RuntimeError(
+                f'Size mismatch for {path.name}: expected {expected_size}, got {size}'
+            )
+        time.sleep(0.5)
+        size = path.stat().st_size
+
+    actual = file_sha256(path)
+    if actual != expected_sha256:
+        raise RuntimeError(f'Checksum mismatch for {path.name}')
+
+
+class TierMover:
+    """Move finished files from the staging tier to DOWNLOAD_DIR in the background."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize mover.
+
+        Args:
+            max_workers: Concurrent moves (default: Config.MOVER_CONCURRENCY)
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.MOVER_CONCURRENCY,
+            thread_name_prefix='tier-mover'
+        )
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        # Moves that failed since the last wait(), by path
+        self._failed: Dict[str, BaseException] = {}
+
+    def submit(self, path: Path, video_key: Optional[str] = None) -> Future:
+        """
+        Queue a staged file for moving. Re-submitting a file already in flight
+        returns the existing future.
+
+        Args:
+            path: Staged file
+            video_key: Archive key of the video the file belongs to, if known
+        """
+        path = Path(path)
+        # Keyed by path: users may have files of the same name
+        key = str(path)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._move, path, video_key)
+            self._pending[key] = future
+        # Outside the lock: for a move that has already finished, _done runs right here
+        future.add_done_callback(lambda f, key=key: self._done(key, f))
+        return future
+
+    def pending(self) -> List[str]:
+        """Names of files still being moved."""
+        with self._lock:
+            return [Path(key).name for key in self._pending]
+
+    def wait(self) -> List[str]:
+        """
+        Block until all queued moves have finished.
+
+        Returns:
+            Names of files that failed to move since the last wait(),
+            including moves that had already finished when it was called
+        """
+        with self._lock:
+            futures = dict(self._pending)
+        failed = set()
+        for key, future in futures.items():
+            try:
+                if future.exception() is not None:
+                    failed.add(key)
+            except CancelledError:
+                pass
+        with self._lock:
+            failed.update(self._failed)
+            self._failed.clear()
+        return sorted(Path(key).name for key in failed)
+
+    def delete(self, path: Path) -> bool:
+        """
+        Delete a staged file, whether or not it is queued for moving.
+
+        A queued move is cancelled; a running one is waited for, and the
+        moved file is deleted instead.
+
+        Returns:
+            False if the file no longer exists
+        """
+        path = Path(path)
+        key = str(path)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None or future.cancel():
+                self._pending.pop(key, None)
+                try:
+                    path.unlink()
+                    return True
+                except FileNotFoundError:
+                    return False
+        try:
+            target = future.result()
+        except Exception:
+            # The move failed and kept the staged file
+            target = path
+        try:
+            target.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _done(self, key: str, future: Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is not None:
+                self._failed[key] = error
+        if error is not None:
+            logger.error(f"Failed to move {Path(key).name} to archive tier: {error}")
+
+    def _move(self, src: Path, video_key: Optional[str] = None) -> Path:
+        """Copy, verify and put in place; the staged file is removed only after verification."""
+        dest_dir = archive_dir(namespace_of(src))
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest = dest_dir / src.name
+
+        if dest.exists() and _already_archived(src, dest, video_key):
+            src.unlink()
+            logger.info(f"{src.name} is already in {dest_dir}; removed the staged copy")
+            return dest
+
+        # Same filesystem: rename is atomic, nothing to verify
+        if src.stat().st_dev == dest_dir.stat().st_dev:
+            _place(src, dest)
+            logger.info(f"Moved {src.name} to {dest_dir} (rename)")
+            return dest
+
+        if dest.exists():
+            raise FileExistsError(f'{dest} already exists; {src.name} kept in staging')
+
+        tmp = dest.with_name(dest.name + MOVING_SUFFIX)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with open(src, 'rb') as fin, open(tmp, 'wb') as fout:
+                for chunk in iter(lambda: fin.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    fout.write(chunk)
+                    size += len(chunk)
+                fout.flush()
+                os.fsync(fout.fileno())
+
+            verify_copy(tmp, size, digest.hexdigest())
+            _place(tmp, dest)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        src.unlink()
+        logger.info(f"Moved {src.name} to {dest_dir} ({size / (1024 * 1024):.1f} MB, verified)")
+        return dest
+
+
+def _already_archived(src: Path, dest: Path, video_key: Optional[str] = None) -> bool:
+    """
+    Whether the archive file dest already stands for the staged file src.
+
+    True for a re-download of the same video (unique_filename gives it the
+    name of the earlier download; the archive knows which video a name
+    belongs to), its sidecars, and an identical copy left by a move that a
+    restart cut short. Anything else at dest is another file and is kept.
+    """
+    archive = get_archive()
+    owner = archive.lookup_filename(dest.name, namespace_of(src))
+    if owner is not None and owner == (video_key or owner):
+        return True
+    entry = archive.get(video_key) if video_key else None
+    if entry and entry.get('filename') and dest.name.startswith(Path(entry['filename']).stem + '.'):
+        # Subtitles and info JSON are named after the video's file
+        return True
+    return dest.stat().st_size == src.stat().st_size and file_sha256(dest) == file_sha256(src)
+
+
+def _place(src: Path, dest: Path):
+    """
+    Rename src to dest unless dest exists.
+
+    Raises:
+        FileExistsError: If dest exists
+    """
+    try:
+        # A hard link fails atomically if dest exists
+        os.link(src, dest)
+    except FileExistsError:
+        raise
+    except OSError:
+        # No hard links (e.g. some NAS shares): check, then rename
+        if dest.exists():
+            raise FileExistsError(f'{dest} already exists')
+        os.replace(src, dest)
+        return
+    os.unlink(src)
+
+
+_mover: Optional[TierMover] = None
+_mover_lock = threading.Lock()
+
+
+def get_mover() -> TierMover:
+    """Get the shared mover instance."""
+    global _mover
+    with _mover_lock:
+        if _mover is None:
+            _mover = TierMover()
+        return _mover
+
+
+def _in_staging(path: Path) -> bool:
+    try:
+        Path(path).resolve().relative_to(Path(Config.STAGING_DIR).resolve())
+        return True
+    except ValueError:
+        return False
+
+
+def promote(path: Path, video_key: Optional[str] = None) -> Optional[Future]:
+    """
+    Hand a finished download over to the archive tier.
+
+    Args:
+        path: Finished file
+        video_key: Archive key of the video the file belongs to, if known
+            (lets a re-download give way to the archived copy)
+
+    Returns:
+        Future resolving to the final path, or None if the file is
+        already in DOWNLOAD_DIR (single tier)
+    """
+    if staging_enabled() and _in_staging(path):
+        return get_mover().submit(path, video_key)
+    return None
+
+
+def delete_file(path: Path) -> bool:
+    """
+    Delete a finished file in either tier.
+
+    A staged file's pending move is cancelled or waited for first (see
+    TierMover.delete), so the file cannot reappear in the archive tier.
+
+    Returns:
+        False if the file no longer exists
+    """
+    path = Path(path)
+    if staging_enabled() and _in_staging(path):
+        return get_mover().delete(path)
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def recover_staged() -> int:
+    """
+    Re-queue finished files left in the staging tier (e.g. after a restart).
+
+    Returns:
+        Number of files queued
+    """
+    if not staging_enabled():
+        return 0
+    staging = Path(Config.STAGING_DIR)
+    if not staging.exists():
+        return 0
+    users = staging / USERS_SUBDIR
+    directories = [staging] + (sorted(p for p in users.iterdir() if p.is_dir()) if users.is_dir() else [])
+    count = 0
+    for directory in directories:
+        for path in directory.iterdir():
+            if path.is_file() and not is_partial(path):
+                get_mover().submit(path)
+                count += 1
+    if count:
+        logger.info(f"Re-queued {count} staged file(s) for the archive tier")
+    return count
+
+
+def _scan(directory: Path, tier: str) -> Dict[str, Dict]:
+    files = {}
+    if not directory.exists():
+        return files
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file() or is_partial(Path(entry.name)):
+                continue
+            stat = entry.stat()
+            files[entry.name] = {
+                'name': entry.name,
+                'filename': entry.name,
+                'size': stat.st_size,
+                'size_mb': f'{stat.st_size / (1024 * 1024):.1f} MB',
+                'modified': stat.st_mtime,
+                'tier': tier,
+            }
+    return files
+
+
+def list_files(namespace: Optional[str] = None) -> List[Dict]:
+    """
+    List finished files (of a namespace) across both tiers as one view, newest first.
+
+    A file present in both tiers (move just completed) is reported from the archive.
+    """
+    files = {}
+    if staging_enabled():
+        files.update(_scan(namespace_dir(Config.STAGING_DIR, namespace), 'staging'))
+    files.update(_scan(archive_dir(namespace), 'archive'))
+    return sorted(files.values(), key=lambda f: f['modified'], reverse=True)
+
+
+def resolve_file(filename: str, namespace: Optional[str] = None) -> Optional[Path]:
+    """Find a finished file (of a namespace) by name in either tier."""
+    candidates = [archive_dir(namespace) / filename]
+    if staging_enabled():
+        candidates.append(namespace_dir(Config.STAGING_DIR, namespace) / filename)
+    for path in candidates:
+        if path.is_file():
+            return path
+    return None
+
+
+def disk_usage(namespace: str) -> int:
+    """Bytes used by a namespace in both tiers, work files included."""
+    roots = [archive_dir(namespace)]
+    if staging_enabled():
+        roots.append(namespace_dir(Config.STAGING_DIR, namespace))
+    total = 0
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                try:
+                    total += os.lstat(os.path.join(dirpath, name)).st_size
+                except OSError:
+                    pass
+    return total
@@ -0,0 +1,314 @@
+"""
+Channel/playlist subscriptions for yt-dlp-wizwam.
+
+Subscriptions are polled with flat extraction. Entries are read lazily,
+newest first, and polling stops at the first entry that is already
+archived or matches the last-seen cursor, so a poll costs one page of the
+listing rather than the whole channel. Only new entries are enqueued into
+the normal download path. Polls are staggered and jittered across
+subscriptions.
+
+In multi-user mode a subscription belongs to the user who added it (its
+owner): its jobs are that user's, and the cursor's archive check looks in
+their namespace.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yt_dlp
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.archive import DownloadArchive, archive_key, get_archive
+from yt_dlp_wizwam.auth import get_auth_store
+from yt_dlp_wizwam.executor import run_blocking, sleep
+
+logger = logging.getLogger(__name__)
+
+# Most recent entry IDs remembered per subscription; several so that a
+# deleted or privated newest video does not break the cursor
+CURSOR_SIZE = 5
+
+# New entries listed at most per poll; a backlog beyond it is skipped (with a warning)
+BACKLOG_LIMIT = 1000
+
+
+class SubscriptionStore:
+    """Subscriptions persisted as JSON (default: ~/.yt-dlp-wizwam/subscriptions.json)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Config.SUBSCRIPTIONS_FILE)
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._subs = {s['id']: s for s in json.load(f)}
+            except (json.JSONDecodeError, KeyError, IOError) as e:
+                logger.warning(f"Error loading subscriptions: {e}")
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(list(self._subs.values()), f, indent=2)
+        os.replace(tmp, self.path)
+
+    def add(
+        self,
+        url: str,
+        name: Optional[str] = None,
+        interval: Optional[int] = None,
+        options: Optional[Dict] = None,
+        backfill: int = 0,
+        owner: Optional[str] = None
+    ) -> Dict:
+        """
+        Add (or update) a subscription.
+
+        Args:
+            url: Channel or playlist URL
+            name: Display name (default: URL)
+            interval: Poll interval in seconds (default: Config.WATCH_INTERVAL)
+            options: download_video options for new entries (quality, codecs, ...)
+            backfill: Number of existing entries to download on the first poll
+            owner: User the subscription and its jobs belong to (multi-user mode)
+
+        Returns:
+            The subscription
+        """
+        # Users subscribing to the same channel get a subscription each
+        sub_id = hashlib.sha256((f'{owner}:{url}' if owner else url).encode()).hexdigest()[:12]
+        with self._lock:
+            sub = self._subs.get(sub_id, {
+                'id': sub_id,
+                'url': url,
+                'owner': owner,
+                'created': time.time(),
+                'cursor': None,
+                'last_polled': None,
+                'next_poll': None,
+                'backfill': backfill,
+                'total_enqueued': 0,
+                'last_error': None,
+            })
+            sub['name'] = name or sub.get('name') or url
+            sub['interval'] = interval or sub.get('interval') or Config.WATCH_INTERVAL
+            sub['options'] = options if options is not None else sub.get('options', {})
+            self._subs[sub_id] = sub
+            self._save()
+            return dict(sub)
+
+    def remove(self, sub_id: str) -> bool:
+        """Remove a subscription; returns False if it did not exist."""
+        with self._lock:
+            if self._subs.pop(sub_id, None) is None:
+                return False
+            self._save()
+            return True
+
+    def get(self, sub_id: str) -> Optional[Dict]:
+        with self._lock:
+            sub = self._subs.get(sub_id)
+            return dict(sub) if sub else None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [dict(s) for s in self._subs.values()]
+
+    def update(self, sub_id: str, **fields):
+        """Update fields of a subscription and persist."""
+        with self._lock:
+            sub = self._subs.get(sub_id)
+            if sub is None:
+                return
+            sub.update(fields)
+            self._save()
+
+
+def list_new_entries(
+    sub: Dict,
+    archive: DownloadArchive,
+    max_entries: Optional[int] = None
+) -> tuple:
+    """
+    List entries of a subscription newer than its cursor.
+
+    Uses flat, lazy extraction and stops at the first archived or
+    previously seen entry. The first poll returns the newest `backfill`
+    entries and puts the cursor at the head of the listing. Later polls
+    return the oldest max_entries new entries and move the cursor past
+    those only, so a larger backlog is worked off over the next polls.
+
+    Args:
+        sub: Subscription dict
+        archive: Download archive
+        max_entries: Maximum new entries to return (default: Config.WATCH_MAX_NEW)
+
+    Returns:
+        (new entries oldest first, new cursor)
+    """
+    max_entries = max_entries or Config.WATCH_MAX_NEW
+    old_cursor = sub.get('cursor') or []
+    cursor = set(old_cursor)
+    first_poll = sub.get('cursor') is None
+    backfill = sub.get('backfill') or 0
+
+    # Members-only channels and private playlists need the auth profile's cookies
+    session = get_auth_store().session(sub['url'], (sub.get('options') or {}).get('auth'))
+    ydl_opts = {
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'http_headers': session.headers if session else {'User-Agent': Config.USER_AGENT},
+    }
+
+    new_entries = []
+    head_ids = []
+    truncated = False
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        if session is not None:
+            session.attach(ydl)
+        info = ydl.extract_info(sub['url'], download=False, process=False)
+        if not info:
+            raise RuntimeError('Failed to extract subscription listing')
+        extractor = info.get('extractor_key') or info.get('ie_key') or 'generic'
+
+        for entry in info.get('entries') or []:
+            if not entry or not entry.get('id'):
+                continue
+            entry_id = entry['id']
+            if len(head_ids) < CURSOR_SIZE:
+                head_ids.append(entry_id)
+
+            key = archive_key(entry.get('ie_key') or extractor, entry_id, sub.get('owner'))
+            if entry_id in cursor or key in archive:
+                break
+            if first_poll and len(new_entries) >= backfill:
+                # Older entries are the channel's history: only the cursor position matters now
+                if len(head_ids) >= CURSOR_SIZE:
+                    break
+                continue
+            if len(new_entries) >= BACKLOG_LIMIT:
+                truncated = True
+                break
+            new_entries.append({
+                'id': entry_id,
+                'url': entry.get('url') or entry.get('webpage_url'),
+                'title': entry.get('title'),
+            })
+    if session is not None:
+        get_auth_store().save_cookies(session.name)
+
+    new_entries.reverse()
+    if first_poll:
+        return new_entries, head_ids or sub.get('cursor')
+
+    if truncated:
+        logger.warning(f"{sub['name']}: more than {BACKLOG_LIMIT} new entries; "
+                       f"entries older than the newest {BACKLOG_LIMIT} are skipped")
+    if len(new_entries) > max_entries:
+        logger.info(f"{sub['name']}: {len(new_entries)} new entries, queueing the oldest {max_entries} "
+                    f"now and the rest on the next polls")
+        new_entries = new_entries[:max_entries]
+    if not new_entries:
+        return [], head_ids or sub.get('cursor')
+    # Past the queued entries only; the newer ones are still ahead of the cursor
+    queued = [entry['id'] for entry in reversed(new_entries)]
+    return new_entries, (queued + [i for i in old_cursor if i not in queued])[:CURSOR_SIZE]
+
+
+class SubscriptionWatcher:
+    """Poll subscriptions on a staggered, jittered schedule and enqueue new entries."""
+
+    def __init__(
+        self,
+        store: SubscriptionStore,
+        enqueue: Callable[[str, Dict, Optional[str]], object],
+        archive: Optional[DownloadArchive] = None
+    ):
+        """
+        Initialize watcher.
+
+        Args:
+            store: Subscription store
+            enqueue: Called with (url, options, owner) for each new entry
+            archive: Download archive (default: shared archive)
+        """
+        self.store = store
+        self.enqueue = enqueue
+        self.archive = archive or get_archive()
+        self._stop = False
+
+    def schedule(self, sub: Dict, now: Optional[float] = None) -> float:
+        """Next poll time: interval with ±WATCH_JITTER jitter."""
+        now = now or time.time()
+        jitter = random.uniform(-Config.WATCH_JITTER, Config.WATCH_JITTER)
+        return now + sub['interval'] * (1 + jitter)
+
+    def poll(self, sub: Dict) -> int:
+        """
+        Poll one subscription now.
+
+        Returns:
+            Number of entries enqueued
+        """
+        now = time.time()
+        try:
+            entries, cursor = run_blocking(list_new_entries, sub, self.archive)
+        except Exception as e:
+            logger.warning(f"Polling {sub['name']} failed: {e}")
+            self.store.update(sub['id'], last_polled=now, next_poll=self.schedule(sub, now),
+                              last_error=str(e))
+            return 0
+
+        for entry in entries:
+            if entry['url']:
+                self.enqueue(entry['url'], dict(sub.get('options') or {}), sub.get('owner'))
+
+        self.store.update(
+            sub['id'],
+            cursor=cursor,
+            last_polled=now,
+            next_poll=self.schedule(sub, now),
+            last_error=None,
+            total_enqueued=sub.get('total_enqueued', 0) + len(entries),
+        )
+        if entries:
+            logger.info(f"{sub['name']}: {len(entries)} new entr{'y' if len(entries) == 1 else 'ies'}")
+        return len(entries)
+
+    def run(self):
+        """Poll loop; never returns until stop() is called."""
+        # Spread subscriptions that have never been scheduled over their interval
+        for sub in self.store.list():
+            if not sub.get('next_poll'):
+                offset = random.uniform(0, min(sub['interval'], Config.WATCH_INITIAL_SPREAD))
+                self.store.update(sub['id'], next_poll=time.time() + offset)
+
+        while not self._stop:
+            now = time.time()
+            due = sorted(
+                (s for s in self.store.list() if (s.get('next_poll') or 0) <= now),
+                key=lambda s: s.get('next_poll') or 0
+            )
+            if not due:
+                sleep(1.0)
+                continue
+            for sub in due:
+                if self._stop:
+                    break
+                self.poll(sub)
+                # Minimum spacing between requests across subscriptions
+                sleep(Config.WATCH_MIN_SPACING)
+
+    def stop(self):
+        self._stop = True
@@ -0,0 +1,465 @@
+"""
+Transcode profiles for yt-dlp-wizwam.
+
+Named profiles ("signal", "whatsapp", ...) re-encode finished downloads for a
+target size, maximum bitrate and resolution, optionally with EBU R128 audio
+normalisation. Transcodes are a separate queued stage after downloads:
+
+- An encoder pool admits jobs against a CPU budget (TRANSCODE_CPU_BUDGET,
+  default: all cores), with each profile declaring its ffmpeg thread count
+- Outputs are cached by (source SHA-256, profile fingerprint), so a file is
+  never encoded twice with the same profile
+
+Custom profiles can be added under "transcode_profiles" in
+~/.yt-dlp-wizwam/config.json; they override built-ins of the same name.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.user_config import UserConfig
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.executor import make_queue, relay, run_blocking, spawn
+
+logger = logging.getLogger(__name__)
+
+# Built-in profiles. Sizes in MB, bitrates in kbit/s.
+PROFILES: Dict[str, Dict] = {
+    'signal': {
+        'description': 'H.264/AAC 720p under Signal\'s 100 MB attachment limit',
+        'container': 'mp4',
+        'max_height': 720,
+        'target_size_mb': 95,
+        'max_video_bitrate': 2500,
+        'audio_bitrate': 128,
+        'normalize_audio': True,
+        'preset': 'medium',
+        'threads': 2,
+    },
+    'whatsapp': {
+        'description': 'H.264/AAC 480p under WhatsApp\'s 16 MB video limit',
+        'container': 'mp4',
+        'max_height': 480,
+        'target_size_mb': 15,
+        'max_video_bitrate': 1000,
+        'audio_bitrate': 96,
+        'normalize_audio': True,
+        'preset': 'medium',
+        'threads': 2,
+    },
+    'mobile': {
+        'description': 'H.264/AAC 720p, quality-based, capped bitrate',
+        'container': 'mp4',
+        'max_height': 720,
+        'crf': 26,
+        'max_video_bitrate': 2000,
+        'audio_bitrate': 128,
+        'normalize_audio': False,
+        'preset': 'fast',
+        'threads': 2,
+    },
+    'audio-normalized': {
+        'description': 'AAC audio only, loudness-normalised',
+        'container': 'm4a',
+        'audio_only': True,
+        'audio_bitrate': 160,
+        'normalize_audio': True,
+        'threads': 1,
+    },
+}
+
+# Video bitrate never goes below this, whatever the target size
+MIN_VIDEO_BITRATE = 150  # kbit/s
+
+
+def get_profiles() -> Dict[str, Dict]:
+    """Built-in profiles merged with custom ones from the user config."""
+    profiles = {name: dict(p) for name, p in PROFILES.items()}
+    custom = UserConfig.get('transcode_profiles') or {}
+    for name, profile in custom.items():
+        profiles[name] = {**profiles.get(name, {}), **profile}
+    return profiles
+
+
+def get_profile(name: str) -> Dict:
+    """
+    Look up a profile by name.
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    profiles = get_profiles()
+    if name not in profiles:
+        raise ValueError(f"Unknown transcode profile '{name}' (available: {', '.join(sorted(profiles))})")
+    return profiles[name]
+
+
+def profile_fingerprint(profile: Dict) -> str:
+    """Short hash of the settings that affect the output (edits invalidate the cache)."""
+    settings = {k: v for k, v in profile.items() if k not in ('description', 'threads')}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def get_ffmpeg() -> str:
+    """
+    Path to ffmpeg: on PATH, else the imageio-ffmpeg binary.
+
+    Raises:
+        RuntimeError: If no ffmpeg is available
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        return ffmpeg
+    if Config.FFMPEG_AUTO_DOWNLOAD:
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            pass
+    raise RuntimeError('ffmpeg not found (install ffmpeg or imageio-ffmpeg)')
+
+
+def probe_duration(ffmpeg: str, source: Path) -> Optional[float]:
+    """Media duration in seconds, read from ffmpeg's input banner."""
+    proc = subprocess.run(
+        [ffmpeg, '-hide_banner', '-i', str(source)],
+        capture_output=True, text=True, errors='replace'
+    )
+    match = re.search(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', proc.stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def build_command(ffmpeg: str, source: Path, output: Path, profile: Dict, duration: Optional[float]) -> List[str]:
+    """ffmpeg command line for a profile."""
+    cmd = [ffmpeg, '-hide_banner', '-nostats', '-y', '-i', str(source),
+           '-threads', str(profile.get('threads', 1)), '-progress', 'pipe:1']
+
+    audio_bitrate = profile.get('audio_bitrate', 128)
+    if profile.get('audio_only'):
+        cmd += ['-vn']
+    else:
+        video_bitrate = profile.get('max_video_bitrate')
+        if profile.get('target_size_mb') and duration:
+            # Leave ~3% for container overhead
+            budget = profile['target_size_mb'] * 8 * 1024 * 0.97 / duration - audio_bitrate
+            video_bitrate = min(video_bitrate or budget, budget)
+        cmd += ['-c:v', 'libx264', '-preset', profile.get('preset', 'medium'), '-pix_fmt', 'yuv420p']
+        if profile.get('crf') is not None and not profile.get('target_size_mb'):
+            cmd += ['-crf', str(profile['crf'])]
+            if video_bitrate:
+                cmd += ['-maxrate', f'{int(video_bitrate)}k', '-bufsize', f'{int(video_bitrate * 2)}k']
+        elif video_bitrate:
+            video_bitrate = max(int(video_bitrate), MIN_VIDEO_BITRATE)
+            cmd += ['-b:v', f'{video_bitrate}k', '-maxrate', f'{video_bitrate}k',
+                    '-bufsize', f'{video_bitrate * 2}k']
+        if profile.get('max_height'):
+            # Never upscale; keep width even for yuv420p
+            cmd += ['-vf', f"scale=-2:'min({profile['max_height']},ih)'"]
+
+    cmd += ['-c:a', 'aac', '-b:a', f'{audio_bitrate}k']
+    if profile.get('normalize_audio'):
+        cmd += ['-af', 'loudnorm=I=-16:TP=-1.5:LRA=11']
+    if profile.get('container', 'mp4') in ('mp4', 'm4a'):
+        cmd += ['-movflags', '+faststart']
+    cmd.append(str(output))
+    return cmd
+
+
+class CpuBudget:
+    """Admit encodes while the sum of their thread counts fits the core budget."""
+
+    def __init__(self, total: int):
+        self.total = max(total, 1)
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, threads: int) -> int:
+        """Block until threads (capped at the budget) are available; returns the amount taken."""
+        threads = min(max(threads, 1), self.total)
+        with self._cond:
+            self._cond.wait_for(lambda: self.used + threads <= self.total)
+            self.used += threads
+        return threads
+
+    def release(self, threads: int):
+        with self._cond:
+            self.used -= threads
+            self._cond.notify_all()
+
+
+class TranscodeCache:
+    """Index of finished transcodes keyed by (source hash, profile fingerprint)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Config.TRANSCODE_CACHE_FILE)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = {}
+        # (path, size, mtime) -> sha256, so unchanged sources are hashed once
+        self._hashes: Dict[tuple, str] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Error loading transcode cache: {e}")
+
+    def source_hash(self, source: Path) -> str:
+        stat = source.stat()
+        key = (str(source), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(key)
+        if cached is None:
+            cached = storage.file_sha256(source)
+            with self._lock:
+                self._hashes[key] = cached
+        return cached
+
+    @staticmethod
+    def key(source_hash: str, profile: Dict, namespace: Optional[str] = None) -> str:
+        key = f'{source_hash[:16]}-{profile_fingerprint(profile)}'
+        # Users do not share transcodes: each one's output is in their own folder
+        return f'{namespace}:{key}' if namespace else key
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Path]:
+        """Cached output for key (in a user namespace), if the file still exists."""
+        with self._lock:
+            filename = self._entries.get(key)
+        if not filename:
+            return None
+        return storage.resolve_file(filename, namespace)
+
+    def put(self, key: str, output: Path):
+        with self._lock:
+            self._entries[key] = output.name
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+def output_path(source: Path, profile_name: str, profile: Dict) -> Path:
+    """Output in DOWNLOAD_DIR (the source's user folder) named after the source: 'Title [...] [signal].mp4'."""
+    ext = profile.get('container', 'mp4')
+    return storage.archive_dir(storage.namespace_of(source)) / f'{source.stem} [{profile_name}].{ext}'
+
+
+
+def transcode_file(
+    source: Path,
+    profile_name: str,
+    progress_callback: Optional[Callable] = None,
+    cache: Optional[TranscodeCache] = None,
+    budget: Optional[CpuBudget] = None
+) -> Dict:
+    """
+    Transcode one file with a profile (blocking).
+
+    Args:
+        source: Source media file
+        profile_name: Profile name
+        progress_callback: Optional callback(phase, percent, message)
+        cache: Transcode cache (default: shared cache)
+        budget: CPU budget to run under (default: shared budget)
+
+    Returns:
+        Result dict: status, filename, filesize, profile, cached
+    """
+    source = Path(source)
+    namespace = storage.namespace_of(source)
+    if not source.exists():
+        # Moved from the staging tier since it was queued
+        source = storage.resolve_file(source.name, namespace) or source
+    cache = cache or get_cache()
+    budget = budget or get_budget()
+    try:
+        profile = get_profile(profile_name)
+        key = cache.key(cache.source_hash(source), profile, namespace)
+        cached = cache.get(key, namespace)
+        if cached is not None:
+            if progress_callback:
+                progress_callback('completed', 100.0, f'Already transcoded: {cached.name}')
+            return _result(cached, profile_name, cached=True)
+
+        ffmpeg = get_ffmpeg()
+        duration = probe_duration(ffmpeg, source)
+        output = output_path(source, profile_name, profile)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        partial = output.with_name(f'.{output.stem}.transcoding{output.suffix}')
+        cmd = build_command(ffmpeg, source, partial, profile, duration)
+
+        if progress_callback:
+            progress_callback('transcoding', 0.0, f'Waiting for encoder ({profile_name})...')
+        threads = budget.acquire(profile.get('threads', 1))
+        try:
+            _run_ffmpeg(cmd, duration, profile_name, progress_callback)
+        finally:
+            budget.release(threads)
+
+        os.replace(partial, output)
+        cache.put(key, output)
+        if progress_callback:
+            progress_callback('completed', 100.0, f'Transcoded: {output.name}')
+        return _result(output, profile_name, cached=False)
+
+    except Exception as e:
+        logger.warning(f"Transcode of {source.name} with '{profile_name}' failed: {e}")
+        if progress_callback:
+            progress_callback('error', 0.0, str(e))
+        return {'status': 'error', 'error': str(e), 'source': str(source), 'profile': profile_name}
+
+
+def _run_ffmpeg(cmd: List[str], duration: Optional[float], profile_name: str,
+                progress_callback: Optional[Callable]):
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, errors='replace')
+    # Drain stderr concurrently so a chatty ffmpeg cannot block on a full pipe
+    stderr_tail: List[str] = []
+
+    def read_stderr():
+        for line in proc.stderr:
+            stderr_tail.append(line)
+            del stderr_tail[:-20]
+
+    reader = threading.Thread(target=read_stderr, daemon=True)
+    reader.start()
+
+    last_report = 0.0
+    for line in proc.stdout:
+        if not line.startswith('out_time_us=') or not duration or not progress_callback:
+            continue
+        try:
+            done = int(line.split('=', 1)[1]) / 1_000_000
+        except ValueError:
+            continue
+        now = time.monotonic()
+        if now - last_report >= 0.5:
+            last_report = now
+            percent = min(done / duration * 100, 99.9)
+            progress_callback('transcoding', percent, f'{profile_name}: {percent:.1f}%')
+
+    proc.wait()
+    reader.join(5)
+    if proc.returncode != 0:
+        raise RuntimeError(f'ffmpeg failed ({proc.returncode}): {"".join(stderr_tail).strip()[-500:]}')
+
+
+def _result(path: Path, profile_name: str, cached: bool) -> Dict:
+    size_mb = path.stat().st_size / (1024 * 1024)
+    return {
+        'status': 'success',
+        'filename': str(path),
+        'filesize': f'{size_mb:.1f} MB',
+        'title': path.stem,
+        'profile': profile_name,
+        'cached': cached,
+    }
+
+
+class TranscodeQueue:
+    """Queued transcode stage with its own workers."""
+
+    def __init__(self, workers: Optional[int] = None, on_done: Optional[Callable[[Dict], None]] = None):
+        """
+        Initialize queue.
+
+        Args:
+            workers: Concurrent transcodes waiting on the CPU budget (default: Config.TRANSCODE_WORKERS)
+            on_done: Optional callback invoked with each finished job dict
+        """
+        self.workers = workers or Config.TRANSCODE_WORKERS
+        self.on_done = on_done
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._queue = None
+
+    def start(self):
+        if self._queue is not None:
+            return
+        self._queue = make_queue()
+        for _ in range(self.workers):
+            spawn(self._worker)
+
+    def submit(
+        self,
+        source: Path,
+        profile_name: str,
+        progress_callback: Optional[Callable] = None,
+        job_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Queue a transcode.
+
+        Raises:
+            ValueError: If the profile does not exist
+        """
+        get_profile(profile_name)
+        self.start()
+        job = {
+            'job_id': job_id or str(uuid.uuid4()),
+            'source': str(source),
+            'profile': profile_name,
+            'status': 'queued',
+            'created': time.time(),
+            'result': None,
+        }
+        with self._lock:
+            self._jobs[job['job_id']] = job
+        self._queue.put((job, progress_callback))
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _worker(self):
+        while True:
+            job, progress_callback = self._queue.get()
+            job['status'] = 'transcoding'
+            result = run_blocking(transcode_file, Path(job['source']), job['profile'],
+                                  relay.wrap(progress_callback))
+            job['result'] = result
+            job['status'] = result['status']
+            if self.on_done:
+                try:
+                    self.on_done(dict(job))
+                except Exception:
+                    logger.exception(f"on_done callback failed for transcode {job['job_id']}")
+
+
+_cache: Optional[TranscodeCache] = None
+_budget: Optional[CpuBudget] = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> TranscodeCache:
+    """Get the shared transcode cache."""
+    global _cache
+    with _shared_lock:
+        if _cache is None:
+            _cache = TranscodeCache()
+        return _cache
+
+
+def get_budget() -> CpuBudget:
+    """Get the shared CPU budget."""
+    global _budget
+    with _shared_lock:
+        if _budget is None:
+            _budget = CpuBudget(Config.TRANSCODE_CPU_BUDGET)
+        return _budget
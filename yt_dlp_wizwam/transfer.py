@@ -0,0 +1,606 @@
+"""
+NAS transfer subsystem for yt-dlp-wizwam.
+
+Replaces the one-file-at-a-time shell macros with built-in transfers:
+
+- Pluggable targets: a mounted share, SFTP (optional paramiko) or an HTTP
+  upload API with Content-Range chunks (WebDAV / FileStation-like)
+- Files are split into TRANSFER_CHUNK_SIZE chunks uploaded in parallel to a
+  '.part' file; completed chunks are recorded in a state file, so an
+  interrupted transfer resumes with the missing chunks only
+- Every finished transfer is verified (by SHA-256 where the target can
+  compute one, by size otherwise) and recorded with its SHA-256 in a
+  checksum manifest; files already on the target are skipped
+- A bounded TransferQueue runs transfers separately from downloads
+
+Targets are configured from the NAS_* settings.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shlex
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.executor import make_queue, relay, run_blocking, spawn
+
+try:
+    import paramiko
+except ImportError:  # Optional: pip install yt-dlp-wizwam[sftp]
+    paramiko = None
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = '.part'
+
+
+class TransferError(RuntimeError):
+    """A transfer failed (the partial upload is kept for resuming)."""
+
+
+class TransferQueueFull(RuntimeError):
+    """The transfer queue has reached TRANSFER_QUEUE_SIZE."""
+
+
+class TransferTarget:
+    """Destination for transfers; subclasses implement chunk writes."""
+
+    name = 'target'
+    # Whether chunks may be written concurrently
+    parallel = True
+
+    def describe(self) -> str:
+        """Human-readable destination (for logs and the manifest)."""
+        raise NotImplementedError
+
+    def exists(self, remote_name: str, size: int) -> bool:
+        """True if a finished file of this size is already on the target."""
+        raise NotImplementedError
+
+    def prepare(self, remote_name: str, size: int, resume: bool):
+        """Create (or, when resuming, keep) the partial file."""
+        raise NotImplementedError
+
+    def write_chunk(self, remote_name: str, offset: int, data: bytes, total: int):
+        """Write one chunk of the partial file."""
+        raise NotImplementedError
+
+    def finalize(self, remote_name: str, size: int, sha256: str) -> str:
+        """
+        Verify the partial file and move it into place.
+
+        Returns:
+            How the file was verified: 'sha256' or 'size'
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MountTarget(TransferTarget):
+    """A share mounted locally (NAS_MOUNT)."""
+
+    name = 'mount'
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def describe(self) -> str:
+        return str(self.root)
+
+    def _path(self, remote_name: str) -> Path:
+        return self.root / remote_name
+
+    def exists(self, remote_name: str, size: int) -> bool:
+        path = self._path(remote_name)
+        return path.is_file() and path.stat().st_size == size
+
+    def prepare(self, remote_name: str, size: int, resume: bool):
+        part = self._path(remote_name + PART_SUFFIX)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        if resume and part.exists():
+            return
+        with open(part, 'wb') as f:
+            f.truncate(size)
+
+    def write_chunk(self, remote_name: str, offset: int, data: bytes, total: int):
+        fd = os.open(self._path(remote_name + PART_SUFFIX), os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, offset)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def finalize(self, remote_name: str, size: int, sha256: str) -> str:
+        part = self._path(remote_name + PART_SUFFIX)
+        if part.stat().st_size != size or storage.file_sha256(part) != sha256:
+            raise TransferError(f'Checksum mismatch for {remote_name} on {self.describe()}')
+        os.replace(part, self._path(remote_name))
+        return 'sha256'
+
+
+class SFTPTarget(TransferTarget):
+    """SFTP to NAS_HOST:NAS_SHARE_PATH (requires paramiko)."""
+
+    name = 'sftp'
+
+    def __init__(self, host: str, user: str, password: str, root: str, port: int = 22):
+        if paramiko is None:
+            raise TransferError('SFTP transfers need paramiko: pip install yt-dlp-wizwam[sftp]')
+        self.host = host
+        self.root = root or '.'
+        self._client = paramiko.SSHClient()
+        self._client.load_system_host_keys()
+        self._client.set_missing_host_key_policy(paramiko.WarningPolicy())
+        self._client.connect(host, port=port, username=user, password=password or None)
+        self._local = threading.local()
+
+    def describe(self) -> str:
+        return f'sftp://{self.host}{self.root}'
+
+    def _sftp(self):
+        # One SFTP channel per thread over the shared connection
+        sftp = getattr(self._local, 'sftp', None)
+        if sftp is None:
+            sftp = self._local.sftp = self._client.open_sftp()
+        return sftp
+
+    def _path(self, remote_name: str) -> str:
+        return posixpath.join(self.root, remote_name)
+
+    def exists(self, remote_name: str, size: int) -> bool:
+        try:
+            return self._sftp().stat(self._path(remote_name)).st_size == size
+        except IOError:
+            return False
+
+    def prepare(self, remote_name: str, size: int, resume: bool):
+        part = self._path(remote_name + PART_SUFFIX)
+        if resume:
+            try:
+                self._sftp().stat(part)
+                return
+            except IOError:
+                pass
+        with self._sftp().open(part, 'wb') as f:
+            f.truncate(size)
+
+    def write_chunk(self, remote_name: str, offset: int, data: bytes, total: int):
+        with self._sftp().open(self._path(remote_name + PART_SUFFIX), 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+    def _remote_sha256(self, path: str) -> Optional[str]:
+        """SHA-256 computed on the NAS, or None without a usable shell."""
+        try:
+            # The path contains the video title: quote it for the remote shell
+            _, stdout, _ = self._client.exec_command(f'sha256sum -- {shlex.quote(path)}', timeout=600)
+            output = stdout.read().decode().split()
+            return output[0] if output else None
+        except (paramiko.SSHException, IOError):
+            return None
+
+    def finalize(self, remote_name: str, size: int, sha256: str) -> str:
+        part = self._path(remote_name + PART_SUFFIX)
+        if self._sftp().stat(part).st_size != size:
+            raise TransferError(f'Size mismatch for {remote_name} on {self.describe()}')
+        remote = self._remote_sha256(part)
+        if remote is not None and remote != sha256:
+            raise TransferError(f'Checksum mismatch for {remote_name} on {self.describe()}')
+        self._sftp().posix_rename(part, self._path(remote_name))
+        if remote is None:
+            logger.info(f"No sha256sum on {self.host}; verified {remote_name} by size only")
+            return 'size'
+        return 'sha256'
+
+    def close(self):
+        self._client.close()
+
+
+class HTTPTarget(TransferTarget):
+    """
+    HTTP upload API (NAS_API_URL).
+
+    Protocol (WebDAV-compatible):
+        PUT  {url}/{name}.part   Content-Range: bytes start-end/total
+        HEAD {url}/{name}        existing file and its Content-Length
+        MOVE {url}/{name}.part   Destination: {url}/{name}, X-Checksum-Sha256: ...
+
+    A server that checks the checksum answers the MOVE with its own
+    X-Checksum-Sha256 header (and refuses a mismatch); without one, only
+    the size of the moved file is verified (HEAD).
+    """
+
+    name = 'http'
+
+    def __init__(self, url: str, user: str = '', password: str = ''):
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+        if user:
+            self.session.auth = (user, password)
+
+    def describe(self) -> str:
+        return self.url
+
+    def _url(self, remote_name: str) -> str:
+        return f'{self.url}/{requests.utils.quote(remote_name)}'
+
+    def exists(self, remote_name: str, size: int) -> bool:
+        response = self.session.head(self._url(remote_name), timeout=30)
+        return response.ok and int(response.headers.get('Content-Length', -1)) == size
+
+    def prepare(self, remote_name: str, size: int, resume: bool):
+        # The partial file is created by the first chunk
+        pass
+
+    def write_chunk(self, remote_name: str, offset: int, data: bytes, total: int):
+        response = self.session.put(
+            self._url(remote_name + PART_SUFFIX),
+            data=data,
+            headers={'Content-Range': f'bytes {offset}-{offset + len(data) - 1}/{total}'},
+            timeout=300,
+        )
+        if not response.ok:
+            raise TransferError(f'Chunk upload failed: HTTP {response.status_code}')
+
+    def finalize(self, remote_name: str, size: int, sha256: str):
+        response = self.session.request(
+            'MOVE',
+            self._url(remote_name + PART_SUFFIX),
+            headers={
+                'Destination': self._url(remote_name),
+                'Overwrite': 'T',
+                'X-Checksum-Sha256': sha256,
+            },
+            timeout=600,
+        )
+        if not response.ok:
+            raise TransferError(f'Finalizing {remote_name} failed: HTTP {response.status_code}')
+        remote = response.headers.get('X-Checksum-Sha256')
+        if remote:
+            if remote.strip().lower() != sha256:
+                raise TransferError(f'Checksum mismatch for {remote_name} on {self.describe()}')
+            return 'sha256'
+        if not self.exists(remote_name, size):
+            raise TransferError(f'Size mismatch for {remote_name} on {self.describe()}')
+        logger.info(f"{self.url} did not confirm the checksum; verified {remote_name} by size only")
+        return 'size'
+
+
+def get_target(protocol: Optional[str] = None) -> TransferTarget:
+    """
+    Transfer target from the NAS_* settings.
+
+    Args:
+        protocol: 'mount', 'sftp', 'http' or 'auto' (default: Config.NAS_PROTOCOL)
+
+    Raises:
+        TransferError: If no target is configured
+    """
+    protocol = protocol or Config.NAS_PROTOCOL
+    if protocol in ('auto', 'mount') and Config.NAS_MOUNT and Path(Config.NAS_MOUNT).is_dir():
+        return MountTarget(Config.NAS_MOUNT)
+    if protocol in ('auto', 'http') and Config.NAS_API_URL:
+        return HTTPTarget(Config.NAS_API_URL, Config.NAS_USER, Config.NAS_PASSWORD)
+    if protocol in ('auto', 'sftp') and Config.NAS_HOST:
+        return SFTPTarget(Config.NAS_HOST, Config.NAS_USER, Config.NAS_PASSWORD,
+                          Config.NAS_SHARE_PATH, Config.NAS_PORT)
+    raise TransferError(f"No NAS transfer target configured (protocol: {protocol})")
+
+
+class TransferManifest:
+    """Checksums of files transferred to each target (JSON)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Path(Config.TRANSFER_STATE_DIR) / 'manifest.json')
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Error loading transfer manifest: {e}")
+
+    @staticmethod
+    def key(target: TransferTarget, remote_name: str) -> str:
+        return f'{target.describe()}/{remote_name}'
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def record(self, key: str, **fields):
+        with self._lock:
+            self._entries[key] = {'time': time.time(), **fields}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class _ResumeState:
+    """Completed chunks of an in-progress transfer, persisted after each chunk."""
+
+    def __init__(self, state_dir: Path, key: str, size: int, mtime: float, chunk_size: int):
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        self.path = Path(state_dir) / f'{digest}.json'
+        self._lock = threading.Lock()
+        self.done = set()
+        self.sha256 = None
+        fingerprint = {'key': key, 'size': size, 'mtime': mtime, 'chunk_size': chunk_size}
+        self.fingerprint = fingerprint
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                # Only resume the same version of the same file
+                if saved.get('fingerprint') == fingerprint:
+                    self.done = set(saved.get('done', []))
+                    self.sha256 = saved.get('sha256')
+            except (json.JSONDecodeError, IOError):
+                pass
+
+    def mark(self, index: int):
+        with self._lock:
+            self.done.add(index)
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'sha256': self.sha256,
+                       'done': sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def transfer_file(
+    source: Path,
+    target: Optional[TransferTarget] = None,
+    remote_name: Optional[str] = None,
+    progress_callback: Optional[Callable] = None,
+    manifest: Optional[TransferManifest] = None,
+    chunk_size: Optional[int] = None,
+    parallel_chunks: Optional[int] = None,
+    state_dir: Optional[Path] = None
+) -> Dict:
+    """
+    Upload one file to a target with parallel, resumable chunks (blocking).
+
+    Args:
+        source: Local file
+        target: Transfer target (default: get_target())
+        remote_name: Name on the target (default: source file name)
+        progress_callback: Optional callback(phase, percent, message)
+        manifest: Checksum manifest (default: shared manifest)
+        chunk_size: Bytes per chunk (default: Config.TRANSFER_CHUNK_SIZE)
+        parallel_chunks: Chunks in flight (default: Config.TRANSFER_PARALLEL_CHUNKS)
+        state_dir: Resume state directory (default: Config.TRANSFER_STATE_DIR)
+
+    Returns:
+        Result dict: status, remote, size, sha256, skipped/resumed or error
+    """
+    source = Path(source)
+    if not source.exists():
+        # Moved from the staging tier since it was queued
+        source = storage.resolve_file(source.name, storage.namespace_of(source)) or source
+    remote_name = remote_name or source.name
+    chunk_size = chunk_size or Config.TRANSFER_CHUNK_SIZE
+    parallel_chunks = parallel_chunks or Config.TRANSFER_PARALLEL_CHUNKS
+    manifest = manifest or get_manifest()
+    own_target = target is None
+
+    def report(phase, percent, message):
+        if progress_callback:
+            progress_callback(phase, percent, message)
+
+    try:
+        target = target or get_target()
+        stat = source.stat()
+        size = stat.st_size
+        key = TransferManifest.key(target, remote_name)
+        state = _ResumeState(state_dir or Config.TRANSFER_STATE_DIR, key, size, stat.st_mtime, chunk_size)
+
+        report('transferring', 0.0, f'Checksumming {source.name}...')
+        sha256 = state.sha256 or storage.file_sha256(source)
+
+        recorded = manifest.get(key)
+        if recorded and recorded.get('sha256') == sha256 and target.exists(remote_name, size):
+            report('completed', 100.0, f'Already on {target.describe()}')
+            return _result(target, remote_name, size, sha256, skipped=True,
+                           verified=recorded.get('verified', 'sha256'))
+
+        resumed = bool(state.done)
+        if not resumed:
+            state.sha256 = sha256
+            state.save()
+        target.prepare(remote_name, size, resume=resumed)
+
+        chunks = [(i, i * chunk_size) for i in range(max((size + chunk_size - 1) // chunk_size, 1))]
+        pending = [c for c in chunks if c[0] not in state.done]
+        sent = [sum(min(chunk_size, size - offset) for i, offset in chunks if i in state.done)]
+        lock = threading.Lock()
+
+        def upload(chunk):
+            index, offset = chunk
+            length = min(chunk_size, size - offset)
+            with open(source, 'rb') as f:
+                f.seek(offset)
+                data = f.read(length)
+            target.write_chunk(remote_name, offset, data, size)
+            state.mark(index)
+            with lock:
+                sent[0] += length
+                percent = sent[0] / size * 100 if size else 100.0
+            report('transferring', percent, f'{percent:.1f}% to {target.describe()}')
+
+        workers = parallel_chunks if target.parallel else 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in concurrent.futures.as_completed([pool.submit(upload, c) for c in pending]):
+                future.result()
+
+        report('transferring', 100.0, 'Verifying...')
+        verified = target.finalize(remote_name, size, sha256)
+        state.clear()
+        manifest.record(key, sha256=sha256, size=size, source=str(source), target=target.name,
+                        verified=verified)
+        report('completed', 100.0, f'Transferred to {target.describe()}')
+        return _result(target, remote_name, size, sha256, resumed=resumed, verified=verified)
+
+    except Exception as e:
+        logger.warning(f"Transfer of {source.name} failed: {e}")
+        report('error', 0.0, str(e))
+        return {'status': 'error', 'error': str(e), 'source': str(source)}
+
+    finally:
+        if own_target and target is not None:
+            target.close()
+
+
+def _result(target: TransferTarget, remote_name: str, size: int, sha256: str,
+            skipped: bool = False, resumed: bool = False, verified: str = 'sha256') -> Dict:
+    return {
+        'status': 'success',
+        'remote': f'{target.describe()}/{remote_name}',
+        'size': size,
+        'sha256': sha256,
+        'skipped': skipped,
+        'resumed': resumed,
+        'verified': verified,
+    }
+
+
+class TransferQueue:
+    """Bounded queue of NAS transfers with its own workers."""
+
+    # Finished transfers kept for status queries
+    MAX_FINISHED = 500
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        maxsize: Optional[int] = None,
+        on_done: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Initialize queue.
+
+        Args:
+            workers: Files transferred at once (default: Config.TRANSFER_CONCURRENCY)
+            maxsize: Maximum queued transfers (default: Config.TRANSFER_QUEUE_SIZE)
+            on_done: Optional callback invoked with each finished job dict
+        """
+        self.workers = workers or Config.TRANSFER_CONCURRENCY
+        self.maxsize = maxsize or Config.TRANSFER_QUEUE_SIZE
+        self.on_done = on_done
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._queue = None
+
+    def start(self):
+        if self._queue is not None:
+            return
+        self._queue = make_queue()
+        for _ in range(self.workers):
+            spawn(self._worker)
+
+    def submit(
+        self,
+        source: Path,
+        progress_callback: Optional[Callable] = None,
+        job_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Queue a transfer.
+
+        Raises:
+            TransferQueueFull: If TRANSFER_QUEUE_SIZE transfers are already waiting
+        """
+        self.start()
+        with self._lock:
+            if self._queued >= self.maxsize:
+                raise TransferQueueFull(f'Transfer queue is full ({self.maxsize} waiting)')
+            self._queued += 1
+            job = {
+                'job_id': job_id or str(uuid.uuid4()),
+                'source': str(source),
+                'status': 'queued',
+                'created': time.time(),
+                'finished': None,
+                'result': None,
+            }
+            self._jobs[job['job_id']] = job
+        self._queue.put((job, progress_callback))
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values()), key=lambda j: j['created'])
+
+    def _worker(self):
+        while True:
+            job, progress_callback = self._queue.get()
+            with self._lock:
+                self._queued -= 1
+            job['status'] = 'transferring'
+            result = run_blocking(transfer_file, Path(job['source']),
+                                  progress_callback=relay.wrap(progress_callback))
+            job['result'] = result
+            job['status'] = result['status']
+            job['finished'] = time.time()
+            self._prune()
+            if self.on_done:
+                try:
+                    self.on_done(dict(job))
+                except Exception:
+                    logger.exception(f"on_done callback failed for transfer {job['job_id']}")
+
+
+    def _prune(self):
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.get('finished')]
+            if len(finished) <= self.MAX_FINISHED:
+                return
+            finished.sort(key=lambda j: j['finished'])
+            for job in finished[:len(finished) - self.MAX_FINISHED]:
+                del self._jobs[job['job_id']]
+
+
+_manifest: Optional[TransferManifest] = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> TransferManifest:
+    """Get the shared checksum manifest."""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = TransferManifest()
+        return _manifest
@@ -0,0 +1,351 @@
+"""
+Users, API tokens and quotas for yt-dlp-wizwam's multi-user mode.
+
+With MULTI_USER on (the default in docker), every API request and Socket.IO
+connection carries a user's token (Authorization: Bearer, the wizwam_token
+cookie or ?token=). Users live in USERS_FILE (0600); only a SHA-256 of each
+token is stored, so a token is shown once, when the user is added or the
+token is rotated (`downloader users add/token`).
+
+Per user:
+
+- weight: share of the download slots while several users have jobs
+  waiting (see jobs.FairQueue); a user with weight 2 gets twice the
+  downloads of a user with weight 1, an idle user's share goes to the others
+- max_jobs: jobs downloading at the same time
+- rate_limit: bandwidth in bytes/s, split across the user's running jobs
+- storage_mb: disk space of the user's folder (users/<name> in both tiers);
+  new downloads are refused once it is used up. The limit is approximate:
+  a download is capped at the space left through yt-dlp's max_filesize,
+  which applies to each format, so a merged video+audio download (or
+  several running at once) can go past it
+- admin: may change server settings and auth profiles
+
+Limits that are not set fall back to USER_MAX_JOBS, USER_RATE_LIMIT and
+USER_STORAGE_MB. The file is re-read when it changes, so users added with
+the CLI take effect in a running server.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from http.cookies import CookieError, SimpleCookie
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from yt_dlp.utils import parse_bytes
+
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.auth import _write_private
+from yt_dlp_wizwam.config import Config
+
+logger = logging.getLogger(__name__)
+
+# User names double as folder names and archive key prefixes
+_NAME_RE = re.compile(r'^[a-z0-9_-]{1,32}$')
+
+# Cookie the web interface keeps the token in
+TOKEN_COOKIE = 'wizwam_token'
+
+# Seconds a measured disk usage is reused (measuring walks the user's folders)
+USAGE_TTL = 30.0
+
+
+class QuotaExceeded(RuntimeError):
+    """Raised when a user's storage quota is used up."""
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def parse_rate(value) -> Optional[int]:
+    """
+    Parse a bandwidth limit.
+
+    Args:
+        value: Bytes/s as a number or a string like "5M" / "500K"
+
+    Returns:
+        Bytes/s, or None for no limit (empty or 0)
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if value in (None, '', 0, '0'):
+        return None
+    if isinstance(value, (int, float)):
+        rate = int(value)
+    else:
+        rate = parse_bytes(str(value).strip())
+        if rate is None:
+            raise ValueError(f"Invalid rate limit '{value}' (e.g. 5M or 500K bytes/s)")
+    return rate or None
+
+
+def request_token(environ: Dict) -> Optional[str]:
+    """
+    Token of a request: Authorization: Bearer header, TOKEN_COOKIE cookie or ?token=.
+
+    Args:
+        environ: WSGI environ (Flask's request.environ, or a Socket.IO connection's)
+    """
+    header = environ.get('HTTP_AUTHORIZATION', '')
+    if header[:7].lower() == 'bearer ':
+        return header[7:].strip() or None
+    cookies = SimpleCookie()
+    try:
+        cookies.load(environ.get('HTTP_COOKIE', ''))
+    except CookieError:
+        pass
+    if TOKEN_COOKIE in cookies:
+        return cookies[TOKEN_COOKIE].value or None
+    return (parse_qs(environ.get('QUERY_STRING', '')).get('token') or [None])[0]
+
+
+def user_room(name: str) -> str:
+    """Socket.IO room of a user's connections."""
+    return f'user:{name}'
+
+
+class UserStore:
+    """Users persisted in USERS_FILE (default: ~/.yt-dlp-wizwam/users.json)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Config.USERS_FILE)
+        self._lock = threading.Lock()
+        self._users: Dict[str, Dict] = {}
+        # (mtime, size, inode) of the file when it was last read
+        self._version: Optional[tuple] = None
+        # name -> (monotonic time, bytes) of the last disk usage measurement
+        self._usage: Dict[str, tuple] = {}
+        self._reload()
+
+    def _reload(self):
+        """Re-read the file if it changed since the last read (e.g. edited by the CLI)."""
+        try:
+            stat = self.path.stat()
+            version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            version = None
+        if version == self._version:
+            return
+        self._version = version
+        if version is None:
+            self._users = {}
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._users = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error loading users: {e}")
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_private(self.path, json.dumps(self._users, indent=2))
+        stat = self.path.stat()
+        self._version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def add(
+        self,
+        name: str,
+        weight: Optional[float] = None,
+        max_jobs: Optional[int] = None,
+        rate_limit: Optional[str] = None,
+        storage_mb: Optional[float] = None,
+        admin: Optional[bool] = None
+    ) -> Optional[str]:
+        """
+        Add a user, or update the settings of an existing one. Fields that are not given are kept.
+
+        Args:
+            name: User name (lowercase letters, digits, "_" and "-")
+            weight: Share of the download slots (default 1)
+            max_jobs: Concurrent jobs (default: Config.USER_MAX_JOBS; 0 = no limit)
+            rate_limit: Bandwidth, e.g. "5M" (default: Config.USER_RATE_LIMIT; "0" = no limit)
+            storage_mb: Storage quota in MB (default: Config.USER_STORAGE_MB; 0 = no limit)
+            admin: May change server settings
+
+        Returns:
+            The new user's token, or None if the user existed (the token is kept)
+
+        Raises:
+            ValueError: If the name or a setting is invalid
+        """
+        if not _NAME_RE.match(name or ''):
+            raise ValueError(f"Invalid user name '{name}' (use lowercase letters, digits, '_' and '-')")
+        if weight is not None and weight <= 0:
+            raise ValueError('Weight must be positive')
+        if rate_limit is not None:
+            parse_rate(rate_limit)
+        with self._lock:
+            self._reload()
+            token = None
+            user = self._users.get(name)
+            if user is None:
+                token = secrets.token_urlsafe(32)
+                user = {'name': name, 'token_hash': _token_hash(token), 'weight': 1.0,
+                        'max_jobs': None, 'rate_limit': None, 'storage_mb': None, 'admin': False}
+            for field, value in (('weight', weight), ('max_jobs', max_jobs), ('rate_limit', rate_limit),
+                                 ('storage_mb', storage_mb), ('admin', admin)):
+                if value is not None:
+                    user[field] = value
+            self._users[name] = user
+            self._save()
+            return token
+
+    def rotate_token(self, name: str) -> Optional[str]:
+        """Give a user a new token (the old one stops working); None if there is no such user."""
+        with self._lock:
+            self._reload()
+            user = self._users.get(name)
+            if user is None:
+                return None
+            token = secrets.token_urlsafe(32)
+            user['token_hash'] = _token_hash(token)
+            self._save()
+            return token
+
+    def remove(self, name: str) -> bool:
+        """Remove a user (their files are kept); returns False if they did not exist."""
+        with self._lock:
+            self._reload()
+            if self._users.pop(name, None) is None:
+                return False
+            self._save()
+            return True
+
+    def authenticate(self, token: Optional[str]) -> Optional[str]:
+        """Name of the user a token belongs to, or None."""
+        if not token:
+            return None
+        digest = _token_hash(token)
+        with self._lock:
+            self._reload()
+            for name, user in self._users.items():
+                if hmac.compare_digest(user.get('token_hash', ''), digest):
+                    return name
+        return None
+
+    def get(self, name: str) -> Optional[Dict]:
+        """A user's effective settings (defaults applied), without the token hash."""
+        with self._lock:
+            self._reload()
+            return self._describe(name) if name in self._users else None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            self._reload()
+            return [self._describe(name) for name in sorted(self._users)]
+
+    def is_admin(self, name: Optional[str]) -> bool:
+        user = self.get(name) if name else None
+        return bool(user and user['admin'])
+
+    def share(self, name: Optional[str]) -> Dict:
+        """
+        Scheduling share of a job owner (see jobs.FairQueue).
+
+        Jobs without an owner (CLI, subscriptions) and owners that are no
+        longer users get weight 1 and no job limit.
+
+        Returns:
+            {'weight', 'max_jobs'}; max_jobs 0 means no limit
+        """
+        user = self.get(name) if name else None
+        if user is None:
+            return {'weight': 1.0, 'max_jobs': 0}
+        return {'weight': user['weight'], 'max_jobs': user['max_jobs']}
+
+    def download_options(self, name: Optional[str], active: int = 1) -> Dict:
+        """
+        download_video() options enforcing a user's namespace and quotas.
+
+        Args:
+            name: Job owner (None: no options)
+            active: The user's jobs downloading now, this one included
+
+        Returns:
+            {'namespace', 'rate_limit', 'max_filesize', 'auth'} (limits only if set);
+            max_filesize is the space left, which yt-dlp applies per format;
+            auth is False for non-admins, who may not use the server's auth profiles
+
+        Raises:
+            QuotaExceeded: If the user's storage quota is used up
+        """
+        user = self.get(name) if name else None
+        if user is None:
+            return {}
+        options = {'namespace': name}
+        if not user['admin']:
+            # Auth profiles hold the admins' cookies: neither by name nor by host rule
+            options['auth'] = False
+        rate = parse_rate(user['rate_limit'])
+        if rate:
+            # The user's bandwidth is split across their job slots
+            slots = user['max_jobs'] or max(active, 1)
+            options['rate_limit'] = max(rate // slots, 1)
+        remaining = self.storage_remaining(name)
+        if remaining is not None:
+            if remaining <= 0:
+                raise QuotaExceeded(f"Storage quota of {user['storage_mb']:g} MB used up; delete files to download more")
+            options['max_filesize'] = remaining
+        return options
+
+    def storage_remaining(self, name: str) -> Optional[int]:
+        """Bytes left of a user's storage quota (None: no quota)."""
+        user = self.get(name)
+        if user is None or not user['storage_mb']:
+            return None
+        return int(user['storage_mb'] * 1024 * 1024) - self.storage_used(name)
+
+    def storage_used(self, name: str) -> int:
+        """Bytes in a user's folders, measured at most every USAGE_TTL seconds (blocking)."""
+        now = time.monotonic()
+        with self._lock:
+            measured = self._usage.get(name)
+        if measured and now - measured[0] < USAGE_TTL:
+            return measured[1]
+        used = storage.disk_usage(name)
+        with self._lock:
+            self._usage[name] = (now, used)
+        return used
+
+    def forget_usage(self, name: Optional[str]):
+        """Measure a user's disk usage again on the next check (a download finished, a file was deleted)."""
+        with self._lock:
+            self._usage.pop(name, None)
+
+    def _describe(self, name: str) -> Dict:
+        user = self._users[name]
+
+        def setting(field, default):
+            return default if user.get(field) is None else user[field]
+
+        return {
+            'name': name,
+            'weight': float(setting('weight', 1.0)),
+            'max_jobs': int(setting('max_jobs', Config.USER_MAX_JOBS)),
+            'rate_limit': setting('rate_limit', Config.USER_RATE_LIMIT) or None,
+            'storage_mb': float(setting('storage_mb', Config.USER_STORAGE_MB)),
+            'admin': bool(user.get('admin')),
+        }
+
+
+_store: Optional[UserStore] = None
+_store_lock = threading.Lock()
+
+
+def get_user_store() -> UserStore:
+    """Get the shared user store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UserStore()
+        return _store
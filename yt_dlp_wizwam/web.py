@@ -3,23 +3,43 @@ Web server module for yt-dlp-wizwam.
 
 Flask application with Socket.IO for real-time progress updates.
 Designed to work in both embedded mode (single-user) and Docker mode (multi-user).
+In multi-user mode (Config.MULTI_USER) API requests and Socket.IO
+connections need a user's token, and every user sees only their own jobs,
+files and events (see users.py).
 
 TODO: Refactor from /home/luke/dev/yt-dlp.wizwam.com/dv.py
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request, jsonify, send_file, g
+from flask_socketio import SocketIO, ConnectionRefusedError, emit, join_room, rooms
 from flask_cors import CORS
 from pathlib import Path
-import threading
-import queue
 import os
+import uuid
+import signal
 import socket
+import sqlite3
 import logging
 
 from yt_dlp_wizwam.config import Config, get_config
-from yt_dlp_wizwam.downloader import download_video
+from yt_dlp_wizwam.events import event_log
+from yt_dlp_wizwam.jobs import JobQueue
+from yt_dlp_wizwam.subscriptions import SubscriptionStore, SubscriptionWatcher
 from yt_dlp_wizwam.user_config import UserConfig
+from yt_dlp_wizwam import storage
+from yt_dlp_wizwam.assets import AssetPipeline, ResponseCache
+from yt_dlp_wizwam.executor import init_executor, run_blocking, spawn, watchdog
+from yt_dlp_wizwam.stats import registry
+from yt_dlp_wizwam.transcode import TranscodeQueue, get_profile, get_profiles
+from yt_dlp_wizwam.transfer import TransferQueue, TransferQueueFull
+from yt_dlp_wizwam.sidecars import attach_sidecars, parse_languages
+from yt_dlp_wizwam.archive import get_archive
+from yt_dlp_wizwam.retry import get_breaker
+from yt_dlp_wizwam.auth import get_auth_store
+from yt_dlp_wizwam.clips import clip_spec, parse_timestamp
+from yt_dlp_wizwam.history import MAX_LIMIT, get_history, parse_since
+from yt_dlp_wizwam.health import get_health
+from yt_dlp_wizwam.users import QuotaExceeded, get_user_store, request_token, user_room
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -69,13 +89,87 @@ def find_available_port(start_port=8080, max_attempts=10, host='127.0.0.1'):
     return None
 
 
-def create_app():
+def _prepare_download_dir(path):
+    """
+    Create a download directory and check it is writable.
+    
+    Returns:
+        str: Error message, or None if the directory is usable
+    """
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        return f'Cannot create directory: {str(e)}'
+    
+    if not os.access(path, os.W_OK):
+        return 'Directory is not writable'
+    return None
+
+
+def _check_dir(path):
+    """
+    Check whether a directory exists or can be created.
+    
+    Returns:
+        dict: Validation result for /api/config/validate-dir
+    """
+    if path.exists():
+        if not path.is_dir():
+            return {'valid': False, 'error': 'Path is not a directory'}
+        if not os.access(path, os.W_OK):
+            return {'valid': False, 'error': 'Directory is not writable'}
+        return {'valid': True, 'exists': True}
+    
+    # Check if parent exists and is writable
+    parent = path.parent
+    if parent.exists() and os.access(parent, os.W_OK):
+        return {'valid': True, 'exists': False, 'message': 'Directory will be created'}
+    return {'valid': False, 'error': 'Cannot create directory (parent not writable)'}
+
+
+def install_drain_handler(app):
+    """
+    Drain on SIGTERM (eventlet server): stop intake, let running jobs finish
+    or checkpoint (Config.SHUTDOWN_TIMEOUT), then stop the server.
+    
+    Args:
+        app: App from create_app()
+    """
+    health = app.extensions['health']
+    job_queue = app.extensions['job_queue']
+    
+    def drain_and_exit():
+        drained = job_queue.drain(Config.SHUTDOWN_TIMEOUT)
+        logger.info("Drained, shutting down" if drained else "Drain timed out, shutting down")
+        # Raised in a greenlet, SystemExit stops the hub and socketio.run() with it
+        raise SystemExit(0)
+    
+    def on_sigterm(signum, frame):
+        if health.draining:
+            return
+        logger.info("SIGTERM received, draining")
+        health.begin_drain()
+        spawn(drain_and_exit)
+    
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+def create_app(async_mode=None, primary=True):
     """
     Application factory for Flask app.
     
+    Args:
+        async_mode: Socket.IO async mode (default: Config.SOCKETIO_ASYNC_MODE);
+                    the asyncio server mode uses 'threading'
+        primary: Run the once-per-server duties (staging recovery, subscription
+                 polling, resuming interrupted jobs); False in web workers other
+                 than the first (see server.py)
+    
     Returns:
         Flask app instance
     """
+    async_mode = async_mode or Config.SOCKETIO_ASYNC_MODE
+    
     # Create Flask app
     app = Flask(__name__)
     
@@ -86,11 +180,31 @@ def create_app():
     # Ensure directories exist
     Config.ensure_directories()
     
+    # Finish moving anything left in the staging tier by a previous run
+    if primary:
+        storage.recover_staged()
+    
+    # Content-hashed, precompressed static assets and memoized responses
+    assets = AssetPipeline(Path(app.static_folder))
+    assets.build()
+    app.jinja_env.globals['asset_url'] = assets.asset_url
+    # Polling needs sticky sessions, which several workers on one port do not have
+    app.jinja_env.globals['socketio_transports'] = 'websocket' if Config.WEB_WORKERS > 1 else ''
+    response_cache = ResponseCache()
+    
+    def render_cached(template):
+        """Render a static page once per version and serve it with an ETag."""
+        return response_cache.respond(
+            ('page', template, Config.VERSION),
+            lambda: render_template(template, version=Config.VERSION).encode(),
+            'text/html'
+        )
+    
     # Initialize extensions
     CORS(app, resources={r"/*": {"origins": Config.CORS_ORIGINS}})
     socketio.init_app(
         app,
-        async_mode=Config.SOCKETIO_ASYNC_MODE,
+        async_mode=async_mode,
         cors_allowed_origins=Config.CORS_ORIGINS,
         message_queue=Config.SOCKETIO_MESSAGE_QUEUE,
         logger=True,  # Enable Socket.IO logging
@@ -99,34 +213,274 @@ def create_app():
         ping_interval=25
     )
     
-    # Task queue for embedded mode
-    download_queue = queue.Queue()
+    # Offload blocking I/O from the event loop and watch for stalls
+    init_executor(socketio, async_mode)
+    watchdog.start()
+    
+    @app.before_request
+    def track_request_start():
+        g.watchdog_token = watchdog.request_started(request.endpoint or request.path)
+    
+    @app.teardown_request
+    def track_request_end(exc=None):
+        token = g.pop('watchdog_token', None)
+        if token is not None:
+            watchdog.request_finished(token)
+    
+    # Multi-user mode: token per request, own jobs/files/events per user
+    users = get_user_store() if Config.MULTI_USER else None
+    # Pages, assets and probes load without a token; the page asks for one when the API refuses
+    public_endpoints = {'index', 'favicon', 'serve_asset', 'about', 'settings', 'healthz', 'readyz', 'static'}
+    # Server-wide settings only admins may change
+    admin_endpoints = {
+        'update_download_dir', 'validate_dir', 'test_socketio', 'add_auth_profile', 'delete_auth_profile',
+        'run_macro',
+    }
+    
+    @app.before_request
+    def authenticate_user():
+        g.user = None
+        if users is None or request.method == 'OPTIONS' or request.endpoint in public_endpoints:
+            return None
+        g.user = run_blocking(users.authenticate, request_token(request.environ))
+        if g.user is None:
+            return jsonify({'error': 'Authentication required: pass your token as Authorization: Bearer <token>'}), 401
+        if request.endpoint in admin_endpoints and not run_blocking(users.is_admin, g.user):
+            return jsonify({'error': 'Only admins may do this'}), 403
+        return None
+    
+    def owns(job):
+        """Whether the request's user may see a job (a Job or a history entry)."""
+        if users is None:
+            return True
+        owner = job.get('user') if isinstance(job, dict) else job.user
+        return owner == g.user
+    
+    def may_use_auth():
+        """Whether the request's user may use auth profiles (only admins in multi-user mode)."""
+        return users is None or run_blocking(users.is_admin, g.user)
+    
+    def owns_subscription(sub):
+        """Whether the request's user may see and manage a subscription."""
+        return users is None or sub.get('owner') == g.user
+    
+    def owns_file(path):
+        """Whether the request's user may see a transcode or transfer of a file."""
+        return users is None or storage.namespace_of(path) == g.user
+    
+    def file_room(path):
+        """Socket.IO room for events about a file (its owner's), or None for everyone."""
+        namespace = storage.namespace_of(path) if users is not None else None
+        return user_room(namespace) if namespace else None
+    
+    def stats_broadcaster():
+        """Periodically emit a compact throughput summary while jobs are active."""
+        was_active = False
+        while True:
+            socketio.sleep(Config.STATS_INTERVAL)
+            summary = registry.compact_summary(job_queue.backlog())
+            active = summary['active_jobs'] > 0
+            # One final summary after the last job finishes, then stay quiet
+            if active or was_active:
+                event_log.broadcast('stats', summary)
+            was_active = active
+    
+    socketio.start_background_task(stats_broadcaster)
+    
+    # Job events are sequenced and logged before they are broadcast, so
+    # clients that connect late or reconnect can catch up
+    event_log.set_emitter(socketio.emit)
+    event_log.prune()
+    
+    def progress_emitter(job_id, room=None):
+        """Progress callback that emits via Socket.IO (to a user's room only, if given)."""
+        def progress_callback(phase, percent, message):
+            logger.debug(f"Progress - Job: {job_id}, Phase: {phase}, Percent: {percent:.1f}%, Message: {message}")
+            event_log.emit('progress', {
+                'job_id': job_id,
+                'phase': phase,
+                'percent': percent,
+                'message': message
+            }, room=room)
+        return progress_callback
+    
+    def on_job_done(job):
+        """Emit the final result of a job."""
+        result = job.result
+        logger.info(f"Download result for job {job.job_id}: {result}")
+        room = user_room(job.user) if job.user else None
+        if result['status'] == 'success' and result.get('playlist'):
+            # Each entry was a job of its own and has been announced already
+            event_log.emit('success', {
+                'job_id': job.job_id,
+                'filename': result.get('title', 'Playlist'),
+                'filesize': f"{result['downloaded']} downloaded, {result['skipped']} already archived",
+                'title': result.get('title', 'Unknown'),
+                'playlist': True
+            }, room=room)
+        elif result['status'] == 'success':
+            event_log.emit('success', {
+                'job_id': job.job_id,
+                'filename': os.path.basename(result['filename']),
+                'filepath': result['filename'],
+                'filesize': result.get('filesize', 'Unknown'),
+                'title': result.get('title', 'Unknown')
+            }, room=room)
+            if job.transcode_profile:
+                submit_transcode(result['filename'], job.transcode_profile)
+            else:
+                auto_push(result['filename'])
+        elif result['status'] == 'cancelled':
+            event_log.emit('cancelled', {'job_id': job.job_id}, room=room)
+        else:
+            event_log.emit('error', {
+                'job_id': job.job_id,
+                'error': result.get('error', 'Unknown error')
+            }, room=room)
+    
+    def on_transcode_done(job):
+        """Emit the final result of a transcode."""
+        result = job['result']
+        room = file_room(job['source'])
+        if result['status'] == 'success':
+            event_log.emit('success', {
+                'job_id': job['job_id'],
+                'filename': os.path.basename(result['filename']),
+                'filepath': result['filename'],
+                'filesize': result.get('filesize', 'Unknown'),
+                'title': result.get('title', 'Unknown'),
+                'profile': job['profile'],
+                'cached': result.get('cached', False)
+            }, room=room)
+            auto_push(result['filename'])
+        else:
+            event_log.emit('error', {
+                'job_id': job['job_id'],
+                'error': result.get('error', 'Unknown error')
+            }, room=room)
+    
+    # Transcode stage: runs after downloads on its own CPU-bounded encoder pool
+    transcode_queue = TranscodeQueue(on_done=on_transcode_done)
+    
+    def submit_transcode(path, profile):
+        job_id = str(uuid.uuid4())
+        return transcode_queue.submit(Path(path), profile, progress_callback=progress_emitter(job_id, file_room(path)),
+                                      job_id=job_id)
+    
+    def on_transfer_done(job):
+        """Emit the final result of a NAS transfer."""
+        result = job['result']
+        room = file_room(job['source'])
+        if result['status'] == 'success':
+            event_log.emit('success', {
+                'job_id': job['job_id'],
+                'filename': os.path.basename(job['source']),
+                'filepath': result['remote'],
+                'filesize': f"{result['size'] / (1024 * 1024):.1f} MB",
+                'title': os.path.basename(job['source']),
+                'transfer': True,
+                'skipped': result.get('skipped', False)
+            }, room=room)
+        else:
+            event_log.emit('error', {
+                'job_id': job['job_id'],
+                'error': result.get('error', 'Unknown error')
+            }, room=room)
+    
+    # NAS transfers: own bounded queue, so pushes never hold up downloads
+    transfer_queue = TransferQueue(on_done=on_transfer_done)
+    
+    def submit_transfer(path):
+        job_id = str(uuid.uuid4())
+        return transfer_queue.submit(Path(path), progress_callback=progress_emitter(job_id, file_room(path)),
+                                     job_id=job_id)
+    
+    def auto_push(path):
+        """Push a finished file to the NAS when NAS_AUTO_PUSH is on."""
+        if not (Config.NAS_ENABLED and Config.NAS_AUTO_PUSH):
+            return
+        try:
+            submit_transfer(path)
+        except TransferQueueFull as e:
+            logger.warning(f"Not pushing {os.path.basename(path)} to NAS: {e}")
+    
+    # Download queue: prefetch (extraction) stage feeding download workers;
+    # fair share across users in multi-user mode
+    job_queue = JobQueue(on_done=on_job_done, users=users)
+    app.extensions['job_queue'] = job_queue
+    
+    def enqueue(url, options, owner=None):
+        """Queue a download for a subscription's owner with Socket.IO progress (used by the subscription watcher)."""
+        job_id = str(uuid.uuid4())
+        room = user_room(owner) if users is not None and owner else None
+        return job_queue.submit(url, options, progress_callback=progress_emitter(job_id, room), job_id=job_id,
+                                user=owner if users is not None else None)
+    
+    # Subscription watcher: polls channels/playlists and enqueues new entries
+    subscription_store = SubscriptionStore()
+    subscription_watcher = SubscriptionWatcher(subscription_store, enqueue)
+    if Config.WATCH_ENABLED and primary:
+        spawn(subscription_watcher.run)
+    
+    health = get_health()
+    app.extensions['health'] = health
+    
+    def resume_interrupted():
+        """Queue the jobs the last shutdown interrupted again, under their old IDs."""
+        try:
+            entries = run_blocking(get_history().interrupted)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Cannot read interrupted jobs from the history: {e}")
+            return
+        for entry in entries:
+            room = user_room(entry['user']) if entry['user'] else None
+            job_queue.submit(entry['url'], entry['options'],
+                             progress_callback=progress_emitter(entry['job_id'], room),
+                             job_id=entry['job_id'], transcode_profile=entry['transcode_profile'],
+                             user=entry['user'])
+        if entries:
+            logger.info(f"Resumed {len(entries)} job(s) interrupted by the last shutdown")
+    
+    def warm_up():
+        """Load yt-dlp, ffmpeg and the indexes before the first request needs them."""
+        health.warmup(run=run_blocking)
+        job_queue.start()
+        if Config.RESUME_INTERRUPTED and primary and not health.draining:
+            resume_interrupted()
+    
+    spawn(warm_up)
     
     # Routes
     @app.route('/')
     def index():
         """Main page."""
-        return render_template('index.html', version=Config.VERSION)
+        return render_cached('index.html')
     
     @app.route('/favicon.ico')
     def favicon():
         """Serve favicon."""
         return send_file(Path(app.root_path) / 'static' / 'favicon.ico', mimetype='image/x-icon')
     
+    @app.route('/assets/<path:name>')
+    def serve_asset(name):
+        """Serve a fingerprinted static asset (immutable, precompressed)."""
+        return assets.serve(name)
+    
     @app.route('/about')
     def about():
         """About page."""
-        return render_template('about.html', version=Config.VERSION)
+        return render_cached('about.html')
     
     @app.route('/settings')
     def settings():
         """Settings page."""
-        return render_template('settings.html', version=Config.VERSION)
+        return render_cached('settings.html')
     
     @app.route('/api/config', methods=['GET'])
     def get_config_api():
-        """Get current configuration."""
-        return jsonify({
+        """Get current configuration (memoized, with ETag)."""
+        key = ('config', Config.VERSION, Config.DOWNLOAD_DIR, Config.DEPLOYMENT_MODE)
+        return response_cache.json(key, lambda: {
             'version': Config.VERSION,
             'download_dir': Config.DOWNLOAD_DIR,
             'deployment_mode': Config.DEPLOYMENT_MODE,
@@ -135,11 +489,40 @@ def create_app():
             'audio_codecs': Config.AUDIO_CODECS,
         })
     
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        """Liveness: subsystem checks, queue saturation and event-loop lag (always 200)."""
+        return jsonify(health.report(job_queue, transfer_queue))
+    
+    @app.route('/readyz', methods=['GET'])
+    def readyz():
+        """Readiness: 200 once warmed up and accepting work, 503 with the reasons otherwise."""
+        report = health.report(job_queue, transfer_queue)
+        return jsonify(report), 200 if report['ready'] else 503
+    
+    @app.route('/api/stats', methods=['GET'])
+    def get_stats():
+        """Aggregate bandwidth, per-extractor throughput and queue ETA (per-job details of own jobs only)."""
+        summary = registry.summary(job_queue.backlog())
+        if users is not None:
+            own = {}
+            for job_id, job in summary['jobs'].items():
+                queued = job_queue.get(job_id)
+                if queued is not None and owns(queued):
+                    own[job_id] = job
+            summary['jobs'] = own
+        return jsonify(summary)
+    
+    @app.route('/api/watchdog', methods=['GET'])
+    def get_watchdog():
+        """Event-loop blocking statistics and slow handlers."""
+        return jsonify(watchdog.snapshot())
+    
     @app.route('/api/test-socketio', methods=['POST'])
     def test_socketio():
         """Test Socket.IO connection."""
         logger.info("Testing Socket.IO emit...")
-        socketio.emit('progress', {
+        event_log.broadcast('progress', {
             'job_id': 'test',
             'phase': 'test',
             'percent': 50.0,
@@ -170,18 +553,12 @@ def create_app():
         if not path.is_absolute():
             return jsonify({'status': 'error', 'error': 'Path must be absolute'}), 400
         
-        # Try to create the directory if it doesn't exist
-        try:
-            path.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            return jsonify({'status': 'error', 'error': f'Cannot create directory: {str(e)}'}), 400
-        
-        # Check if directory is writable
-        if not os.access(path, os.W_OK):
-            return jsonify({'status': 'error', 'error': 'Directory is not writable'}), 400
+        error = run_blocking(_prepare_download_dir, path)
+        if error:
+            return jsonify({'status': 'error', 'error': error}), 400
         
         # Save to user config
-        if UserConfig.set('download_dir', str(path)):
+        if run_blocking(UserConfig.set, 'download_dir', str(path)):
             # Update the Config class (for current session)
             Config.DOWNLOAD_DIR = str(path)
             
@@ -216,20 +593,7 @@ def create_app():
         if not path.is_absolute():
             return jsonify({'valid': False, 'error': 'Path must be absolute'})
         
-        # Check if path exists
-        if path.exists():
-            if not path.is_dir():
-                return jsonify({'valid': False, 'error': 'Path is not a directory'})
-            if not os.access(path, os.W_OK):
-                return jsonify({'valid': False, 'error': 'Directory is not writable'})
-            return jsonify({'valid': True, 'exists': True})
-        else:
-            # Check if parent exists and is writable
-            parent = path.parent
-            if parent.exists() and os.access(parent, os.W_OK):
-                return jsonify({'valid': True, 'exists': False, 'message': 'Directory will be created'})
-            else:
-                return jsonify({'valid': False, 'error': 'Cannot create directory (parent not writable)'})
+        return jsonify(run_blocking(_check_dir, path))
     
     @app.route('/api/download', methods=['POST'])
     def download():
@@ -238,117 +602,394 @@ def create_app():
         
         Request body:
         {
-            "url": "https://youtube.com/watch?v=...",
+            "url": "https://youtube.com/watch?v=...",  (video, playlist or channel)
+            "urls": ["...", "..."],   (optional, batch instead of "url")
             "quality": "720p",
             "video_codec": "avc1",
             "audio_codec": "m4a",
-            "audio_only": false
+            "audio_only": false,
+            "profile": "signal",     (optional, transcode after download)
+            "subtitles": ["en"],     (optional sidecars; default from config)
+            "chapters": true,
+            "info_json": true,
+            "auth": "members",       (optional auth profile, admins only in multi-user mode; default by host rule)
+            "start": "1:00:00",      (optional clip: seconds or HH:MM:SS)
+            "end": "1:00:30",
+            "chapter": "Intro",      (optional clip of one chapter instead of start/end)
+            "accurate_cuts": false,  (re-encode at the clip edges)
+            "live_from_start": false, (live streams: start at the oldest available segment)
+            "max_duration": "2:00:00", (live streams: stop after; default from config)
+            "max_size_mb": 4096,     (live streams: stop after this many MB)
+            "segment_seconds": 600   (live streams: segment length)
         }
         """
+        if health.draining:
+            return jsonify({'error': 'Server is shutting down'}), 503
+        
         data = request.get_json()
         
-        url = data.get('url')
-        if not url:
+        urls = data.get('urls') or ([data['url']] if data.get('url') else [])
+        if not urls:
             return jsonify({'error': 'URL is required'}), 400
         
-        quality = data.get('quality', Config.DEFAULT_QUALITY)
-        video_codec = data.get('video_codec', Config.DEFAULT_VIDEO_CODEC)
-        audio_codec = data.get('audio_codec', Config.DEFAULT_AUDIO_CODEC)
-        audio_only = data.get('audio_only', False)
+        options = {
+            'quality': data.get('quality', Config.DEFAULT_QUALITY),
+            'video_codec': data.get('video_codec', Config.DEFAULT_VIDEO_CODEC),
+            'audio_codec': data.get('audio_codec', Config.DEFAULT_AUDIO_CODEC),
+            'audio_only': data.get('audio_only', False),
+        }
+        if 'subtitles' in data:
+            options['subtitles'] = parse_languages(data['subtitles'])
+        for key in ('chapters', 'info_json'):
+            if key in data:
+                options[key] = bool(data[key])
+        if data.get('auth'):
+            if not may_use_auth():
+                return jsonify({'error': 'Only admins may use auth profiles'}), 403
+            if get_auth_store().get(data['auth']) is None:
+                return jsonify({'error': f"Unknown auth profile '{data['auth']}'"}), 400
+            options['auth'] = data['auth']
+        try:
+            clip = clip_spec(data.get('start'), data.get('end'), data.get('chapter'), data.get('accurate_cuts', False))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if clip:
+            options.update(start=clip['start'], end=clip['end'], chapter=clip['chapter'],
+                           accurate_cuts=clip['accurate'])
+        # Live recording limits
+        try:
+            if data.get('live_from_start'):
+                options['live_from_start'] = True
+            if data.get('max_duration') not in (None, ''):
+                options['max_duration'] = parse_timestamp(data['max_duration'])
+            if data.get('max_size_mb') not in (None, ''):
+                options['max_size_mb'] = float(data['max_size_mb'])
+            if data.get('segment_seconds'):
+                options['segment_seconds'] = max(int(data['segment_seconds']), 1)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid live recording option: {e}'}), 400
         
-        logger.info(f"Download request: {url} (quality={quality}, video={video_codec}, audio={audio_codec}, audio_only={audio_only})")
-        audio_only = data.get('audio_only', False)
+        profile = data.get('profile') or None
+        if profile:
+            try:
+                get_profile(profile)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        # Generate job ID
-        import uuid
-        job_id = str(uuid.uuid4())
+        if users is not None:
+            try:
+                run_blocking(users.download_options, g.user)
+            except QuotaExceeded as e:
+                return jsonify({'error': str(e)}), 403
+        room = user_room(g.user) if g.user else None
         
-        logger.info(f"Starting download job {job_id}")
+        logger.info(f"Download request: {len(urls)} URL(s) ({options})")
         logger.info(f"Current download directory: {Config.DOWNLOAD_DIR}")
         
-        # Progress callback to emit via Socket.IO
-        def progress_callback(phase, percent, message):
-            logger.info(f"Progress callback - Job: {job_id}, Phase: {phase}, Percent: {percent:.1f}%, Message: {message}")
-            socketio.emit('progress', {
-                'job_id': job_id,
-                'phase': phase,
-                'percent': percent,
-                'message': message
+        jobs = []
+        try:
+            for url in urls:
+                job_id = str(uuid.uuid4())
+                jobs.append(job_queue.submit(
+                    url, options, progress_callback=progress_emitter(job_id, room), job_id=job_id,
+                    transcode_profile=profile, user=g.user
+                ))
+        except RuntimeError:
+            # Drained between the check above and here
+            return jsonify({'error': 'Server is shutting down'}), 503
+        
+        if 'urls' in data:
+            return jsonify({
+                'status': 'queued',
+                'job_ids': [job.job_id for job in jobs],
+                'urls': urls
             })
         
-        # Start download in background thread (embedded mode)
-        def download_worker():
-            logger.info(f"Download worker started for job {job_id}")
+        return jsonify({
+            'job_id': jobs[0].job_id,
+            'status': 'queued',
+            'url': urls[0]
+        })
+    
+    @app.route('/api/queue', methods=['GET'])
+    def list_queue():
+        """List queued, running and recently finished jobs (the user's own in multi-user mode)."""
+        jobs = [job for job in job_queue.list_jobs() if owns(job)]
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return jsonify({
+            'counts': counts,
+            'jobs': [job.to_dict() for job in jobs],
+            'circuits': get_breaker().snapshot(),
+        })
+    
+    @app.route('/api/queue/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        """Get the status of one job."""
+        job = job_queue.get(job_id)
+        if job is not None and owns(job):
+            return jsonify(job.to_dict())
+        # Pruned from the queue (or from before a restart): the history has it
+        entry = run_blocking(get_history().get, job_id)
+        if entry is None or not owns(entry):
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(entry)
+    
+    @app.route('/api/queue/<job_id>/cancel', methods=['POST'])
+    def cancel_job(job_id):
+        """Cancel a queued or running job."""
+        job = job_queue.get(job_id)
+        if job is None or not owns(job) or not job_queue.cancel(job_id):
+            return jsonify({'error': 'Job not found or already finished'}), 404
+        return jsonify({'status': 'cancelling', 'job_id': job_id})
+    
+    @app.route('/api/jobs', methods=['GET'])
+    def list_job_history():
+        """
+        Query the job history, most recently finished first.
+        
+        Query parameters: status, extractor, url, q (title/URL/filename
+        substring), parent, since/until (e.g. 7d, 12h, 2024-05-01), limit
+        (default 50, at most 200), cursor (next_cursor of the previous page).
+        """
+        args = request.args
+        try:
+            filters = {
+                'status': args.get('status') or None,
+                'extractor': args.get('extractor') or None,
+                'url': args.get('url') or None,
+                'search': args.get('q') or None,
+                'parent': args.get('parent') or None,
+                'user': g.user,
+                'since': parse_since(args.get('since')),
+                'until': parse_since(args.get('until')),
+                'limit': min(int(args.get('limit', 50)), MAX_LIMIT),
+                'cursor': args.get('cursor') or None,
+            }
+            page = run_blocking(get_history().query, **filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(page)
+    
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def get_job_history(job_id):
+        """Get one job from the history."""
+        entry = run_blocking(get_history().get, job_id)
+        if entry is None or not owns(entry):
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(entry)
+    
+    @app.route('/api/transcode/profiles', methods=['GET'])
+    def list_transcode_profiles():
+        """List transcode profiles."""
+        return jsonify({'profiles': get_profiles()})
+    
+    @app.route('/api/transcode', methods=['POST'])
+    def start_transcode():
+        """
+        Transcode a downloaded file.
+        
+        Request body:
+        {
+            "filename": "Title [...].mp4",
+            "profile": "whatsapp"
+        }
+        """
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        profile = data.get('profile', '')
+        # Plain file names only, like the <filename> routes
+        path = None
+        if filename and Path(filename).name == filename:
+            path = run_blocking(storage.resolve_file, filename, g.user)
+        if path is None:
+            return jsonify({'error': 'File not found'}), 404
+        try:
+            job = submit_transcode(path, profile)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'job_id': job['job_id'], 'status': 'queued', 'profile': profile})
+    
+    @app.route('/api/transcode/<job_id>', methods=['GET'])
+    def get_transcode(job_id):
+        """Get the status of a transcode."""
+        job = transcode_queue.get(job_id)
+        if job is None or not owns_file(job['source']):
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+    
+    @app.route('/api/transfer', methods=['POST'])
+    def start_transfer():
+        """
+        Push downloaded files to the NAS.
+        
+        Request body:
+        {
+            "filenames": ["Title [...].mp4", ...]
+        }
+        """
+        data = request.get_json() or {}
+        filenames = data.get('filenames') or ([data['filename']] if data.get('filename') else [])
+        if not filenames:
+            return jsonify({'error': 'No filenames provided'}), 400
+        
+        transfers = []
+        for filename in filenames:
+            path = run_blocking(storage.resolve_file, filename, g.user) if Path(filename).name == filename else None
+            if path is None:
+                return jsonify({'error': f'File not found: {filename}', 'transfers': transfers}), 404
             try:
-                logger.info(f"Calling download_video with url={url}, quality={quality}")
-                result = download_video(
-                    url=url,
-                    quality=quality,
-                    video_codec=video_codec,
-                    audio_codec=audio_codec,
-                    audio_only=audio_only,
-                    progress_callback=progress_callback
-                )
-                
-                logger.info(f"Download result: {result}")
-                
-                if result['status'] == 'success':
-                    socketio.emit('success', {
-                        'job_id': job_id,
-                        'filename': os.path.basename(result['filename']),
-                        'filepath': result['filename'],
-                        'filesize': result.get('filesize', 'Unknown'),
-                        'title': result.get('title', 'Unknown')
-                    })
-                else:
-                    socketio.emit('error', {
-                        'job_id': job_id,
-                        'error': result.get('error', 'Unknown error')
-                    })
-            except Exception as e:
-                logger.exception(f"Download worker error for job {job_id}: {e}")
-                socketio.emit('error', {
-                    'job_id': job_id,
-                    'error': str(e)
-                })
+                job = submit_transfer(path)
+            except TransferQueueFull as e:
+                return jsonify({'error': str(e), 'transfers': transfers}), 503
+            transfers.append({'job_id': job['job_id'], 'filename': filename})
+        
+        return jsonify({'status': 'queued', 'transfers': transfers})
+    
+    @app.route('/api/transfer/<job_id>', methods=['GET'])
+    def get_transfer(job_id):
+        """Get the status of a NAS transfer."""
+        job = transfer_queue.get(job_id)
+        if job is None or not owns_file(job['source']):
+            return jsonify({'error': 'Transfer not found'}), 404
+        return jsonify(job)
+    
+    @app.route('/api/transfers', methods=['GET'])
+    def list_transfers():
+        """List NAS transfers of this session (of the user's files in multi-user mode)."""
+        return jsonify({'transfers': [job for job in transfer_queue.list_jobs() if owns_file(job['source'])]})
+    
+    @app.route('/api/subscriptions', methods=['GET'])
+    def list_subscriptions():
+        """List channel/playlist subscriptions (the user's own in multi-user mode)."""
+        return jsonify({'subscriptions': [sub for sub in subscription_store.list() if owns_subscription(sub)]})
+    
+    @app.route('/api/subscriptions', methods=['POST'])
+    def add_subscription():
+        """
+        Subscribe to a channel or playlist.
         
-        # Start download in background using socketio.start_background_task (better for eventlet)
-        socketio.start_background_task(download_worker)
+        Request body:
+        {
+            "url": "https://youtube.com/@channel/videos",
+            "name": "Channel name",           (optional)
+            "interval": 3600,                 (optional, seconds)
+            "backfill": 0,                    (optional, existing videos to fetch)
+            "quality": "720p", ...            (optional download options)
+        }
+        """
+        data = request.get_json()
+        url = data.get('url')
+        if not url:
+            return jsonify({'status': 'error', 'error': 'URL is required'}), 400
         
+        try:
+            interval = int(data['interval']) if data.get('interval') not in (None, '') else None
+            backfill = int(data.get('backfill') or 0)
+            if (interval is not None and interval <= 0) or backfill < 0:
+                raise ValueError('interval must be positive and backfill not negative')
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'error': f'Invalid subscription option: {e}'}), 400
+        
+        options = {k: data[k] for k in ('quality', 'video_codec', 'audio_codec', 'audio_only', 'auth') if k in data}
+        if not may_use_auth():
+            if data.get('auth'):
+                return jsonify({'status': 'error', 'error': 'Only admins may use auth profiles'}), 403
+            # Nor by host rule when the channel is listed
+            options['auth'] = False
+        sub = run_blocking(
+            subscription_store.add, url,
+            name=data.get('name'),
+            interval=interval,
+            options=options,
+            backfill=backfill,
+            owner=g.user
+        )
+        return jsonify({'status': 'success', 'subscription': sub})
+    
+    @app.route('/api/subscriptions/<sub_id>', methods=['DELETE'])
+    def delete_subscription(sub_id):
+        """Remove a subscription."""
+        sub = subscription_store.get(sub_id)
+        if sub is None or not owns_subscription(sub) or not run_blocking(subscription_store.remove, sub_id):
+            return jsonify({'status': 'error', 'error': 'Subscription not found'}), 404
+        return jsonify({'status': 'success', 'id': sub_id})
+    
+    @app.route('/api/subscriptions/<sub_id>/poll', methods=['POST'])
+    def poll_subscription(sub_id):
+        """Poll a subscription now."""
+        sub = subscription_store.get(sub_id)
+        if sub is None or not owns_subscription(sub):
+            return jsonify({'status': 'error', 'error': 'Subscription not found'}), 404
+        count = subscription_watcher.poll(sub)
+        return jsonify({'status': 'success', 'enqueued': count, 'subscription': subscription_store.get(sub_id)})
+    
+    @app.route('/api/auth', methods=['GET'])
+    def list_auth_profiles():
+        """List the auth profiles the user may use (no cookie values or header values)."""
+        return jsonify({'profiles': get_auth_store().list() if may_use_auth() else []})
+    
+    @app.route('/api/auth', methods=['POST'])
+    def add_auth_profile():
+        """
+        Add or update an auth profile.
+        
+        Request body:
+        {
+            "name": "members",
+            "cookies": "# Netscape HTTP Cookie File...",   (optional, cookies.txt contents)
+            "headers": {"Authorization": "..."},           (optional)
+            "user_agent": "Mozilla/5.0 ...",               (optional)
+            "hosts": ["youtube.com"]                       (optional host rules)
+        }
+        """
+        data = request.get_json() or {}
+        try:
+            profile = run_blocking(
+                get_auth_store().add, data.get('name', ''),
+                cookies=data.get('cookies'),
+                headers=data.get('headers'),
+                user_agent=data.get('user_agent'),
+                hosts=data.get('hosts')
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        return jsonify({'status': 'success', 'profile': profile})
+    
+    @app.route('/api/auth/<name>', methods=['DELETE'])
+    def delete_auth_profile(name):
+        """Remove an auth profile and its cookies."""
+        if not run_blocking(get_auth_store().remove, name):
+            return jsonify({'status': 'error', 'error': 'Auth profile not found'}), 404
+        return jsonify({'status': 'success', 'name': name})
+    
+    @app.route('/api/users/me', methods=['GET'])
+    def current_user():
+        """The token's user with their limits and usage (multi-user mode)."""
+        if users is None:
+            return jsonify({'multi_user': False})
+        user = run_blocking(users.get, g.user)
+        used = run_blocking(users.storage_used, g.user)
         return jsonify({
-            'job_id': job_id,
-            'status': 'started',
-            'url': url
+            **user,
+            'multi_user': True,
+            'active_jobs': sum(1 for job in job_queue.list_jobs() if job.user == g.user and not job.done.is_set()),
+            'storage_used_mb': round(used / (1024 * 1024), 1),
         })
     
     @app.route('/api/files', methods=['GET'])
     def list_files():
-        """List downloaded files."""
-        download_dir = Path(Config.DOWNLOAD_DIR)
-        
-        if not download_dir.exists():
-            return jsonify({'files': []})
-        
-        files = []
-        for filepath in sorted(download_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
-            if filepath.is_file() and not filepath.name.startswith('.'):
-                stat = filepath.stat()
-                files.append({
-                    'name': filepath.name,  # Changed from 'filename' to 'name' for JS compatibility
-                    'filename': filepath.name,  # Keep for backwards compatibility
-                    'size': stat.st_size,
-                    'size_mb': f'{stat.st_size / (1024 * 1024):.1f} MB',
-                    'modified': stat.st_mtime
-                })
-        
-        return jsonify({'files': files})
+        """List downloaded files (staging and archive tiers as one view), with their sidecars."""
+        files = run_blocking(storage.list_files, g.user)
+        return jsonify({'files': attach_sidecars(files, get_archive(), g.user)})
     
     @app.route('/api/files/<filename>', methods=['GET'])
     def download_file(filename):
         """Download a file."""
-        filepath = Path(Config.DOWNLOAD_DIR) / filename
+        filepath = run_blocking(storage.resolve_file, filename, g.user)
         
-        if not filepath.exists() or not filepath.is_file():
+        if filepath is None:
             return jsonify({'error': 'File not found'}), 404
         
         return send_file(filepath, as_attachment=True)
@@ -356,13 +997,16 @@ def create_app():
     @app.route('/api/files/<filename>', methods=['DELETE'])
     def delete_file(filename):
         """Delete a file."""
-        filepath = Path(Config.DOWNLOAD_DIR) / filename
+        filepath = run_blocking(storage.resolve_file, filename, g.user)
         
-        if not filepath.exists():
+        if filepath is None:
             return jsonify({'status': 'error', 'error': 'File not found'}), 404
         
         try:
-            filepath.unlink()
+            if not run_blocking(storage.delete_file, filepath):
+                return jsonify({'status': 'error', 'error': 'File not found'}), 404
+            if users is not None:
+                users.forget_usage(g.user)
             return jsonify({'status': 'success', 'message': f'Deleted {filename}', 'filename': filename})
         except Exception as e:
             return jsonify({'status': 'error', 'error': str(e)}), 500
@@ -370,9 +1014,9 @@ def create_app():
     @app.route('/view/<filename>')
     def view_file(filename):
         """View file in browser video player."""
-        filepath = Path(Config.DOWNLOAD_DIR) / filename
+        filepath = run_blocking(storage.resolve_file, filename, g.user)
         
-        if not filepath.exists() or not filepath.is_file():
+        if filepath is None:
             return jsonify({'error': 'File not found'}), 404
         
         return render_template('viewer.html', filename=filename)
@@ -380,9 +1024,9 @@ def create_app():
     @app.route('/serve/<filename>')
     def serve_file(filename):
         """Serve file for video player (with range support for seeking)."""
-        filepath = Path(Config.DOWNLOAD_DIR) / filename
+        filepath = run_blocking(storage.resolve_file, filename, g.user)
         
-        if not filepath.exists() or not filepath.is_file():
+        if filepath is None:
             return jsonify({'error': 'File not found'}), 404
         
         # Determine MIME type
@@ -408,23 +1052,24 @@ def create_app():
         if not filename:
             return jsonify({'error': 'Filename is required'}), 400
         
-        filepath = Path(Config.DOWNLOAD_DIR) / filename
+        filepath = run_blocking(storage.resolve_file, filename, g.user)
         
-        if not filepath.exists():
+        if filepath is None:
             return jsonify({'error': 'File not found'}), 404
         
         try:
             # Get macro script path from config
             macro_script = Config.MACRO_SCRIPT
             
-            if not macro_script or not Path(macro_script).exists():
+            if not macro_script or not run_blocking(os.path.exists, macro_script):
                 return jsonify({
                     'error': 'Macro script not configured. Please set MACRO_SCRIPT in settings.'
                 }), 400
             
             # Run macro script
             import subprocess
-            result = subprocess.run(
+            result = run_blocking(
+                subprocess.run,
                 [macro_script, str(filepath)],
                 capture_output=True,
                 text=True,
@@ -456,9 +1101,32 @@ def create_app():
     
     # Socket.IO events
     @socketio.on('connect')
-    def handle_connect():
-        """Handle client connection."""
-        emit('connected', {'version': Config.VERSION})
+    def handle_connect(auth=None):
+        """Handle client connection and replay job events it missed."""
+        auth = auth if isinstance(auth, dict) else {}
+        if users is not None:
+            # Multi-user mode: the user's own room; their events go there only
+            user = run_blocking(users.authenticate, auth.get('token') or request_token(request.environ))
+            if user is None:
+                raise ConnectionRefusedError('Authentication required')
+            join_room(user_room(user))
+        emit('connected', {'version': Config.VERSION, 'epoch': event_log.epoch})
+        replay_events(auth.get('since'), auth.get('epoch'))
+    
+    @socketio.on('resume')
+    def handle_resume(data=None):
+        """Replay job events after the given sequence number."""
+        data = data if isinstance(data, dict) else {}
+        replay_events(data.get('since'), data.get('epoch'))
+    
+    def replay_events(since, epoch):
+        try:
+            since = int(since) if since is not None else None
+        except (TypeError, ValueError):
+            since = None
+        room = next((r for r in rooms() if r.startswith(user_room(''))), None)
+        for record in event_log.replay(since, epoch, room):
+            emit(record['event'], record['data'])
     
     @socketio.on('disconnect')
     def handle_disconnect():
@@ -0,0 +1,314 @@
+"""
+Process worker mode for yt-dlp-wizwam.
+
+With WORKER_MODE = 'process' each download_video call runs in a child
+process instead of a thread of the web server. A runaway extractor, a huge
+info dict or GIL-heavy manifest parsing then only affects its own process,
+and downloads spread across cores.
+
+Each child runs one job at a time under an RLIMIT_AS limit and a per-job
+RLIMIT_CPU budget, and sends progress, stats registry updates and the result
+back over a pipe.
+Children are reused between jobs and recycled after WORKER_MAX_JOBS jobs,
+when their RSS exceeds WORKER_MAX_RSS_MB, or when they die.
+"""
+
+import importlib
+import logging
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import psutil
+
+from yt_dlp_wizwam.config import Config
+from yt_dlp_wizwam.stats import registry
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Config values that can change at runtime and must follow each task into the child
+FORWARDED_CONFIG = ('DOWNLOAD_DIR', 'STAGING_DIR', 'ARCHIVE_FILE', 'FILE_VERIFICATION_ENABLED')
+
+# Function the children run for each task ('module:function')
+DOWNLOAD_TARGET = 'yt_dlp_wizwam.downloader:download_video'
+
+
+def _apply_memory_limit(memory_limit_mb: int):
+    """Set the address-space limit of the current process."""
+    if resource is None or memory_limit_mb <= 0:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _apply_cpu_limit(cpu_limit: int):
+    """
+    Give the next task cpu_limit seconds of CPU time.
+
+    RLIMIT_CPU counts the whole life of the process, and children are
+    reused, so the soft limit is moved to the CPU time used so far plus the
+    budget before every task. Exceeding it sends SIGXCPU, which ends the
+    process. The hard limit is left alone: once lowered it could not be
+    raised for the next task.
+    """
+    if resource is None or cpu_limit <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_limit
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, cancel, checkpoint, memory_limit_mb: int, cpu_limit: int, target: str = DOWNLOAD_TARGET):
+    """Child process loop: run download tasks received over conn until None."""
+    _apply_memory_limit(memory_limit_mb)
+    logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL, logging.INFO))
+
+    from yt_dlp_wizwam import storage
+
+    module, _, name = target.partition(':')
+    download_video = getattr(importlib.import_module(module), name)
+
+    # Progress hooks and the merge watcher may report from different threads
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    registry.set_forwarder(lambda method, args: send(('stats', method, args)))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        for key, value in task['config'].items():
+            setattr(Config, key, value)
+        _apply_cpu_limit(cpu_limit)
+
+        try:
+            result = download_video(
+                task['url'],
+                progress_callback=lambda *args: send(('progress', args)),
+                cancel_event=cancel,
+                checkpoint_event=checkpoint,
+                **task['kwargs']
+            )
+        except BaseException as e:  # MemoryError from RLIMIT_AS included
+            result = {'status': 'error', 'error': f'{type(e).__name__}: {e}', 'url': task['url']}
+        send(('result', result))
+
+    # Let staged files finish moving before the process goes away
+    storage.get_mover().wait()
+
+
+class WorkerProcess:
+    """One child process running download_video jobs."""
+
+    def __init__(self, ctx, target: str = DOWNLOAD_TARGET):
+        """
+        Start a child process.
+
+        Args:
+            ctx: multiprocessing context
+            target: Function run for each task ('module:function'; default download_video)
+        """
+        self.conn, child_conn = ctx.Pipe()
+        self.cancel = ctx.Event()
+        self.checkpoint = ctx.Event()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cancel, self.checkpoint, Config.WORKER_MEMORY_LIMIT_MB, Config.WORKER_CPU_LIMIT,
+                  target),
+            daemon=True,
+            name='download-worker',
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_run = 0
+        logger.info(f"Started download worker process {self.process.pid}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def rss_mb(self) -> float:
+        """Resident memory of the child in MB (0 if it is gone)."""
+        try:
+            return psutil.Process(self.process.pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def run(
+        self,
+        url: str,
+        kwargs: Dict,
+        progress_callback: Optional[Callable] = None,
+        cancel_event: Optional[threading.Event] = None,
+        checkpoint_event: Optional[threading.Event] = None
+    ) -> Dict:
+        """
+        Run one download in the child and relay its messages.
+
+        Args:
+            url: Video URL
+            kwargs: Keyword arguments for download_video
+            progress_callback: Optional callback(phase, percent, message)
+            cancel_event: Optional event; cancels the child's download when set
+            checkpoint_event: Optional event; keep the partial files when cancelling
+
+        Returns:
+            download_video result dict
+        """
+        self.cancel.clear()
+        self.checkpoint.clear()
+        self.jobs_run += 1
+        self.conn.send({
+            'url': url,
+            'kwargs': kwargs,
+            'config': {key: getattr(Config, key) for key in FORWARDED_CONFIG},
+        })
+
+        cancelled_at = None
+        while True:
+            if self.conn.poll(0.25):
+                try:
+                    kind, *payload = self.conn.recv()
+                except (EOFError, OSError):
+                    return self._died(url, kwargs.get('job_id'))
+                if kind == 'progress':
+                    if progress_callback:
+                        progress_callback(*payload[0])
+                elif kind == 'stats':
+                    method, args = payload
+                    getattr(registry, method)(*args)
+                elif kind == 'result':
+                    return payload[0]
+                continue
+
+            if not self.alive:
+                return self._died(url, kwargs.get('job_id'))
+
+            if cancel_event is not None and cancel_event.is_set():
+                if cancelled_at is None:
+                    cancelled_at = time.monotonic()
+                    if checkpoint_event is not None and checkpoint_event.is_set():
+                        self.checkpoint.set()
+                    self.cancel.set()
+                elif time.monotonic() - cancelled_at > Config.WORKER_CANCEL_GRACE:
+                    logger.warning(f"Worker {self.process.pid} ignored cancellation, killing it")
+                    self.kill()
+                    if kwargs.get('job_id'):
+                        registry.finish_job(kwargs['job_id'], 'cancelled')
+                    return {'status': 'cancelled', 'url': url}
+
+    def _died(self, url: str, job_id: Optional[str]) -> Dict:
+        self.process.join(1)
+        code = self.process.exitcode
+        logger.error(f"Download worker {self.process.pid} exited with code {code}")
+        if job_id:
+            registry.finish_job(job_id, 'error')
+        return {'status': 'error', 'error': f'Worker process exited unexpectedly (code {code})', 'url': url}
+
+    def stop(self, timeout: float = 60.0):
+        """Ask the child to exit after pending file moves; kill it after timeout."""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.alive:
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(5)
+
+
+class WorkerPool:
+    """Fixed number of recyclable worker processes."""
+
+    def __init__(self, size: int, max_jobs: Optional[int] = None, target: str = DOWNLOAD_TARGET):
+        """
+        Initialize pool; processes are started on first use.
+
+        Args:
+            size: Number of worker processes (concurrent downloads)
+            max_jobs: Jobs per process before it is recycled (default: Config.WORKER_MAX_JOBS)
+            target: Function the processes run for each task ('module:function'; default download_video)
+        """
+        self.size = size
+        self.max_jobs = max_jobs or Config.WORKER_MAX_JOBS
+        self.target = target
+        # spawn: children must not inherit the server's threads, locks or hub
+        self._ctx = multiprocessing.get_context('spawn')
+        self._slots = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._slots.put(None)
+
+    def run(
+        self,
+        url: str,
+        progress_callback: Optional[Callable] = None,
+        cancel_event: Optional[threading.Event] = None,
+        checkpoint_event: Optional[threading.Event] = None,
+        **kwargs
+    ) -> Dict:
+        """
+        Run download_video(url, **kwargs) in a worker process; blocks until done.
+
+        Returns:
+            download_video result dict
+        """
+        worker = self._slots.get()
+        try:
+            if worker is None or not worker.alive:
+                worker = WorkerProcess(self._ctx, self.target)
+                with self._lock:
+                    self._workers.append(worker)
+            result = worker.run(url, kwargs, progress_callback, cancel_event, checkpoint_event)
+            if self._should_recycle(worker):
+                self._retire(worker)
+                worker = None
+            return result
+        finally:
+            self._slots.put(worker)
+
+    def _should_recycle(self, worker: WorkerProcess) -> bool:
+        if not worker.alive or worker.jobs_run >= self.max_jobs:
+            return True
+        if Config.WORKER_MAX_RSS_MB and worker.rss_mb() > Config.WORKER_MAX_RSS_MB:
+            logger.info(f"Recycling worker {worker.process.pid}: RSS {worker.rss_mb():.0f} MB")
+            return True
+        return False
+
+    def _retire(self, worker: WorkerProcess):
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        # Stopping waits for the child's file moves; don't hold up the next job
+        threading.Thread(target=worker.stop, daemon=True).start()
+
+    def shutdown(self, timeout: float = 60.0):
+        """Stop all worker processes."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop(timeout)